@@ -0,0 +1,52 @@
+"""create ensemble signals table
+
+Revision ID: 0b6e4d2c8a17
+Revises: f1c9a3e57b04
+Create Date: 2026-10-18 19:41:08.230954
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0b6e4d2c8a17'
+down_revision: Union[str, Sequence[str], None] = 'f1c9a3e57b04'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "ensemble_signals",
+        sa.Column("id", sa.Integer, primary_key=True),
+        sa.Column("date", sa.Date, nullable=False),
+        sa.Column("ts", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("symbol_id", sa.Integer, sa.ForeignKey("symbols.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("instrument_token", sa.BigInteger, nullable=False),
+        sa.Column("side", sa.String(length=10), nullable=False),
+        sa.Column("score", sa.Numeric(8, 4), nullable=False),
+        sa.Column("adjusted_score", sa.Numeric(8, 4), nullable=False),
+        sa.Column("agree", sa.Integer, nullable=False),
+        sa.Column("n_strategies", sa.Integer, nullable=False),
+        sa.Column("qualified", sa.Boolean, nullable=False, server_default=sa.text("false")),
+        sa.Column("entry_price", sa.Numeric(14, 4)),
+        sa.Column("sl_price", sa.Numeric(14, 4)),
+        sa.Column("tp_price", sa.Numeric(14, 4)),
+        sa.Column("constituents", postgresql.JSONB, nullable=False, server_default=sa.text("'[]'::jsonb")),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("NOW()")),
+        sa.CheckConstraint("side IN ('long','short','flat')", name="ck_ensemble_signals_side"),
+        sa.UniqueConstraint("symbol_id", "ts", name="uq_ensemble_signals_symbol_ts"),
+    )
+    # alerts and dashboards read today's qualified rows, newest first
+    op.create_index("ix_ensemble_date_qualified_ts", "ensemble_signals", ["date", "qualified", "ts"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_ensemble_date_qualified_ts", table_name="ensemble_signals")
+    op.drop_table("ensemble_signals")
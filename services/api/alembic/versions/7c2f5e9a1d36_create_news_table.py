@@ -0,0 +1,52 @@
+"""create news table
+
+Revision ID: 7c2f5e9a1d36
+Revises: 0b6e4d2c8a17
+Create Date: 2026-10-18 21:12:44.518302
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7c2f5e9a1d36'
+down_revision: Union[str, Sequence[str], None] = '0b6e4d2c8a17'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "news",
+        sa.Column("id", sa.BigInteger, primary_key=True),
+        sa.Column("ts", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("source", sa.String(length=64), nullable=False),
+        sa.Column("url", sa.Text, nullable=False),
+        sa.Column("title", sa.Text, nullable=False),
+        sa.Column("summary", sa.Text),
+        sa.Column("body_hash", sa.String(length=32), nullable=False),
+        sa.Column("tickers", postgresql.ARRAY(sa.String(length=32)), nullable=False,
+                  server_default=sa.text("'{}'")),
+        sa.Column("symbol_ids", postgresql.ARRAY(sa.Integer), nullable=False, server_default=sa.text("'{}'")),
+        sa.Column("sentiment", sa.Float),
+        sa.Column("sentiment_label", sa.String(length=16)),
+        sa.Column("novelty", sa.Float),
+        sa.Column("reliability", sa.Float),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.text("NOW()")),
+        sa.UniqueConstraint("body_hash", name="uq_news_body_hash"),
+    )
+    # per-ticker lookups: symbol_ids @> ARRAY[:sid], newest first from the ts index
+    op.create_index("ix_news_symbol_ids", "news", ["symbol_ids"], postgresql_using="gin")
+    op.create_index("ix_news_ts", "news", [sa.text("ts DESC")])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_news_ts", table_name="news")
+    op.drop_index("ix_news_symbol_ids", table_name="news")
+    op.drop_table("news")
@@ -0,0 +1,36 @@
+"""add candle coverage table
+
+Revision ID: b3c41e9d7a52
+Revises: fa7dd87c2bc3
+Create Date: 2026-10-18 11:02:17.540912
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b3c41e9d7a52'
+down_revision: Union[str, Sequence[str], None] = 'fa7dd87c2bc3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "candle_coverage",
+        sa.Column("symbol_id", sa.Integer, sa.ForeignKey("symbols.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("timeframe", sa.String(length=8), nullable=False),
+        sa.Column("start_ts", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("end_ts", sa.DateTime(timezone=True), nullable=False),
+        sa.PrimaryKeyConstraint("symbol_id", "timeframe", "start_ts", name="pk_candle_coverage"),
+        sa.CheckConstraint("start_ts < end_ts", name="ck_candle_coverage_range"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("candle_coverage")
@@ -0,0 +1,32 @@
+"""unique strategy signal key
+
+Revision ID: c7d2a4f19e60
+Revises: b3c41e9d7a52
+Create Date: 2026-10-18 12:40:05.118420
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d2a4f19e60'
+down_revision: Union[str, Sequence[str], None] = 'b3c41e9d7a52'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # previously created at runtime by vwap_bounce(); IF NOT EXISTS keeps existing databases happy
+    op.execute("""
+        CREATE UNIQUE INDEX IF NOT EXISTS ux_strategy_signals_symbol_ts_strategy
+        ON strategy_signals (symbol_id, ts, strategy_name);
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ux_strategy_signals_symbol_ts_strategy;")
@@ -0,0 +1,70 @@
+"""candle continuous aggregates
+
+Revision ID: d5b8e2f4a913
+Revises: c7d2a4f19e60
+Create Date: 2026-10-18 15:20:41.118204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5b8e2f4a913'
+down_revision: Union[str, Sequence[str], None] = 'c7d2a4f19e60'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# view -> (bucket expression over candles.ts, refresh start offset, end offset, schedule)
+# intraday buckets start at the 09:15 IST open, daily ones at IST midnight (Kite's daily ts)
+AGGREGATES = {
+    "candles_15m": ("time_bucket(INTERVAL '15 minutes', ts, TIMESTAMPTZ '2000-01-03 09:15:00+05:30')",
+                    "3 days", "15 minutes", "15 minutes"),
+    "candles_1h": ("time_bucket(INTERVAL '1 hour', ts, TIMESTAMPTZ '2000-01-03 09:15:00+05:30')",
+                   "7 days", "1 hour", "30 minutes"),
+    "candles_1d": ("time_bucket(INTERVAL '1 day', ts, 'Asia/Kolkata')",
+                   "35 days", "1 day", "1 hour"),
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # continuous aggregates need candles to be a hypertable
+    op.execute("SELECT create_hypertable('candles', 'ts', if_not_exists => TRUE, migrate_data => TRUE);")
+
+    for view, (bucket, start_offset, end_offset, schedule) in AGGREGATES.items():
+        # real-time: buckets past the last refresh are computed from the raw 5m rows on read
+        op.execute(f"""
+            CREATE MATERIALIZED VIEW {view}
+            WITH (timescaledb.continuous, timescaledb.materialized_only = false) AS
+            SELECT symbol_id,
+                   {bucket} AS ts,
+                   first(o, ts) AS o,
+                   max(h) AS h,
+                   min(l) AS l,
+                   last(c, ts) AS c,
+                   sum(v) AS v
+            FROM candles
+            WHERE timeframe = '5m'
+            GROUP BY symbol_id, {bucket}
+            WITH NO DATA;
+        """)
+        op.execute(f"""
+            SELECT add_continuous_aggregate_policy('{view}',
+                start_offset => INTERVAL '{start_offset}',
+                end_offset => INTERVAL '{end_offset}',
+                schedule_interval => INTERVAL '{schedule}');
+        """)
+
+    # materialise the existing history once (refreshes can't run inside a transaction)
+    with op.get_context().autocommit_block():
+        for view in AGGREGATES:
+            op.execute(f"CALL refresh_continuous_aggregate('{view}', NULL, NULL);")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    for view in reversed(list(AGGREGATES)):
+        op.execute(f"DROP MATERIALIZED VIEW IF EXISTS {view};")
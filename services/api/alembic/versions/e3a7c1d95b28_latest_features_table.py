@@ -0,0 +1,69 @@
+"""latest features table
+
+Revision ID: e3a7c1d95b28
+Revises: d5b8e2f4a913
+Create Date: 2026-10-18 16:05:12.402771
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e3a7c1d95b28'
+down_revision: Union[str, Sequence[str], None] = 'd5b8e2f4a913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+FEATURE_COLUMNS = "rsi14, macd, macd_sig, atr14, atr_pct, vwap, vwap_dev, vol_z, ma50, ma200, adtv"
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table(
+        "latest_features",
+        sa.Column("symbol_id", sa.Integer, sa.ForeignKey("symbols.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("ts", sa.TIMESTAMP(timezone=True), nullable=False),
+        sa.Column("rsi14", sa.Numeric(6, 3), nullable=True),
+        sa.Column("macd", sa.Numeric(10, 4), nullable=True),
+        sa.Column("macd_sig", sa.Numeric(10, 4), nullable=True),
+        sa.Column("atr14", sa.Numeric(10, 4), nullable=True),
+        sa.Column("atr_pct", sa.Numeric(10, 4), nullable=True),
+        sa.Column("vwap", sa.Numeric(10, 4), nullable=True),
+        sa.Column("vwap_dev", sa.Numeric(10, 4), nullable=True),
+        sa.Column("vol_z", sa.Numeric(10, 4), nullable=True),
+        sa.Column("ma50", sa.Numeric(14, 4), nullable=True),
+        sa.Column("ma200", sa.Numeric(14, 4), nullable=True),
+        sa.Column("adtv", sa.Numeric(10, 4), nullable=True),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.text("now()"), nullable=True),
+        sa.PrimaryKeyConstraint("symbol_id", name="pk_latest_features"),
+    )
+    op.execute(f"""
+        INSERT INTO latest_features (symbol_id, ts, {FEATURE_COLUMNS})
+        SELECT DISTINCT ON (symbol_id) symbol_id, ts, {FEATURE_COLUMNS}
+        FROM features
+        ORDER BY symbol_id, ts DESC;
+    """)
+    # the focus set is read from latest_features + trading_universe now
+    op.execute("DROP MATERIALIZED VIEW IF EXISTS mv_focus_base;")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("""
+        CREATE MATERIALIZED VIEW mv_focus_base AS
+        SELECT tu.symbol_id,
+               tu.rank AS universe_rank,
+               f.ts,
+               f.vwap_dev,
+               f.vol_z
+        FROM trading_universe tu
+        JOIN features f
+          ON tu.symbol_id = f.symbol_id
+         AND f.ts = (SELECT MAX(ts) FROM features f2 WHERE f2.symbol_id = f.symbol_id)
+        WHERE tu.date = CURRENT_DATE;
+    """)
+    op.execute("CREATE UNIQUE INDEX ON mv_focus_base (symbol_id);")
+    op.drop_table("latest_features")
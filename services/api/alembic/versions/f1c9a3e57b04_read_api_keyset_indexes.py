@@ -0,0 +1,32 @@
+"""read api keyset indexes
+
+Revision ID: f1c9a3e57b04
+Revises: e3a7c1d95b28
+Create Date: 2026-10-18 18:22:47.615309
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f1c9a3e57b04'
+down_revision: Union[str, Sequence[str], None] = 'e3a7c1d95b28'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GET /signals pages newest first on (ts, symbol_id, strategy_name): a backward scan of this
+    op.execute("""
+        CREATE INDEX IF NOT EXISTS ix_signals_ts_symbol_strategy
+        ON strategy_signals (ts, symbol_id, strategy_name);
+    """)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_signals_ts_symbol_strategy;")
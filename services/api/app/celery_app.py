@@ -1,6 +1,7 @@
+import os
 from celery import Celery
 from datetime import timedelta
-# from celery.schedules import crontab
+from celery.schedules import crontab
 
 celery_app = Celery(
     "pragyan",
@@ -11,11 +12,35 @@ celery_app = Celery(
 celery_app.conf.timezone = "Asia/Kolkata"
 
 celery_app.conf.beat_schedule = {
-        "trade_pipeline": {
-            "task" : "app.workers.tasks.run_trade_pipeline",
+        "research_export": {
+            "task" : "app.workers.tasks.export_research_store",
+            "schedule" : crontab(hour=16, minute=15, day_of_week="mon-fri"),
+            'args': ("5m",),
+        },
+}
+
+# PIPELINE_TRIGGER=events: bar-close events on the Redis stream drive features and
+# strategies (app.workers.bar_close_listener) instead of the 5 minute timer pipeline;
+# beat only polls Kite for the bars (skipped with PIPELINE_INGEST=ticks, when the tick
+# service writes them) and keeps the focus set fresh.
+if os.environ.get("PIPELINE_TRIGGER", "timer") == "timer":
+    celery_app.conf.beat_schedule["trade_pipeline"] = {
+        "task" : "app.workers.tasks.run_trade_pipeline",
+        "schedule" : timedelta(minutes=5),
+        'args': (),
+        'options': {'queue': 'intraday'},
+    }
+else:
+    if os.environ.get("PIPELINE_INGEST", "poll") == "poll":
+        celery_app.conf.beat_schedule["candle_poll"] = {
+            "task" : "app.workers.tasks.poll_candles",
             "schedule" : timedelta(minutes=5),
             'args': (),
-            'options': {'queue': 'intraday'}, 
+            'options': {'queue': 'intraday'},
         }
-}
-
+    celery_app.conf.beat_schedule["focus_refresh"] = {
+        "task" : "app.workers.tasks.refresh_focus",
+        "schedule" : timedelta(minutes=5),
+        'args': (),
+        'options': {'queue': 'intraday'},
+    }
@@ -1,6 +1,6 @@
 
 from sqlalchemy import text
-from ..db import engine, SessionLocal
+from ..db import engine, SessionLocal, async_engine, AsyncSessionLocal
 
 def get_session():
     db = SessionLocal()
@@ -9,6 +9,10 @@ def get_session():
     finally:
         db.close()
 
+async def get_async_session():
+    async with AsyncSessionLocal() as db:
+        yield db
+
 def ping_db():
     with engine.connect as conn:
         conn.execute(text("SELECT 1"))
@@ -2,8 +2,13 @@ from fastapi import FastAPI, Depends
 from fastapi.responses import HTMLResponse
 from sqlalchemy import text
 from sqlalchemy.orm import Session
-from .db import get_session
+from .db import async_engine, get_session
 from .routes.kite_callback import router as kite_callback_router
+from .routes.signals import router as signals_router
+from .routes.symbols import router as symbols_router
+from .routes.universe import router as universe_router
+from .routes.ws import hub as live_hub, router as ws_router
+from .services.redis_pool import close_async_redis, get_async_redis
 import os 
 from dotenv import load_dotenv
 from contextlib import asynccontextmanager
@@ -41,8 +46,13 @@ app.include_router(kite_callback_router)
 @asynccontextmanager
 async def lifespan(app:FastAPI):
     start_scheduler()
+    # one pub/sub subscription per process feeds every WebSocket client
+    live_hub.start(get_async_redis())
     yield
+    await live_hub.stop()
     shutdown_scheduler()
+    await close_async_redis()
+    await async_engine.dispose()
 
 app = FastAPI(lifespan=lifespan)
 
@@ -50,5 +60,13 @@ app.include_router(trade_pipeline)
 
 app.include_router(redis_zset)
 
+app.include_router(universe_router)
+
+app.include_router(signals_router)
+
+app.include_router(symbols_router)
+
+app.include_router(ws_router)
+
 
 
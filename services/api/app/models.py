@@ -130,4 +130,65 @@ class Trading_Universe(Base):
         # Fast lookups for intraday consumers
         Index("ix_universe_date_asof_rank", "date", "asof_time", "rank"),
         Index("ix_universe_date_asof_score", "date", "asof_time", "score"),
-    )
\ No newline at end of file
+    )
+
+# ---------------------------
+# Feature watermarks  (last finalized feature bar written per symbol/timeframe)
+# PK: (symbol_id, timeframe)
+# ---------------------------
+class FeatureWatermark(Base):
+    __tablename__ = "feature_watermarks"
+
+    symbol_id: Mapped[int] = mapped_column(
+        ForeignKey("symbols.id", ondelete="CASCADE"), nullable=False
+    )
+    timeframe: Mapped[str] = mapped_column(String(8), nullable=False)
+    last_final_ts: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False)
+    updated_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
+
+    __table_args__ = (
+        PrimaryKeyConstraint("symbol_id", "timeframe", name="pk_feature_watermarks"),
+    )
+
+# ---------------------------
+# Candle coverage  (merged ts ranges already fetched into candles)
+# PK: (symbol_id, timeframe, start_ts)
+# ---------------------------
+class CandleCoverage(Base):
+    __tablename__ = "candle_coverage"
+
+    symbol_id: Mapped[int] = mapped_column(
+        ForeignKey("symbols.id", ondelete="CASCADE"), nullable=False
+    )
+    timeframe: Mapped[str] = mapped_column(String(8), nullable=False)
+    start_ts: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False)
+    end_ts: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("symbol_id", "timeframe", "start_ts", name="pk_candle_coverage"),
+    )
+
+# ---------------------------
+# Latest features  (newest features row per symbol, upserted with features)
+# PK: symbol_id
+# ---------------------------
+class LatestFeature(Base):
+    __tablename__ = "latest_features"
+
+    symbol_id: Mapped[int] = mapped_column(
+        ForeignKey("symbols.id", ondelete="CASCADE"), primary_key=True
+    )
+    ts: Mapped[DateTime] = mapped_column(DateTime(timezone=True), nullable=False)
+
+    rsi14: Mapped[Optional[float]] = mapped_column(Numeric(6, 3))
+    macd: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))
+    macd_sig: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))
+    atr14: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))
+    atr_pct: Mapped[Optional[float]] = mapped_column(Numeric(10,4))
+    vwap: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))
+    vwap_dev: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))
+    vol_z: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))
+    adtv: Mapped[Optional[float]] = mapped_column(Numeric(10, 4))
+    ma50: Mapped[Optional[float]] = mapped_column(Numeric(14, 4))
+    ma200: Mapped[Optional[float]] = mapped_column(Numeric(14, 4))
+    updated_at: Mapped[Optional[DateTime]] = mapped_column(DateTime(timezone=True), server_default=func.now())
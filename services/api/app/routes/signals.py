@@ -0,0 +1,66 @@
+from datetime import date
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import get_async_session
+from ..schemas import Page, SignalOut
+from ..services.keyset import CursorError, Keyset
+from ..services.redis_pool import get_async_redis
+from ..services.response_cache import cached_body
+
+router = APIRouter()
+
+# newest first; strategy_name breaks ties between strategies firing on the same bar
+SIGNALS_KEYSET = Keyset((
+    ("ts", "ss.ts", "timestamptz"),
+    ("symbol_id", "ss.symbol_id", "integer"),
+    ("strategy_name", "ss.strategy_name", "varchar"),
+))
+
+SIGNAL_COLUMNS = """
+    ss.id, ss.date, ss.ts, ss.symbol_id, s.ticker, ss.instrument_token, ss.strategy_name, ss.side,
+    ss.signal_strength, ss.reason_codes, ss.entry_price, ss.sl_price, ss.tp_price, ss.ttl_bars, ss.created_at
+"""
+
+@router.get("/signals", response_model=Page[SignalOut])
+async def list_signals(
+    trade_date: Optional[date] = Query(None, alias="date"),
+    strategy: Optional[str] = None,
+    symbol_id: Optional[int] = None,
+    side: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """Strategy signals, newest first, keyset-paginated on (ts, symbol_id)."""
+    try:
+        after, params = SIGNALS_KEYSET.where(cursor)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filters = [after]
+    for column, name, value in (("ss.date", "d", trade_date), ("ss.strategy_name", "strategy", strategy),
+                                ("ss.symbol_id", "sid", symbol_id), ("ss.side", "side", side)):
+        if value is not None:
+            filters.append(f"{column} = :{name}")
+            params[name] = value
+    sql = text(f"""
+        SELECT {SIGNAL_COLUMNS}
+        FROM strategy_signals ss
+        JOIN symbols s ON s.id = ss.symbol_id
+        WHERE {" AND ".join(filters)}
+        ORDER BY {SIGNALS_KEYSET.order_by}
+        LIMIT :n
+    """)
+
+    async def load():
+        rows = [dict(r) for r in (await db.execute(sql, {**params, "n": limit + 1})).mappings().all()]
+        items, next_cursor = SIGNALS_KEYSET.page(rows, limit)
+        return {"items": items, "next_cursor": next_cursor}
+
+    query = {"date": trade_date, "strategy": strategy, "symbol_id": symbol_id, "side": side,
+             "limit": limit, "cursor": cursor}
+    body = await cached_body(get_async_redis(), "signals", query, ["signals"], load)
+    return Response(content=body, media_type="application/json")
@@ -0,0 +1,52 @@
+from typing import Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import get_async_session
+from ..schemas import Page, SymbolOut
+from ..services.keyset import CursorError, Keyset
+from ..services.redis_pool import get_async_redis
+from ..services.response_cache import cached_body
+
+router = APIRouter()
+
+SYMBOLS_KEYSET = Keyset((("id", "id", "integer"),), descending=False)
+SYMBOLS_TTL = 60.0   # the instrument list only changes with the daily instruments load
+
+@router.get("/symbols", response_model=Page[SymbolOut])
+async def list_symbols(
+    exchange: Optional[str] = None,
+    sector: Optional[str] = None,
+    active: Optional[bool] = True,
+    limit: int = Query(500, ge=1, le=5000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """Instruments by id, keyset-paginated."""
+    try:
+        after, params = SYMBOLS_KEYSET.where(cursor)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    filters = [after]
+    for column, value in (("exchange", exchange), ("sector", sector), ("is_active", active)):
+        if value is not None:
+            filters.append(f"{column} = :{column}")
+            params[column] = value
+    sql = text(f"""
+        SELECT id, exchange, ticker, name, sector, tick_size, instrument_token, last_price, is_active
+        FROM symbols
+        WHERE {" AND ".join(filters)}
+        ORDER BY {SYMBOLS_KEYSET.order_by}
+        LIMIT :n
+    """)
+
+    async def load():
+        rows = [dict(r) for r in (await db.execute(sql, {**params, "n": limit + 1})).mappings().all()]
+        items, next_cursor = SYMBOLS_KEYSET.page(rows, limit)
+        return {"items": items, "next_cursor": next_cursor}
+
+    query = {"exchange": exchange, "sector": sector, "active": active, "limit": limit, "cursor": cursor}
+    body = await cached_body(get_async_redis(), "symbols", query, [], load, ttl=SYMBOLS_TTL)
+    return Response(content=body, media_type="application/json")
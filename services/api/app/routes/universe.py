@@ -0,0 +1,71 @@
+from datetime import date, datetime
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ..db import get_async_session
+from ..schemas import FocusRowOut, Page, UniverseRowOut
+from ..services.coverage import IST
+from ..services.focus import focus_set, snapshot_sql
+from ..services.keyset import CursorError, Keyset
+from ..services.redis_pool import get_async_redis
+from ..services.response_cache import cached_body
+
+router = APIRouter()
+
+# best first; a missing score sorts as 0, like in the Redis universe zset
+UNIVERSE_KEYSET = Keyset((
+    ("score", "COALESCE(tu.score, 0)", "numeric"),
+    ("symbol_id", "tu.symbol_id", "integer"),
+))
+
+@router.get("/universe", response_model=Page[UniverseRowOut])
+async def list_universe(
+    trade_date: Optional[date] = Query(None, alias="date"),
+    asof: Optional[str] = None,
+    limit: int = Query(200, ge=1, le=2000),
+    cursor: Optional[str] = None,
+    db: AsyncSession = Depends(get_async_session),
+):
+    """The day's latest trading-universe snapshot (or the given asof), keyset-paginated by score."""
+    trade_date = trade_date or datetime.now(IST).date()
+    try:
+        after, params = UNIVERSE_KEYSET.where(cursor)
+    except CursorError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    params["d"] = trade_date
+    if asof is not None:
+        params["asof"] = asof
+    sql = text(f"""
+        WITH snap AS ({snapshot_sql("asof_time = :asof" if asof is not None else "TRUE")})
+        SELECT tu.date, tu.asof_time, tu.symbol_id, s.ticker, tu.instrument_token,
+               tu.atr_pct, tu.adv20, COALESCE(tu.score, 0) AS score, tu.rank
+        FROM snap
+        JOIN trading_universe tu ON tu.date = snap.date AND tu.asof_time = snap.asof_time
+        JOIN symbols s ON s.id = tu.symbol_id
+        WHERE {after}
+        ORDER BY {UNIVERSE_KEYSET.order_by}
+        LIMIT :n
+    """)
+
+    async def load():
+        rows = [dict(r) for r in (await db.execute(sql, {**params, "n": limit + 1})).mappings().all()]
+        items, next_cursor = UNIVERSE_KEYSET.page(rows, limit)
+        return {"items": items, "next_cursor": next_cursor}
+
+    query = {"date": trade_date, "asof": asof, "limit": limit, "cursor": cursor}
+    body = await cached_body(get_async_redis(), "universe", query, ["universe"], load)
+    return Response(content=body, media_type="application/json")
+
+@router.get("/focus", response_model=List[FocusRowOut])
+async def focus(k: int = 30, today_only: bool = True, db: AsyncSession = Depends(get_async_session)):
+    """Today's top-k universe symbols with their latest features (one indexed query)."""
+    async def load():
+        df = await db.run_sync(lambda s: focus_set(s, k, today_only=today_only))
+        return df.to_dict("records")
+
+    query = {"k": k, "today_only": today_only, "day": datetime.now(IST).date()}
+    body = await cached_body(get_async_redis(), "focus", query, ["universe", "features"], load)
+    return Response(content=body, media_type="application/json")
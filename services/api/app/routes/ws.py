@@ -0,0 +1,44 @@
+'''
+WS /ws?topics=signals,focus,bars,alerts&symbols=12,57
+
+Live signals, focus-set changes, bar closes and price alerts (app.services.live_feed). Without
+`symbols` every symbol is sent. The filter can be changed on an open socket by sending
+{"topics": [...], "symbols": [...]} or {"symbols": null} for all symbols.
+'''
+
+from typing import List, Optional
+
+from fastapi import APIRouter, WebSocket, WebSocketDisconnect
+
+from ..services.live_feed import TOPICS, Hub
+
+router = APIRouter()
+hub = Hub()
+
+def _topics(raw: Optional[str]) -> List[str]:
+    if not raw:
+        return list(TOPICS.values())
+    return [t for t in raw.split(",") if t in TOPICS.values()]
+
+def _symbols(raw: Optional[str]) -> Optional[List[int]]:
+    return [int(s) for s in raw.split(",") if s.strip()] if raw else None
+
+@router.websocket("/ws")
+async def live(websocket: WebSocket, topics: Optional[str] = None, symbols: Optional[str] = None):
+    await websocket.accept()
+    client = hub.connect(websocket.send_text, _topics(topics), _symbols(symbols))
+    try:
+        while not client.closed:
+            msg = await websocket.receive_json()
+            hub.update(client,
+                       topics=[t for t in msg["topics"] if t in TOPICS.values()] if "topics" in msg else None,
+                       symbol_ids=msg.get("symbols"),
+                       all_symbols="symbols" in msg and msg["symbols"] is None)
+    except (WebSocketDisconnect, ValueError, TypeError):
+        pass
+    finally:
+        await hub.disconnect(client)
+
+@router.get("/ws/stats")
+def ws_stats():
+    return hub.stats()
@@ -0,0 +1,74 @@
+'''
+Response shapes of the read API (OpenAPI docs). The routes serialize rows straight to
+orjson bytes, so these describe the payload and are not used to validate it per request.
+'''
+
+from datetime import date, datetime
+from typing import Generic, List, Optional, TypeVar
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+class Page(BaseModel, Generic[T]):
+    items: List[T]
+    next_cursor: Optional[str] = None   # pass as ?cursor= for the next page; None on the last
+
+class SignalOut(BaseModel):
+    id: int
+    date: date
+    ts: datetime
+    symbol_id: int
+    ticker: Optional[str] = None
+    instrument_token: int
+    strategy_name: str
+    side: str
+    signal_strength: Optional[float] = None
+    reason_codes: Optional[List[str]] = None
+    entry_price: Optional[float] = None
+    sl_price: Optional[float] = None
+    tp_price: Optional[float] = None
+    ttl_bars: Optional[int] = None
+    created_at: Optional[datetime] = None
+
+class SymbolOut(BaseModel):
+    id: int
+    exchange: str
+    ticker: str
+    name: Optional[str] = None
+    sector: Optional[str] = None
+    tick_size: Optional[float] = None
+    instrument_token: str
+    last_price: Optional[float] = None
+    is_active: bool
+
+class UniverseRowOut(BaseModel):
+    date: date
+    asof_time: str
+    symbol_id: int
+    ticker: Optional[str] = None
+    instrument_token: Optional[str] = None
+    atr_pct: Optional[float] = None
+    adv20: Optional[float] = None
+    score: Optional[float] = None
+    rank: Optional[int] = None
+
+class FocusRowOut(BaseModel):
+    date: date
+    asof_time: str
+    symbol_id: int
+    instrument_token: Optional[str] = None
+    universe_score: Optional[float] = None
+    universe_rank: Optional[int] = None
+    ts: Optional[datetime] = None
+    rsi14: Optional[float] = None
+    macd: Optional[float] = None
+    macd_sig: Optional[float] = None
+    atr14: Optional[float] = None
+    atr_pct: Optional[float] = None
+    vwap: Optional[float] = None
+    vwap_dev: Optional[float] = None
+    vol_z: Optional[float] = None
+    adtv: Optional[float] = None
+    ma50: Optional[float] = None
+    ma200: Optional[float] = None
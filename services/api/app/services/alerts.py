@@ -0,0 +1,341 @@
+'''
+Price alerts on the active signals' levels, evaluated per tick.
+
+The active signals (today's qualified ensemble rows and the latest signal per strategy,
+not older than max_age_minutes) are loaded into a LevelIndex: per instrument token, the
+entry/SL/TP prices sorted in plain lists. A price update is two bisections:
+
+    crossed       levels between the previous and the current price -> entry / sl / tp
+    approaching   entries within approaching_pct % of the price: entry in
+                  [price / (1 + p), price / (1 - p)]
+
+so the cost per tick is O(log n + hits) whatever the number of signals. A signal stops
+alerting once its SL or TP is crossed, and stops "approaching" once entered.
+
+Alerts are queued per tick, at most once per (signal, event) until dispatched, and flushed
+in batches (every dispatch_interval or batch_size alerts) by a dispatcher thread, never on
+the thread reading ticks: one Redis pipeline does the cooldown check (SET alert:cd:<signal>:<event> NX EX)
+and records entered/closed signals in alerts:state:<date>, so restarts and several
+processes do not repeat alerts; the survivors go to the notifiers as one list. Keys
+known to be cooling down are also remembered in-process, so a price hovering at a level
+does not cost a Redis round trip per tick.
+'''
+
+import json
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+
+from .coverage import IST
+from .live_feed import ALERTS_CHANNEL
+from .ticks import tick_time
+
+ACTIVE_LEVELS_SQL = text("""
+    SELECT * FROM (
+        SELECT DISTINCT ON (e.symbol_id)
+               'ensemble' AS source, e.id, e.symbol_id, e.instrument_token, 'ensemble' AS strategy_name,
+               e.ts, e.side, e.entry_price, e.sl_price, e.tp_price
+        FROM ensemble_signals e
+        WHERE e.date = :d AND e.qualified AND e.ts >= :since
+        ORDER BY e.symbol_id, e.ts DESC
+    ) ens
+    UNION ALL
+    SELECT * FROM (
+        SELECT DISTINCT ON (ss.symbol_id, ss.strategy_name)
+               'strategy' AS source, ss.id, ss.symbol_id, ss.instrument_token, ss.strategy_name,
+               ss.ts, ss.side, ss.entry_price, ss.sl_price, ss.tp_price
+        FROM strategy_signals ss
+        WHERE ss.date = :d AND ss.ts >= :since AND :with_strategies
+        ORDER BY ss.symbol_id, ss.strategy_name, ss.ts DESC
+    ) strat
+""")
+
+LEVEL_COLUMNS = ["source", "id", "symbol_id", "instrument_token", "strategy_name", "ts", "side",
+                 "entry_price", "sl_price", "tp_price"]
+LEVELS = (("entry", "entry_price"), ("sl", "sl_price"), ("tp", "tp_price"))
+TERMINAL = {"sl", "tp"}
+
+OUTBOX_KEY = "alerts:outbox"    # downstream push/email workers pop from here
+OUTBOX_LEN = 10_000
+
+def state_key(trade_date) -> str:
+    return f"alerts:state:{trade_date}"
+
+def cooldown_key(signal_key: str, event: str) -> str:
+    return f"alert:cd:{signal_key}:{event}"
+
+@dataclass
+class AlertConfig:
+    approaching_pct: float = 0.3      # percent of the entry price
+    cooldown_seconds: int = 900
+    max_age_minutes: int = 60
+    strategy_signals: bool = True     # alert on single-strategy signals too, not only the ensemble
+    batch_size: int = 200
+    dispatch_interval: float = 0.25   # seconds
+    refresh_seconds: float = 15.0
+
+    @classmethod
+    def from_dict(cls, config: dict) -> "AlertConfig":
+        known = cls.__dataclass_fields__
+        return cls(**{k: v for k, v in (config or {}).items() if k in known})
+
+# -----------------------
+#     Level index
+# -----------------------
+
+class LevelIndex:
+    """Per token: all levels sorted (price, row, event) and the entries sorted on their own."""
+
+    def __init__(self, signals: List[dict]):
+        self.signals = signals
+        self.levels: Dict[int, Tuple[List[float], List[Tuple[int, str]]]] = {}
+        self.entries: Dict[int, Tuple[List[float], List[int]]] = {}
+        by_token: Dict[int, List[Tuple[float, int, str]]] = {}
+        for row, sig in enumerate(signals):
+            for event, col in LEVELS:
+                price = sig.get(col)
+                if price is not None and price == price:
+                    by_token.setdefault(sig["instrument_token"], []).append((float(price), row, event))
+        for token, items in by_token.items():
+            items.sort()
+            self.levels[token] = ([p for p, _, _ in items], [(r, e) for _, r, e in items])
+            entries = [(p, r) for p, r, e in items if e == "entry"]
+            self.entries[token] = ([p for p, _ in entries], [r for _, r in entries])
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "LevelIndex":
+        rows = df.astype(object).where(df.notna(), None).to_dict("records")
+        for r in rows:
+            r["instrument_token"] = int(r["instrument_token"])
+            r["key"] = f"{r['source']}:{r['id']}"
+            for _, col in LEVELS:
+                r[col] = float(r[col]) if r[col] is not None else None   # numeric -> JSON-able
+        return cls(rows)
+
+    def crossed(self, token: int, lo: float, hi: float) -> List[Tuple[int, str]]:
+        """(row, event) of every level in [lo, hi]."""
+        found = self.levels.get(token)
+        if found is None:
+            return []
+        prices, refs = found
+        return refs[bisect_left(prices, lo):bisect_right(prices, hi)]
+
+    def near_entry(self, token: int, price: float, pct: float) -> List[int]:
+        """Rows whose entry is within pct % of price."""
+        found = self.entries.get(token)
+        if found is None:
+            return []
+        prices, rows = found
+        p = pct / 100.0
+        return rows[bisect_left(prices, price / (1 + p)):bisect_right(prices, price / (1 - p))]
+
+    def __len__(self) -> int:
+        return len(self.signals)
+
+# -----------------------
+#     Notifiers
+# -----------------------
+
+class Notifier:
+    def send(self, alerts: List[dict]) -> None:
+        raise NotImplementedError
+
+class LogNotifier(Notifier):
+    def send(self, alerts: List[dict]) -> None:
+        for a in alerts:
+            print(f"ALERT {a['event']} {a['side']} {a['instrument_token']} ({a['strategy_name']}) "
+                  f"@ {a['price']} entry {a['entry_price']} sl {a['sl_price']} tp {a['tp_price']}")
+
+class MemoryNotifier(Notifier):
+    """Stub channel: keeps every batch (tests, dry runs)."""
+
+    def __init__(self):
+        self.batches: List[List[dict]] = []
+
+    def send(self, alerts: List[dict]) -> None:
+        self.batches.append(list(alerts))
+
+    @property
+    def alerts(self) -> List[dict]:
+        return [a for b in self.batches for a in b]
+
+class RedisNotifier(Notifier):
+    """One round trip per batch: onto the outbox list for push/email workers, and to the live feed."""
+
+    def __init__(self, r):
+        self.r = r
+
+    def send(self, alerts: List[dict]) -> None:
+        pipe = self.r.pipeline(transaction=False)
+        pipe.lpush(OUTBOX_KEY, *[json.dumps(a) for a in alerts])
+        pipe.ltrim(OUTBOX_KEY, 0, OUTBOX_LEN - 1)
+        pipe.publish(ALERTS_CHANNEL, json.dumps({"published_at": time.time(), "alerts": alerts}))
+        pipe.execute()
+
+# -----------------------
+#     Engine
+# -----------------------
+
+class AlertEngine:
+    def __init__(self, r, notifiers: Iterable[Notifier], config: Optional[AlertConfig] = None,
+                 clock=time.monotonic):
+        self.r = r
+        self.notifiers = list(notifiers)
+        self.config = config or AlertConfig()
+        self.clock = clock
+        self.index = LevelIndex([])
+        self.trade_date = None
+        self.last_price: Dict[int, float] = {}
+        self.entered: set = set()            # signal keys
+        self.closed: set = set()
+        self.queue: List[dict] = []
+        self.queued: set = set()             # (signal key, event) in the queue
+        self.cooling: Dict[str, float] = {}  # cooldown key -> local expiry
+        self.last_flush = clock()
+        self.loaded_at: Optional[float] = None
+        self.sent = self.suppressed = 0
+        self._lock = threading.Lock()
+        self._wake = threading.Event()     # set by on_price when a batch is full
+        self._stop = threading.Event()
+
+    # --- signals ---
+
+    def set_signals(self, signals: pd.DataFrame, trade_date=None) -> int:
+        """Swap in a new index; entered/closed state comes from Redis (shared across restarts)."""
+        index = LevelIndex.from_frame(signals.reindex(columns=LEVEL_COLUMNS))
+        state = self.r.hgetall(state_key(trade_date)) if trade_date is not None else {}
+        with self._lock:
+            self.index = index
+            self.trade_date = trade_date
+            self.entered = {k for k, v in state.items() if v == "entered"}
+            self.closed = {k for k, v in state.items() if v == "closed"}
+            self.loaded_at = self.clock()
+        return len(index)
+
+    def load(self, db, now: Optional[datetime] = None) -> int:
+        now = (now or datetime.now(IST)).astimezone(IST)
+        rows = db.execute(ACTIVE_LEVELS_SQL, {
+            "d": now.date(), "since": now - timedelta(minutes=self.config.max_age_minutes),
+            "with_strategies": self.config.strategy_signals,
+        }).fetchall()
+        return self.set_signals(pd.DataFrame(rows, columns=LEVEL_COLUMNS), now.date())
+
+    def refresh_due(self) -> bool:
+        return self.loaded_at is None or self.clock() - self.loaded_at >= self.config.refresh_seconds
+
+    # --- prices ---
+
+    def _alert(self, sig: dict, event: str, price: float, ts) -> dict:
+        return {
+            "event": event, "key": sig["key"], "source": sig["source"], "strategy_name": sig["strategy_name"],
+            "symbol_id": int(sig["symbol_id"]), "instrument_token": sig["instrument_token"], "side": sig["side"],
+            "entry_price": sig["entry_price"], "sl_price": sig["sl_price"], "tp_price": sig["tp_price"],
+            "signal_ts": pd.Timestamp(sig["ts"]).isoformat() if sig.get("ts") is not None else None,
+            "price": price, "ts": pd.Timestamp(ts).isoformat() if ts is not None else None,
+        }
+
+    def on_price(self, token: int, price: float, ts=None) -> int:
+        """Queue the alerts this price update triggers; returns how many."""
+        with self._lock:
+            index, queued = self.index, 0
+            prev = self.last_price.get(token)
+            self.last_price[token] = price
+            hits: List[Tuple[int, str]] = []
+            if prev is not None and prev != price:
+                hits += index.crossed(token, min(prev, price), max(prev, price))
+            hits += [(row, "approaching") for row in index.near_entry(token, price, self.config.approaching_pct)]
+            now = self.clock()
+            for row, event in hits:
+                sig = index.signals[row]
+                key = sig["key"]
+                if key in self.closed or (event == "approaching" and key in self.entered):
+                    continue
+                if event == "entry":
+                    self.entered.add(key)
+                elif event in TERMINAL:
+                    self.closed.add(key)
+                if self.cooling.get(cooldown_key(key, event), 0) > now or (key, event) in self.queued:
+                    continue
+                self.queued.add((key, event))
+                self.queue.append(self._alert(sig, event, price, ts))
+                queued += 1
+            if len(self.queue) >= self.config.batch_size:
+                self._wake.set()
+        return queued
+
+    def on_ticks(self, ticks: Iterable[dict]) -> int:
+        queued = 0
+        for tick in ticks:
+            price = tick.get("last_price")
+            if price is not None:
+                queued += self.on_price(int(tick["instrument_token"]), float(price), tick_time(tick))
+        return queued
+
+    # --- dispatch ---
+
+    def dispatch_due(self) -> bool:
+        return len(self.queue) >= self.config.batch_size or \
+            self.clock() - self.last_flush >= self.config.dispatch_interval
+
+    def run_dispatcher(self) -> None:
+        """Flush whenever due (a full batch wakes it early) until stop_dispatcher()."""
+        while not self._stop.is_set():
+            if self.dispatch_due():
+                try:
+                    self.flush()
+                except Exception as e:
+                    print(f"Alert dispatch failed: {e}")
+            self._wake.wait(self.config.dispatch_interval)
+            self._wake.clear()
+
+    def start_dispatcher(self) -> threading.Thread:
+        self._stop.clear()
+        thread = threading.Thread(target=self.run_dispatcher, name="alert-dispatch", daemon=True)
+        thread.start()
+        return thread
+
+    def stop_dispatcher(self) -> None:
+        self._stop.set()
+        self._wake.set()
+
+    def flush(self) -> List[dict]:
+        """Cooldown-check the queued alerts in one pipeline and hand the survivors to the notifiers."""
+        with self._lock:
+            batch, self.queue, self.queued = self.queue, [], set()
+            self.last_flush = now = self.clock()
+            self.cooling = {k: t for k, t in self.cooling.items() if t > now}
+        if not batch:
+            return []
+        ttl = self.config.cooldown_seconds
+        pipe = self.r.pipeline(transaction=False)
+        for a in batch:
+            pipe.set(cooldown_key(a["key"], a["event"]), 1, nx=True, ex=ttl)
+        if self.trade_date is not None:
+            for a in batch:
+                if a["event"] == "entry" or a["event"] in TERMINAL:
+                    pipe.hset(state_key(self.trade_date), a["key"], "closed" if a["event"] in TERMINAL else "entered")
+            pipe.expire(state_key(self.trade_date), 2 * 86_400)
+        acquired = pipe.execute()[:len(batch)]
+        out = [a for a, ok in zip(batch, acquired) if ok]
+        with self._lock:
+            for a in batch:
+                self.cooling[cooldown_key(a["key"], a["event"])] = now + ttl
+        self.suppressed += len(batch) - len(out)
+        if out:
+            for notifier in self.notifiers:
+                try:
+                    notifier.send(out)
+                except Exception as e:
+                    print(f"Alert notifier {type(notifier).__name__} failed: {e}")
+            self.sent += len(out)
+        return out
+
+    def stats(self) -> dict:
+        return {"signals": len(self.index), "tokens": len(self.index.levels), "queued": len(self.queue),
+                "sent": self.sent, "suppressed": self.suppressed}
@@ -0,0 +1,308 @@
+'''
+Backtester: replays historical candles through the production feature and strategy code.
+
+Bars of all symbols live in flat NumPy arrays (BarStore) sorted by (symbol_id, ts).
+Features come from compute_features_panel with point-in-time ADTV, i.e. exactly the
+rows IncrementalFeatureEngine emits bar by bar, computed in one vectorised pass.
+The registered strategies then run day by day in chronological order, each call seeing
+every (symbol, bar) row of that day plus the day's bars, so nothing beyond the row
+being evaluated leaks in. Fills are simulated on the arrays with slippage, fees and
+an entry delay; the result is a trade list and an equity curve.
+'''
+
+import math
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from .features import FeatureConfig
+from .incremental import FEATURE_COLUMNS
+from .panel import compute_features_panel
+
+BAR_COLUMNS = ["symbol_id", "ts", "o", "h", "l", "c", "v"]
+
+TRADE_COLUMNS = [
+    "strategy_name", "symbol_id", "side", "signal_ts", "entry_ts", "entry_price",
+    "exit_ts", "exit_price", "exit_reason", "qty", "gross_pnl", "fees", "net_pnl", "bars_held",
+]
+
+@dataclass
+class BacktestConfig:
+    timeframe: str = "5m"
+    slippage_bps: float = 5.0       # adverse, on every fill
+    fee_bps: float = 3.0            # per side, on traded notional
+    entry_delay_bars: int = 1       # 1 = open of the bar after the signal bar; more = human latency
+    capital_per_trade: float = 100000.0
+    initial_capital: float = 1000000.0
+    flatten_eod: bool = True        # intraday: exit at the session's last bar
+    features: FeatureConfig = field(default_factory=FeatureConfig)
+
+@dataclass
+class BacktestResult:
+    trades: pd.DataFrame
+    equity: pd.Series
+    stats: dict
+
+# -----------------------
+#     Bar storage
+# -----------------------
+
+class BarStore:
+    """Bars of many symbols as contiguous arrays sorted by (symbol_id, ts)."""
+
+    def __init__(self, symbol_id: np.ndarray, ts: np.ndarray, o: np.ndarray, h: np.ndarray,
+                 l: np.ndarray, c: np.ndarray, v: np.ndarray, presorted: bool = False):
+        # presorted arrays (e.g. attached from shared memory) are used as they are, without a copy
+        order = slice(None) if presorted else np.lexsort((ts, symbol_id))
+        self.symbol_id = np.ascontiguousarray(symbol_id[order], dtype=np.int64)
+        self.ts = np.ascontiguousarray(ts[order], dtype="datetime64[ns]")  # UTC
+        self.o, self.h, self.l, self.c, self.v = (
+            np.ascontiguousarray(x[order], dtype=np.float64) for x in (o, h, l, c, v)
+        )
+        n = len(self.ts)
+        # IST trading day of every bar (as days since epoch)
+        self.day = ((self.ts + np.timedelta64(330, "m")).astype("datetime64[D]")).astype(np.int64)
+
+        new_sym = np.ones(n, dtype=bool)
+        new_sym[1:] = self.symbol_id[1:] != self.symbol_id[:-1]
+        new_day = new_sym.copy()
+        new_day[1:] |= self.day[1:] != self.day[:-1]
+        # last row (inclusive) of each row's symbol segment and of its (symbol, day) block
+        self.symbol_end = self._block_end(new_sym)
+        self.day_end = self._block_end(new_day)
+
+    @staticmethod
+    def _block_end(starts: np.ndarray) -> np.ndarray:
+        idx = np.flatnonzero(starts)
+        ends = np.append(idx[1:], len(starts)) - 1
+        return ends[np.cumsum(starts) - 1]
+
+    def __len__(self) -> int:
+        return len(self.ts)
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "BarStore":
+        ts = pd.to_datetime(df["ts"], utc=True).dt.tz_localize(None).to_numpy()
+        return cls(df["symbol_id"].to_numpy(), ts, *(df[c].to_numpy(dtype=float) for c in "ohlcv"))
+
+    def frame(self, rows: Optional[np.ndarray] = None) -> pd.DataFrame:
+        rows = slice(None) if rows is None else rows
+        return pd.DataFrame({
+            "symbol_id": self.symbol_id[rows],
+            "ts": pd.DatetimeIndex(self.ts[rows]).tz_localize("UTC"),
+            "o": self.o[rows], "h": self.h[rows], "l": self.l[rows], "c": self.c[rows], "v": self.v[rows],
+        }, index=np.arange(len(self))[rows])
+
+    def days(self):
+        """(trade_date, row positions) for every trading day, in chronological order."""
+        order = np.argsort(self.day, kind="stable")
+        days, first = np.unique(self.day[order], return_index=True)
+        for d, rows in zip(days, np.split(order, first[1:])):
+            yield (np.datetime64(int(d), "D").astype(object), rows)
+
+def load_bars(db, symbol_ids: Iterable[int], timeframe: str, start: datetime, end: datetime,
+              chunk_days: int = 31) -> BarStore:
+    """
+    Stream candles from the DB in chronological chunks straight into arrays
+    (15m/1h/1d from their continuous aggregates).
+    """
+    from .resample import AGGREGATE_VIEWS
+
+    source = AGGREGATE_VIEWS.get(timeframe)
+    sql = text(f"""
+        SELECT symbol_id, ts, o, h, l, c, v
+        FROM {source or "candles"}
+        WHERE symbol_id = ANY(:sids) {"" if source else "AND timeframe = :tf"} AND ts >= :lo AND ts < :hi
+        ORDER BY ts, symbol_id
+    """)
+    parts = {k: [] for k in BAR_COLUMNS}
+    sids = [int(s) for s in symbol_ids]
+    lo = start
+    while lo < end:
+        hi = min(lo + timedelta(days=chunk_days), end)
+        rows = db.execute(sql, {"sids": sids, "tf": timeframe, "lo": lo, "hi": hi}).fetchall()
+        if rows:
+            cols = list(zip(*rows))
+            for k, col in zip(BAR_COLUMNS, cols):
+                parts[k].append(np.asarray(col, dtype=object if k == "ts" else float))
+        lo = hi
+    if not parts["ts"]:
+        empty = np.array([], dtype=float)
+        return BarStore(empty.astype(np.int64), empty.astype("datetime64[ns]"), empty, empty, empty, empty, empty)
+    arr = {k: np.concatenate(v) for k, v in parts.items()}
+    ts = pd.to_datetime(arr["ts"], utc=True).tz_localize(None).to_numpy()
+    return BarStore(arr["symbol_id"].astype(np.int64), ts, arr["o"], arr["h"], arr["l"], arr["c"], arr["v"])
+
+# -----------------------
+#     Engine
+# -----------------------
+
+class Backtester:
+    def __init__(self, strategies: List, cfg: BacktestConfig = None):
+        self.strategies = strategies
+        self.cfg = cfg or BacktestConfig()
+
+    def features(self, store: BarStore) -> pd.DataFrame:
+        bars = store.frame()
+        out = compute_features_panel(bars, self.cfg.features, point_in_time_adtv=True)
+        # panel sorts by (symbol_id, ts) like the store, so positions line up
+        out.index = bars.index
+        return out
+
+    def signals(self, store: BarStore, feats: pd.DataFrame) -> pd.DataFrame:
+        """All strategy signals, indexed by the store row they were raised on."""
+        from services.api.strategies.base import SIGNAL_COLUMNS, StrategyContext
+
+        matrix_cols = ["symbol_id", "ts", *FEATURE_COLUMNS, "o", "h", "l", "c", "v"]
+        frames = []
+        for trade_date, rows in store.days():
+            rows = np.sort(rows)
+            matrix = feats.iloc[rows][matrix_cols].assign(instrument_token=lambda m: m["symbol_id"],
+                                                          universe_score=np.nan)
+            ctx = StrategyContext(matrix, matrix[BAR_COLUMNS], trade_date, self.cfg.timeframe)
+            for strategy in self.strategies:
+                out = strategy.evaluate(ctx)
+                if out is not None and not out.empty:
+                    frames.append(out.reindex(columns=SIGNAL_COLUMNS).assign(strategy_name=strategy.name))
+        if not frames:
+            return pd.DataFrame(columns=[*SIGNAL_COLUMNS, "strategy_name"])
+        return pd.concat(frames)
+
+    def simulate(self, store: BarStore, signals: pd.DataFrame) -> pd.DataFrame:
+        """
+        One position per (strategy, symbol) at a time. Entry at the open entry_delay_bars
+        after the signal bar; exit at the stop or target (stop first when one bar touches
+        both; gaps fill at the open), else at the close of the ttl / last session bar.
+        """
+        cfg = self.cfg
+        slip = cfg.slippage_bps / 1e4
+        fee = cfg.fee_bps / 1e4
+        o, h, l, c, ts = store.o, store.h, store.l, store.c, store.ts
+
+        sig = signals.assign(bar=signals.index.to_numpy()).sort_values(["strategy_name", "symbol_id", "bar"])
+        bars = sig["bar"].to_numpy(dtype=np.int64)
+        sides = np.where(sig["side"].to_numpy() == "long", 1, -1)
+        sls = sig["sl_price"].to_numpy(dtype=float)
+        tps = sig["tp_price"].to_numpy(dtype=float)
+        ttls = sig["ttl_bars"].fillna(0).to_numpy(dtype=np.int64)
+        names = sig["strategy_name"].to_numpy()
+
+        trades = []
+        busy_until = {}
+        for k in range(len(bars)):
+            i = bars[k]
+            entry = i + cfg.entry_delay_bars
+            key = (names[k], store.symbol_id[i])
+            if entry > store.symbol_end[i] or entry <= busy_until.get(key, -1):
+                continue
+            if cfg.flatten_eod and store.day[entry] != store.day[i]:
+                continue
+
+            side = sides[k]
+            last = store.symbol_end[i]
+            if cfg.flatten_eod:
+                last = min(last, store.day_end[entry])
+            if ttls[k] > 0:
+                last = min(last, entry + ttls[k] - 1)
+
+            fill = o[entry] * (1 + side * slip)
+            hh, ll, oo = h[entry:last + 1], l[entry:last + 1], o[entry:last + 1]
+            sl, tp = sls[k], tps[k]
+            n = last - entry + 1
+            stop_hits = (ll <= sl) if side > 0 else (hh >= sl)
+            tp_hits = (hh >= tp) if side > 0 else (ll <= tp)
+            j_stop = int(np.argmax(stop_hits)) if not math.isnan(sl) and stop_hits.any() else n
+            j_tp = int(np.argmax(tp_hits)) if not math.isnan(tp) and tp_hits.any() else n
+
+            if j_stop < n and j_stop <= j_tp:
+                j = j_stop
+                # a gap through the stop fills at the open, on the entry bar too
+                px = min(oo[j], sl) if side > 0 else max(oo[j], sl)
+                reason = "stop"
+            elif j_tp < n:
+                j = j_tp
+                px = max(oo[j], tp) if side > 0 else min(oo[j], tp)
+                reason = "target"
+            else:
+                j = n - 1
+                px = c[last]
+                reason = "time"
+            exit_idx = entry + j
+            exit_px = px * (1 - side * slip)
+
+            qty = max(1, int(cfg.capital_per_trade // fill)) if fill > 0 else 0
+            gross = side * (exit_px - fill) * qty
+            fees = fee * (fill + exit_px) * qty
+            trades.append((names[k], int(store.symbol_id[i]), "long" if side > 0 else "short",
+                           ts[i], ts[entry], fill, ts[exit_idx], exit_px, reason, qty,
+                           gross, fees, gross - fees, j + 1))
+            busy_until[key] = exit_idx
+
+        df = pd.DataFrame(trades, columns=TRADE_COLUMNS)
+        for col in ["signal_ts", "entry_ts", "exit_ts"]:
+            df[col] = pd.to_datetime(df[col]).dt.tz_localize("UTC")
+        return df
+
+    def run(self, store: BarStore) -> BacktestResult:
+        timings = {}
+        started = time.perf_counter()
+        feats = self.features(store)
+        timings["features"] = time.perf_counter() - started
+        signals = self.signals(store, feats)
+        timings["signals"] = time.perf_counter() - started - timings["features"]
+        trades = self.simulate(store, signals)
+        timings["simulate"] = time.perf_counter() - started - timings["features"] - timings["signals"]
+        equity = equity_curve(trades, self.cfg.initial_capital)
+        stats = summarize(trades, equity, self.cfg.initial_capital)
+        stats.update(bars=len(store), signals=len(signals), seconds=time.perf_counter() - started, timings=timings)
+        return BacktestResult(trades, equity, stats)
+
+def run_backtest(db, strategies: List, symbol_ids: Iterable[int], start: datetime, end: datetime,
+                 cfg: BacktestConfig = None, batch_size: int = 100) -> BacktestResult:
+    """Symbols are independent, so they run in batches to bound memory; results are merged."""
+    cfg = cfg or BacktestConfig()
+    bt = Backtester(strategies, cfg)
+    sids = list(symbol_ids)
+    trades, stats = [], {"bars": 0, "signals": 0, "seconds": 0.0}
+    for i in range(0, len(sids), batch_size):
+        store = load_bars(db, sids[i : i + batch_size], cfg.timeframe, start, end)
+        if len(store) == 0:
+            continue
+        res = bt.run(store)
+        trades.append(res.trades)
+        for k in stats:
+            stats[k] += res.stats[k]
+    all_trades = pd.concat(trades, ignore_index=True) if trades else pd.DataFrame(columns=TRADE_COLUMNS)
+    equity = equity_curve(all_trades, cfg.initial_capital)
+    return BacktestResult(all_trades, equity, {**summarize(all_trades, equity, cfg.initial_capital), **stats})
+
+# -----------------------
+#     Reporting
+# -----------------------
+
+def equity_curve(trades: pd.DataFrame, initial_capital: float) -> pd.Series:
+    """Realised equity after every exit timestamp."""
+    if trades.empty:
+        return pd.Series([initial_capital], dtype=float)
+    pnl = trades.groupby("exit_ts")["net_pnl"].sum().sort_index()
+    return initial_capital + pnl.cumsum()
+
+def summarize(trades: pd.DataFrame, equity: pd.Series, initial_capital: float) -> dict:
+    if trades.empty:
+        return {"trades": 0, "win_rate": None, "net_pnl": 0.0, "return_pct": 0.0, "max_drawdown_pct": 0.0}
+    peak = np.maximum.accumulate(np.concatenate(([initial_capital], equity.to_numpy())))
+    dd = (peak[1:] - equity.to_numpy()) / peak[1:]
+    net = float(trades["net_pnl"].sum())
+    return {
+        "trades": len(trades),
+        "win_rate": float((trades["net_pnl"] > 0).mean()),
+        "net_pnl": net,
+        "return_pct": net / initial_capital * 100.0,
+        "max_drawdown_pct": float(dd.max() * 100.0),
+        "by_strategy": trades.groupby("strategy_name")["net_pnl"].agg(["count", "sum"]).to_dict("index"),
+    }
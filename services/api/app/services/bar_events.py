@@ -0,0 +1,278 @@
+'''
+Bar-close event bus on a Redis Stream.
+
+Whatever commits new closed bars (the tick service, the Kite polling ingest) adds one
+event per (timeframe, bar ts) listing the symbols that got that bar. Each timeframe's
+pipeline has its own consumer group (pipeline:<tf>), which reads them and computes
+features, then strategies, for those symbols only; the other timeframes' events are acked
+in that group only, their own groups still get them.
+
+- Idempotency: once a symbol's bar is processed it goes into the bar's "done" set
+  (bars:done:<tf>:<ts>), so the same bar arriving twice (ticker and Kite poll both
+  writing it, a redelivery after a crash) is dropped. Symbols are marked after success:
+  a crash means a redo, never a miss, and the work itself is upserts.
+- Backpressure: the consumer takes everything waiting in one read and coalesces it per
+  timeframe (union of the symbols, newest bar), so a burst or a slow cycle costs one
+  run instead of a queue of stale ones.
+- Latency: every batch records bar close (bar end) -> signals written, with the queue
+  wait and stage times, in a capped Redis list.
+'''
+
+import json
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .feature_store import timeframe_delta
+from .live_feed import BAR_CLOSE_CHANNEL, bar_close_message
+
+STREAM_KEY = "stream:bar_close"
+GROUP = "pipeline"
+STREAM_MAXLEN = 10_000   # approximate; about a week of 1m + 5m events
+DONE_TTL = 2 * 86_400
+LATENCY_KEY = "pipeline:latency"
+LATENCY_LEN = 2_000
+
+def done_key(timeframe: str, ts: pd.Timestamp) -> str:
+    return f"bars:done:{timeframe}:{pd.Timestamp(ts).value}"
+
+@dataclass
+class BarEvent:
+    timeframe: str
+    ts: pd.Timestamp                  # bar start, UTC
+    symbol_ids: List[int]
+    published_at: float = 0.0         # epoch seconds
+    id: Optional[str] = None          # stream entry id once read
+
+    @property
+    def closed_at(self) -> pd.Timestamp:
+        return self.ts + timeframe_delta(self.timeframe)
+
+    def fields(self) -> dict:
+        return {
+            "timeframe": self.timeframe,
+            "ts": self.ts.isoformat(),
+            "symbol_ids": ",".join(str(s) for s in sorted(self.symbol_ids)),
+            "published_at": repr(self.published_at),
+        }
+
+    @classmethod
+    def from_fields(cls, id: str, fields: dict) -> "BarEvent":
+        sids = fields.get("symbol_ids") or ""
+        return cls(
+            timeframe=fields["timeframe"],
+            ts=pd.Timestamp(fields["ts"]).tz_convert("UTC"),
+            symbol_ids=[int(s) for s in sids.split(",") if s],
+            published_at=float(fields.get("published_at") or 0.0),
+            id=id,
+        )
+
+def events_from_bars(last_bar: Dict[int, pd.Timestamp], timeframe: str) -> List[BarEvent]:
+    """{symbol_id: newest closed bar ts} -> one event per distinct ts."""
+    by_ts: Dict[pd.Timestamp, List[int]] = {}
+    for sid, ts in last_bar.items():
+        by_ts.setdefault(pd.Timestamp(ts).tz_convert("UTC"), []).append(int(sid))
+    return [BarEvent(timeframe, ts, sorted(sids)) for ts, sids in sorted(by_ts.items())]
+
+# -----------------------
+#     Publish
+# -----------------------
+
+def publish(r, events: Iterable[BarEvent], now: Optional[float] = None, maxlen: int = STREAM_MAXLEN) -> List[str]:
+    """XADD every event (and tell the live feed) in one round trip; returns the entry ids."""
+    events = [e for e in events if e.symbol_ids]
+    if not events:
+        return []
+    now = time.time() if now is None else now
+    pipe = r.pipeline(transaction=False)
+    for e in events:
+        e.published_at = now
+        pipe.xadd(STREAM_KEY, e.fields(), maxlen=maxlen, approximate=True)
+    for e in events:
+        pipe.publish(BAR_CLOSE_CHANNEL, bar_close_message(e.timeframe, e.ts, e.symbol_ids, now))
+    return pipe.execute()[:len(events)]
+
+def group_name(timeframes: Optional[Iterable[str]] = None) -> str:
+    """pipeline:<tf>[,<tf>...] for consumers of some timeframes, pipeline for all of them."""
+    return f"{GROUP}:{','.join(sorted(set(timeframes)))}" if timeframes else GROUP
+
+def ensure_group(r, stream: str = STREAM_KEY, group: str = GROUP) -> None:
+    try:
+        # "$": a new group starts with the bars closing from now on
+        r.xgroup_create(stream, group, id="$", mkstream=True)
+    except Exception as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+# -----------------------
+#     Idempotency / coalescing
+# -----------------------
+
+def unprocessed(r, events: List[BarEvent]) -> List[BarEvent]:
+    """The events narrowed to symbols whose bar is not done yet (empty ones dropped)."""
+    events = [e for e in events if e.symbol_ids]
+    if not events:
+        return []
+    pipe = r.pipeline(transaction=False)
+    for e in events:
+        pipe.smismember(done_key(e.timeframe, e.ts), e.symbol_ids)
+    out = []
+    for e, done in zip(events, pipe.execute()):
+        todo = [sid for sid, d in zip(e.symbol_ids, done) if not int(d)]
+        if todo:
+            out.append(BarEvent(e.timeframe, e.ts, todo, e.published_at, e.id))
+    return out
+
+def mark_done(r, events: List[BarEvent], ttl: int = DONE_TTL) -> None:
+    pipe = r.pipeline(transaction=False)
+    for e in events:
+        key = done_key(e.timeframe, e.ts)
+        pipe.sadd(key, *e.symbol_ids)
+        pipe.expire(key, ttl)
+    pipe.execute()
+
+@dataclass
+class Batch:
+    """Coalesced events of one timeframe: one features + strategies run."""
+    timeframe: str
+    ts: pd.Timestamp                  # newest bar in the batch
+    symbol_ids: List[int]
+    events: List[BarEvent] = field(default_factory=list)
+
+    @property
+    def first_close(self) -> pd.Timestamp:
+        """End of the oldest bar: the batch's latency is measured from here."""
+        return min(e.closed_at for e in self.events)
+
+    @property
+    def first_published(self) -> float:
+        return min(e.published_at for e in self.events)
+
+def coalesce(events: List[BarEvent]) -> List[Batch]:
+    batches: Dict[str, Batch] = {}
+    for e in events:
+        b = batches.get(e.timeframe)
+        if b is None:
+            b = batches[e.timeframe] = Batch(e.timeframe, e.ts, [])
+        b.ts = max(b.ts, e.ts)
+        b.events.append(e)
+    for b in batches.values():
+        b.symbol_ids = sorted({sid for e in b.events for sid in e.symbol_ids})
+    return [batches[tf] for tf in sorted(batches)]
+
+# -----------------------
+#     Latency
+# -----------------------
+
+def record_latency(r, batch: Batch, started: float, finished: float, stages: dict) -> dict:
+    """Log one batch: bar close -> signals, queue wait and the handler's stage times."""
+    summary = {
+        "timeframe": batch.timeframe,
+        "ts": batch.ts.isoformat(),
+        "events": len(batch.events),
+        "symbols": len(batch.symbol_ids),
+        "bar_to_signal": finished - batch.first_close.timestamp(),
+        "queued": started - batch.first_published,
+        "processing": finished - started,
+        **stages,
+    }
+    pipe = r.pipeline(transaction=False)
+    pipe.lpush(LATENCY_KEY, json.dumps(summary))
+    pipe.ltrim(LATENCY_KEY, 0, LATENCY_LEN - 1)
+    pipe.execute()
+    return summary
+
+def latency_stats(r, n: int = 300, timeframe: Optional[str] = None) -> dict:
+    """p50/p95/max of the last n batches' bar close -> signal seconds."""
+    rows = [json.loads(x) for x in r.lrange(LATENCY_KEY, 0, n - 1)]
+    values = np.array([x["bar_to_signal"] for x in rows if timeframe is None or x["timeframe"] == timeframe])
+    if not len(values):
+        return {"batches": 0}
+    return {
+        "batches": int(len(values)),
+        "p50": float(np.percentile(values, 50)),
+        "p95": float(np.percentile(values, 95)),
+        "max": float(values.max()),
+    }
+
+# -----------------------
+#     Consumer
+# -----------------------
+
+class BarEventConsumer:
+    """
+    One member of the consumer group of its timeframes (group_name). handler(batch) does
+    the work and returns its stage timings; events it raises on stay pending and are re-claimed after reclaim_idle_ms
+    (by this or any other member), like the ones of a consumer that died.
+    """
+
+    def __init__(self, r, handler: Callable[[Batch], dict], consumer: str, timeframes: Optional[Iterable[str]] = None,
+                 group: Optional[str] = None, stream: str = STREAM_KEY, count: int = 1000, block_ms: int = 1000,
+                 reclaim_idle_ms: int = 60_000):
+        self.r = r
+        self.handler = handler
+        self.consumer = consumer
+        self.timeframes = set(timeframes) if timeframes else None
+        self.group = group or group_name(timeframes)
+        self.stream = stream
+        self.count = count
+        self.block_ms = block_ms
+        self.reclaim_idle_ms = reclaim_idle_ms
+
+    def _parse(self, messages) -> List[BarEvent]:
+        return [BarEvent.from_fields(mid, fields) for mid, fields in messages or [] if fields]
+
+    def read(self) -> List[BarEvent]:
+        """Stale pending entries plus everything new, blocking only while there is nothing."""
+        claimed = self.r.xautoclaim(self.stream, self.group, self.consumer, self.reclaim_idle_ms,
+                                    start_id="0-0", count=self.count)
+        events = self._parse(claimed[1])
+        block = None if events else self.block_ms
+        while True:
+            reply = self.r.xreadgroup(self.group, self.consumer, {self.stream: ">"}, count=self.count, block=block)
+            got = self._parse(reply[0][1]) if reply else []
+            events += got
+            # drain the backlog without waiting: it is coalesced into one run
+            if len(got) < self.count:
+                return events
+            block = None
+
+    def process(self, events: List[BarEvent]) -> List[dict]:
+        """Run the handler once per timeframe; ack what is done or not ours (the group is ours alone)."""
+        ack = [e.id for e in events if self.timeframes is not None and e.timeframe not in self.timeframes]
+        events = [e for e in events if self.timeframes is None or e.timeframe in self.timeframes]
+        todo = unprocessed(self.r, events)
+        pending = {e.id for e in todo}
+        ack += [e.id for e in events if e.id not in pending]  # duplicates
+        summaries = []
+        for batch in coalesce(todo):
+            started = time.time()
+            try:
+                stages = self.handler(batch) or {}
+            except Exception as e:
+                print(f"Bar events {batch.timeframe} {batch.ts} failed, left pending: {e}")
+                continue
+            finished = time.time()
+            mark_done(self.r, batch.events)
+            ack += [e.id for e in batch.events]
+            summaries.append(record_latency(self.r, batch, started, finished, stages))
+        ack = sorted({a for a in ack if a is not None})
+        if ack:
+            self.r.xack(self.stream, self.group, *ack)
+        return summaries
+
+    def run(self) -> None:
+        ensure_group(self.r, self.stream, self.group)
+        print(f"Consumer {self.consumer} reading {self.stream} as {self.group}")
+        while True:
+            try:
+                events = self.read()
+                for s in self.process(events) if events else []:
+                    print(f"Bar close {s['timeframe']} {s['ts']}: {s['symbols']} symbols from {s['events']} events, "
+                          f"{s['bar_to_signal']:.2f}s bar->signal ({s['queued']:.2f}s queued)")
+            except Exception as e:
+                print(f"Bar event consumer error: {e}")
+                time.sleep(1)
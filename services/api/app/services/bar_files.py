@@ -0,0 +1,311 @@
+'''
+Local append-only bar files: one memory-mapped file per (symbol_id, timeframe).
+
+A file is a 64-byte header followed by fixed-width BAR_DTYPE records in ts order:
+
+    magic (8s) | version (i4) | record size (i4) | committed records (i8) | padding
+
+Only closed bars are stored and a record never changes once written. Writers serialise on
+flock, write the records past the committed count and then bump the count in the header;
+readers take no lock, read the count and map exactly that many records. Any number of
+worker processes can read while one appends. Bars older than the last record (a backfill)
+can't be appended in place: the file is rebuilt with them merged in and renamed over the
+old one, and open handles notice the new inode and reopen. Reads are read-only NumPy views
+of the page cache (no copy, no SQL), with an in-memory index from IST trading day to
+record range.
+'''
+
+import fcntl
+import os
+import struct
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+BAR_DTYPE = np.dtype([("ts", "<i8"), ("o", "<f8"), ("h", "<f8"), ("l", "<f8"), ("c", "<f8"), ("v", "<i8")])
+
+MAGIC = b"PRGNBARS"
+VERSION = 1
+HEADER_SIZE = 64
+_HEADER = struct.Struct("<8siiq")
+_COUNT_OFFSET = 16
+
+_NS_PER_DAY = 86_400 * 10**9
+_IST_OFFSET_NS = (5 * 60 + 30) * 60 * 10**9
+
+def ist_day(ts_ns: np.ndarray) -> np.ndarray:
+    """IST calendar day (days since epoch) of UTC epoch-ns timestamps."""
+    return (ts_ns + _IST_OFFSET_NS) // _NS_PER_DAY
+
+def _day_number(day: date) -> int:
+    return (day - date(1970, 1, 1)).days
+
+# -----------------------
+#     One file
+# -----------------------
+
+class BarFile:
+    def __init__(self, path, create: bool = False):
+        self.path = Path(path)
+        if create and not self.path.exists():
+            self._create()
+        self._open()
+
+    def _open(self) -> None:
+        self._fd = os.open(self.path, os.O_RDWR)
+        magic, version, size, _ = _HEADER.unpack(os.pread(self._fd, _HEADER.size, 0))
+        if magic != MAGIC or version != VERSION or size != BAR_DTYPE.itemsize:
+            os.close(self._fd)
+            raise ValueError(f"{self.path} is not a v{VERSION} bar file")
+        self._map: Optional[np.memmap] = None
+        self._days = np.empty(0, dtype=np.int64)     # day numbers in the index
+        self._starts = np.empty(0, dtype=np.int64)   # first record of each day
+        self._indexed = 0
+
+    def _reopen_if_replaced(self) -> None:
+        """Follow a rebuild: the path now names a new inode, this fd still holds the old one."""
+        try:
+            replaced = os.stat(self.path).st_ino != os.fstat(self._fd).st_ino
+        except FileNotFoundError:
+            return
+        if replaced:
+            os.close(self._fd)
+            self._open()
+
+    def _create(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, BAR_DTYPE.itemsize, 0).ljust(HEADER_SIZE, b"\0"))
+        try:
+            # another process may have created it meanwhile; theirs wins
+            os.link(tmp, self.path)
+        except FileExistsError:
+            pass
+        finally:
+            os.unlink(tmp)
+
+    def close(self) -> None:
+        self._map = None
+        os.close(self._fd)
+
+    def count(self) -> int:
+        return struct.unpack("<q", os.pread(self._fd, 8, _COUNT_OFFSET))[0]
+
+    def __len__(self) -> int:
+        return self.count()
+
+    # --- read ---
+
+    def view(self) -> np.ndarray:
+        """All committed records as a read-only structured view."""
+        self._reopen_if_replaced()
+        n = self.count()
+        if self._map is None or len(self._map) != n:
+            self._map = np.memmap(self.path, dtype=BAR_DTYPE, mode="r", offset=HEADER_SIZE, shape=(n,)) if n else \
+                np.empty(0, dtype=BAR_DTYPE)
+        self._index(self._map)
+        return self._map
+
+    def _index(self, bars: np.ndarray) -> None:
+        """Extend the day index over records appended since the last call."""
+        n = len(bars)
+        if n == self._indexed:
+            return
+        # re-scan from the start of the last indexed day, it may have grown
+        lo = int(self._starts[-1]) if len(self._starts) else 0
+        days = ist_day(bars["ts"][lo:n])
+        new = np.ones(len(days), dtype=bool)
+        new[1:] = days[1:] != days[:-1]
+        keep = len(self._starts) - 1 if len(self._starts) else 0
+        self._days = np.concatenate([self._days[:keep], days[new]])
+        self._starts = np.concatenate([self._starts[:keep], np.flatnonzero(new) + lo])
+        self._indexed = n
+
+    def day_index(self) -> Dict[date, Tuple[int, int]]:
+        bars = self.view()
+        ends = np.append(self._starts[1:], len(bars))
+        epoch = date(1970, 1, 1).toordinal()
+        return {date.fromordinal(epoch + int(d)): (int(s), int(e)) for d, s, e in zip(self._days, self._starts, ends)}
+
+    def read(self, start: Optional[date] = None, end: Optional[date] = None) -> np.ndarray:
+        """Records of the IST days in [start, end] (inclusive), as a view."""
+        bars = self.view()
+        lo = 0 if start is None else int(np.searchsorted(self._days, _day_number(start), "left"))
+        hi = len(self._days) if end is None else int(np.searchsorted(self._days, _day_number(end), "right"))
+        first = int(self._starts[lo]) if lo < len(self._starts) else len(bars)
+        last = int(self._starts[hi]) if hi < len(self._starts) else len(bars)
+        return bars[first:last]
+
+    def since(self, ts) -> np.ndarray:
+        """Records with ts >= the given instant."""
+        bars = self.view()
+        return bars[int(np.searchsorted(bars["ts"], pd.Timestamp(ts).value, "left")):]
+
+    def first_ts(self) -> Optional[pd.Timestamp]:
+        bars = self.view()
+        return pd.Timestamp(int(bars["ts"][0]), tz="UTC") if len(bars) else None
+
+    def last_ts(self) -> Optional[pd.Timestamp]:
+        bars = self.view()
+        return pd.Timestamp(int(bars["ts"][-1]), tz="UTC") if len(bars) else None
+
+    # --- write ---
+
+    def _lock(self) -> None:
+        """flock the current file; a rebuild may have replaced it while we waited."""
+        while True:
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+            try:
+                if os.stat(self.path).st_ino == os.fstat(self._fd).st_ino:
+                    return
+            except FileNotFoundError:
+                return
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._open()
+
+    def append(self, bars: np.ndarray) -> int:
+        """
+        Add BAR_DTYPE records (sorted, one per ts) whose ts isn't stored yet; returns how many
+        were written. Records newer than the last one are appended in place; older ones
+        missing from the file rebuild it.
+        """
+        self._lock()
+        try:
+            n = self.count()
+            if n and len(bars) and bars["ts"][0] <= self._last_stored(n):
+                stored = self._stored(n)
+                bars = bars[~np.isin(bars["ts"], stored["ts"])]
+                if len(bars) and bars["ts"][0] <= stored["ts"][-1]:
+                    return self._rebuild(stored, bars)
+            if not len(bars):
+                return 0
+            os.pwrite(self._fd, np.ascontiguousarray(bars, dtype=BAR_DTYPE).tobytes(),
+                      HEADER_SIZE + n * BAR_DTYPE.itemsize)
+            os.fdatasync(self._fd)
+            # readers only ever see records covered by the committed count
+            os.pwrite(self._fd, struct.pack("<q", n + len(bars)), _COUNT_OFFSET)
+            return len(bars)
+        finally:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+
+    def _last_stored(self, n: int) -> int:
+        return struct.unpack("<q", os.pread(self._fd, 8, HEADER_SIZE + (n - 1) * BAR_DTYPE.itemsize))[0]
+
+    def _stored(self, n: int) -> np.ndarray:
+        return np.fromfile(self.path, dtype=BAR_DTYPE, count=n, offset=HEADER_SIZE)
+
+    def _rebuild(self, stored: np.ndarray, bars: np.ndarray) -> int:
+        """Write the stored records merged with bars to a new file and rename it over this one."""
+        merged = np.concatenate([stored, np.ascontiguousarray(bars, dtype=BAR_DTYPE)])
+        merged = merged[np.argsort(merged["ts"], kind="stable")]
+        tmp = self.path.with_suffix(f".tmp{os.getpid()}")
+        with open(tmp, "wb") as f:
+            f.write(_HEADER.pack(MAGIC, VERSION, BAR_DTYPE.itemsize, len(merged)).ljust(HEADER_SIZE, b"\0"))
+            f.write(merged.tobytes())
+            f.flush()
+            os.fdatasync(f.fileno())
+        # readers holding the old inode keep their maps; the next view() reopens
+        os.replace(tmp, self.path)
+        return len(bars)
+
+def to_records(df: pd.DataFrame) -> np.ndarray:
+    """(ts, o, h, l, c, v) frame -> BAR_DTYPE records sorted by ts, one per ts."""
+    out = np.empty(len(df), dtype=BAR_DTYPE)
+    out["ts"] = pd.to_datetime(df["ts"], utc=True).dt.as_unit("ns").astype("int64").to_numpy()
+    for col in "ohlc":
+        out[col] = df[col].to_numpy(dtype=float)
+    out["v"] = df["v"].to_numpy(dtype=np.int64)
+    out = np.sort(out, order="ts", kind="stable")
+    keep = np.ones(len(out), dtype=bool)
+    keep[:-1] = out["ts"][1:] != out["ts"][:-1]  # last version of a repeated ts wins
+    return out[keep]
+
+def records_frame(bars: np.ndarray) -> pd.DataFrame:
+    """Records -> (ts, o, h, l, c, v) frame like the candles queries return."""
+    return pd.DataFrame({
+        "ts": pd.to_datetime(bars["ts"], utc=True),
+        "o": bars["o"], "h": bars["h"], "l": bars["l"], "c": bars["c"], "v": bars["v"],
+    })
+
+# -----------------------
+#     Directory of files
+# -----------------------
+
+class BarFileStore:
+    """<root>/<timeframe>/<symbol_id>.bars, with open files cached per process."""
+
+    def __init__(self, root):
+        self.root = Path(root)
+        self._files: Dict[Tuple[int, str], BarFile] = {}
+
+    def path(self, symbol_id: int, timeframe: str) -> Path:
+        return self.root / timeframe / f"{int(symbol_id)}.bars"
+
+    def open(self, symbol_id: int, timeframe: str, create: bool = False) -> Optional[BarFile]:
+        key = (int(symbol_id), timeframe)
+        f = self._files.get(key)
+        if f is None:
+            if not create and not self.path(symbol_id, timeframe).exists():
+                return None
+            f = self._files[key] = BarFile(self.path(symbol_id, timeframe), create=create)
+        return f
+
+    def append(self, df: pd.DataFrame, timeframe: str, closed_before: Optional[datetime] = None) -> int:
+        """
+        Append a long (symbol_id, ts, o, h, l, c, v) frame. Bars starting at or after
+        closed_before are still open and are left out.
+        """
+        if df.empty:
+            return 0
+        if closed_before is not None:
+            df = df[pd.to_datetime(df["ts"], utc=True) < pd.Timestamp(closed_before)]
+        written = 0
+        for sid, grp in df.groupby("symbol_id"):
+            written += self.open(sid, timeframe, create=True).append(to_records(grp))
+        return written
+
+    def covers(self, symbol_id: int, timeframe: str, since) -> bool:
+        f = self.open(symbol_id, timeframe)
+        first = f.first_ts() if f is not None else None
+        return first is not None and first <= pd.Timestamp(since)
+
+    def read_since(self, symbol_id: int, timeframe: str, since) -> np.ndarray:
+        f = self.open(symbol_id, timeframe)
+        return f.since(since) if f is not None else np.empty(0, dtype=BAR_DTYPE)
+
+    def bar_store(self, symbol_ids: Iterable[int], timeframe: str, start: Optional[date] = None,
+                  end: Optional[date] = None):
+        """The backtester's BarStore for the given symbols and IST days (15m/1h/1d resampled from 5m)."""
+        from .backtest import BarStore
+        from .resample import AGGREGATE_VIEWS, BASE_TIMEFRAME, resample_store
+
+        if timeframe in AGGREGATE_VIEWS:
+            return resample_store(self.bar_store(symbol_ids, BASE_TIMEFRAME, start, end), timeframe)
+        sids, parts = [], []
+        for sid in sorted({int(s) for s in symbol_ids}):
+            f = self.open(sid, timeframe)
+            if f is not None:
+                bars = f.read(start, end)
+                sids.append(np.full(len(bars), int(sid), dtype=np.int64))
+                parts.append(bars)
+        bars = np.concatenate(parts) if parts else np.empty(0, dtype=BAR_DTYPE)
+        sid = np.concatenate(sids) if sids else np.empty(0, dtype=np.int64)
+        return BarStore(sid, bars["ts"].astype("datetime64[ns]"), bars["o"], bars["h"], bars["l"], bars["c"],
+                        bars["v"].astype(float), presorted=True)
+
+_store: Optional[BarFileStore] = None
+
+def get_bar_files() -> Optional[BarFileStore]:
+    """Process-wide store under PRAGYAN_BAR_DIR; None (disabled) when it isn't set."""
+    global _store
+    root = os.environ.get("PRAGYAN_BAR_DIR")
+    if not root:
+        return None
+    if _store is None or _store.root != Path(root):
+        _store = BarFileStore(root)
+    return _store
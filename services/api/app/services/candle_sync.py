@@ -0,0 +1,68 @@
+'''
+Keeps `candles` in sync with Kite by fetching only what candle_coverage says is missing.
+'''
+
+from datetime import datetime
+from typing import Iterable, Optional, Tuple
+
+import pandas as pd
+
+from app.services.bar_files import BarFileStore
+from app.services.candle_writer import CopyStats, write_candles
+from app.services.coverage import IST, closed_until, fetched_range, load_coverage, plan_fetches, save_coverage
+from app.services.kite_fetcher import HistoricalFetcher
+
+def candles_frame(candle_data: list) -> pd.DataFrame:
+    """Kite historical_data rows -> (ts, o, h, l, c, v) sorted by ts."""
+    candle_df = pd.DataFrame(candle_data)
+    if candle_df.empty:
+        return candle_df
+    df = candle_df.rename(columns={"date": "ts", "open": "o", "high": "h", "low": "l", "close": "c", "volume": "v"})
+    return df[["ts","o","h","l","c","v"]].sort_values("ts").reset_index(drop=True)
+
+def sync_candles(db, fetcher: HistoricalFetcher, symbols: Iterable[Tuple[int, str]], timeframe: str,
+                 start: datetime, end: datetime, now: Optional[datetime] = None,
+                 bar_files: Optional[BarFileStore] = None) -> CopyStats:
+    """
+    Fetch the uncovered parts of [start, end) for every (symbol_id, instrument_token),
+    write the candles and extend the coverage, all in the caller's transaction.
+    With bar_files the closed bars are appended to the local bar files as well.
+    stats.last_bar holds the newest closed bar written per symbol (for the bar-close events).
+    """
+    symbols = list(symbols)
+    now = now or datetime.now(IST)
+    coverage = load_coverage(db, [sid for sid, _ in symbols], timeframe)
+    requests = plan_fetches(symbols, coverage, timeframe, start, end)
+    if not requests:
+        return CopyStats()
+
+    frames = []
+    touched = {}
+    for result in fetcher.fetch_many(requests):
+        req = result.request
+        if not result.ok:
+            print(f"Error fetching {req.instrument_token} after {result.attempts} attempts: {result.error}")
+            continue
+        df = candles_frame(result.candles)
+        if not df.empty:
+            frames.append(df.assign(symbol_id=req.key))
+        covered = fetched_range(req, now)
+        if covered:
+            touched.setdefault(req.key, list(coverage.get(req.key, []))).append(covered)
+
+    candles = pd.concat(frames, ignore_index=True) if frames else None
+    stats = write_candles(db, candles, timeframe) if frames else CopyStats()
+    save_coverage(db, touched, timeframe)
+    if candles is not None:
+        closed = candles[pd.to_datetime(candles["ts"], utc=True) < pd.Timestamp(closed_until(now, timeframe))]
+        if not closed.empty:
+            last = pd.to_datetime(closed["ts"], utc=True).groupby(closed["symbol_id"]).max()
+            stats.last_bar = {int(sid): ts for sid, ts in last.items()}
+    if bar_files is not None and candles is not None:
+        try:
+            bar_files.append(candles, timeframe, closed_before=closed_until(now, timeframe))
+        except OSError as e:
+            # the files are a local mirror; Postgres stays the source of truth
+            print(f"Failed to append bar files: {e}")
+    print(f"{len(requests)} Kite requests for {len(symbols)} symbols: {stats}")
+    return stats
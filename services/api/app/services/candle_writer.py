@@ -0,0 +1,101 @@
+'''
+Bulk candle writer: streams rows into a session-private staging table with COPY
+and merges them into the `candles` hypertable with one set-based upsert.
+'''
+
+import io
+import time
+from dataclasses import dataclass, field
+from typing import Dict
+
+import pandas as pd
+from sqlalchemy import text
+
+CANDLE_COLUMNS = ["symbol_id", "ts", "o", "h", "l", "c", "v", "timeframe"]
+
+# Temp tables are never WAL-logged (like UNLOGGED) and are private to the session,
+# so concurrent workers can each COPY into their own staging table.
+CREATE_STAGING_SQL = text("""
+    CREATE TEMP TABLE IF NOT EXISTS candles_staging
+        (LIKE candles INCLUDING DEFAULTS)
+""")
+
+COPY_SQL = "COPY candles_staging (symbol_id, ts, o, h, l, c, v, timeframe) FROM STDIN WITH (FORMAT csv)"
+
+MERGE_SQL = text("""
+    INSERT INTO candles (symbol_id, ts, o, h, l, c, v, timeframe)
+    SELECT symbol_id, ts, o, h, l, c, v, timeframe
+    FROM candles_staging
+    ON CONFLICT (symbol_id, ts, timeframe) DO UPDATE SET
+      o = EXCLUDED.o, h = EXCLUDED.h, l = EXCLUDED.l,
+      c = EXCLUDED.c, v = EXCLUDED.v
+    WHERE (candles.o, candles.h, candles.l, candles.c, candles.v)
+          IS DISTINCT FROM (EXCLUDED.o, EXCLUDED.h, EXCLUDED.l, EXCLUDED.c, EXCLUDED.v)
+""")
+
+@dataclass
+class CopyStats:
+    rows: int = 0
+    merged: int = 0
+    symbols: int = 0
+    seconds: float = 0.0
+    last_bar: Dict[int, pd.Timestamp] = field(default_factory=dict)  # newest closed bar per symbol_id
+
+    @property
+    def rows_per_sec(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+    def __str__(self) -> str:
+        return (f"{self.rows} rows ({self.merged} changed) for {self.symbols} symbols "
+                f"in {self.seconds:.2f}s -> {self.rows_per_sec:,.0f} rows/sec")
+
+
+def _to_csv(df: pd.DataFrame) -> str:
+    buf = io.StringIO()
+    df[CANDLE_COLUMNS].to_csv(buf, index=False, header=False)
+    return buf.getvalue()
+
+def _copy(raw_conn, payload: str) -> None:
+    cur = raw_conn.cursor()
+    try:
+        if hasattr(cur, "copy"):  # psycopg 3
+            with cur.copy(COPY_SQL) as cp:
+                cp.write(payload)
+        else:  # psycopg2
+            cur.copy_expert(COPY_SQL, io.StringIO(payload))
+    finally:
+        cur.close()
+
+def write_candles(db, candles: pd.DataFrame, timeframe: str) -> CopyStats:
+    """
+    COPY a long frame (symbol_id, ts, o, h, l, c, v) of any number of symbols into
+    `candles` inside the caller's session; the caller commits.
+    """
+    stats = CopyStats()
+    if candles is None or candles.empty:
+        return stats
+    started = time.perf_counter()
+
+    # one row per key, otherwise ON CONFLICT would have to touch a row twice
+    df = candles.assign(timeframe=timeframe).drop_duplicates(["symbol_id", "ts"], keep="last")
+    # Kite leaves volume empty on some illiquid bars; the column is NOT NULL
+    df = df.assign(v=df["v"].fillna(0)).astype({"symbol_id": "int64", "v": "int64"})
+
+    db.execute(CREATE_STAGING_SQL)
+    _copy(db.connection().connection.driver_connection, _to_csv(df))
+    result = db.execute(MERGE_SQL)
+    db.execute(text("TRUNCATE candles_staging"))
+
+    stats.rows = len(df)
+    stats.merged = result.rowcount
+    stats.symbols = candles["symbol_id"].nunique()
+    stats.seconds = time.perf_counter() - started
+    return stats
+
+def copy_candles(candles: pd.DataFrame, timeframe: str) -> CopyStats:
+    """write_candles in its own session and transaction."""
+    from app.db import SessionLocal
+    with SessionLocal() as db:
+        stats = write_candles(db, candles, timeframe)
+        db.commit()
+    return stats
@@ -0,0 +1,223 @@
+'''
+Candle coverage index and gap detection.
+
+`candle_coverage` stores, per (symbol_id, timeframe), the merged time ranges whose
+candles are already in `candles`. A range is recorded once it has been fetched from
+Kite, even if Kite returned no bars (holidays, suspensions), so the same window is
+never asked for twice. Missing ranges are computed only over NSE trading sessions
+(whole IST days for 1d, whose bars Kite stamps 00:00) and a fetch is marked covered
+only up to SETTLE_BARS before the last closed bar, so the open bar and the last few
+closed intraday ones (which Kite may still revise or deliver late) are fetched again
+next time. A daily bar is final once its session has closed.
+'''
+
+from datetime import date, datetime, time, timedelta
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import pytz
+from sqlalchemy import text
+
+from .feature_store import timeframe_delta
+from .kite_fetcher import FetchRequest
+
+IST = pytz.timezone("Asia/Kolkata")
+
+SESSION_OPEN = time(9, 15)
+SESSION_CLOSE = time(15, 30)
+
+# NSE equity trading holidays (weekdays only). An outdated list only costs one extra
+# request per missed holiday: the empty fetch is recorded as covered.
+NSE_HOLIDAYS = frozenset([
+    # 2025
+    date(2025, 2, 26), date(2025, 3, 14), date(2025, 3, 31), date(2025, 4, 10),
+    date(2025, 4, 14), date(2025, 4, 18), date(2025, 5, 1), date(2025, 8, 15),
+    date(2025, 8, 27), date(2025, 10, 2), date(2025, 10, 21), date(2025, 10, 22),
+    date(2025, 11, 5), date(2025, 12, 25),
+    # 2026
+    date(2026, 1, 26), date(2026, 3, 3), date(2026, 3, 26), date(2026, 3, 31),
+    date(2026, 4, 3), date(2026, 4, 14), date(2026, 5, 1), date(2026, 5, 28),
+    date(2026, 6, 26), date(2026, 9, 14), date(2026, 10, 2), date(2026, 10, 20),
+    date(2026, 11, 10), date(2026, 11, 24), date(2026, 12, 25),
+])
+
+# closed bars left uncovered at the end of every fetch; timeframes not listed settle 3 bars
+SETTLE_BARS = {"1d": 0}
+
+# Kite's maximum span (days) per historical_data request
+MAX_SPAN_DAYS = {"1m": 60, "3m": 100, "5m": 100, "15m": 200, "1h": 400, "1d": 2000}
+
+Interval = Tuple[datetime, datetime]
+
+# -----------------------
+#     Interval algebra
+# -----------------------
+
+def merge_intervals(intervals: Iterable[Interval]) -> List[Interval]:
+    """Sort and merge overlapping or touching [start, end) intervals."""
+    merged: List[Interval] = []
+    for s, e in sorted(i for i in intervals if i[0] < i[1]):
+        if merged and s <= merged[-1][1]:
+            if e > merged[-1][1]:
+                merged[-1] = (merged[-1][0], e)
+        else:
+            merged.append((s, e))
+    return merged
+
+def subtract_intervals(base: Sequence[Interval], covered: Sequence[Interval]) -> List[Interval]:
+    """Parts of `base` not inside any `covered` interval (both lists sorted and merged)."""
+    out: List[Interval] = []
+    j = 0
+    for s, e in base:
+        while j < len(covered) and covered[j][1] <= s:
+            j += 1
+        k = j
+        cur = s
+        while k < len(covered) and covered[k][0] < e:
+            cs, ce = covered[k]
+            if cs > cur:
+                out.append((cur, cs))
+            cur = max(cur, ce)
+            k += 1
+        if cur < e:
+            out.append((cur, e))
+    return out
+
+# -----------------------
+#     NSE calendar
+# -----------------------
+
+def is_trading_day(d: date, holidays=NSE_HOLIDAYS) -> bool:
+    return d.weekday() < 5 and d not in holidays
+
+def session_bounds(d: date) -> Interval:
+    return (IST.localize(datetime.combine(d, SESSION_OPEN)),
+            IST.localize(datetime.combine(d, SESSION_CLOSE)))
+
+def day_bounds(d: date) -> Interval:
+    op = IST.localize(datetime.combine(d, time.min))
+    return op, IST.localize(datetime.combine(d + timedelta(days=1), time.min))
+
+def bar_bounds(d: date, timeframe: str = "5m") -> Interval:
+    """The span a day's bars of this timeframe start in: the session, or the whole day for 1d."""
+    return day_bounds(d) if timeframe == "1d" else session_bounds(d)
+
+def sessions(start: datetime, end: datetime, holidays=NSE_HOLIDAYS, timeframe: str = "5m") -> List[Interval]:
+    """Trading sessions (bar_bounds) between start and end (aware datetimes), clipped to [start, end)."""
+    start, end = start.astimezone(IST), end.astimezone(IST)
+    out: List[Interval] = []
+    d = start.date()
+    while d <= end.date():
+        if is_trading_day(d, holidays):
+            op, cl = bar_bounds(d, timeframe)
+            s, e = max(op, start), min(cl, end)
+            if s < e:
+                out.append((s, e))
+        d += timedelta(days=1)
+    return out
+
+def closed_until(now: datetime, timeframe: str, holidays=NSE_HOLIDAYS) -> datetime:
+    """Every bar that starts before this instant has closed (bars are aligned to the open)."""
+    now = now.astimezone(IST)
+    if is_trading_day(now.date(), holidays):
+        op, cl = session_bounds(now.date())
+        if timeframe == "1d":
+            # today's daily bar (stamped 00:00) closes with the session; no bar starts
+            # after it until tomorrow
+            start, end = day_bounds(now.date())
+            return start if now < cl else end
+        if op <= now < cl:
+            tf = timeframe_delta(timeframe).to_pytimedelta()
+            return op + ((now - op) // tf) * tf
+    return now
+
+# -----------------------
+#     Gap planning
+# -----------------------
+
+def missing_ranges(covered: Sequence[Interval], start: datetime, end: datetime, timeframe: str,
+                   holidays=NSE_HOLIDAYS) -> List[Interval]:
+    """
+    Trading time in [start, end) not yet covered. Gaps separated only by closed-market
+    time are coalesced into one request, then split to Kite's per-request span limit.
+    """
+    gaps = subtract_intervals(sessions(start, end, holidays, timeframe), merge_intervals(covered))
+    coalesced: List[Interval] = []
+    for s, e in gaps:
+        if coalesced and not sessions(coalesced[-1][1], s, holidays, timeframe):
+            coalesced[-1] = (coalesced[-1][0], e)
+        else:
+            coalesced.append((s, e))
+
+    span = timedelta(days=MAX_SPAN_DAYS.get(timeframe, 60))
+    out: List[Interval] = []
+    for s, e in coalesced:
+        while e - s > span:
+            out.append((s, s + span))
+            s = s + span
+        out.append((s, e))
+    return out
+
+def plan_fetches(symbols: Iterable[Tuple[int, str]], coverage: Dict[int, List[Interval]], timeframe: str,
+                 start: datetime, end: datetime, holidays=NSE_HOLIDAYS) -> List[FetchRequest]:
+    """One FetchRequest per missing range; key is the symbol_id."""
+    return [
+        FetchRequest(token, s, e, timeframe, key=symbol_id)
+        for symbol_id, token in symbols
+        for s, e in missing_ranges(coverage.get(symbol_id, []), start, end, timeframe, holidays)
+    ]
+
+def settled_until(now: datetime, timeframe: str, holidays=NSE_HOLIDAYS) -> datetime:
+    """closed_until minus the settle lag: bars starting before this are final."""
+    lag = SETTLE_BARS.get(timeframe, 3) * timeframe_delta(timeframe).to_pytimedelta()
+    return closed_until(now, timeframe, holidays) - lag
+
+def fetched_range(req: FetchRequest, now: datetime, holidays=NSE_HOLIDAYS) -> Optional[Interval]:
+    """The part of a completed request that can be marked covered (settled bars only)."""
+    end = min(req.to_date, settled_until(now, req.interval, holidays))
+    return (req.from_date, end) if req.from_date < end else None
+
+# -----------------------
+#     Storage
+# -----------------------
+
+def load_coverage(db, symbol_ids: Iterable[int], timeframe: str) -> Dict[int, List[Interval]]:
+    rows = db.execute(text("""
+        SELECT symbol_id, start_ts, end_ts
+        FROM candle_coverage
+        WHERE symbol_id = ANY(:sids) AND timeframe = :tf
+        ORDER BY symbol_id, start_ts
+    """), {"sids": list(symbol_ids), "tf": timeframe}).fetchall()
+    coverage: Dict[int, List[Interval]] = {}
+    for sid, s, e in rows:
+        coverage.setdefault(sid, []).append((s, e))
+    return coverage
+
+def save_coverage(db, coverage: Dict[int, List[Interval]], timeframe: str) -> None:
+    """
+    Union the given ranges into the stored ones of these symbols (in the caller's
+    transaction). A transaction-scoped advisory lock per (timeframe, symbol), taken in
+    symbol order, serializes concurrent syncs of the same symbol; the stored ranges are
+    re-read under it, so one writer never drops what another just recorded.
+    """
+    if not coverage:
+        return
+    sids = sorted(int(sid) for sid in coverage)
+    db.execute(text("""
+        SELECT pg_advisory_xact_lock(hashtext(:ns), sid)
+        FROM (SELECT unnest(CAST(:sids AS integer[])) AS sid ORDER BY 1) s
+    """), {"ns": f"candle_coverage:{timeframe}", "sids": sids})
+    stored = load_coverage(db, sids, timeframe)
+    db.execute(text("""
+        DELETE FROM candle_coverage WHERE symbol_id = ANY(:sids) AND timeframe = :tf
+    """), {"sids": sids, "tf": timeframe})
+    params = [
+        {"symbol_id": int(sid), "timeframe": timeframe, "start_ts": s, "end_ts": e}
+        for sid, ranges in coverage.items()
+        for s, e in merge_intervals(list(stored.get(int(sid), [])) + list(ranges))
+    ]
+    if params:
+        db.execute(text("""
+            INSERT INTO candle_coverage (symbol_id, timeframe, start_ts, end_ts)
+            VALUES (:symbol_id, :timeframe, :start_ts, :end_ts)
+            ON CONFLICT (symbol_id, timeframe, start_ts) DO NOTHING
+        """), params)
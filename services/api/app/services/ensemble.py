@@ -0,0 +1,278 @@
+'''
+Ensemble scoring (K-of-N) over the per-strategy signals.
+
+For the symbols that just got new strategy signals, the latest still-active signal of
+every strategy (ts + ttl_bars covers the current bar) is loaded in one query and laid
+out as a (symbols x strategies) matrix: side in {+1, -1, 0} and a confidence in [0, 1)
+(signal_strength / (signal_strength + strength_scale); strengths are in ATR-ish units).
+
+    long_w / short_w   sum of weight x confidence of the strategies on each side
+    score              (long_w - short_w) / sum of all N weights, in [-1, 1]
+    side               the sign of score; agree = strategies on that side
+    adjusted           |score| x regime multiplier (time of day, volatility)
+    qualified          agree >= k and adjusted >= threshold
+
+Entry/SL/TP are the weight x confidence average of the agreeing strategies' levels.
+Every scored symbol is upserted into ensemble_signals on (symbol_id, ts) in one
+statement, qualified or not, so a rescore that drops below the bar replaces the row.
+Symbols without new constituent signals are not touched.
+'''
+
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from .coverage import IST, SESSION_CLOSE, SESSION_OPEN
+from .feature_store import timeframe_delta
+
+ACTIVE_SIGNALS_SQL = text("""
+    SELECT DISTINCT ON (ss.symbol_id, ss.strategy_name)
+           ss.symbol_id, ss.instrument_token, ss.strategy_name, ss.ts, ss.side, ss.signal_strength,
+           ss.entry_price, ss.sl_price, ss.tp_price, ss.ttl_bars, lf.atr_pct
+    FROM strategy_signals ss
+    LEFT JOIN latest_features lf ON lf.symbol_id = ss.symbol_id
+    WHERE ss.date = :d
+      AND ss.symbol_id = ANY(:sids)
+    ORDER BY ss.symbol_id, ss.strategy_name, ss.ts DESC
+""")
+
+UPSERT_ENSEMBLE_SQL = text("""
+    INSERT INTO ensemble_signals (
+        date, ts, symbol_id, instrument_token, side, score, adjusted_score, agree, n_strategies,
+        qualified, entry_price, sl_price, tp_price, constituents
+    )
+    SELECT * FROM unnest(
+        CAST(:date AS date[]), CAST(:ts AS timestamptz[]), CAST(:symbol_id AS integer[]),
+        CAST(:instrument_token AS bigint[]), CAST(:side AS varchar[]), CAST(:score AS numeric[]),
+        CAST(:adjusted_score AS numeric[]), CAST(:agree AS integer[]), CAST(:n_strategies AS integer[]),
+        CAST(:qualified AS boolean[]), CAST(:entry_price AS numeric[]), CAST(:sl_price AS numeric[]),
+        CAST(:tp_price AS numeric[]), CAST(:constituents AS jsonb[])
+    )
+    ON CONFLICT (symbol_id, ts) DO UPDATE SET
+        side = EXCLUDED.side,
+        score = EXCLUDED.score,
+        adjusted_score = EXCLUDED.adjusted_score,
+        agree = EXCLUDED.agree,
+        n_strategies = EXCLUDED.n_strategies,
+        qualified = EXCLUDED.qualified,
+        entry_price = EXCLUDED.entry_price,
+        sl_price = EXCLUDED.sl_price,
+        tp_price = EXCLUDED.tp_price,
+        constituents = EXCLUDED.constituents,
+        created_at = NOW()
+""")
+
+ENSEMBLE_COLUMNS = [
+    "symbol_id", "instrument_token", "ts", "side", "score", "adjusted_score", "agree", "n_strategies",
+    "qualified", "entry_price", "sl_price", "tp_price", "constituents",
+]
+
+SIDES = {"long": 1, "short": -1}
+
+@dataclass
+class RegimeConfig:
+    """Multipliers on |score|: the first/last minutes of the session and ATR% extremes."""
+    open_minutes: int = 15
+    open_mult: float = 0.8
+    close_minutes: int = 30
+    close_mult: float = 0.7
+    atr_pct_low: float = 1.0
+    low_vol_mult: float = 0.9
+    atr_pct_high: float = 4.0
+    high_vol_mult: float = 0.8
+
+@dataclass
+class EnsembleConfig:
+    k: int = 2                          # strategies that must agree
+    threshold: float = 0.4              # minimum regime-adjusted |score|
+    strength_scale: float = 1.0
+    weights: Dict[str, float] = field(default_factory=dict)   # strategy_name -> weight (default 1)
+    regime: RegimeConfig = field(default_factory=RegimeConfig)
+
+    @classmethod
+    def from_dict(cls, config: dict) -> "EnsembleConfig":
+        config = dict(config or {})
+        regime = RegimeConfig(**(config.pop("regime", None) or {}))
+        return cls(regime=regime, **config)
+
+# -----------------------
+#     Scoring (pure NumPy)
+# -----------------------
+
+def confidence(strength: np.ndarray, scale: float = 1.0) -> np.ndarray:
+    """Strength (>= 0, unbounded) -> [0, 1); a missing strength counts as 0.5."""
+    s = np.clip(np.asarray(strength, dtype=float), 0.0, None)
+    return np.where(np.isnan(s), 0.5, s / (s + scale))
+
+def regime_multiplier(ts: pd.Series, atr_pct: np.ndarray, cfg: RegimeConfig) -> np.ndarray:
+    """Per-row multiplier from the bar's minute of the session and the symbol's ATR%."""
+    local = pd.to_datetime(ts, utc=True).dt.tz_convert(IST)
+    minute = (local.dt.hour * 60 + local.dt.minute).to_numpy()
+    open_min = SESSION_OPEN.hour * 60 + SESSION_OPEN.minute
+    close_min = SESSION_CLOSE.hour * 60 + SESSION_CLOSE.minute
+    mult = np.ones(len(minute))
+    mult = np.where(minute < open_min + cfg.open_minutes, mult * cfg.open_mult, mult)
+    mult = np.where(minute >= close_min - cfg.close_minutes, mult * cfg.close_mult, mult)
+    atr = np.asarray(atr_pct, dtype=float)
+    mult = np.where(atr < cfg.atr_pct_low, mult * cfg.low_vol_mult, mult)
+    mult = np.where(atr > cfg.atr_pct_high, mult * cfg.high_vol_mult, mult)
+    return mult
+
+def score_matrix(side: np.ndarray, conf: np.ndarray, weights: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    side, conf: (symbols x strategies), side 0 where a strategy has no active signal.
+    weights: (strategies,). Returns per-symbol score, consensus side and agreement count.
+    """
+    wc = conf * weights[None, :]
+    long_w = np.where(side > 0, wc, 0.0).sum(axis=1)
+    short_w = np.where(side < 0, wc, 0.0).sum(axis=1)
+    total = weights.sum()
+    score = (long_w - short_w) / total if total > 0 else np.zeros(len(side))
+    consensus = np.sign(score).astype(int)
+    agree = ((side == consensus[:, None]) & (consensus[:, None] != 0)).sum(axis=1)
+    return {"long_w": long_w, "short_w": short_w, "score": score, "side": consensus, "agree": agree}
+
+def consensus_levels(levels: np.ndarray, side: np.ndarray, consensus: np.ndarray, wc: np.ndarray) -> np.ndarray:
+    """Weight x confidence average of one level (entry/SL/TP) over the agreeing strategies."""
+    mask = (side == consensus[:, None]) & (consensus[:, None] != 0) & ~np.isnan(levels)
+    w = np.where(mask, wc, 0.0)
+    num = np.where(mask, levels, 0.0) * w
+    den = w.sum(axis=1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(den > 0, num.sum(axis=1) / den, np.nan)
+
+# -----------------------
+#     Engine
+# -----------------------
+
+class EnsembleEngine:
+    def __init__(self, config: EnsembleConfig, strategy_names: Iterable[str], timeframe: str = "5m"):
+        self.config = config
+        self.strategies: List[str] = list(dict.fromkeys(strategy_names))
+        self.weights = np.array([float(config.weights.get(s, 1.0)) for s in self.strategies])
+        self.timeframe = timeframe
+
+    @classmethod
+    def from_config(cls, config: dict, strategy_names: Iterable[str], timeframe: str = "5m") -> "EnsembleEngine":
+        return cls(EnsembleConfig.from_dict(config), strategy_names, timeframe)
+
+    def active(self, signals: pd.DataFrame, asof: pd.Timestamp) -> pd.DataFrame:
+        """Signals of known strategies whose ttl still covers the bar at asof."""
+        ts = pd.to_datetime(signals["ts"], utc=True)
+        ttl = pd.to_numeric(signals["ttl_bars"], errors="coerce").fillna(0).clip(lower=0)
+        expires = ts + ttl.to_numpy() * timeframe_delta(self.timeframe)
+        keep = (expires >= asof) & (ts <= asof) & signals["strategy_name"].isin(self.strategies) \
+            & signals["side"].isin(list(SIDES))
+        return signals[keep]
+
+    def score(self, signals: pd.DataFrame, asof: Optional[pd.Timestamp] = None) -> pd.DataFrame:
+        """
+        Latest signal per (symbol, strategy) -> one ensemble row per symbol with any
+        active constituent. asof defaults to the newest signal bar.
+        """
+        if signals.empty or not self.strategies:
+            return pd.DataFrame(columns=ENSEMBLE_COLUMNS)
+        signals = signals.assign(ts=pd.to_datetime(signals["ts"], utc=True))
+        asof = signals["ts"].max() if asof is None else pd.Timestamp(asof)
+        sig = self.active(signals, asof)
+        if sig.empty:
+            return pd.DataFrame(columns=ENSEMBLE_COLUMNS)
+
+        sids = pd.Index(np.unique(sig["symbol_id"].astype(int)))
+        i = sids.get_indexer(sig["symbol_id"].astype(int))
+        j = pd.Index(self.strategies).get_indexer(sig["strategy_name"])
+        shape = (len(sids), len(self.strategies))
+
+        side = np.zeros(shape, dtype=int)
+        conf = np.zeros(shape)
+        side[i, j] = sig["side"].map(SIDES).to_numpy()
+        conf[i, j] = confidence(pd.to_numeric(sig["signal_strength"], errors="coerce").to_numpy(),
+                                self.config.strength_scale)
+        levels = {}
+        for col in ("entry_price", "sl_price", "tp_price"):
+            m = np.full(shape, np.nan)
+            m[i, j] = pd.to_numeric(sig[col], errors="coerce").to_numpy()
+            levels[col] = m
+
+        out = score_matrix(side, conf, self.weights)
+        wc = conf * self.weights[None, :]
+
+        # per symbol: newest constituent bar, its token and ATR% (i is sorted within the lexsort)
+        ts_ns = pd.DatetimeIndex(sig["ts"]).asi8
+        order = np.lexsort((ts_ns, i))
+        last = order[np.r_[np.flatnonzero(np.diff(i[order])), len(order) - 1]]
+        bar_ts = sig["ts"].iloc[last].reset_index(drop=True)
+        atr = pd.to_numeric(sig["atr_pct"], errors="coerce").to_numpy()[last]
+        adjusted = np.abs(out["score"]) * regime_multiplier(bar_ts, atr, self.config.regime)
+        qualified = (out["agree"] >= self.config.k) & (adjusted >= self.config.threshold) & (out["side"] != 0)
+
+        constituents = [
+            json.dumps([
+                {"strategy": self.strategies[c], "side": "long" if side[r, c] > 0 else "short",
+                 "confidence": round(float(conf[r, c]), 4), "weight": float(self.weights[c])}
+                for c in np.flatnonzero(side[r])
+            ])
+            for r in range(len(sids))
+        ]
+        return pd.DataFrame({
+            "symbol_id": sids.to_numpy(),
+            "instrument_token": sig["instrument_token"].to_numpy()[last],
+            "ts": bar_ts,
+            "side": np.where(out["side"] > 0, "long", np.where(out["side"] < 0, "short", "flat")),
+            "score": out["score"],
+            "adjusted_score": adjusted,
+            "agree": out["agree"],
+            "n_strategies": len(self.strategies),
+            "qualified": qualified,
+            **{col: consensus_levels(levels[col], side, out["side"], wc) for col in levels},
+            "constituents": constituents,
+        })
+
+    # -----------------------
+    #     Load / persist
+    # -----------------------
+
+    @staticmethod
+    def load_signals(db, symbol_ids: Iterable[int], trade_date: date) -> pd.DataFrame:
+        rows = db.execute(ACTIVE_SIGNALS_SQL, {"d": trade_date, "sids": [int(s) for s in symbol_ids]}).fetchall()
+        return pd.DataFrame(rows, columns=[
+            "symbol_id", "instrument_token", "strategy_name", "ts", "side", "signal_strength",
+            "entry_price", "sl_price", "tp_price", "ttl_bars", "atr_pct",
+        ])
+
+    @staticmethod
+    def ensemble_arrays(df: pd.DataFrame, trade_date: date) -> dict:
+        """Column arrays for UPSERT_ENSEMBLE_SQL (NaN -> NULL)."""
+        df = df.astype(object).where(df.notna(), None)
+        arrays = {c: df[c].tolist() for c in ENSEMBLE_COLUMNS}
+        for c in ("symbol_id", "instrument_token", "agree", "n_strategies"):
+            arrays[c] = [int(x) for x in arrays[c]]
+        for c in ("score", "adjusted_score", "entry_price", "sl_price", "tp_price"):
+            arrays[c] = [float(x) if x is not None else None for x in arrays[c]]
+        arrays["qualified"] = [bool(x) for x in arrays["qualified"]]
+        arrays["ts"] = [pd.Timestamp(x).to_pydatetime() for x in arrays["ts"]]
+        arrays["date"] = [trade_date] * len(df)
+        return arrays
+
+    def write(self, db, ensemble: pd.DataFrame, trade_date: date) -> int:
+        if ensemble.empty:
+            return 0
+        db.execute(UPSERT_ENSEMBLE_SQL, self.ensemble_arrays(ensemble, trade_date))
+        return len(ensemble)
+
+    def run(self, db, new_signals: pd.DataFrame, now: Optional[datetime] = None) -> pd.DataFrame:
+        """Rescore the symbols in new_signals, in the caller's transaction; returns the ensemble rows."""
+        if new_signals.empty:
+            return pd.DataFrame(columns=ENSEMBLE_COLUMNS)
+        trade_date = (now or datetime.now(IST)).astimezone(IST).date()
+        asof = pd.to_datetime(new_signals["ts"], utc=True).max()
+        signals = self.load_signals(db, new_signals["symbol_id"].unique(), trade_date)
+        ensemble = self.score(signals, asof)
+        self.write(db, ensemble, trade_date)
+        print(f"Ensemble: {len(ensemble)} symbols rescored, {int(ensemble['qualified'].sum()) if len(ensemble) else 0} qualified")
+        return ensemble
@@ -0,0 +1,110 @@
+'''
+Hot feature snapshot: the latest feature vector of every symbol, kept in Redis.
+
+One hash per instrument token (`feat:<token>`) holding symbol_id, ts (epoch seconds),
+a schema version and the FEATURE_COLUMNS. Written after every feature computation and
+read for a whole focus set with one pipelined round trip; tokens missing from Redis
+are read from Postgres (the symbol's `latest_features` row) and cached.
+'''
+
+import math
+from typing import Dict, Iterable, List, Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+from .incremental import FEATURE_COLUMNS
+from .redis_pool import hgetall_many
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_TTL = 60 * 60 * 24  # a snapshot older than a day is stale anyway
+
+LATEST_FEATURES_SQL = text(f"""
+    SELECT s.instrument_token, f.symbol_id, f.ts, {", ".join(f"f.{c}" for c in FEATURE_COLUMNS)}
+    FROM symbols s
+    JOIN latest_features f ON f.symbol_id = s.id
+    WHERE s.instrument_token = ANY(:tokens)
+""")
+
+def snapshot_key(instrument_token) -> str:
+    return f"feat:{instrument_token}"
+
+# -----------------------
+#     Encode / decode
+# -----------------------
+
+def _encode(value) -> str:
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return ""
+    return repr(float(value))
+
+def encode_snapshot(symbol_id: int, ts, features: dict) -> Dict[str, str]:
+    fields = {
+        "v": str(SNAPSHOT_VERSION),
+        "symbol_id": str(int(symbol_id)),
+        "ts": repr(pd.Timestamp(ts).timestamp()),
+    }
+    for c in FEATURE_COLUMNS:
+        fields[c] = _encode(features.get(c))
+    return fields
+
+def decode_snapshot(fields: Dict[str, str]) -> Optional[dict]:
+    """None for an empty hash or one written with another schema version."""
+    if not fields or fields.get("v") != str(SNAPSHOT_VERSION):
+        return None
+    snap = {
+        "symbol_id": int(fields["symbol_id"]),
+        "ts": pd.Timestamp(float(fields["ts"]), unit="s", tz="UTC"),
+    }
+    for c in FEATURE_COLUMNS:
+        raw = fields.get(c, "")
+        snap[c] = float(raw) if raw != "" else None
+    return snap
+
+# -----------------------
+#     Redis
+# -----------------------
+
+def publish_snapshots(r, features: pd.DataFrame, tokens: Dict[int, str]) -> int:
+    """
+    Cache the latest row per symbol of a long features frame (symbol_id, ts, features).
+    `tokens` maps symbol_id -> instrument_token. Returns the number of snapshots written.
+    """
+    if features.empty:
+        return 0
+    latest = features.sort_values("ts").groupby("symbol_id").tail(1)
+    pipe = r.pipeline(transaction=False)
+    written = 0
+    for row in latest.to_dict("records"):
+        token = tokens.get(int(row["symbol_id"]))
+        if token is None:
+            continue
+        key = snapshot_key(token)
+        pipe.hset(key, mapping=encode_snapshot(row["symbol_id"], row["ts"], row))
+        pipe.expire(key, SNAPSHOT_TTL)
+        written += 1
+    pipe.execute()
+    return written
+
+def read_snapshots(r, instrument_tokens: Iterable) -> Dict[str, Optional[dict]]:
+    """Pipelined HGETALLs (one round trip per 1000 tokens); misses map to None."""
+    tokens = [str(t) for t in instrument_tokens]
+    found = hgetall_many(r, [snapshot_key(t) for t in tokens])
+    return {token: decode_snapshot(fields) for token, fields in zip(tokens, found)}
+
+def get_snapshots(r, instrument_tokens: Iterable, db=None) -> Dict[str, dict]:
+    """
+    Snapshots for the given tokens from Redis; misses are loaded from Postgres when a
+    session is given and written back to the cache.
+    """
+    snaps = read_snapshots(r, instrument_tokens)
+    missing: List[str] = [t for t, s in snaps.items() if s is None]
+    if missing and db is not None:
+        rows = db.execute(LATEST_FEATURES_SQL, {"tokens": missing}).mappings().all()
+        if rows:
+            df = pd.DataFrame(rows)
+            publish_snapshots(r, df, dict(zip(df["symbol_id"].astype(int), df["instrument_token"].astype(str))))
+            for row in rows:
+                snaps[str(row["instrument_token"])] = decode_snapshot(
+                    encode_snapshot(row["symbol_id"], row["ts"], dict(row)))
+    return {t: s for t, s in snaps.items() if s is not None}
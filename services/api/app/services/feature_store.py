@@ -0,0 +1,185 @@
+'''
+Writes computed feature rows into `features`.
+
+A high-water mark per (symbol_id, timeframe) in `feature_watermarks` records the last
+*finalized* bar already persisted. Later runs only upsert rows after it: new bars plus
+the still-open bar, which is rewritten until it closes. full_rewrite=True ignores the
+mark (repairs, config changes).
+
+`latest_features` keeps the newest row per symbol, upserted in the same transaction, so
+"latest bar per symbol" reads are one primary-key lookup per symbol.
+
+Neither table (nor the feat:<token> snapshot cache) has a timeframe in its key, and 15m/1h
+buckets start on 5m bar timestamps, so only FEATURE_TIMEFRAME is ever written: another
+timeframe would silently overwrite its rows.
+'''
+
+from datetime import datetime, timezone
+from typing import Dict, Iterable, Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+from .incremental import FEATURE_COLUMNS
+
+# the one timeframe features, latest_features and the snapshot cache hold
+FEATURE_TIMEFRAME = "5m"
+
+FEATURE_UPSERT_SQL = text("""
+    INSERT INTO features (
+        symbol_id, ts, rsi14, macd, macd_sig, atr14, atr_pct,
+        vwap, vwap_dev, vol_z, ma50, ma200, adtv
+    )
+    VALUES (
+        :symbol_id, :ts, :rsi14, :macd, :macd_sig, :atr14, :atr_pct,
+        :vwap, :vwap_dev, :vol_z, :ma50, :ma200, :adtv
+    )
+    ON CONFLICT (symbol_id, ts) DO UPDATE SET
+        rsi14 = EXCLUDED.rsi14,
+        macd = EXCLUDED.macd,
+        macd_sig = EXCLUDED.macd_sig,
+        atr14 = EXCLUDED.atr14,
+        atr_pct = EXCLUDED.atr_pct,
+        vwap = EXCLUDED.vwap,
+        vwap_dev = EXCLUDED.vwap_dev,
+        vol_z = EXCLUDED.vol_z,
+        ma50 = EXCLUDED.ma50,
+        ma200 = EXCLUDED.ma200,
+        adtv = EXCLUDED.adtv
+""")
+
+# a rewrite of older rows never moves a symbol's latest row back
+LATEST_UPSERT_SQL = text("""
+    INSERT INTO latest_features (
+        symbol_id, ts, rsi14, macd, macd_sig, atr14, atr_pct,
+        vwap, vwap_dev, vol_z, ma50, ma200, adtv, updated_at
+    )
+    VALUES (
+        :symbol_id, :ts, :rsi14, :macd, :macd_sig, :atr14, :atr_pct,
+        :vwap, :vwap_dev, :vol_z, :ma50, :ma200, :adtv, now()
+    )
+    ON CONFLICT (symbol_id) DO UPDATE SET
+        ts = EXCLUDED.ts,
+        rsi14 = EXCLUDED.rsi14,
+        macd = EXCLUDED.macd,
+        macd_sig = EXCLUDED.macd_sig,
+        atr14 = EXCLUDED.atr14,
+        atr_pct = EXCLUDED.atr_pct,
+        vwap = EXCLUDED.vwap,
+        vwap_dev = EXCLUDED.vwap_dev,
+        vol_z = EXCLUDED.vol_z,
+        ma50 = EXCLUDED.ma50,
+        ma200 = EXCLUDED.ma200,
+        adtv = EXCLUDED.adtv,
+        updated_at = now()
+    WHERE latest_features.ts <= EXCLUDED.ts
+""")
+
+WATERMARK_UPSERT_SQL = text("""
+    INSERT INTO feature_watermarks (symbol_id, timeframe, last_final_ts, updated_at)
+    VALUES (:symbol_id, :timeframe, :last_final_ts, now())
+    ON CONFLICT (symbol_id, timeframe) DO UPDATE SET
+        last_final_ts = GREATEST(feature_watermarks.last_final_ts, EXCLUDED.last_final_ts),
+        updated_at = now()
+""")
+
+_TIMEFRAMES = {
+    "1m": pd.Timedelta(minutes=1),
+    "3m": pd.Timedelta(minutes=3),
+    "5m": pd.Timedelta(minutes=5),
+    "15m": pd.Timedelta(minutes=15),
+    "1h": pd.Timedelta(hours=1),
+    "1d": pd.Timedelta(days=1),
+}
+
+def timeframe_delta(timeframe: str) -> pd.Timedelta:
+    try:
+        return _TIMEFRAMES[timeframe]
+    except KeyError:
+        raise ValueError(f"Unsupported timeframe: {timeframe}")
+
+def check_feature_timeframe(timeframe: str) -> None:
+    if timeframe != FEATURE_TIMEFRAME:
+        raise ValueError(f"Features are stored for {FEATURE_TIMEFRAME} only, not {timeframe}: "
+                         f"the features tables are keyed without a timeframe")
+
+# -----------------------
+#     Watermarks
+# -----------------------
+
+def load_watermarks(db, symbol_ids: Iterable[int], timeframe: str) -> Dict[int, pd.Timestamp]:
+    rows = db.execute(text("""
+        SELECT symbol_id, last_final_ts
+        FROM feature_watermarks
+        WHERE symbol_id = ANY(:sids) AND timeframe = :tf
+    """), {"sids": list(symbol_ids), "tf": timeframe}).fetchall()
+    return {sid: pd.Timestamp(ts) for sid, ts in rows}
+
+def rows_to_write(df: pd.DataFrame, watermarks: Dict[int, pd.Timestamp],
+                  rewrite_from: Optional[Dict[int, pd.Timestamp]] = None) -> pd.DataFrame:
+    """
+    Rows strictly after each symbol's watermark (all rows for symbols without one). For the
+    symbols in rewrite_from the watermark is lowered to that ts: their rows were recomputed
+    (an engine reseeded after a backfill) and replace what is stored from there on.
+    """
+    if rewrite_from:
+        watermarks = dict(watermarks)
+        for sid, ts in rewrite_from.items():
+            if sid in watermarks:
+                watermarks[sid] = min(watermarks[sid], pd.Timestamp(ts) - pd.Timedelta(1, "ns"))
+    if not watermarks or df.empty:
+        return df
+    mark = df["symbol_id"].map(watermarks)
+    return df[mark.isna() | (df["ts"] > mark)]
+
+def finalized_marks(df: pd.DataFrame, timeframe: str, now: Optional[datetime] = None) -> Dict[int, pd.Timestamp]:
+    """Latest closed bar per symbol: a bar stamped ts is final once ts + timeframe <= now."""
+    now = pd.Timestamp(now or datetime.now(timezone.utc))
+    closed = df[df["ts"] + timeframe_delta(timeframe) <= now]
+    if closed.empty:
+        return {}
+    return closed.groupby("symbol_id")["ts"].max().to_dict()
+
+# -----------------------
+#     Writer
+# -----------------------
+
+def feature_payload(df: pd.DataFrame) -> list:
+    """Upsert params (symbol_id, ts + feature columns) for a long features frame."""
+    cols = ["symbol_id", "ts", *[c for c in FEATURE_COLUMNS if c in df.columns]]
+    payload = df[cols].to_dict("records")
+    for row in payload:
+        for c in FEATURE_COLUMNS:
+            row.setdefault(c, None)
+    return payload
+
+def latest_payload(df: pd.DataFrame) -> list:
+    """Upsert params for latest_features: the newest row of every symbol."""
+    return feature_payload(df.sort_values("ts", kind="stable").groupby("symbol_id").tail(1))
+
+def write_features(db, df: pd.DataFrame, timeframe: str, full_rewrite: bool = False,
+                   now: Optional[datetime] = None, rewrite_from: Optional[Dict[int, pd.Timestamp]] = None) -> int:
+    """
+    Upsert a long features frame (symbol_id, ts, feature columns), the symbols' latest
+    rows and the watermarks, all in the caller's transaction. Returns the number of rows written.
+    rewrite_from lowers some symbols' watermarks for this write (see rows_to_write).
+    """
+    check_feature_timeframe(timeframe)
+    if df.empty:
+        return 0
+    if not full_rewrite:
+        df = rows_to_write(df, load_watermarks(db, df["symbol_id"].unique().tolist(), timeframe), rewrite_from)
+        if df.empty:
+            return 0
+
+    payload = feature_payload(df)
+    db.execute(FEATURE_UPSERT_SQL, payload)
+    db.execute(LATEST_UPSERT_SQL, latest_payload(df))
+
+    marks = finalized_marks(df, timeframe, now)
+    if marks:
+        db.execute(WATERMARK_UPSERT_SQL, [
+            {"symbol_id": int(sid), "timeframe": timeframe, "last_final_ts": ts}
+            for sid, ts in marks.items()
+        ])
+    return len(payload)
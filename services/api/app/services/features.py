@@ -2,6 +2,7 @@ import pandas as pd
 import numpy as np
 from dataclasses import dataclass
 from typing import Optional, Iterable, Literal
+from . import kernels
 
 # -----------------------
 #         Config
@@ -20,6 +21,8 @@ class FeatureConfig:
     baseline_rs: Optional[pd.Series] = None
     vwap_sessionize: bool = True
     currency_scale_to_crore: bool = True
+    # "pandas" (reference) or "kernel" (fused passes in kernels.py, numba-compiled when installed)
+    backend: Literal["pandas", "kernel"] = "pandas"
 
 # -----------------------
 #     Helper Functions
@@ -28,6 +31,19 @@ class FeatureConfig:
 def _ema(s: pd.Series, span: int) -> pd.Series:
     return s.ewm(span=span, adjust=False, min_periods=span).mean()
 
+def ewm_alpha(span: Optional[float] = None, alpha: Optional[float] = None) -> float:
+    """
+    Smoothing factor exactly as pandas derives it for ewm(span=...) / ewm(alpha=...).
+    pandas round-trips through the centre of mass, so 1/period is not always bit-equal.
+    """
+    if span is not None:
+        com = (span - 1) / 2
+    elif alpha is not None:
+        com = (1 - alpha) / alpha
+    else:
+        raise ValueError("Must pass one of span or alpha")
+    return 1.0 / (1.0 + com)
+
 def _rolling_zscore(s: pd.Series, window: int) -> pd.Series:
     m = s.rolling(window, min_periods=max(5, window // 3)).mean()
     sd = s.rolling(window, min_periods=max(5, window // 3)).std(ddof=0)
@@ -52,8 +68,12 @@ def _ensure_cols(df: pd.DataFrame, cols: Iterable[str]) -> None:
 #     Indicators
 # -----------------------
 
-def rsi(df: pd.DataFrame, period: int = 14, price_col: str = "c", out_col: str = "rsi14") -> pd.DataFrame:
+def rsi(df: pd.DataFrame, period: int = 14, price_col: str = "c", out_col: str = "rsi14",
+        backend: str = "pandas") -> pd.DataFrame:
     _ensure_cols(df, [price_col])
+    if backend == "kernel":
+        df[out_col] = kernels.rsi(kernels.as_f64(df[price_col]), ewm_alpha(alpha=1/period), period)
+        return df
     delta = df[price_col].diff()
     gain = delta.clip(lower=0.0)
     loss = -delta.clip(upper=0.0)
@@ -66,8 +86,15 @@ def rsi(df: pd.DataFrame, period: int = 14, price_col: str = "c", out_col: str =
 def macd(df: pd.DataFrame,
          fast: int = 12, slow: int = 26, signal: int = 9,
          price_col: str = "c",
-         out_macd: str = "macd", out_sig: str = "macd_sig") -> pd.DataFrame:
+         out_macd: str = "macd", out_sig: str = "macd_sig",
+         backend: str = "pandas") -> pd.DataFrame:
     _ensure_cols(df, [price_col])
+    if backend == "kernel":
+        df[out_macd], df[out_sig] = kernels.macd(kernels.as_f64(df[price_col]),
+                                                 ewm_alpha(span=fast), fast,
+                                                 ewm_alpha(span=slow), slow,
+                                                 ewm_alpha(span=signal), signal)
+        return df
     ema_fast = _ema(df[price_col], fast)
     ema_slow = _ema(df[price_col], slow)
     macd_line = ema_fast - ema_slow
@@ -77,10 +104,15 @@ def macd(df: pd.DataFrame,
     return df
 
 def atr(df: pd.DataFrame, period: int = 14,
-        out_col: str = "atr14", out_pct_col: Optional[str] = "atr_pct") -> pd.DataFrame:
+        out_col: str = "atr14", out_pct_col: Optional[str] = "atr_pct",
+        backend: str = "pandas") -> pd.DataFrame:
     _ensure_cols(df, ["h", "l", "c"])
-    tr = _true_range(df["h"], df["l"], df["c"].shift(1))
-    df[out_col] = tr.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
+    if backend == "kernel":
+        df[out_col] = kernels.atr(kernels.as_f64(df["h"]), kernels.as_f64(df["l"]), kernels.as_f64(df["c"]),
+                                  ewm_alpha(alpha=1/period), period)
+    else:
+        tr = _true_range(df["h"], df["l"], df["c"].shift(1))
+        df[out_col] = tr.ewm(alpha=1/period, min_periods=period, adjust=False).mean()
     if out_pct_col:
         df[out_pct_col] = (df[out_col] / df["c"]) * 100.0
     return df
@@ -113,8 +145,12 @@ def vwap(df: pd.DataFrame,
     df[out_dev] = (df["c"] - df[out_price]) / df[out_price]  # relative deviation, e.g. 0.012 = +1.2%
     return df
 
-def volume_zscore(df: pd.DataFrame, window: int = 20, out_col: str = "vol_z") -> pd.DataFrame:
+def volume_zscore(df: pd.DataFrame, window: int = 20, out_col: str = "vol_z",
+                  backend: str = "pandas") -> pd.DataFrame:
     _ensure_cols(df, ["v"])
+    if backend == "kernel":
+        df[out_col] = kernels.rolling_zscore(kernels.as_f64(df["v"]), window, max(5, window // 3))
+        return df
     df[out_col] = _rolling_zscore(df["v"], window)
     return df
 
@@ -167,19 +203,19 @@ def compute_features(df: pd.DataFrame,
     todo = set(include) if include else {"rsi", "macd", "atr", "vwap", "vol_z", "ma", "adtv"}
 
     if "rsi" in todo:
-        rsi(df,period=cfg.rsi_period)
+        rsi(df,period=cfg.rsi_period, backend=cfg.backend)
     
     if "macd" in todo:
-        macd(df, fast=cfg.macd_fast, slow=cfg.macd_slow, signal=cfg.macd_signal)
+        macd(df, fast=cfg.macd_fast, slow=cfg.macd_slow, signal=cfg.macd_signal, backend=cfg.backend)
 
     if "atr" in todo:
-        atr(df, period=cfg.atr_period, out_col="atr14", out_pct_col="atr_pct")
+        atr(df, period=cfg.atr_period, out_col="atr14", out_pct_col="atr_pct", backend=cfg.backend)
     
     if "vwap" in todo:
         vwap(df, sessionize=cfg.vwap_sessionize, out_price="vwap", out_dev="vwap_dev")
     
     if "vol_z" in todo:
-        volume_zscore(df, window=cfg.vol_z_window, out_col="vol_z")
+        volume_zscore(df, window=cfg.vol_z_window, out_col="vol_z", backend=cfg.backend)
     
     if "ma" in todo:
         moving_averages(df, short=cfg.ma_short, long=cfg.ma_long, out_short="ma50", out_long="ma200")
@@ -191,14 +227,15 @@ def compute_features(df: pd.DataFrame,
     # creating relative strength of index to calculate RSI
     if cfg.baseline_rs is not None and "rs" in todo:
         relative_strength(df,baseline_close=cfg.baseline_rs, out_col="rel_strength")
-    
+
+    return df
 
 # -----------------------
 #     Warm Up candles
 # -----------------------
     
 def required_warmup_bars(cfg:FeatureConfig = FeatureConfig(), 
-                         timeframe: Literal["1m","3m","5m","15m","1d"] = "5m") -> int: 
+                         timeframe: Literal["1m","3m","5m","15m","1h","1d"] = "5m") -> int: 
     key = [
         cfg.rsi_period,
         cfg.macd_slow + cfg.macd_signal,
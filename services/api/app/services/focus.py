@@ -0,0 +1,82 @@
+'''
+Focus-set reads on top of `latest_features` (newest feature row per symbol, kept by
+write_features in the same transaction as the features upsert).
+
+The top-K is the latest trading-universe snapshot of the day (12:30 > 09:30 > preopen),
+highest score first, joined to each symbol's latest features: an index scan of
+ix_universe_date_asof_score plus K primary-key lookups, whatever the size of `features`.
+'''
+
+from datetime import date, datetime
+from typing import Iterable, Optional
+
+import pandas as pd
+from sqlalchemy import text
+
+from .coverage import IST
+from .incremental import FEATURE_COLUMNS
+
+_LATEST_COLUMNS = ", ".join(f"lf.{c}" for c in FEATURE_COLUMNS)
+
+def snapshot_sql(where: str = "TRUE") -> str:
+    """The day's (latest date <= :d) most recent universe snapshot as (date, asof_time)."""
+    return f"""
+        SELECT date, asof_time
+        FROM trading_universe
+        WHERE date = (SELECT MAX(date) FROM trading_universe WHERE date <= :d)
+          AND {where}
+        GROUP BY date, asof_time
+        ORDER BY CASE asof_time
+            WHEN '1230' THEN 3
+            WHEN '0930' THEN 2
+            WHEN 'preopen' THEN 1
+            ELSE 0
+        END DESC
+        LIMIT 1
+    """
+
+FOCUS_SQL = text(f"""
+    WITH snap AS ({snapshot_sql()})
+    SELECT tu.date, tu.asof_time, tu.symbol_id, tu.instrument_token,
+           tu.score AS universe_score, tu.rank AS universe_rank,
+           lf.ts, {_LATEST_COLUMNS}
+    FROM snap
+    JOIN trading_universe tu ON tu.date = snap.date AND tu.asof_time = snap.asof_time
+    LEFT JOIN latest_features lf ON lf.symbol_id = tu.symbol_id
+    ORDER BY tu.score DESC
+    LIMIT :k
+""")
+
+LATEST_SQL = text(f"""
+    SELECT lf.symbol_id, lf.ts, {_LATEST_COLUMNS}
+    FROM latest_features lf
+    WHERE lf.symbol_id = ANY(:sids)
+""")
+
+FOCUS_COLUMNS = ["date", "asof_time", "symbol_id", "instrument_token", "universe_score", "universe_rank",
+                 "ts", *FEATURE_COLUMNS]
+
+def _typed(df: pd.DataFrame) -> pd.DataFrame:
+    df["ts"] = pd.to_datetime(df["ts"], utc=True)
+    for c in FEATURE_COLUMNS + [c for c in ("universe_score",) if c in df.columns]:
+        df[c] = pd.to_numeric(df[c], errors="coerce")
+    return df
+
+def focus_set(db, topk: Optional[int] = None, trade_date: Optional[date] = None,
+              today_only: bool = True) -> pd.DataFrame:
+    """
+    Top-K symbols of the day's latest universe snapshot with their latest features
+    (ts and features are NaN for a symbol without feature rows yet). today_only drops
+    symbols whose latest features are from an earlier day.
+    """
+    trade_date = trade_date or datetime.now(IST).date()
+    rows = db.execute(FOCUS_SQL, {"d": trade_date, "k": topk}).fetchall()
+    df = _typed(pd.DataFrame(rows, columns=FOCUS_COLUMNS))
+    if today_only and not df.empty:
+        df = df[df["ts"].dt.tz_convert(IST).dt.date == trade_date].reset_index(drop=True)
+    return df
+
+def latest_features(db, symbol_ids: Iterable[int]) -> pd.DataFrame:
+    """Latest features row of each symbol (one row per symbol that has any)."""
+    rows = db.execute(LATEST_SQL, {"sids": [int(s) for s in symbol_ids]}).fetchall()
+    return _typed(pd.DataFrame(rows, columns=["symbol_id", "ts", *FEATURE_COLUMNS]))
@@ -0,0 +1,293 @@
+import copy
+import math
+from collections import deque
+from dataclasses import replace
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+
+from .features import FeatureConfig, ewm_alpha, _ensure_cols
+
+# Columns emitted per bar, in the same order calc_features upserts them
+FEATURE_COLUMNS = [
+    "rsi14", "macd", "macd_sig", "atr14", "atr_pct",
+    "vwap", "vwap_dev", "vol_z", "ma50", "ma200", "adtv",
+]
+
+_GROUP_COLUMNS = {
+    "rsi": ["rsi14"],
+    "macd": ["macd", "macd_sig"],
+    "atr": ["atr14", "atr_pct"],
+    "vwap": ["vwap", "vwap_dev"],
+    "vol_z": ["vol_z"],
+    "ma": ["ma50", "ma200"],
+    "adtv": ["adtv"],
+}
+
+NAN = float("nan")
+
+# -----------------------
+#     Recursive state
+# -----------------------
+
+class _Ewm:
+    """
+    One step of pandas' ewm(adjust=False).mean(), kept as running state.
+    Mirrors the pandas update (including the division by old_wt + new_wt)
+    so values are bit-identical to the batch path.
+    """
+    __slots__ = ("alpha", "old_wt", "min_periods", "value", "nobs")
+
+    def __init__(self, alpha: float, min_periods: int):
+        self.alpha = alpha
+        self.old_wt = 1.0 - alpha
+        self.min_periods = min_periods
+        self.value = NAN
+        self.nobs = 0
+
+    def update(self, x: float) -> float:
+        if x == x:
+            self.nobs += 1
+            if self.value != self.value:
+                self.value = x
+            elif self.value != x:
+                self.value = (self.old_wt * self.value + self.alpha * x) / (self.old_wt + self.alpha)
+        return self.value if self.nobs >= self.min_periods else NAN
+
+    def clone(self) -> "_Ewm":
+        return copy.copy(self)
+
+
+class _Rolling:
+    """Rolling sum and sum-of-squares over the last `window` values."""
+    __slots__ = ("window", "min_periods", "buf", "s", "ss")
+
+    def __init__(self, window: int, min_periods: int):
+        self.window = window
+        self.min_periods = min_periods
+        self.buf = deque()
+        self.s = 0.0
+        self.ss = 0.0
+
+    def push(self, x: float) -> None:
+        self.buf.append(x)
+        self.s += x
+        self.ss += x * x
+        if len(self.buf) > self.window:
+            old = self.buf.popleft()
+            self.s -= old
+            self.ss -= old * old
+
+    def mean(self) -> float:
+        n = len(self.buf)
+        return self.s / n if n >= self.min_periods else NAN
+
+    def std(self) -> float:
+        n = len(self.buf)
+        if n < self.min_periods:
+            return NAN
+        m = self.s / n
+        return math.sqrt(max(self.ss / n - m * m, 0.0))
+
+    def clone(self) -> "_Rolling":
+        other = copy.copy(self)
+        other.buf = deque(self.buf)
+        return other
+
+
+class _FeatureState:
+    def __init__(self, cfg: FeatureConfig):
+        self.prev_close = NAN
+        self.n_bars = 0
+        # rsi (Wilder)
+        wilder_rsi = ewm_alpha(alpha=1 / cfg.rsi_period)
+        self.gain = _Ewm(wilder_rsi, cfg.rsi_period)
+        self.loss = _Ewm(wilder_rsi, cfg.rsi_period)
+        # macd
+        self.ema_fast = _Ewm(ewm_alpha(span=cfg.macd_fast), cfg.macd_fast)
+        self.ema_slow = _Ewm(ewm_alpha(span=cfg.macd_slow), cfg.macd_slow)
+        self.ema_sig = _Ewm(ewm_alpha(span=cfg.macd_signal), cfg.macd_signal)
+        # atr (Wilder)
+        self.tr = _Ewm(ewm_alpha(alpha=1 / cfg.atr_period), cfg.atr_period)
+        # sessionized vwap accumulators
+        self.session = None
+        self.cum_tpv = 0.0
+        self.cum_vol = 0.0
+        # rolling windows
+        self.vol = _Rolling(cfg.vol_z_window, max(5, cfg.vol_z_window // 3))
+        self.ma_short = _Rolling(cfg.ma_short, cfg.ma_short // 2)
+        self.ma_long = _Rolling(cfg.ma_long, cfg.ma_long // 2)
+        # adtv: completed days + today's running traded value
+        self.adtv_days = _Rolling(cfg.adtv_window_days - 1, 0)
+        self.adtv_min_periods = max(5, cfg.adtv_window_days // 3)
+        self.day = None
+        self.day_value = 0.0
+
+    def clone(self) -> "_FeatureState":
+        # cheaper than deepcopy: only the stateful members need their own copy
+        other = copy.copy(self)
+        for name, member in vars(self).items():
+            if isinstance(member, (_Ewm, _Rolling)):
+                setattr(other, name, member.clone())
+        return other
+
+
+# -----------------------
+#     Engine
+# -----------------------
+
+class IncrementalFeatureEngine:
+    """
+    Stateful counterpart of compute_features for one symbol/timeframe.
+
+    Each call to update() advances the recursive state (EMA levels, Wilder averages,
+    rolling sums, session VWAP accumulators) by the new bars only and returns their
+    feature rows. Every emitted row equals the last row of compute_features run over
+    all bars seen so far (ADTV included, i.e. today's value is point-in-time).
+
+    A bar whose ts equals the last one seen replaces it (Kite re-sends the open candle
+    with updated values), so the state before the last bar is kept for rollback. Bars
+    older than the last one cannot be folded in: a symbol whose store gained bars inside
+    [first_ts, last_ts] (n_bars no longer matches) needs a fresh engine.
+    """
+
+    def __init__(self, cfg: FeatureConfig = FeatureConfig(), include: Optional[Iterable[str]] = None):
+        self.cfg = cfg
+        todo = set(include) if include else set(_GROUP_COLUMNS)
+        self.columns = [c for g, cols in _GROUP_COLUMNS.items() if g in todo for c in cols]
+        self._state = _FeatureState(cfg)
+        self._prev_state: Optional[_FeatureState] = None
+        self.first_ts: Optional[pd.Timestamp] = None
+        self.last_ts: Optional[pd.Timestamp] = None
+
+    @property
+    def n_bars(self) -> int:
+        """Distinct bars folded into the state (a revised last bar counts once)."""
+        return self._state.n_bars
+
+    def update(self, df: pd.DataFrame) -> pd.DataFrame:
+        _ensure_cols(df, ["ts", "o", "h", "l", "c", "v"])
+        df = df.sort_values("ts")
+        if self.last_ts is not None:
+            df = df[df["ts"] >= self.last_ts]
+        if df.empty:
+            return pd.DataFrame(columns=["ts", *self.columns])
+
+        ts = df["ts"].tolist()
+        h = df["h"].to_numpy(dtype=float)
+        l = df["l"].to_numpy(dtype=float)
+        c = df["c"].to_numpy(dtype=float)
+        v = df["v"].to_numpy(dtype=float)
+
+        if self.last_ts is not None and ts[0] == self.last_ts:
+            # revised copy of the last bar: roll back and re-apply
+            self._state = self._prev_state.clone()
+
+        if self.first_ts is None:
+            self.first_ts = ts[0]
+        rows = []
+        last = len(ts) - 1
+        for i in range(len(ts)):
+            if i == last:
+                self._prev_state = self._state.clone()
+            rows.append(self._step(self._state, ts[i], h[i], l[i], c[i], v[i]))
+        self.last_ts = ts[-1]
+
+        out = pd.DataFrame(rows, columns=["ts", *FEATURE_COLUMNS])
+        return out[["ts", *self.columns]]
+
+    def _step(self, st: _FeatureState, ts, h: float, l: float, c: float, v: float) -> Tuple:
+        cfg = self.cfg
+        prev = st.prev_close
+
+        # rsi
+        delta = c - prev
+        avg_gain = st.gain.update(max(delta, 0.0) if delta == delta else NAN)
+        avg_loss = st.loss.update(-min(delta, 0.0) if delta == delta else NAN)
+        rsi14 = 100 - (100 / (1 + avg_gain / avg_loss)) if avg_loss != 0 else NAN
+
+        # macd
+        fast = st.ema_fast.update(c)
+        slow = st.ema_slow.update(c)
+        macd_line = fast - slow
+        macd_sig = st.ema_sig.update(macd_line)
+
+        # atr
+        tr = h - l
+        if prev == prev:
+            tr = max(tr, abs(h - prev), abs(l - prev))
+        atr14 = st.tr.update(tr)
+        atr_pct = (atr14 / c) * 100.0
+
+        # vwap
+        typical = (h + l + c) / 3.0
+        session = ts.date() if cfg.vwap_sessionize else None
+        if session != st.session:
+            st.session = session
+            st.cum_tpv = 0.0
+            st.cum_vol = 0.0
+        st.cum_tpv += typical * v
+        st.cum_vol += v
+        vw = st.cum_tpv / st.cum_vol if st.cum_vol != 0 else NAN
+        vwap_dev = (c - vw) / vw
+
+        # volume z-score
+        st.vol.push(v)
+        sd = st.vol.std()
+        vol_z = (v - st.vol.mean()) / sd if sd != 0 else NAN
+
+        # moving averages
+        st.ma_short.push(c)
+        st.ma_long.push(c)
+        ma50 = st.ma_short.mean()
+        ma200 = st.ma_long.mean()
+
+        # adtv (completed days roll forward when the date changes)
+        day = ts.date()
+        if day != st.day:
+            if st.day is not None:
+                st.adtv_days.push(st.day_value)
+            st.day = day
+            st.day_value = 0.0
+        st.day_value += c * v
+        n_days = len(st.adtv_days.buf) + 1
+        adtv = (st.adtv_days.s + st.day_value) / n_days if n_days >= st.adtv_min_periods else NAN
+        if cfg.currency_scale_to_crore:
+            adtv = adtv / 1e7
+
+        st.prev_close = c
+        st.n_bars += 1
+        return (ts, rsi14, macd_line, macd_sig, atr14, atr_pct,
+                vw, vwap_dev, vol_z, ma50, ma200, adtv)
+
+
+# -----------------------
+#   Per-process registry
+# -----------------------
+
+_ENGINES: Dict[Tuple[int, str], IncrementalFeatureEngine] = {}
+
+def get_engine(symbol_id: int, timeframe: str, cfg: FeatureConfig = FeatureConfig()) -> IncrementalFeatureEngine:
+    """Engine for (symbol_id, timeframe), created empty on first use in this worker process."""
+    key = (symbol_id, timeframe)
+    engine = _ENGINES.get(key)
+    if engine is None or replace(engine.cfg, baseline_rs=None) != replace(cfg, baseline_rs=None):
+        engine = _ENGINES[key] = IncrementalFeatureEngine(cfg)
+    return engine
+
+def reset_engines(keys: Optional[Iterable[Tuple[int, str]]] = None) -> None:
+    """Drop the given (symbol_id, timeframe) engines, or all of them."""
+    if keys is None:
+        _ENGINES.clear()
+        return
+    for key in keys:
+        _ENGINES.pop(key, None)
+
+def warm_engines(symbol_ids: Iterable[int], timeframe: str) -> Dict[int, IncrementalFeatureEngine]:
+    """The seeded engines of these symbols (no new ones are created)."""
+    out = {}
+    for sid in symbol_ids:
+        engine = _ENGINES.get((sid, timeframe))
+        if engine is not None and engine.last_ts is not None:
+            out[sid] = engine
+    return out
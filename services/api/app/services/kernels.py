@@ -0,0 +1,244 @@
+"""
+Compiled kernels for the recursive indicators in features.py.
+
+Every kernel is a single fused pass over contiguous float64 arrays. With numba installed
+they are JIT-compiled (and cached on disk); without it each kernel falls back to
+vectorised NumPy (the EWM recursions to pandas' compiled ewm with ignore_na, which skips
+missing values the same way), never to the loops as plain Python.
+The EWM update mirrors pandas' ewm(adjust=False) step for step, so the recursive outputs
+are identical to the pandas path; rolling statistics agree to floating-point tolerance.
+"""
+import numpy as np
+import pandas as pd
+
+try:
+    from numba import njit
+    HAVE_NUMBA = True
+except ImportError:  # optional dependency
+    HAVE_NUMBA = False
+
+    def njit(*args, **kwargs):
+        if len(args) == 1 and callable(args[0]):
+            return args[0]
+        return lambda fn: fn
+
+
+def as_f64(values) -> np.ndarray:
+    return np.ascontiguousarray(values, dtype=np.float64)
+
+# -----------------------
+#     EWM family
+# -----------------------
+
+@njit(cache=True)
+def _ewm_step(w, x, alpha, old_wt):
+    # one observation of pandas' ewm(adjust=False) recursion
+    if w != w:
+        return x
+    if w != x:
+        return (old_wt * w + alpha * x) / (old_wt + alpha)
+    return w
+
+@njit(cache=True)
+def _ewm_mean_loop(x, alpha, min_periods):
+    n = x.shape[0]
+    out = np.empty(n)
+    old_wt = 1.0 - alpha
+    w = np.nan
+    nobs = 0
+    for i in range(n):
+        xi = x[i]
+        if xi == xi:
+            nobs += 1
+            w = _ewm_step(w, xi, alpha, old_wt)
+        out[i] = w if nobs >= min_periods else np.nan
+    return out
+
+@njit(cache=True)
+def _rsi_loop(c, alpha, period):
+    # Wilder RSI: price diff, gain/loss split and both averages in one pass
+    n = c.shape[0]
+    out = np.empty(n)
+    old_wt = 1.0 - alpha
+    avg_gain = np.nan
+    avg_loss = np.nan
+    nobs = 0
+    for i in range(n):
+        out[i] = np.nan
+        if i == 0:
+            continue
+        delta = c[i] - c[i - 1]
+        if delta != delta:
+            continue
+        nobs += 1
+        avg_gain = _ewm_step(avg_gain, max(delta, 0.0), alpha, old_wt)
+        avg_loss = _ewm_step(avg_loss, -min(delta, 0.0), alpha, old_wt)
+        if nobs >= period and avg_loss != 0:
+            out[i] = 100.0 - (100.0 / (1.0 + avg_gain / avg_loss))
+    return out
+
+@njit(cache=True)
+def _macd_loop(c, alpha_fast, fast, alpha_slow, slow, alpha_sig, signal):
+    # fast/slow EMAs, their spread and the signal EMA in one pass
+    n = c.shape[0]
+    line = np.empty(n)
+    sig = np.empty(n)
+    ema_fast = np.nan
+    ema_slow = np.nan
+    ema_sig = np.nan
+    nobs = 0
+    nobs_sig = 0
+    for i in range(n):
+        ci = c[i]
+        if ci == ci:
+            nobs += 1
+            ema_fast = _ewm_step(ema_fast, ci, alpha_fast, 1.0 - alpha_fast)
+            ema_slow = _ewm_step(ema_slow, ci, alpha_slow, 1.0 - alpha_slow)
+        li = np.nan
+        if nobs >= fast and nobs >= slow:
+            li = ema_fast - ema_slow
+        line[i] = li
+        if li == li:
+            nobs_sig += 1
+            ema_sig = _ewm_step(ema_sig, li, alpha_sig, 1.0 - alpha_sig)
+        sig[i] = ema_sig if nobs_sig >= signal else np.nan
+    return line, sig
+
+def _ewm_numpy(x, alpha, min_periods):
+    return pd.Series(x).ewm(alpha=alpha, adjust=False, ignore_na=True, min_periods=min_periods).mean().to_numpy()
+
+def _rsi_numpy(c, alpha, period):
+    delta = np.empty_like(c)
+    delta[0] = np.nan
+    delta[1:] = c[1:] - c[:-1]
+    avg_gain = _ewm_numpy(np.where(delta > 0, delta, np.where(delta == delta, 0.0, np.nan)), alpha, period)
+    avg_loss = _ewm_numpy(np.where(delta < 0, -delta, np.where(delta == delta, 0.0, np.nan)), alpha, period)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        out = 100.0 - (100.0 / (1.0 + avg_gain / avg_loss))
+    out[(avg_loss == 0) | (delta != delta)] = np.nan
+    return out
+
+def _macd_numpy(c, alpha_fast, fast, alpha_slow, slow, alpha_sig, signal):
+    line = _ewm_numpy(c, alpha_fast, fast) - _ewm_numpy(c, alpha_slow, slow)
+    return line, _ewm_numpy(line, alpha_sig, signal)
+
+def ewm_mean(x, alpha, min_periods):
+    return _ewm_mean_loop(x, alpha, min_periods) if HAVE_NUMBA else _ewm_numpy(x, alpha, min_periods)
+
+def rsi(c, alpha, period):
+    """Wilder RSI."""
+    return _rsi_loop(c, alpha, period) if HAVE_NUMBA else _rsi_numpy(c, alpha, period)
+
+def macd(c, alpha_fast, fast, alpha_slow, slow, alpha_sig, signal):
+    """MACD line and signal."""
+    if HAVE_NUMBA:
+        return _macd_loop(c, alpha_fast, fast, alpha_slow, slow, alpha_sig, signal)
+    return _macd_numpy(c, alpha_fast, fast, alpha_slow, slow, alpha_sig, signal)
+
+# -----------------------
+#     True range / ATR
+# -----------------------
+
+@njit(cache=True)
+def _true_range_loop(h, l, c):
+    n = h.shape[0]
+    out = np.empty(n)
+    for i in range(n):
+        tr = h[i] - l[i]
+        if i > 0:
+            prev = c[i - 1]
+            if prev == prev:
+                tr = max(tr, abs(h[i] - prev), abs(l[i] - prev))
+        out[i] = tr
+    return out
+
+def _true_range_numpy(h, l, c):
+    prev = np.empty_like(c)
+    prev[0] = np.nan
+    prev[1:] = c[:-1]
+    # fmax skips the NaN legs exactly like the row max over the pd.concat did
+    return np.fmax(h - l, np.fmax(np.abs(h - prev), np.abs(l - prev)))
+
+def true_range(h, l, c):
+    return _true_range_loop(h, l, c) if HAVE_NUMBA else _true_range_numpy(h, l, c)
+
+@njit(cache=True)
+def _atr_loop(h, l, c, alpha, period):
+    # true range and its Wilder average in one pass
+    n = h.shape[0]
+    out = np.empty(n)
+    old_wt = 1.0 - alpha
+    w = np.nan
+    nobs = 0
+    for i in range(n):
+        tr = h[i] - l[i]
+        if i > 0:
+            prev = c[i - 1]
+            if prev == prev:
+                tr = max(tr, abs(h[i] - prev), abs(l[i] - prev))
+        if tr == tr:
+            nobs += 1
+            w = _ewm_step(w, tr, alpha, old_wt)
+        out[i] = w if nobs >= period else np.nan
+    return out
+
+def atr(h, l, c, alpha, period):
+    """Wilder ATR."""
+    if HAVE_NUMBA:
+        return _atr_loop(h, l, c, alpha, period)
+    return _ewm_numpy(_true_range_numpy(h, l, c), alpha, period)
+
+# -----------------------
+#     Rolling z-score
+# -----------------------
+
+@njit(cache=True)
+def _rolling_zscore_loop(x, window, min_periods):
+    # NaNs are left out of the window sums and the count, as pandas' rolling does
+    n = x.shape[0]
+    out = np.empty(n)
+    s = 0.0
+    ss = 0.0
+    count = 0
+    for i in range(n):
+        xi = x[i]
+        if xi == xi:
+            s += xi
+            ss += xi * xi
+            count += 1
+        if i >= window:
+            old = x[i - window]
+            if old == old:
+                s -= old
+                ss -= old * old
+                count -= 1
+        if count < min_periods or xi != xi:
+            out[i] = np.nan
+            continue
+        m = s / count
+        sd = np.sqrt(max(ss / count - m * m, 0.0))
+        out[i] = (xi - m) / sd if sd != 0 else np.nan
+    return out
+
+def _rolling_zscore_numpy(x, window, min_periods):
+    n = x.shape[0]
+    idx = np.arange(n)
+    lo = np.maximum(idx - window + 1, 0)
+    valid = x == x
+    center = x[valid].mean() if valid.any() else 0.0
+    xc = np.where(valid, x - center, 0.0)
+    cn = np.concatenate(([0], np.cumsum(valid)))
+    cs = np.concatenate(([0.0], np.cumsum(xc)))
+    cs2 = np.concatenate(([0.0], np.cumsum(xc * xc)))
+    count = cn[idx + 1] - cn[lo]
+    with np.errstate(divide="ignore", invalid="ignore"):
+        mean_c = (cs[idx + 1] - cs[lo]) / count
+        var = np.maximum((cs2[idx + 1] - cs2[lo]) / count - mean_c * mean_c, 0.0)
+        z = (xc - mean_c) / np.sqrt(var)
+    z[(count < min_periods) | (var == 0) | ~valid] = np.nan
+    return z
+
+def rolling_zscore(x, window, min_periods):
+    if HAVE_NUMBA:
+        return _rolling_zscore_loop(x, window, min_periods)
+    return _rolling_zscore_numpy(x, window, min_periods)
@@ -0,0 +1,76 @@
+'''
+Keyset pagination: each page continues after the last row of the previous one
+(WHERE (k1, k2, ...) < (:k1, :k2, ...) ORDER BY k1 DESC, k2 DESC, ... LIMIT n+1), so
+page 50 costs the same index range scan as page 1 and rows written between polls do
+not shift the pages. The cursor is the last row's key, opaque to the client
+(url-safe base64 of a JSON list).
+'''
+
+import base64
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import Decimal
+from typing import Any, List, Optional, Sequence, Tuple
+
+import orjson
+import pandas as pd
+
+class CursorError(ValueError):
+    pass
+
+def _plain(value):
+    if isinstance(value, (datetime, pd.Timestamp)):
+        return pd.Timestamp(value).isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+def encode_cursor(values: Sequence[Any]) -> str:
+    raw = orjson.dumps([_plain(v) for v in values])
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+def decode_cursor(cursor: str, size: int) -> List[Any]:
+    try:
+        values = orjson.loads(base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)))
+    except (ValueError, TypeError) as e:
+        raise CursorError(f"bad cursor: {e}")
+    if not isinstance(values, list) or len(values) != size:
+        raise CursorError("bad cursor: wrong key size")
+    return values
+
+@dataclass(frozen=True)
+class Keyset:
+    """
+    Sort key as (row field, SQL expression, Postgres type the cursor value is cast to),
+    most significant first; all columns run the same direction so one row comparison
+    (and one index scan) covers it.
+    """
+    columns: Tuple[Tuple[str, str, str], ...]
+    descending: bool = True
+
+    def where(self, cursor: Optional[str]) -> Tuple[str, dict]:
+        """Predicate for the rows after the cursor ("TRUE" on the first page) and its params."""
+        if not cursor:
+            return "TRUE", {}
+        values = decode_cursor(cursor, len(self.columns))
+        exprs = ", ".join(expr for _, expr, _ in self.columns)
+        params = ", ".join(f"CAST(:k{i} AS {typ})" for i, (_, _, typ) in enumerate(self.columns))
+        op = "<" if self.descending else ">"
+        return f"({exprs}) {op} ({params})", {f"k{i}": v for i, v in enumerate(values)}
+
+    @property
+    def order_by(self) -> str:
+        direction = "DESC" if self.descending else "ASC"
+        return ", ".join(f"{expr} {direction}" for _, expr, _ in self.columns)
+
+    def key(self, row: dict) -> List[Any]:
+        return [row[name] for name, _, _ in self.columns]
+
+    def page(self, rows: List[dict], limit: int) -> Tuple[List[dict], Optional[str]]:
+        """Rows fetched with LIMIT limit+1 -> (this page, cursor of the next one or None)."""
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(self.key(rows[-1]))
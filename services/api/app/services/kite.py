@@ -1,6 +1,7 @@
 import os
 from kiteconnect import KiteConnect
 from dotenv import load_dotenv
+from app.services.kite_fetcher import FetchRequest, HistoricalFetcher, RedisTokenBucket, TokenBucket
 
 load_dotenv()
 
@@ -31,7 +32,26 @@ def get_stocks():
     ]
     return active_stocks
 
+_fetcher = None
+
+def get_fetcher() -> HistoricalFetcher:
+    """
+    Process-wide fetcher. The rate limit is per API key, so by default the token bucket
+    lives in Redis and is shared by every worker; KITE_RATE_LIMIT_BACKEND=local keeps it in-process.
+    """
+    global _fetcher
+    if _fetcher is None:
+        if os.environ.get("KITE_RATE_LIMIT_BACKEND", "redis") == "local":
+            bucket = TokenBucket()
+        else:
+            from app.services.redis_utils import redis_client
+            bucket = RedisTokenBucket(redis_client())
+        _fetcher = HistoricalFetcher(kite, bucket, max_workers=int(os.environ.get("KITE_FETCH_WORKERS", 8)))
+    return _fetcher
+
 def get_historical_data(instrument_token, from_date, to_date, interval="5m"):
-    historical_data = kite.historical_data(instrument_token=instrument_token, from_date=from_date, to_date=to_date, interval=interval)
-    return historical_data
+    result = get_fetcher().fetch(FetchRequest(instrument_token, from_date, to_date, interval))
+    if not result.ok:
+        raise result.error
+    return result.candles
     
@@ -0,0 +1,185 @@
+'''
+Concurrent, rate-limited fetcher for kite.historical_data.
+
+Requests run on a thread pool and every call first takes a token from a shared bucket
+(Kite allows ~3 historical requests/second per API key). The bucket is in-process by
+default; RedisTokenBucket shares it across Celery workers and machines. 429s and
+transient network errors are retried with jittered exponential backoff, and results
+are yielded as soon as each request finishes.
+'''
+
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import Any, Callable, Iterable, Iterator, List, Optional
+
+# Kite's interval names for our timeframe labels
+KITE_INTERVALS = {
+    "1m": "minute",
+    "3m": "3minute",
+    "5m": "5minute",
+    "15m": "15minute",
+    "1h": "60minute",
+    "1d": "day",
+}
+
+HISTORICAL_RATE_PER_SEC = 3.0
+
+def kite_interval(interval: str) -> str:
+    return KITE_INTERVALS.get(interval, interval)
+
+# -----------------------
+#     Token buckets
+# -----------------------
+
+class TokenBucket:
+    """Thread-safe in-process token bucket."""
+
+    def __init__(self, rate: float = HISTORICAL_RATE_PER_SEC, capacity: Optional[float] = None,
+                 clock: Callable[[], float] = time.monotonic, sleep: Callable[[float], None] = time.sleep):
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._tokens = self.capacity
+        self._last = clock()
+        self._clock = clock
+        self._sleep = sleep
+        self._lock = threading.Lock()
+
+    def _reserve(self, tokens: float) -> float:
+        """Take tokens (possibly going negative) and return how long the caller must wait."""
+        with self._lock:
+            now = self._clock()
+            self._tokens = min(self.capacity, self._tokens + (now - self._last) * self.rate)
+            self._last = now
+            self._tokens -= tokens
+            return max(0.0, -self._tokens / self.rate)
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        wait = self._reserve(tokens)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+
+_REDIS_BUCKET_LUA = """
+local key = KEYS[1]
+local rate = tonumber(ARGV[1])
+local capacity = tonumber(ARGV[2])
+local requested = tonumber(ARGV[3])
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local state = redis.call('HMGET', key, 'tokens', 'ts')
+local tokens = tonumber(state[1]) or capacity
+local ts = tonumber(state[2]) or now
+tokens = math.min(capacity, tokens + math.max(0, now - ts) * rate) - requested
+redis.call('HSET', key, 'tokens', tokens, 'ts', now)
+redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000) + 60000)
+if tokens >= 0 then return '0' end
+return tostring(-tokens / rate)
+"""
+
+class RedisTokenBucket:
+    """
+    Token bucket kept in a Redis hash and updated atomically by a Lua script using the
+    Redis server clock, so every worker process draws from the same budget.
+    """
+
+    def __init__(self, redis_client, key: str = "ratelimit:kite:historical",
+                 rate: float = HISTORICAL_RATE_PER_SEC, capacity: Optional[float] = None,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.key = key
+        self.rate = rate
+        self.capacity = capacity if capacity is not None else rate
+        self._script = redis_client.register_script(_REDIS_BUCKET_LUA)
+        self._sleep = sleep
+
+    def acquire(self, tokens: float = 1.0) -> float:
+        wait = float(self._script(keys=[self.key], args=[self.rate, self.capacity, tokens]))
+        if wait > 0:
+            self._sleep(wait)
+        return wait
+
+# -----------------------
+#     Fetcher
+# -----------------------
+
+@dataclass
+class FetchRequest:
+    instrument_token: Any
+    from_date: datetime
+    to_date: datetime
+    interval: str = "5m"
+    key: Any = None  # caller's handle (symbol_id, ticker, ...), returned untouched
+
+@dataclass
+class FetchResult:
+    request: FetchRequest
+    candles: List[dict] = field(default_factory=list)
+    error: Optional[Exception] = None
+    attempts: int = 0
+    seconds: float = 0.0
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def is_retryable(exc: Exception) -> bool:
+    """429 (too many requests), 5xx and Kite's NetworkException are worth another try."""
+    code = getattr(exc, "code", None)
+    if code == 429 or (isinstance(code, int) and code >= 500):
+        return True
+    if type(exc).__name__ == "NetworkException":
+        return True
+    return "too many requests" in str(exc).lower()
+
+
+class HistoricalFetcher:
+    def __init__(self, client, bucket=None, max_workers: int = 8, max_retries: int = 5,
+                 base_backoff: float = 0.5, max_backoff: float = 8.0,
+                 sleep: Callable[[float], None] = time.sleep):
+        self.client = client
+        self.bucket = bucket if bucket is not None else TokenBucket()
+        self.max_workers = max_workers
+        self.max_retries = max_retries
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        self._sleep = sleep
+
+    def backoff(self, attempt: int) -> float:
+        # "full jitter": uniform over [0, base * 2^attempt], capped
+        return random.uniform(0, min(self.max_backoff, self.base_backoff * (2 ** attempt)))
+
+    def fetch(self, req: FetchRequest) -> FetchResult:
+        result = FetchResult(request=req)
+        started = time.perf_counter()
+        for attempt in range(self.max_retries + 1):
+            result.attempts = attempt + 1
+            self.bucket.acquire()
+            try:
+                data = self.client.historical_data(
+                    instrument_token=req.instrument_token,
+                    from_date=req.from_date,
+                    to_date=req.to_date,
+                    interval=kite_interval(req.interval),
+                )
+                result.candles = data or []
+                result.error = None
+                break
+            except Exception as e:
+                result.error = e
+                if not is_retryable(e) or attempt == self.max_retries:
+                    break
+                self._sleep(self.backoff(attempt))
+        result.seconds = time.perf_counter() - started
+        return result
+
+    def fetch_many(self, requests: Iterable[FetchRequest]) -> Iterator[FetchResult]:
+        """Yield results in completion order while the rest are still in flight."""
+        with ThreadPoolExecutor(max_workers=self.max_workers) as pool:
+            futures = [pool.submit(self.fetch, req) for req in requests]
+            for fut in as_completed(futures):
+                yield fut.result()
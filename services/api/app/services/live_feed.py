@@ -0,0 +1,270 @@
+'''
+Live feed for WebSocket clients: Redis pub/sub in, per-client fan-out.
+
+Publishers put one JSON message per event on these channels (with published_at, epoch
+seconds, so delivery latency can be measured end to end):
+
+    events:signals    new strategy_signals rows, after their commit
+    events:focus      the focus set (universe:latest) was rewritten
+    events:bar_close  bars closed for a set of symbols (next to the bar-close stream)
+    events:alerts     price alerts on signal levels (app.services.alerts), one batch per message
+
+One Hub per API process subscribes once and fans every message out. Clients choose
+topics and optionally symbol_ids; the hub indexes them by symbol, so a message only
+touches the clients that want it, and each outgoing payload is serialized once.
+Every client has a bounded outbox keyed for coalescing: a newer message with the same
+key (a symbol's signal from one strategy, the focus set, a timeframe's bar close, a
+signal's alert event)
+replaces the queued one in place, and a full outbox drops its oldest entry. A writer
+task per client drains its outbox, so a slow socket only ever delays itself.
+'''
+
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set
+
+import pandas as pd
+
+from .response_cache import bump_versions
+
+SIGNALS_CHANNEL = "events:signals"
+FOCUS_CHANNEL = "events:focus"
+BAR_CLOSE_CHANNEL = "events:bar_close"
+ALERTS_CHANNEL = "events:alerts"
+
+TOPICS = {SIGNALS_CHANNEL: "signals", FOCUS_CHANNEL: "focus", BAR_CLOSE_CHANNEL: "bars", ALERTS_CHANNEL: "alerts"}
+OUTBOX_SIZE = 256
+
+# -----------------------
+#     Publish
+# -----------------------
+
+def _plain(value):
+    if value is None or (isinstance(value, float) and math.isnan(value)):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    return value
+
+def signals_message(signals: pd.DataFrame, published_at: Optional[float] = None) -> str:
+    rows = [{k: _plain(v) for k, v in row.items()} for row in signals.to_dict("records")]
+    return json.dumps({"published_at": published_at or time.time(), "signals": rows})
+
+def publish_signals(r, signals: pd.DataFrame) -> int:
+    """Announce freshly written signals; returns how many."""
+    if signals.empty:
+        return 0
+    pipe = r.pipeline(transaction=False)
+    pipe.publish(SIGNALS_CHANNEL, signals_message(signals))
+    bump_versions(pipe, "signals")   # read API caches
+    pipe.execute()
+    return len(signals)
+
+def focus_message(tokens: List[str], published_at: Optional[float] = None, **extra) -> str:
+    return json.dumps({"published_at": published_at or time.time(), "tokens": list(tokens), **extra})
+
+def bar_close_message(timeframe: str, ts: pd.Timestamp, symbol_ids: Iterable[int],
+                      published_at: Optional[float] = None) -> str:
+    return json.dumps({"published_at": published_at or time.time(), "timeframe": timeframe,
+                       "ts": pd.Timestamp(ts).isoformat(), "symbol_ids": sorted(int(s) for s in symbol_ids)})
+
+# -----------------------
+#     Clients
+# -----------------------
+
+class Client:
+    def __init__(self, send: Callable[[str], Awaitable], topics: Iterable[str] = TOPICS.values(),
+                 symbol_ids: Optional[Iterable[int]] = None, max_queue: int = OUTBOX_SIZE):
+        self.send = send
+        self.topics: Set[str] = set(topics)
+        self.symbol_ids: Optional[Set[int]] = {int(s) for s in symbol_ids} if symbol_ids is not None else None
+        self.max_queue = max_queue
+        self.outbox: "OrderedDict[tuple, str]" = OrderedDict()
+        self.sent = self.coalesced = self.dropped = 0
+        self.closed = False
+        self._ready = asyncio.Event()
+
+    def offer(self, key: tuple, payload: str) -> None:
+        if key in self.outbox:
+            self.outbox[key] = payload  # keeps its place in line, carries the newest value
+            self.coalesced += 1
+        else:
+            if len(self.outbox) >= self.max_queue:
+                self.outbox.popitem(last=False)
+                self.dropped += 1
+            self.outbox[key] = payload
+        self._ready.set()
+
+    async def run(self) -> None:
+        """Drain the outbox until the socket fails or the client is closed."""
+        while not self.closed:
+            await self._ready.wait()
+            self._ready.clear()
+            while self.outbox and not self.closed:
+                _, payload = self.outbox.popitem(last=False)
+                try:
+                    await self.send(payload)
+                except Exception:
+                    self.closed = True
+                    return
+                self.sent += 1
+
+# -----------------------
+#     Hub
+# -----------------------
+
+class Hub:
+    def __init__(self, max_queue: int = OUTBOX_SIZE):
+        self.max_queue = max_queue
+        self.clients: Dict[Client, asyncio.Task] = {}
+        self.everything: Set[Client] = set()          # no symbol filter
+        self.by_symbol: Dict[int, Set[Client]] = {}
+        self.received = 0
+        self._listener: Optional[asyncio.Task] = None
+
+    # --- connections ---
+
+    def connect(self, send: Callable[[str], Awaitable], topics: Iterable[str] = TOPICS.values(),
+                symbol_ids: Optional[Iterable[int]] = None) -> Client:
+        client = Client(send, topics, symbol_ids, self.max_queue)
+        self._index(client)
+        self.clients[client] = asyncio.get_running_loop().create_task(client.run())
+        return client
+
+    def update(self, client: Client, topics: Optional[Iterable[str]] = None,
+               symbol_ids: Optional[Iterable[int]] = None, all_symbols: bool = False) -> None:
+        self._unindex(client)
+        if topics is not None:
+            client.topics = set(topics)
+        if all_symbols:
+            client.symbol_ids = None
+        elif symbol_ids is not None:
+            client.symbol_ids = {int(s) for s in symbol_ids}
+        self._index(client)
+
+    async def disconnect(self, client: Client) -> None:
+        self._unindex(client)
+        client.closed = True
+        task = self.clients.pop(client, None)
+        if task is not None:
+            task.cancel()
+            try:
+                await task
+            except (asyncio.CancelledError, Exception):
+                pass
+
+    def _index(self, client: Client) -> None:
+        if client.symbol_ids is None:
+            self.everything.add(client)
+        else:
+            for sid in client.symbol_ids:
+                self.by_symbol.setdefault(sid, set()).add(client)
+
+    def _unindex(self, client: Client) -> None:
+        self.everything.discard(client)
+        for sid in client.symbol_ids or ():
+            subs = self.by_symbol.get(sid)
+            if subs is not None:
+                subs.discard(client)
+                if not subs:
+                    del self.by_symbol[sid]
+
+    def _targets(self, symbol_ids: Iterable[int]) -> Set[Client]:
+        out = set(self.everything)
+        for sid in symbol_ids:
+            out |= self.by_symbol.get(sid, set())
+        return out
+
+    # --- fan-out ---
+
+    def dispatch(self, channel: str, data: str) -> int:
+        """Route one pub/sub message; returns the number of outbox offers."""
+        self.received += 1
+        msg = json.loads(data)
+        topic = TOPICS.get(channel)
+        published_at = msg.get("published_at")
+        offers = 0
+        if topic == "signals":
+            for sig in msg.get("signals", []):
+                sid = int(sig["symbol_id"])
+                payload = json.dumps({"topic": topic, "published_at": published_at, **sig})
+                key = (topic, sid, sig.get("strategy_name"))
+                for client in self._targets([sid]):
+                    if topic in client.topics:
+                        client.offer(key, payload)
+                        offers += 1
+        elif topic == "alerts":
+            for alert in msg.get("alerts", []):
+                payload = json.dumps({"topic": topic, "published_at": published_at, **alert})
+                key = (topic, alert.get("key"), alert.get("event"))
+                for client in self._targets([int(alert["symbol_id"])]):
+                    if topic in client.topics:
+                        client.offer(key, payload)
+                        offers += 1
+        elif topic == "focus":
+            payload = json.dumps({"topic": topic, **msg})
+            for client in list(self.clients):
+                if topic in client.topics:
+                    client.offer((topic,), payload)
+                    offers += 1
+        elif topic == "bars":
+            payload = json.dumps({"topic": topic, **msg})
+            key = (topic, msg.get("timeframe"))
+            for client in self._targets(int(s) for s in msg.get("symbol_ids", [])):
+                if topic in client.topics:
+                    client.offer(key, payload)
+                    offers += 1
+        return offers
+
+    async def listen(self, r, retry_seconds: float = 1.0) -> None:
+        """Subscribe once (asyncio Redis client) and dispatch forever, resubscribing after errors."""
+        while True:
+            pubsub = r.pubsub(ignore_subscribe_messages=True)
+            try:
+                await pubsub.subscribe(*TOPICS)
+                async for message in pubsub.listen():
+                    if message.get("type") == "message":
+                        try:
+                            self.dispatch(message["channel"], message["data"])
+                        except (ValueError, KeyError, TypeError) as e:
+                            print(f"Live feed: bad message on {message['channel']}: {e}")
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"Live feed subscription failed, retrying: {e}")
+                await asyncio.sleep(retry_seconds)
+            finally:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
+
+    def start(self, r) -> None:
+        if self._listener is None or self._listener.done():
+            self._listener = asyncio.get_running_loop().create_task(self.listen(r))
+
+    async def stop(self) -> None:
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+        for client in list(self.clients):
+            await self.disconnect(client)
+
+    def stats(self) -> dict:
+        clients = list(self.clients)
+        return {
+            "clients": len(clients),
+            "received": self.received,
+            "queued": sum(len(c.outbox) for c in clients),
+            "sent": sum(c.sent for c in clients),
+            "coalesced": sum(c.coalesced for c in clients),
+            "dropped": sum(c.dropped for c in clients),
+        }
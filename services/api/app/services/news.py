@@ -0,0 +1,537 @@
+'''
+News pipeline: feeds -> dedupe -> NER ticker-linking + sentiment -> news table.
+
+    fetch      every feed concurrently over one httpx.AsyncClient (semaphore-bounded),
+               with ETag / Last-Modified so unchanged feeds cost a 304
+    parse      RSS 2.0 / Atom (xml.etree) and JSON Feed / plain item lists
+    dedupe     on a content hash of the normalized title + summary, so the same story
+               syndicated under different URLs is stored once: an in-process Bloom filter
+               drops what this worker has already seen without a Redis round trip, one
+               pipeline against the day-bucketed news:seen:<date> sets settles the rest
+               across workers, and the unique body_hash in the table is the last guard;
+               articles are marked seen only after their write is committed
+    analyze    the new articles in batches: spaCy nlp.pipe (NER only) -> ORG entities and
+               upper-case ticker tokens linked to symbols; one batched call of a
+               transformers text-classification pipeline on CPU for sentiment
+    persist    one INSERT ... FROM jsonb_to_recordset per write batch, ON CONFLICT DO NOTHING
+
+The models are loaded once per process (load_nlp / load_sentiment cache them) and kept
+warm by the long-lived app.workers.news_worker, never per task. Throughput is bound by
+the classifier: with max_length 128 and batches of 32, a CPU does thousands of headlines
+a minute; nlp.pipe with the parser and tagger disabled is several times faster than that.
+
+httpx, spaCy, torch and transformers are imported where they are used, so the parsing,
+dedupe and linking parts import (and test) without them.
+'''
+
+import asyncio
+import hashlib
+import html
+import math
+import re
+import threading
+import xml.etree.ElementTree as ET
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import numpy as np
+import orjson
+from sqlalchemy import text
+
+SEEN_TTL = 3 * 24 * 3600     # a day bucket outlives the next day's lookups
+ENTITY_LABELS = {"ORG"}
+
+def seen_key(day) -> str:
+    return f"news:seen:{day}"
+
+@dataclass
+class Feed:
+    name: str
+    url: str
+    kind: str = "rss"           # rss (RSS 2.0 / Atom) or json (JSON Feed / a list of items)
+    reliability: float = 0.5    # source weight stored with every article
+
+@dataclass
+class NewsConfig:
+    feeds: List[Feed] = field(default_factory=list)
+    poll_seconds: float = 60.0
+    concurrency: int = 8        # feeds fetched at once
+    timeout: float = 10.0
+    spacy_model: str = "en_core_web_sm"
+    sentiment_model: str = "ProsusAI/finbert"
+    nlp_batch_size: int = 256
+    sentiment_batch_size: int = 32
+    max_length: int = 128       # classifier tokens; headlines + ledes fit, bodies are cut
+    max_chars: int = 1000       # text handed to spaCy
+    torch_threads: int = 0      # 0: torch's default
+    score_unlinked: bool = False   # classify articles that link to no symbol too
+    write_batch_size: int = 1000
+    bloom_capacity: int = 1_000_000
+    linker_refresh_seconds: float = 3600.0
+
+    @classmethod
+    def from_dict(cls, config: dict) -> "NewsConfig":
+        known = cls.__dataclass_fields__
+        values = {k: v for k, v in (config or {}).items() if k in known}
+        values["feeds"] = [f if isinstance(f, Feed) else Feed(**f) for f in values.get("feeds") or []]
+        return cls(**values)
+
+@dataclass
+class Article:
+    source: str
+    url: str
+    title: str
+    summary: str
+    ts: datetime
+    reliability: float = 0.5
+    body_hash: str = ""
+    tickers: List[str] = field(default_factory=list)
+    symbol_ids: List[int] = field(default_factory=list)
+    sentiment: Optional[float] = None
+    sentiment_label: Optional[str] = None
+
+    @property
+    def text(self) -> str:
+        return f"{self.title}. {self.summary}" if self.summary else self.title
+
+# -----------------------
+#     Parsing
+# -----------------------
+
+TAG_RE = re.compile(r"<[^>]+>")
+SPACE_RE = re.compile(r"\s+")
+WORD_RE = re.compile(r"[a-z0-9]+")
+TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "mc_cid", "mc_eid")
+
+def clean_text(value: Optional[str]) -> str:
+    """Plain text of an HTML fragment: tags dropped, entities unescaped, whitespace collapsed."""
+    if not value:
+        return ""
+    return SPACE_RE.sub(" ", html.unescape(TAG_RE.sub(" ", value))).strip()
+
+def canonical_url(url: str) -> str:
+    """Lower-cased scheme/host, no fragment, no tracking parameters."""
+    parts = urlsplit(url.strip())
+    query = [(k, v) for k, v in parse_qsl(parts.query, keep_blank_values=True)
+             if not k.lower().startswith(TRACKING_PARAMS)]
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, urlencode(query), ""))
+
+def content_hash(title: str, summary: str = "") -> str:
+    """Hash of the normalized words, so case, punctuation and markup do not make a new story."""
+    words = WORD_RE.findall(f"{title} {summary}".lower())
+    return hashlib.blake2b(" ".join(words).encode(), digest_size=16).hexdigest()
+
+def parse_time(value: Optional[str], now: datetime) -> datetime:
+    """RFC 822 (RSS) or ISO 8601 (Atom, JSON Feed) -> aware UTC; missing, bad or future -> now."""
+    ts = None
+    if value:
+        value = value.strip()
+        try:
+            ts = datetime.fromisoformat(value)
+        except ValueError:
+            try:
+                ts = parsedate_to_datetime(value)
+            except (TypeError, ValueError):
+                ts = None
+    if ts is None:
+        return now
+    if ts.tzinfo is None:
+        ts = ts.replace(tzinfo=timezone.utc)
+    return min(ts.astimezone(timezone.utc), now)
+
+def make_article(feed: Feed, url: str, title: str, summary: str, published: Optional[str],
+                 now: datetime) -> Article:
+    title, summary = clean_text(title), clean_text(summary)
+    return Article(source=feed.name, url=canonical_url(url), title=title, summary=summary,
+                   ts=parse_time(published, now), reliability=feed.reliability,
+                   body_hash=content_hash(title, summary))
+
+def _local(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+def parse_rss(content: bytes, feed: Feed, now: Optional[datetime] = None) -> List[Article]:
+    """RSS 2.0 <item>s and Atom <entry>s (namespaces ignored)."""
+    now = now or datetime.now(timezone.utc)
+    articles = []
+    for node in ET.fromstring(content).iter():
+        if _local(node.tag) not in ("item", "entry"):
+            continue
+        fields: Dict[str, str] = {}
+        for child in node:
+            name = _local(child.tag)
+            if name == "link" and child.get("href"):     # Atom
+                if child.get("rel", "alternate") == "alternate":
+                    fields.setdefault("link", child.get("href"))
+            elif child.text and name not in fields:
+                fields[name] = child.text
+        title = fields.get("title")
+        link = fields.get("link") or fields.get("guid") or fields.get("id")
+        if not title or not link:
+            continue
+        summary = fields.get("description") or fields.get("summary") or fields.get("content") or ""
+        published = fields.get("pubDate") or fields.get("published") or fields.get("updated") or fields.get("date")
+        articles.append(make_article(feed, link, title, summary, published, now))
+    return articles
+
+def parse_json(content: bytes, feed: Feed, now: Optional[datetime] = None) -> List[Article]:
+    """JSON Feed ({"items": [...]}) or a bare list of items."""
+    now = now or datetime.now(timezone.utc)
+    data = orjson.loads(content)
+    items = (data.get("items") or data.get("articles") or []) if isinstance(data, dict) else data
+    articles = []
+    for item in items:
+        title = item.get("title")
+        link = item.get("url") or item.get("link") or item.get("external_url")
+        if not title or not link:
+            continue
+        summary = (item.get("summary") or item.get("content_text") or item.get("description")
+                   or item.get("content_html") or "")
+        published = item.get("date_published") or item.get("published") or item.get("publishedAt")
+        articles.append(make_article(feed, link, title, summary, published, now))
+    return articles
+
+PARSERS = {"rss": parse_rss, "json": parse_json}
+
+def parse_feed(feed: Feed, content: bytes, now: Optional[datetime] = None) -> List[Article]:
+    try:
+        return PARSERS[feed.kind](content, feed, now)
+    except Exception as e:
+        # one broken feed must not stop the poll
+        print(f"Failed to parse feed {feed.name}: {e}")
+        return []
+
+# -----------------------
+#     Fetching
+# -----------------------
+
+def make_client(config: NewsConfig):
+    import httpx
+    return httpx.AsyncClient(
+        timeout=config.timeout,
+        follow_redirects=True,
+        limits=httpx.Limits(max_connections=config.concurrency, max_keepalive_connections=config.concurrency),
+        headers={"User-Agent": "pragyan-news/1.0"},
+    )
+
+async def fetch_feeds(client, feeds: Sequence[Feed], concurrency: int = 8,
+                      validators: Optional[Dict[str, Tuple[Optional[str], Optional[str]]]] = None,
+                      updated: Optional[Dict[str, Tuple[Optional[str], Optional[str]]]] = None,
+                      ) -> List[Tuple[Feed, Optional[bytes]]]:
+    """
+    GET every feed, at most `concurrency` at a time. validators (url -> (etag, last-modified))
+    are sent for conditional requests; the responses' new ones go into `updated` (validators
+    itself by default). Content is None for 304s and failures.
+    """
+    validators = validators if validators is not None else {}
+    updated = updated if updated is not None else validators
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one(feed: Feed) -> Tuple[Feed, Optional[bytes]]:
+        etag, modified = validators.get(feed.url, (None, None))
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if modified:
+            headers["If-Modified-Since"] = modified
+        async with sem:
+            try:
+                resp = await client.get(feed.url, headers=headers)
+            except Exception as e:
+                print(f"Failed to fetch feed {feed.name}: {e}")
+                return feed, None
+        if resp.status_code == 304:
+            return feed, None
+        if resp.status_code >= 400:
+            print(f"Feed {feed.name} returned {resp.status_code}")
+            return feed, None
+        updated[feed.url] = (resp.headers.get("etag"), resp.headers.get("last-modified"))
+        return feed, resp.content
+
+    return list(await asyncio.gather(*(one(feed) for feed in feeds)))
+
+# -----------------------
+#     Dedupe
+# -----------------------
+
+class BloomFilter:
+    """Bit array with k positions per key by double hashing one 128-bit blake2b digest."""
+
+    def __init__(self, capacity: int = 1_000_000, error_rate: float = 1e-4):
+        self.capacity = capacity
+        self.m = int(math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.k = max(1, int(round(self.m / capacity * math.log(2))))
+        self.bits = np.zeros((self.m + 7) // 8, dtype=np.uint8)
+        self.count = 0
+
+    def _positions(self, keys: Sequence[str]) -> np.ndarray:
+        digests = b"".join(hashlib.blake2b(k.encode(), digest_size=16).digest() for k in keys)
+        h = np.frombuffer(digests, dtype="<u8").reshape(len(keys), 2)
+        i = np.arange(self.k, dtype=np.uint64)
+        return (h[:, :1] + i * h[:, 1:]) % np.uint64(self.m)
+
+    def contains(self, keys: Sequence[str]) -> np.ndarray:
+        if not keys:
+            return np.zeros(0, dtype=bool)
+        pos = self._positions(keys)
+        hit = self.bits[pos >> np.uint64(3)] & (np.uint8(1) << (pos & np.uint64(7)).astype(np.uint8))
+        return (hit != 0).all(axis=1)
+
+    def add(self, keys: Sequence[str]) -> None:
+        if not keys:
+            return
+        if self.count + len(keys) > self.capacity:
+            # past capacity the error rate climbs; start over (Redis still has the recent days)
+            self.bits[:] = 0
+            self.count = 0
+        pos = self._positions(keys).ravel()
+        np.bitwise_or.at(self.bits, pos >> np.uint64(3), np.uint8(1) << (pos & np.uint64(7)).astype(np.uint8))
+        self.count += len(keys)
+
+    def __contains__(self, key: str) -> bool:
+        return bool(self.contains([key])[0])
+
+class Deduper:
+    """
+    Drops articles already seen. In-batch duplicates and Bloom hits go without a round
+    trip; the rest is one pipeline: SMISMEMBER yesterday's and today's sets. fresh() only
+    checks: the articles go into the Bloom filter and today's set through mark_seen(),
+    once they are committed, so a failed write or commit leaves them to the next poll.
+    """
+
+    def __init__(self, r=None, bloom: Optional[BloomFilter] = None, clock: Callable[[], datetime] = None):
+        self.r = r
+        self.bloom = bloom
+        self.clock = clock or (lambda: datetime.now(timezone.utc))
+
+    def fresh(self, articles: Iterable[Article]) -> List[Article]:
+        unique: Dict[str, Article] = {}
+        for a in articles:
+            unique.setdefault(a.body_hash, a)
+        batch = list(unique.values())
+        if self.bloom is not None and batch:
+            maybe = self.bloom.contains([a.body_hash for a in batch])
+            batch = [a for a, m in zip(batch, maybe) if not m]
+        if not batch or self.r is None:
+            return batch
+        hashes = [a.body_hash for a in batch]
+        today = self.clock().date()
+        pipe = self.r.pipeline(transaction=False)
+        pipe.smismember(seen_key(today - timedelta(days=1)), hashes)
+        pipe.smismember(seen_key(today), hashes)
+        before, seen = pipe.execute()
+        return [a for a, b, t in zip(batch, before, seen) if not int(b) and not int(t)]
+
+    def mark_seen(self, articles: Iterable[Article]) -> None:
+        hashes = list({a.body_hash for a in articles})
+        if not hashes:
+            return
+        if self.bloom is not None:
+            self.bloom.add(hashes)
+        if self.r is None:
+            return
+        key = seen_key(self.clock().date())
+        pipe = self.r.pipeline(transaction=False)
+        pipe.sadd(key, *hashes)
+        pipe.expire(key, SEEN_TTL)
+        pipe.execute()
+
+# -----------------------
+#     Ticker linking
+# -----------------------
+
+CORPORATE_WORDS = {"ltd", "limited", "inc", "corp", "corporation", "co", "company", "plc", "pvt", "private", "the"}
+TICKER_RE = re.compile(r"\b[A-Z][A-Z0-9&]{2,19}\b")
+# upper-case words in market news that are not company mentions even when a ticker matches
+TICKER_STOPWORDS = {
+    "CEO", "CFO", "IPO", "GDP", "RBI", "SEBI", "NSE", "BSE", "USD", "INR", "FII", "FPI", "DII", "EPS",
+    "YOY", "QOQ", "AGM", "EGM", "EBITDA", "NIFTY", "SENSEX", "ETF", "CPI", "WPI", "MPC", "GST", "NAV",
+}
+
+def normalize_name(name: str) -> str:
+    words = WORD_RE.findall(name.lower().replace("&", " and "))
+    return " ".join(w for w in words if w not in CORPORATE_WORDS)
+
+class TickerLinker:
+    """
+    Entity text -> symbol by normalized company name ("Infosys Ltd." == "infosys") or ticker, plus
+    upper-case tokens of the text that are listed tickers. A name's first word is an alias
+    too when no other listed name starts with it ("HDFC Bank" -> "hdfc" would not be).
+    """
+
+    def __init__(self, symbols: Iterable[Tuple[int, str, Optional[str]]]):
+        self.tickers: Dict[str, int] = {}
+        self.names: Dict[str, int] = {}
+        self.ticker_of: Dict[int, str] = {}
+        normalized = []
+        for sid, ticker, name in symbols:
+            sid, ticker = int(sid), str(ticker).upper()
+            self.tickers[ticker] = sid
+            self.ticker_of[sid] = ticker
+            if ticker not in TICKER_STOPWORDS:
+                self.names.setdefault(normalize_name(ticker), sid)
+            if name:
+                normalized.append((sid, normalize_name(name)))
+        firsts = Counter(n.split()[0] for _, n in normalized if n)
+        for sid, n in normalized:
+            if not n:
+                continue
+            self.names[n] = sid
+            first = n.split()[0]
+            if " " in n and firsts[first] == 1 and len(first) >= 4:
+                self.names.setdefault(first, sid)
+
+    @classmethod
+    def from_db(cls, db) -> "TickerLinker":
+        rows = db.execute(text("SELECT id, ticker, name FROM symbols WHERE is_active")).fetchall()
+        return cls(rows)
+
+    def link(self, text_: str, entities: Iterable[str] = ()) -> Tuple[List[int], List[str]]:
+        ids = set()
+        for ent in entities:
+            sid = self.names.get(normalize_name(ent))
+            if sid is not None:
+                ids.add(sid)
+        for token in TICKER_RE.findall(text_):
+            if token not in TICKER_STOPWORDS and token in self.tickers:
+                ids.add(self.tickers[token])
+        ids = sorted(ids)
+        return ids, [self.ticker_of[i] for i in ids]
+
+# -----------------------
+#     Models
+# -----------------------
+
+_MODELS: Dict[Tuple[str, str], Any] = {}
+_MODELS_LOCK = threading.Lock()
+
+def load_nlp(name: str = "en_core_web_sm"):
+    """spaCy pipeline with only the NER path (tok2vec + ner), loaded once per process."""
+    key = ("spacy", name)
+    with _MODELS_LOCK:
+        if key not in _MODELS:
+            import spacy
+            _MODELS[key] = spacy.load(name, disable=["tagger", "parser", "attribute_ruler", "lemmatizer"])
+            print(f"Loaded spaCy model {name}")
+    return _MODELS[key]
+
+def load_sentiment(name: str = "ProsusAI/finbert", threads: int = 0):
+    """transformers text-classification pipeline on CPU returning every label's score, loaded once per process."""
+    key = ("sentiment", name)
+    with _MODELS_LOCK:
+        if key not in _MODELS:
+            import torch
+            from transformers import pipeline
+            if threads:
+                torch.set_num_threads(threads)
+            _MODELS[key] = pipeline("text-classification", model=name, device=-1, top_k=None)
+            print(f"Loaded sentiment model {name}")
+    return _MODELS[key]
+
+def sentiment_scores(outputs: Sequence[Any]) -> List[Tuple[float, str]]:
+    """Per text: (P(positive) - P(negative), most likely label) from the pipeline's label scores."""
+    scored = []
+    for out in outputs:
+        labels = [out] if isinstance(out, dict) else out
+        probs = {d["label"].lower(): float(d["score"]) for d in labels}
+        label = max(probs, key=probs.get)
+        scored.append((round(probs.get("positive", 0.0) - probs.get("negative", 0.0), 4), label))
+    return scored
+
+class NewsAnalyzer:
+    """Links and scores articles in batches: one nlp.pipe pass, one classifier call."""
+
+    def __init__(self, nlp, classifier, linker: TickerLinker, config: NewsConfig = None):
+        self.nlp = nlp
+        self.classifier = classifier
+        self.linker = linker
+        self.config = config or NewsConfig()
+
+    @classmethod
+    def load(cls, config: NewsConfig, linker: TickerLinker) -> "NewsAnalyzer":
+        return cls(load_nlp(config.spacy_model), load_sentiment(config.sentiment_model, config.torch_threads),
+                   linker, config)
+
+    def analyze(self, articles: List[Article]) -> List[Article]:
+        if not articles:
+            return articles
+        cfg = self.config
+        texts = [a.text[:cfg.max_chars] for a in articles]
+        for a, doc in zip(articles, self.nlp.pipe(texts, batch_size=cfg.nlp_batch_size)):
+            entities = [e.text for e in doc.ents if e.label_ in ENTITY_LABELS]
+            a.symbol_ids, a.tickers = self.linker.link(a.text, entities)
+        todo = [i for i, a in enumerate(articles) if a.symbol_ids or cfg.score_unlinked]
+        if self.classifier is not None and todo:
+            outputs = self.classifier([texts[i] for i in todo], batch_size=cfg.sentiment_batch_size,
+                                      truncation=True, max_length=cfg.max_length)
+            for i, (score, label) in zip(todo, sentiment_scores(outputs)):
+                articles[i].sentiment, articles[i].sentiment_label = score, label
+        return articles
+
+# -----------------------
+#     Persist
+# -----------------------
+
+INSERT_NEWS_SQL = text("""
+    INSERT INTO news (ts, source, url, title, summary, body_hash, tickers, symbol_ids,
+                      sentiment, sentiment_label, reliability)
+    SELECT x.ts, x.source, x.url, x.title, x.summary, x.body_hash, x.tickers, x.symbol_ids,
+           x.sentiment, x.sentiment_label, x.reliability
+    FROM jsonb_to_recordset(CAST(:rows AS jsonb)) AS x(
+        ts timestamptz, source text, url text, title text, summary text, body_hash text,
+        tickers text[], symbol_ids integer[], sentiment double precision, sentiment_label text,
+        reliability double precision
+    )
+    ON CONFLICT (body_hash) DO NOTHING
+""")
+
+NEWS_FIELDS = ("ts", "source", "url", "title", "summary", "body_hash", "tickers", "symbol_ids",
+               "sentiment", "sentiment_label", "reliability")
+
+def write_news(db, articles: Sequence[Article], batch_size: int = 1000) -> int:
+    """One statement per batch (ragged ticker arrays do not unnest, a JSON recordset does)."""
+    written = 0
+    for start in range(0, len(articles), batch_size):
+        rows = [{f: getattr(a, f) for f in NEWS_FIELDS} for a in articles[start:start + batch_size]]
+        res = db.execute(INSERT_NEWS_SQL, {"rows": orjson.dumps(rows).decode()})
+        written += max(res.rowcount or 0, 0)
+    return written
+
+# -----------------------
+#     Pipeline
+# -----------------------
+
+class NewsPipeline:
+    def __init__(self, config: NewsConfig, analyzer: NewsAnalyzer, deduper: Deduper):
+        self.config = config
+        self.analyzer = analyzer
+        self.deduper = deduper
+        self.validators: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+
+    async def fetch(self, client) -> Tuple[List[Article], Dict[str, Tuple[Optional[str], Optional[str]]]]:
+        """
+        The feeds' articles and their new validators. Pass both to process(): the validators
+        are kept only once the articles are committed, so a failed poll refetches in full.
+        """
+        validators: Dict[str, Tuple[Optional[str], Optional[str]]] = {}
+        results = await fetch_feeds(client, self.config.feeds, self.config.concurrency, self.validators, validators)
+        now = datetime.now(timezone.utc)
+        return [a for feed, content in results if content for a in parse_feed(feed, content, now)], validators
+
+    def process(self, db, articles: List[Article],
+                validators: Optional[Dict[str, Tuple[Optional[str], Optional[str]]]] = None) -> dict:
+        """
+        Dedupe, analyze, write and commit. Only once committed are the new articles marked
+        seen and the feeds' validators (from fetch) kept.
+        """
+        fresh = self.deduper.fresh(articles)
+        self.analyzer.analyze(fresh)
+        written = write_news(db, fresh, self.config.write_batch_size) if fresh else 0
+        db.commit()
+        self.deduper.mark_seen(fresh)
+        self.validators.update(validators or {})
+        return {"fetched": len(articles), "new": len(fresh), "written": written,
+                "linked": sum(1 for a in fresh if a.symbol_ids)}
@@ -0,0 +1,225 @@
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .features import FeatureConfig, ewm_alpha, _ensure_cols
+
+PANEL_COLUMNS = ["symbol_id", "ts", "o", "h", "l", "c", "v"]
+
+# -----------------------
+#     Panel kernels
+# -----------------------
+# The long frame is sorted by (symbol_id, ts). Each symbol is a contiguous segment;
+# `starts` marks the first row of every segment.
+
+def _segments(keys: np.ndarray) -> np.ndarray:
+    starts = np.ones(len(keys), dtype=bool)
+    starts[1:] = keys[1:] != keys[:-1]
+    return starts
+
+def _ewm_2d(x: np.ndarray, alpha: np.ndarray, min_periods: np.ndarray) -> np.ndarray:
+    """
+    ewm(adjust=False).mean() down axis 0 for every column at once (one Python step per bar,
+    vectorised across symbols). Same update as pandas, so values are bit-identical.
+    NaN cells (leading NaNs and the padding after short symbols) do not advance a column.
+    """
+    n_rows, n_cols = x.shape
+    out = np.empty_like(x)
+    w = np.full(n_cols, np.nan)
+    nobs = np.zeros(n_cols)
+    old_wt = 1.0 - alpha
+    denom = old_wt + alpha
+    for t in range(n_rows):
+        xt = x[t]
+        obs = xt == xt
+        nobs += obs
+        started = w == w
+        w = np.where(obs & started & (w != xt), (old_wt * w + alpha * xt) / denom, w)
+        w = np.where(obs & ~started, xt, w)
+        out[t] = np.where(nobs >= min_periods, w, np.nan)
+    return out
+
+def _segment_rolling(x: np.ndarray, starts: np.ndarray, window: int, min_periods: int, with_std: bool = False):
+    """
+    Rolling mean (and population std) that never crosses a segment boundary, via
+    cumulative sums. Values are centred per segment first to keep the sums small.
+    """
+    n = len(x)
+    seg = np.cumsum(starts) - 1
+    start_idx = np.flatnonzero(starts)
+    seg_mean = np.add.reduceat(x, start_idx) / np.diff(np.append(start_idx, n))
+    xc = x - seg_mean[seg]
+
+    idx = np.arange(n)
+    lo = np.maximum(idx - window + 1, start_idx[seg])
+    count = idx - lo + 1
+
+    cs = np.concatenate(([0.0], np.cumsum(xc)))
+    s = cs[idx + 1] - cs[lo]
+    mean_c = s / count
+    mean = np.where(count >= min_periods, mean_c + seg_mean[seg], np.nan)
+    if not with_std:
+        return mean
+    cs2 = np.concatenate(([0.0], np.cumsum(xc * xc)))
+    ss = cs2[idx + 1] - cs2[lo]
+    var = np.maximum(ss / count - mean_c * mean_c, 0.0)
+    std = np.where(count >= min_periods, np.sqrt(var), np.nan)
+    return mean, std
+
+def _local_days(ts: pd.Series) -> np.ndarray:
+    """Calendar day of each ts in its own timezone (same as ts.dt.date), as datetime64[D]."""
+    if ts.dt.tz is not None:
+        ts = ts.dt.tz_localize(None)
+    return ts.to_numpy().astype("datetime64[D]")
+
+
+def _point_in_time_adtv(value: np.ndarray, dtv: np.ndarray, day_starts: np.ndarray,
+                        day_seg_starts: np.ndarray, window: int, min_periods: int) -> np.ndarray:
+    """
+    Per bar: (traded value of up to window-1 completed days + today's value so far)
+    / number of days in that sum. NaN below min_periods days.
+    """
+    n_days = len(dtv)
+    d = np.arange(n_days)
+    seg_start = np.flatnonzero(day_seg_starts)[np.cumsum(day_seg_starts) - 1]
+    lo = np.maximum(d - (window - 1), seg_start)
+    cs = np.concatenate(([0.0], np.cumsum(dtv)))
+    prev_sum = cs[d] - cs[lo]
+    prev_count = d - lo
+
+    day_of_bar = np.cumsum(day_starts) - 1
+    today = pd.Series(value).groupby(day_of_bar).cumsum().to_numpy()
+    count = prev_count[day_of_bar] + 1
+    return np.where(count >= min_periods, (prev_sum[day_of_bar] + today) / count, np.nan)
+
+
+# -----------------------
+#     Orchestrator
+# -----------------------
+
+@np.errstate(divide="ignore", invalid="ignore")
+def compute_features_panel(panel: pd.DataFrame, cfg: FeatureConfig = FeatureConfig(),
+                           point_in_time_adtv: bool = False,
+                           include: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    compute_features for a whole universe in one pass.
+
+    Takes a long frame (symbol_id, ts, o, h, l, c, v) and returns it sorted by
+    (symbol_id, ts) with the same feature columns compute_features adds per symbol.
+    Recursive indicators run as one 2-D recursion with symbols on the column axis,
+    rolling/session aggregates as segment-aware cumulative sums. rel_strength is not
+    computed here (baseline alignment is per symbol).
+
+    ADTV matches compute_features (today's full traded value) unless point_in_time_adtv,
+    which only counts today's bars up to each row, as IncrementalFeatureEngine does;
+    backtests need that to avoid looking ahead.
+
+    `include` limits the work to some feature groups (rsi, macd, atr, vwap, vol_z, ma,
+    adtv), as in IncrementalFeatureEngine.
+    """
+    _ensure_cols(panel, PANEL_COLUMNS)
+    df = panel.sort_values(["symbol_id", "ts"], kind="stable").reset_index(drop=True).copy()
+    n = len(df)
+    if n == 0:
+        return df
+    todo = set(include) if include else {"rsi", "macd", "atr", "vwap", "vol_z", "ma", "adtv"}
+
+    h = df["h"].to_numpy(dtype=float)
+    l = df["l"].to_numpy(dtype=float)
+    c = df["c"].to_numpy(dtype=float)
+    v = df["v"].to_numpy(dtype=float)
+
+    starts = _segments(df["symbol_id"].to_numpy())
+    seg = np.cumsum(starts) - 1
+    start_idx = np.flatnonzero(starts)
+    pos = np.arange(n) - start_idx[seg]
+    n_sym = len(start_idx)
+    depth = int(pos.max()) + 1
+
+    prev_c = np.empty(n)
+    prev_c[0] = np.nan
+    prev_c[1:] = c[:-1]
+    prev_c[starts] = np.nan
+
+    # --- recursive indicators: rsi gains/losses, macd emas, atr ---
+    delta = c - prev_c
+    gain = np.clip(delta, 0.0, None)
+    loss = -np.clip(delta, None, 0.0)
+    tr = np.fmax(h - l, np.fmax(np.abs(h - prev_c), np.abs(l - prev_c)))
+
+    series = {}
+    if "rsi" in todo:
+        series["gain"] = (gain, ewm_alpha(alpha=1 / cfg.rsi_period), cfg.rsi_period)
+        series["loss"] = (loss, ewm_alpha(alpha=1 / cfg.rsi_period), cfg.rsi_period)
+    if "macd" in todo:
+        series["fast"] = (c, ewm_alpha(span=cfg.macd_fast), cfg.macd_fast)
+        series["slow"] = (c, ewm_alpha(span=cfg.macd_slow), cfg.macd_slow)
+    if "atr" in todo:
+        series["tr"] = (tr, ewm_alpha(alpha=1 / cfg.atr_period), cfg.atr_period)
+    smoothed = {}
+    if series:
+        k = len(series)
+        grid = np.full((depth, k * n_sym), np.nan)
+        alpha = np.repeat([a for _, a, _ in series.values()], n_sym)
+        minp = np.repeat([m for _, _, m in series.values()], n_sym)
+        for j, (values, _, _) in enumerate(series.values()):
+            grid[pos, j * n_sym + seg] = values
+        out = _ewm_2d(grid, alpha, minp)
+        smoothed = {name: out[pos, j * n_sym + seg] for j, name in enumerate(series)}
+
+    if "rsi" in todo:
+        rs = smoothed["gain"] / np.where(smoothed["loss"] == 0, np.nan, smoothed["loss"])
+        df["rsi14"] = 100 - (100 / (1 + rs))
+    if "macd" in todo:
+        macd_line = smoothed["fast"] - smoothed["slow"]
+        grid = np.full((depth, n_sym), np.nan)
+        grid[pos, seg] = macd_line
+        df["macd"] = macd_line
+        df["macd_sig"] = _ewm_2d(grid,
+                                 np.full(n_sym, ewm_alpha(span=cfg.macd_signal)),
+                                 np.full(n_sym, cfg.macd_signal))[pos, seg]
+    if "atr" in todo:
+        df["atr14"] = smoothed["tr"]
+        df["atr_pct"] = (smoothed["tr"] / c) * 100.0
+
+    days = _local_days(df["ts"])
+
+    # --- session vwap ---
+    if "vwap" in todo:
+        typical = (h + l + c) / 3.0
+        session_starts = starts.copy()
+        if cfg.vwap_sessionize:
+            session_starts[1:] |= days[1:] != days[:-1]
+        session = np.cumsum(session_starts)
+        tpv = pd.Series(typical * v).groupby(session).cumsum().to_numpy()
+        vol = pd.Series(v).groupby(session).cumsum().to_numpy()
+        vw = tpv / np.where(vol == 0, np.nan, vol)
+        df["vwap"] = vw
+        df["vwap_dev"] = (c - vw) / vw
+
+    # --- rolling windows ---
+    if "vol_z" in todo:
+        vz_minp = max(5, cfg.vol_z_window // 3)
+        m, sd = _segment_rolling(v, starts, cfg.vol_z_window, vz_minp, with_std=True)
+        df["vol_z"] = (v - m) / sd
+    if "ma" in todo:
+        df["ma50"] = _segment_rolling(c, starts, cfg.ma_short, cfg.ma_short // 2)
+        df["ma200"] = _segment_rolling(c, starts, cfg.ma_long, cfg.ma_long // 2)
+
+    # --- adtv: daily traded value per symbol, rolled over days, mapped back to bars ---
+    if "adtv" in todo:
+        day_starts = starts.copy()
+        day_starts[1:] |= days[1:] != days[:-1]
+        day_idx = np.flatnonzero(day_starts)
+        dtv = np.add.reduceat(c * v, day_idx)
+        adtv_minp = max(5, cfg.adtv_window_days // 3)
+        if point_in_time_adtv:
+            adtv = _point_in_time_adtv(c * v, dtv, day_starts, starts[day_idx], cfg.adtv_window_days, adtv_minp)
+        else:
+            adtv = _segment_rolling(dtv, starts[day_idx], cfg.adtv_window_days, adtv_minp)[np.cumsum(day_starts) - 1]
+        if cfg.currency_scale_to_crore:
+            adtv = adtv / 1e7
+        df["adtv"] = adtv
+
+    return df
@@ -0,0 +1,223 @@
+'''
+Shared Redis access: one connection pool per process (sync for Celery tasks, workers and
+strategies; asyncio for FastAPI), batch helpers that pipeline reads and writes in
+chunks, and per-command latency metrics.
+
+Clients are thin wrappers over the process pool, so taking one per call is free: no new
+sockets, no handshake. A forked child (Celery prefork, the sweep pool) opens its own
+pool on first use. Every command and every pipeline round trip is timed into METRICS.
+'''
+
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+# upper bounds of the latency histogram buckets, in ms
+LATENCY_BUCKETS_MS = (0.1, 0.25, 0.5, 1, 2.5, 5, 10, 25, 50, 100, 250, 500, 1000, float("inf"))
+PIPELINE_CHUNK = 1000
+
+def pool_settings() -> dict:
+    return {
+        "host": os.environ.get("REDIS_HOST", "127.0.0.1"),
+        "port": int(os.environ.get("REDIS_PORT", 6379)),
+        "db": int(os.environ.get("REDIS_DB", 0)),
+        "password": os.environ.get("REDIS_PASSWORD"),
+        "decode_responses": True,
+        "max_connections": int(os.environ.get("REDIS_MAX_CONNECTIONS", 64)),
+        "socket_timeout": float(os.environ.get("REDIS_SOCKET_TIMEOUT", 5)),
+        "socket_connect_timeout": 2,
+        "health_check_interval": 30,
+        "retry_on_timeout": True,
+    }
+
+# -----------------------
+#     Metrics
+# -----------------------
+
+class CommandStats:
+    """Count, total, max and a latency histogram per command name (thread-safe)."""
+
+    def __init__(self, buckets_ms: Sequence[float] = LATENCY_BUCKETS_MS):
+        self.buckets_ms = tuple(buckets_ms)
+        self._lock = threading.Lock()
+        self._stats: Dict[str, list] = {}
+
+    def record(self, name: str, seconds: float) -> None:
+        ms = seconds * 1000
+        b = next(i for i, upper in enumerate(self.buckets_ms) if ms <= upper)
+        with self._lock:
+            s = self._stats.get(name)
+            if s is None:
+                s = self._stats[name] = [0, 0.0, 0.0, [0] * len(self.buckets_ms)]
+            s[0] += 1
+            s[1] += ms
+            s[2] = max(s[2], ms)
+            s[3][b] += 1
+
+    def _quantile(self, hist: List[int], count: int, q: float) -> float:
+        """Upper bound of the bucket holding the q-quantile (the max for the open bucket)."""
+        seen = 0
+        for upper, n in zip(self.buckets_ms, hist):
+            seen += n
+            if seen >= q * count:
+                return upper
+        return self.buckets_ms[-1]
+
+    def snapshot(self) -> Dict[str, dict]:
+        with self._lock:
+            stats = {name: (s[0], s[1], s[2], list(s[3])) for name, s in self._stats.items()}
+        out = {}
+        for name, (count, total, worst, hist) in sorted(stats.items()):
+            out[name] = {
+                "count": count,
+                "avg_ms": total / count,
+                "max_ms": worst,
+                "p50_ms": min(self._quantile(hist, count, 0.5), worst),
+                "p95_ms": min(self._quantile(hist, count, 0.95), worst),
+            }
+        return out
+
+    def reset(self) -> None:
+        with self._lock:
+            self._stats.clear()
+
+METRICS = CommandStats()
+
+class _TimedSync:
+    """Times every command and pipeline round trip of a redis.Redis subclass."""
+
+    def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return super().execute_command(*args, **options)
+        finally:
+            METRICS.record(str(args[0]).upper(), time.perf_counter() - started)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None):
+        pipe = super().pipeline(transaction=transaction, shard_hint=shard_hint)
+        execute = pipe.execute
+
+        def timed_execute(raise_on_error: bool = True):
+            started = time.perf_counter()
+            try:
+                return execute(raise_on_error)
+            finally:
+                METRICS.record("PIPELINE", time.perf_counter() - started)
+
+        pipe.execute = timed_execute
+        return pipe
+
+class _TimedAsync:
+    """The same for redis.asyncio.Redis."""
+
+    async def execute_command(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            return await super().execute_command(*args, **options)
+        finally:
+            METRICS.record(str(args[0]).upper(), time.perf_counter() - started)
+
+    def pipeline(self, transaction: bool = True, shard_hint=None):
+        pipe = super().pipeline(transaction=transaction, shard_hint=shard_hint)
+        execute = pipe.execute
+
+        async def timed_execute(raise_on_error: bool = True):
+            started = time.perf_counter()
+            try:
+                return await execute(raise_on_error)
+            finally:
+                METRICS.record("PIPELINE", time.perf_counter() - started)
+
+        pipe.execute = timed_execute
+        return pipe
+
+# -----------------------
+#     Pools / clients
+# -----------------------
+
+_lock = threading.Lock()
+_sync: Dict[str, Any] = {}    # pid, pool, client class
+_async: Dict[str, Any] = {}
+
+def get_redis():
+    """Sync client on this process's pool."""
+    import redis
+
+    with _lock:
+        if _sync.get("pid") != os.getpid():
+            _sync["pool"] = redis.ConnectionPool(**pool_settings())
+            _sync["cls"] = _sync.get("cls") or type("PooledRedis", (_TimedSync, redis.Redis), {})
+            _sync["pid"] = os.getpid()
+        return _sync["cls"](connection_pool=_sync["pool"])
+
+def get_async_redis():
+    """asyncio client on this process's pool (use from one event loop, e.g. FastAPI's)."""
+    import redis.asyncio as aredis
+
+    with _lock:
+        if _async.get("pid") != os.getpid():
+            _async["pool"] = aredis.ConnectionPool(**pool_settings())
+            _async["cls"] = _async.get("cls") or type("PooledAsyncRedis", (_TimedAsync, aredis.Redis), {})
+            _async["pid"] = os.getpid()
+        return _async["cls"](connection_pool=_async["pool"])
+
+async def close_async_redis() -> None:
+    pool = _async.pop("pool", None)
+    _async.pop("pid", None)
+    if pool is not None:
+        await pool.disconnect()
+
+def pool_stats() -> dict:
+    out = {}
+    for name, state in (("sync", _sync), ("async", _async)):
+        pool = state.get("pool")
+        if pool is not None and state.get("pid") == os.getpid():
+            out[name] = {
+                "max_connections": pool.max_connections,
+                "created": getattr(pool, "_created_connections", None),
+                "idle": len(getattr(pool, "_available_connections", [])),
+            }
+    return out
+
+# -----------------------
+#     Batch helpers
+# -----------------------
+
+Call = Tuple[str, tuple]  # (method name, args), e.g. ("hgetall", (key,))
+
+def _chunks(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i : i + size]
+
+def pipelined(r, calls: Iterable[Call], chunk: int = PIPELINE_CHUNK, transaction: bool = False) -> list:
+    """Run the calls in pipelines of `chunk` commands; results in call order."""
+    results = []
+    for part in _chunks(list(calls), chunk):
+        pipe = r.pipeline(transaction=transaction)
+        for method, args in part:
+            getattr(pipe, method)(*args)
+        results.extend(pipe.execute())
+    return results
+
+async def apipelined(r, calls: Iterable[Call], chunk: int = PIPELINE_CHUNK, transaction: bool = False) -> list:
+    results = []
+    for part in _chunks(list(calls), chunk):
+        pipe = r.pipeline(transaction=transaction)
+        for method, args in part:
+            getattr(pipe, method)(*args)
+        results.extend(await pipe.execute())
+    return results
+
+def hgetall_many(r, keys: Iterable[str], chunk: int = PIPELINE_CHUNK) -> List[dict]:
+    return pipelined(r, (("hgetall", (k,)) for k in keys), chunk)
+
+def hset_many(r, mappings: Dict[str, dict], ttl: Optional[int] = None, chunk: int = PIPELINE_CHUNK) -> int:
+    """HSET every key's mapping (plus EXPIRE with ttl) in chunked pipelines; returns keys written."""
+    calls: List[Call] = []
+    for key, mapping in mappings.items():
+        calls.append(("hset", (key, None, None, mapping)))
+        if ttl is not None:
+            calls.append(("expire", (key, ttl)))
+    pipelined(r, calls, chunk)
+    return len(mappings)
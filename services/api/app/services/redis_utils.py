@@ -1,14 +1,21 @@
-import os
 import datetime
 import pytz  # CHANGE: ensure we use IST for "today"
 import redis
 import pandas as pd
 from sqlalchemy import text  # CHANGE: parameterized SQL (safer/faster)
 from app.db import SessionLocal
+from app.services.feature_cache import get_snapshots
+from app.services.live_feed import FOCUS_CHANNEL, focus_message
+from app.services.redis_pool import METRICS, get_redis, pool_stats
+from app.services.response_cache import bump_versions
 from fastapi import APIRouter
 
 IST = pytz.timezone("Asia/Kolkata")
 
+def redis_client() -> redis.Redis:
+    # a wrapper over this process's shared pool (app.services.redis_pool): no new connection
+    return get_redis()
+
 def write_universe_to_redis():
     """
     Publish *today's latest* trading-universe snapshot into Redis ZSET(s).
@@ -63,13 +70,7 @@ def write_universe_to_redis():
     zkey_latest = "universe:latest"  # live pointer
 
     # --- Redis client ---
-    r = redis.Redis(
-        host=os.environ.get("REDIS_HOST", "127.0.0.1"),
-        port=int(os.environ.get("REDIS_PORT", 6379)),
-        db=int(os.environ.get("REDIS_DB", 0)),
-        password=os.environ.get("REDIS_PASSWORD"),
-        decode_responses=True,  # CHANGE: read/write strings directly (no bytes decode hassle)
-    )
+    r = redis_client()
 
     # CHANGE: build a single mapping for ZADD instead of per-row pipeline calls
     # (fewer roundtrips; also skip None scores safely)
@@ -96,6 +97,12 @@ def write_universe_to_redis():
         pipe.expire(zkey_today, 60 * 60 * 36)  # 36h
         pipe.expire(zkey_latest, 60 * 60 * 12)  # 12h
 
+    bump_versions(pipe, "universe")  # read API caches
+
+    # live feed: the new focus set, best first
+    pipe.publish(FOCUS_CHANNEL, focus_message(sorted(mapping, key=mapping.get, reverse=True),
+                                              date=today_str, asof_time=asof_time))
+
     pipe.execute()
 
     return {"date": today_str, "asof_time": asof_time, "wrote": len(mapping)}
@@ -105,4 +112,18 @@ router = APIRouter()
 @router.post("/redis_zset")
 def create_zset():
     write_universe_to_redis.delay()
-    
\ No newline at end of file
+
+@router.get("/focus/snapshots")
+def focus_snapshots(limit: int = 30):
+    """Latest feature snapshot of the top focus symbols (one pipelined Redis read)."""
+    r = redis_client()
+    tokens = r.zrevrange("universe:latest", 0, limit - 1)
+    with SessionLocal() as db:
+        snaps = get_snapshots(r, tokens, db)
+    return [{"instrument_token": t, **snaps[t]} for t in tokens if t in snaps]
+    
+
+@router.get("/redis/metrics")
+def redis_metrics():
+    """Per-command latency of this API process and its pool usage."""
+    return {"commands": METRICS.snapshot(), "pools": pool_stats()}
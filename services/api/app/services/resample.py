@@ -0,0 +1,139 @@
+'''
+Higher timeframes from the base 5m candles instead of separate Kite fetches.
+
+Postgres keeps 15m/1h/1d bars as Timescale continuous aggregates over the 5m candles
+(candles_15m, candles_1h, candles_1d; real-time, so the open bucket is included), and
+local bars (bar files, backtest stores) are resampled here into the same buckets:
+intraday buckets are aligned to the 09:15 IST open like Kite's, daily ones start at IST
+midnight like Kite's daily candles. Open/close come from the first/last bar of a bucket,
+high/low are its extremes and volume is the sum.
+'''
+
+from datetime import datetime
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from .bar_files import BAR_DTYPE, ist_day
+from .coverage import IST
+from .feature_store import timeframe_delta
+
+BASE_TIMEFRAME = "5m"
+AGGREGATE_VIEWS = {"15m": "candles_15m", "1h": "candles_1h", "1d": "candles_1d"}
+
+# a Monday open; the views bucket from the same origin
+ORIGIN = pd.Timestamp("2000-01-03 09:15", tz=IST)
+_NS_PER_DAY = 86_400 * 10**9
+_IST_OFFSET_NS = (5 * 60 + 30) * 60 * 10**9
+
+def source_timeframe(timeframe: str) -> str:
+    """The timeframe that is actually stored (fetched) for `timeframe`."""
+    return BASE_TIMEFRAME if timeframe in AGGREGATE_VIEWS else timeframe
+
+def bucket_start(ts_ns: np.ndarray, timeframe: str) -> np.ndarray:
+    """Start (UTC epoch ns) of the `timeframe` bucket of every timestamp."""
+    ts_ns = np.asarray(ts_ns, dtype=np.int64)
+    if timeframe == "1d":
+        return ist_day(ts_ns) * _NS_PER_DAY - _IST_OFFSET_NS
+    step = timeframe_delta(timeframe).value
+    return ts_ns - (ts_ns - ORIGIN.value) % step
+
+def bucket_floor(ts, timeframe: str) -> pd.Timestamp:
+    """Start of the bucket holding ts (UTC)."""
+    ns = bucket_start(np.array([pd.Timestamp(ts).value]), timeframe)[0]
+    return pd.Timestamp(int(ns), tz="UTC")
+
+# -----------------------
+#     Arrays
+# -----------------------
+
+def resample_arrays(symbol_id: np.ndarray, ts_ns: np.ndarray, o: np.ndarray, h: np.ndarray, l: np.ndarray,
+                    c: np.ndarray, v: np.ndarray, timeframe: str) -> tuple:
+    """Bars sorted by (symbol_id, ts) -> (symbol_id, bucket ts ns, o, h, l, c, v) of the timeframe."""
+    if not len(ts_ns):
+        return tuple(np.asarray(x)[:0] for x in (symbol_id, ts_ns, o, h, l, c, v))
+    bucket = bucket_start(ts_ns, timeframe)
+    new = np.ones(len(bucket), dtype=bool)
+    new[1:] = (bucket[1:] != bucket[:-1]) | (symbol_id[1:] != symbol_id[:-1])
+    starts = np.flatnonzero(new)
+    ends = np.append(starts[1:], len(bucket)) - 1
+    return (symbol_id[starts], bucket[starts], o[starts], np.maximum.reduceat(h, starts),
+            np.minimum.reduceat(l, starts), c[ends], np.add.reduceat(v, starts))
+
+def resample_records(bars: np.ndarray, timeframe: str) -> np.ndarray:
+    """One symbol's BAR_DTYPE records (a bar file view) -> records of the timeframe."""
+    sid = np.zeros(len(bars), dtype=np.int64)
+    _, ts, o, h, l, c, v = resample_arrays(sid, bars["ts"], bars["o"], bars["h"], bars["l"], bars["c"],
+                                           bars["v"], timeframe)
+    out = np.empty(len(ts), dtype=BAR_DTYPE)
+    out["ts"], out["o"], out["h"], out["l"], out["c"], out["v"] = ts, o, h, l, c, v
+    return out
+
+def resample_frame(df: pd.DataFrame, timeframe: str) -> pd.DataFrame:
+    """Long (symbol_id, ts, o, h, l, c, v) frame -> the same at the timeframe."""
+    if df.empty:
+        return df[["symbol_id", "ts", "o", "h", "l", "c", "v"]].copy()
+    df = df.assign(ts=pd.to_datetime(df["ts"], utc=True)).sort_values(["symbol_id", "ts"], kind="stable")
+    sid, ts, o, h, l, c, v = resample_arrays(
+        df["symbol_id"].to_numpy(dtype=np.int64), df["ts"].dt.as_unit("ns").astype("int64").to_numpy(),
+        *(df[col].to_numpy(dtype=float) for col in "ohlc"), df["v"].to_numpy(dtype=np.int64), timeframe)
+    return pd.DataFrame({"symbol_id": sid, "ts": pd.to_datetime(ts, utc=True), "o": o, "h": h, "l": l, "c": c, "v": v})
+
+def resample_store(store, timeframe: str):
+    """The backtester's BarStore at a higher timeframe."""
+    from .backtest import BarStore
+
+    sid, ts, o, h, l, c, v = resample_arrays(store.symbol_id, store.ts.astype(np.int64), store.o, store.h,
+                                             store.l, store.c, store.v, timeframe)
+    return BarStore(sid, ts.astype("datetime64[ns]"), o, h, l, c, v, presorted=True)
+
+# -----------------------
+#     SQL
+# -----------------------
+
+def bars_sql(timeframe: str):
+    """
+    (symbol_id, ts, o, h, l, c, v) of :sids in [:from_dt, :to_dt], from the timeframe's
+    aggregate when it has one, else from `candles` (:tf).
+    """
+    view = AGGREGATE_VIEWS.get(timeframe)
+    source = view if view else "candles"
+    tf_filter = "" if view else "AND timeframe = :tf"
+    return text(f"""
+        SELECT symbol_id, ts, o, h, l, c, v
+        FROM {source}
+        WHERE symbol_id = ANY(:sids)
+          {tf_filter}
+          AND ts BETWEEN :from_dt AND :to_dt
+        ORDER BY symbol_id, ts
+    """)
+
+def bar_counts_sql(timeframe: str):
+    """
+    (symbol_id, bars) per symbol in its own [from, to] range: :sids, :froms and :tos are
+    parallel arrays. Same sources as bars_sql.
+    """
+    view = AGGREGATE_VIEWS.get(timeframe)
+    source = view if view else "candles"
+    tf_filter = "" if view else "AND b.timeframe = :tf"
+    return text(f"""
+        SELECT s.sid, COUNT(b.ts)
+        FROM unnest(CAST(:sids AS integer[]), CAST(:froms AS timestamptz[]), CAST(:tos AS timestamptz[]))
+             AS s(sid, from_ts, to_ts)
+        LEFT JOIN {source} b ON b.symbol_id = s.sid {tf_filter} AND b.ts BETWEEN s.from_ts AND s.to_ts
+        GROUP BY s.sid
+    """)
+
+def load_bars_frame(db, symbol_ids: Iterable[int], timeframe: str, from_dt: datetime,
+                    to_dt: Optional[datetime] = None) -> pd.DataFrame:
+    to_dt = to_dt or datetime.now(IST)
+    rows = db.execute(bars_sql(timeframe), {"sids": [int(s) for s in symbol_ids], "tf": timeframe,
+                                            "from_dt": from_dt, "to_dt": to_dt}).fetchall()
+    df = pd.DataFrame(rows, columns=["symbol_id", "ts", "o", "h", "l", "c", "v"])
+    df["ts"] = pd.to_datetime(df["ts"], utc=True)
+    for col in ["o", "h", "l", "c"]:
+        df[col] = df[col].astype(float)
+    df["v"] = df["v"].astype("int64")
+    return df
@@ -0,0 +1,265 @@
+'''
+Columnar research store: Parquet mirrors of `candles` and `features`, read with Arrow or DuckDB.
+
+Layout (Hive partitions, one immutable file per trading day):
+
+    <root>/candles/timeframe=5m/date=2025-06-02/part-0.parquet
+    <root>/features/timeframe=5m/date=2025-06-02/part-0.parquet
+
+Rows inside a file are sorted by (symbol_id, ts) and written in row groups, so a symbol
+filter is answered from row-group statistics rather than a file per symbol (a 5m day of
+one symbol is 75 rows, far too small for a Parquet file). The `features` table has no
+timeframe column; its partitions carry the timeframe the pipeline computes.
+
+The exporter writes the days that are over and either not exported yet, in the trailing
+`refresh_days` (late revisions), or whose row count in Postgres no longer matches the
+partition's (a backfilled gap); a partition is written to a temp file and renamed into place. pyarrow and duckdb are imported lazily so
+the API and workers don't need them.
+'''
+
+import os
+from datetime import date, datetime, time, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from .coverage import IST, SESSION_CLOSE, sessions
+from .incremental import FEATURE_COLUMNS
+
+RESEARCH_DIR = os.getenv("PRAGYAN_RESEARCH_DIR", "research")
+ROW_GROUP_SIZE = 64 * 1024
+
+KINDS = {
+    "candles": ["symbol_id", "ts", "o", "h", "l", "c", "v"],
+    "features": ["symbol_id", "ts", *FEATURE_COLUMNS],
+}
+
+EXPORT_SQL = {
+    "candles": text("""
+        SELECT symbol_id, ts, o, h, l, c, v
+        FROM candles
+        WHERE timeframe = :tf AND ts >= :lo AND ts < :hi
+        ORDER BY symbol_id, ts
+    """),
+    "features": text(f"""
+        SELECT symbol_id, ts, {", ".join(FEATURE_COLUMNS)}
+        FROM features
+        WHERE ts >= :lo AND ts < :hi
+        ORDER BY symbol_id, ts
+    """),
+}
+
+DAY_COUNTS_SQL = {
+    "candles": text("""
+        SELECT (ts AT TIME ZONE 'Asia/Kolkata')::date AS day, count(*)
+        FROM candles
+        WHERE timeframe = :tf AND ts >= :lo AND ts < :hi
+        GROUP BY 1
+    """),
+    "features": text("""
+        SELECT (ts AT TIME ZONE 'Asia/Kolkata')::date AS day, count(*)
+        FROM features
+        WHERE ts >= :lo AND ts < :hi
+        GROUP BY 1
+    """),
+}
+
+FIRST_TS_SQL = {
+    "candles": text("SELECT min(ts) FROM candles WHERE timeframe = :tf"),
+    "features": text("SELECT min(ts) FROM features"),
+}
+
+def _arrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        import pyarrow.parquet as pq
+    except ImportError as e:  # optional dependency
+        raise ImportError("The research store needs pyarrow (pip install pyarrow)") from e
+    return pa, ds, pq
+
+def schema(kind: str):
+    pa, _, _ = _arrow()
+    fields = [("symbol_id", pa.int32()), ("ts", pa.timestamp("us", tz="UTC"))]
+    if kind == "candles":
+        fields += [(c, pa.float64()) for c in "ohlc"] + [("v", pa.int64())]
+    else:
+        fields += [(c, pa.float64()) for c in FEATURE_COLUMNS]
+    return pa.schema(fields)
+
+# -----------------------
+#     Partitions
+# -----------------------
+
+def partition_dir(root, kind: str, timeframe: str, day: date) -> Path:
+    return Path(root) / kind / f"timeframe={timeframe}" / f"date={day.isoformat()}"
+
+def exported_dates(root, kind: str, timeframe: str) -> set:
+    base = Path(root) / kind / f"timeframe={timeframe}"
+    if not base.is_dir():
+        return set()
+    return {
+        date.fromisoformat(p.name.split("=", 1)[1])
+        for p in base.iterdir()
+        if p.name.startswith("date=") and (p / "part-0.parquet").exists()
+    }
+
+def exported_rows(root, kind: str, timeframe: str) -> Dict[date, int]:
+    """Row count per exported day, from the Parquet footers only."""
+    _, _, pq = _arrow()
+    return {
+        day: pq.ParquetFile(partition_dir(root, kind, timeframe, day) / "part-0.parquet").metadata.num_rows
+        for day in exported_dates(root, kind, timeframe)
+    }
+
+def complete_through(now: datetime) -> date:
+    """Last day whose session is over (today only after the close)."""
+    now = now.astimezone(IST)
+    return now.date() if now.time() >= SESSION_CLOSE else now.date() - timedelta(days=1)
+
+def write_partition(table, path: Path) -> None:
+    _, _, pq = _arrow()
+    path.mkdir(parents=True, exist_ok=True)
+    tmp = path / ".part-0.parquet.tmp"
+    pq.write_table(table, tmp, compression="zstd", row_group_size=ROW_GROUP_SIZE)
+    os.replace(tmp, path / "part-0.parquet")
+
+def rows_to_table(kind: str, rows: Sequence[tuple]):
+    """DB rows (KINDS[kind] order, Decimals/None allowed) -> Arrow table."""
+    pa, _, _ = _arrow()
+    cols = list(zip(*rows)) if rows else [()] * len(KINDS[kind])
+    arrays = {}
+    for name, col in zip(KINDS[kind], cols):
+        if name == "ts":
+            arrays[name] = pd.to_datetime(list(col), utc=True).as_unit("us")
+        elif name in ("symbol_id", "v"):
+            arrays[name] = np.asarray(col, dtype=np.int64)
+        else:
+            arrays[name] = np.asarray(col, dtype=np.float64)  # None -> NaN
+    return pa.Table.from_pydict(arrays, schema=schema(kind))
+
+# -----------------------
+#     Export
+# -----------------------
+
+def export(db, kind: str, timeframe: str, root=RESEARCH_DIR, start: Optional[date] = None,
+           end: Optional[date] = None, rewrite: bool = False, chunk_days: int = 5,
+           refresh_days: int = 1, now: Optional[datetime] = None) -> Dict[str, int]:
+    """
+    Mirror `kind` (candles | features) for trading days in [start, end] into Parquet.
+    Days already exported are skipped unless rewrite, one of the last refresh_days trading
+    days, or their row count in the table changed. start defaults to the first day in the
+    table, end to the last finished session.
+    """
+    if kind not in KINDS:
+        raise ValueError(f"Unknown research kind: {kind}")
+    pa, _, _ = _arrow()
+    end = min(end or date.max, complete_through(now or datetime.now(IST)))
+    if start is None:
+        first = db.execute(FIRST_TS_SQL[kind], {"tf": timeframe}).scalar()
+        if first is None:
+            return {"days": 0, "rows": 0}
+        start = pd.Timestamp(first).tz_convert(IST).date()
+
+    lo = IST.localize(datetime.combine(start, time.min))
+    hi = IST.localize(datetime.combine(end + timedelta(days=1), time.min))
+    days_in_range = sorted({op.date() for op, _ in sessions(lo, hi)})
+    done = {} if rewrite else exported_rows(root, kind, timeframe)
+    if done:
+        # one grouped count decides which exported days went stale
+        counts = dict(db.execute(DAY_COUNTS_SQL[kind], {"tf": timeframe, "lo": lo, "hi": hi}).fetchall())
+        trailing = set(days_in_range[-refresh_days:]) if refresh_days > 0 else set()
+        done = {d for d, n in done.items() if d not in trailing and counts.get(d, 0) == n}
+    todo = [d for d in days_in_range if d not in done]
+
+    days = rows = 0
+    for i in range(0, len(todo), chunk_days):
+        chunk = todo[i : i + chunk_days]
+        result = db.execute(EXPORT_SQL[kind], {
+            "tf": timeframe,
+            "lo": IST.localize(datetime.combine(chunk[0], time.min)),
+            "hi": IST.localize(datetime.combine(chunk[-1] + timedelta(days=1), time.min)),
+        }).fetchall()
+        if not result:
+            continue
+        table = rows_to_table(kind, result)
+        local_day = pd.DatetimeIndex(table.column("ts").to_numpy()).tz_localize("UTC").tz_convert(IST).date
+        for day in chunk:
+            mask = local_day == day
+            if not mask.any():
+                continue
+            # rows stay sorted by (symbol_id, ts) within the day
+            write_partition(table.filter(pa.array(mask)), partition_dir(root, kind, timeframe, day))
+            days += 1
+            rows += int(mask.sum())
+    print(f"Research export {kind}/{timeframe}: {days} days, {rows} rows")
+    return {"days": days, "rows": rows}
+
+def export_candles(db, timeframe: str = "5m", **kwargs) -> Dict[str, int]:
+    return export(db, "candles", timeframe, **kwargs)
+
+def export_features(db, timeframe: str = "5m", **kwargs) -> Dict[str, int]:
+    return export(db, "features", timeframe, **kwargs)
+
+# -----------------------
+#     Read
+# -----------------------
+
+class ResearchStore:
+    """Filtered, column-pruned reads of the Parquet mirror."""
+
+    def __init__(self, root=RESEARCH_DIR):
+        self.root = Path(root)
+
+    def dataset(self, kind: str):
+        pa, ds, _ = _arrow()
+        partitioning = ds.partitioning(pa.schema([("timeframe", pa.string()), ("date", pa.date32())]), flavor="hive")
+        return ds.dataset(self.root / kind, format="parquet", partitioning=partitioning)
+
+    def scan(self, kind: str, timeframe: str, start: Optional[date] = None, end: Optional[date] = None,
+             symbol_ids: Optional[Iterable[int]] = None, columns: Optional[List[str]] = None):
+        """
+        Arrow table of the rows for [start, end] (inclusive dates). Only the matching
+        partitions and row groups are read, and only the requested columns.
+        """
+        _, ds, _ = _arrow()
+        cond = ds.field("timeframe") == timeframe
+        if start is not None:
+            cond &= ds.field("date") >= start
+        if end is not None:
+            cond &= ds.field("date") <= end
+        if symbol_ids is not None:
+            cond &= ds.field("symbol_id").isin([int(s) for s in symbol_ids])
+        return self.dataset(kind).to_table(columns=columns or KINDS[kind], filter=cond)
+
+    def arrays(self, kind: str, timeframe: str, **kwargs) -> Dict[str, np.ndarray]:
+        table = self.scan(kind, timeframe, **kwargs)
+        return {name: table.column(name).to_numpy() for name in table.column_names}
+
+    def frame(self, kind: str, timeframe: str, **kwargs) -> pd.DataFrame:
+        return self.scan(kind, timeframe, **kwargs).to_pandas()
+
+    def bar_store(self, timeframe: str, **kwargs):
+        """Candles straight into the backtester's BarStore."""
+        from .backtest import BarStore
+
+        a = self.arrays("candles", timeframe, **kwargs)
+        ts = a["ts"].astype("datetime64[ns]") if len(a["ts"]) else np.array([], dtype="datetime64[ns]")
+        return BarStore(a["symbol_id"].astype(np.int64), ts, a["o"], a["h"], a["l"], a["c"], a["v"].astype(float))
+
+    def duckdb(self, database: str = ":memory:"):
+        """DuckDB connection with `candles` and `features` views over the Parquet files."""
+        try:
+            import duckdb
+        except ImportError as e:  # optional dependency
+            raise ImportError("DuckDB queries need duckdb (pip install duckdb)") from e
+        con = duckdb.connect(database)
+        for kind in KINDS:
+            if (self.root / kind).is_dir():
+                glob = (self.root / kind / "*" / "*" / "*.parquet").as_posix()
+                con.execute(f"CREATE OR REPLACE VIEW {kind} AS "
+                            f"SELECT * FROM read_parquet('{glob}', hive_partitioning = true)")
+        return con
@@ -0,0 +1,137 @@
+'''
+Short-TTL cache of serialized read-API responses, per API process.
+
+Writers bump a version counter in one Redis hash (api:version, a field per dataset:
+universe, features, signals) right after they commit. A cached body is keyed on the
+route, its query parameters and the versions of the datasets it is built from, so a
+poll within the TTL costs one HMGET and a dict lookup instead of a Postgres query, and a
+write makes the next poll miss. Concurrent misses for the same key share one load.
+Bodies are serialized once with orjson and served as they are.
+'''
+
+import asyncio
+import os
+import time
+from collections import OrderedDict
+from decimal import Decimal
+from typing import Any, Awaitable, Callable, Dict, Iterable, Optional, Sequence, Tuple
+
+import numpy as np
+import orjson
+import pandas as pd
+
+VERSION_KEY = "api:version"
+DEFAULT_TTL = 5.0
+MAX_ENTRIES = 1024
+
+# -----------------------
+#     Serialization
+# -----------------------
+
+def _default(value):
+    if isinstance(value, pd.Timestamp):
+        return None if pd.isna(value) else value.isoformat()
+    if isinstance(value, Decimal):
+        return float(value)
+    if isinstance(value, np.generic):
+        return value.item()
+    if value is pd.NaT:
+        return None
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+def dumps(payload: Any) -> bytes:
+    """orjson with the types our rows carry (Decimal numerics, pandas timestamps, numpy scalars)."""
+    return orjson.dumps(payload, default=_default, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+
+# -----------------------
+#     Versions
+# -----------------------
+
+def bump_versions(r, *datasets: str) -> None:
+    """After a commit: invalidate cached responses built from these datasets (r may be a pipeline)."""
+    for name in datasets:
+        r.hincrby(VERSION_KEY, name, 1)
+
+async def read_versions(r, datasets: Sequence[str]) -> Tuple:
+    """Current versions (asyncio Redis client); None when Redis is unreachable (TTL only then)."""
+    if not datasets:
+        return ()
+    try:
+        return tuple(await r.hmget(VERSION_KEY, list(datasets)))
+    except Exception as e:
+        print(f"Response cache: version read failed: {e}")
+        return None
+
+# -----------------------
+#     Cache
+# -----------------------
+
+class ResponseCache:
+    def __init__(self, ttl: float = DEFAULT_TTL, max_entries: int = MAX_ENTRIES, clock: Callable[[], float] = time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.clock = clock
+        self.entries: "OrderedDict[tuple, Tuple[float, bytes]]" = OrderedDict()
+        self.loading: Dict[tuple, asyncio.Future] = {}
+        self.hits = self.misses = 0
+
+    @staticmethod
+    def key(route: str, params: dict, versions: Optional[Iterable]) -> tuple:
+        return (route, tuple(sorted((k, str(v)) for k, v in params.items() if v is not None)),
+                tuple(versions) if versions is not None else None)
+
+    def get(self, key: tuple) -> Optional[bytes]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        expires, body = entry
+        if expires <= self.clock():
+            del self.entries[key]
+            return None
+        self.entries.move_to_end(key)
+        return body
+
+    def put(self, key: tuple, body: bytes, ttl: Optional[float] = None) -> None:
+        self.entries[key] = (self.clock() + (self.ttl if ttl is None else ttl), body)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    async def get_or_load(self, key: tuple, load: Callable[[], Awaitable[Any]], ttl: Optional[float] = None) -> bytes:
+        """Cached body, or load() serialized with dumps and cached; one load per key at a time."""
+        body = self.get(key)
+        if body is not None:
+            self.hits += 1
+            return body
+        pending = self.loading.get(key)
+        if pending is not None:
+            self.hits += 1
+            return await asyncio.shield(pending)
+        self.misses += 1
+        future = asyncio.get_running_loop().create_future()
+        self.loading[key] = future
+        try:
+            body = dumps(await load())
+            self.put(key, body, ttl)
+            future.set_result(body)
+            return body
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            future.exception()  # retrieved: waiters get it, nobody else has to
+            raise
+        finally:
+            del self.loading[key]
+
+    def stats(self) -> dict:
+        return {"entries": len(self.entries), "hits": self.hits, "misses": self.misses}
+
+CACHE = ResponseCache(ttl=float(os.environ.get("API_CACHE_TTL", DEFAULT_TTL)))
+
+async def cached_body(r, route: str, params: dict, datasets: Sequence[str], load: Callable[[], Awaitable[Any]],
+                      ttl: Optional[float] = None, cache: ResponseCache = CACHE) -> bytes:
+    """The route's serialized response for these params at the datasets' current versions."""
+    versions = await read_versions(r, datasets)
+    return await cache.get_or_load(cache.key(route, params, versions), load, ttl)
@@ -0,0 +1,301 @@
+'''
+Parameter sweeps and walk-forward evaluation on top of the backtester.
+
+Candidates are flat dicts such as {"vwap_bounce.atr_mult": 1.2, "features.atr_period": 10}:
+"features.*" keys go to FeatureConfig, every other "<section>.<key>" overrides the
+strategies config (config.yaml -> strategies).
+
+The bar arrays and every distinct feature column are computed once in the parent and
+placed in shared memory; worker processes attach to them instead of receiving pickled
+frames. Feature groups are keyed by the FeatureConfig fields they depend on, so sweeping
+atr_period recomputes ATR only and strategy-only sweeps compute features once. Each
+candidate runs over the whole period once; walk-forward windows are cut from its trades
+(features are point-in-time, so a window never sees later bars).
+'''
+
+import itertools
+import json
+import math
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, fields, replace
+from datetime import date, datetime
+from multiprocessing import shared_memory
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .backtest import BacktestConfig, Backtester, BarStore, equity_curve, summarize
+from .coverage import IST
+from .incremental import _GROUP_COLUMNS
+from .panel import compute_features_panel
+
+SWEEP_DIR = os.getenv("PRAGYAN_SWEEP_DIR", "sweeps")
+
+# FeatureConfig fields each feature group depends on
+FEATURE_GROUP_PARAMS = {
+    "rsi": ("rsi_period",),
+    "macd": ("macd_fast", "macd_slow", "macd_signal"),
+    "atr": ("atr_period",),
+    "vwap": ("vwap_sessionize",),
+    "vol_z": ("vol_z_window",),
+    "ma": ("ma_short", "ma_long"),
+    "adtv": ("adtv_window_days", "currency_scale_to_crore"),
+}
+
+METRIC_COLUMNS = ["trades", "win_rate", "net_pnl", "return_pct", "max_drawdown_pct", "sharpe"]
+
+@dataclass
+class SweepResult:
+    metrics: pd.DataFrame        # one row per (candidate, split, segment)
+    walk_forward: pd.DataFrame   # per split: the best candidate in-sample and its out-of-sample row
+    run_dir: Optional[Path]
+
+# -----------------------
+#     Candidates
+# -----------------------
+
+def param_grid(grid: Dict[str, Sequence]) -> List[dict]:
+    keys = list(grid)
+    return [dict(zip(keys, values)) for values in itertools.product(*(grid[k] for k in keys))]
+
+def random_search(space: Dict[str, object], n: int, seed: int = 0) -> List[dict]:
+    """
+    n random candidates. A list is sampled from; an (lo, hi) tuple is sampled uniformly,
+    as integers when both bounds are ints.
+    """
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        cand = {}
+        for key, dom in space.items():
+            if isinstance(dom, tuple):
+                lo, hi = dom
+                cand[key] = rng.randint(lo, hi) if isinstance(lo, int) and isinstance(hi, int) else rng.uniform(lo, hi)
+            else:
+                cand[key] = rng.choice(list(dom))
+        out.append(cand)
+    return out
+
+def split_params(params: dict, base_features: "FeatureConfig" = None, base_strategies: dict = None):
+    """(FeatureConfig, strategies config) for one candidate."""
+    from .features import FeatureConfig
+
+    feat = {}
+    strategies = {k: dict(v or {}) for k, v in (base_strategies or {}).items()}
+    for key, value in params.items():
+        section, _, name = key.partition(".")
+        if not name:
+            raise ValueError(f"Sweep parameter {key!r} is not '<section>.<name>'")
+        if section == "features":
+            feat[name] = value
+        else:
+            strategies.setdefault(section, {})[name] = value
+    return replace(base_features or FeatureConfig(), **feat), strategies
+
+def feature_key(cfg, group: str) -> str:
+    return f"{group}:" + ",".join(f"{p}={getattr(cfg, p)}" for p in FEATURE_GROUP_PARAMS[group])
+
+# -----------------------
+#     Walk-forward
+# -----------------------
+
+def walk_forward_splits(days: Sequence[date], train_days: int, test_days: int,
+                        step_days: Optional[int] = None, anchored: bool = False) -> List[dict]:
+    """
+    Rolling (or anchored: train always starts at the first day) train/test windows over
+    trading days. Bounds are inclusive dates.
+    """
+    days = sorted(days)
+    step = step_days or test_days
+    splits = []
+    start = 0
+    while start + train_days + test_days <= len(days):
+        train_lo = 0 if anchored else start
+        train_hi = start + train_days - 1
+        splits.append({
+            "split": len(splits),
+            "train_start": days[train_lo], "train_end": days[train_hi],
+            "test_start": days[train_hi + 1], "test_end": days[train_hi + test_days],
+        })
+        start += step
+    return splits
+
+def window_metrics(trades: pd.DataFrame, days: Sequence[date], initial_capital: float) -> dict:
+    """Metrics of the trades signalled on `days`; sharpe from daily net PnL (zero on idle days)."""
+    if trades.empty:
+        sel = trades
+    else:
+        signal_day = trades["signal_ts"].dt.tz_convert(IST).dt.date
+        sel = trades[signal_day.isin(set(days))]
+    stats = summarize(sel, equity_curve(sel, initial_capital), initial_capital)
+    daily = pd.Series(0.0, index=list(days))
+    if not sel.empty:
+        pnl = sel.groupby(sel["signal_ts"].dt.tz_convert(IST).dt.date)["net_pnl"].sum()
+        daily = daily.add(pnl, fill_value=0.0)
+    sd = daily.std()
+    stats["sharpe"] = float(daily.mean() / sd * math.sqrt(252)) if sd and sd == sd else None
+    return {k: stats.get(k) for k in METRIC_COLUMNS}
+
+# -----------------------
+#     Shared memory
+# -----------------------
+
+class SharedArrays:
+    """Named NumPy arrays in shared memory. The creating process owns and unlinks them."""
+
+    def __init__(self):
+        self.spec: Dict[str, tuple] = {}
+        self._blocks: List[shared_memory.SharedMemory] = []
+
+    def put(self, name: str, arr: np.ndarray) -> None:
+        arr = np.ascontiguousarray(arr)
+        shm = shared_memory.SharedMemory(create=True, size=max(arr.nbytes, 1))
+        np.ndarray(arr.shape, arr.dtype, buffer=shm.buf)[...] = arr
+        self._blocks.append(shm)
+        self.spec[name] = (shm.name, arr.shape, arr.dtype.str)
+
+    def close(self) -> None:
+        for shm in self._blocks:
+            shm.close()
+            shm.unlink()
+        self._blocks = []
+
+def attach(spec: Dict[str, tuple]):
+    """Read-only views of published arrays, plus the handles that keep them mapped."""
+    arrays, handles = {}, []
+    for name, (shm_name, shape, dtype) in spec.items():
+        shm = shared_memory.SharedMemory(name=shm_name)
+        arr = np.ndarray(shape, np.dtype(dtype), buffer=shm.buf)
+        arr.flags.writeable = False
+        arrays[name] = arr
+        handles.append(shm)
+    return arrays, handles
+
+# -----------------------
+#     Workers
+# -----------------------
+
+_W: dict = {}
+
+def _init_worker(spec: Dict[str, tuple], cfg: BacktestConfig, days: List[date], splits: List[dict]):
+    arrays, handles = attach(spec)
+    store = BarStore(*(arrays[f"bar:{c}"] for c in ["symbol_id", "ts", "o", "h", "l", "c", "v"]), presorted=True)
+    _W.update(arrays=arrays, handles=handles, store=store, base=store.frame(), cfg=cfg,
+              days=days, splits=splits, frame_key=None, frame=None)
+
+def _features_frame(columns: Dict[str, str]) -> pd.DataFrame:
+    """Bars + feature columns (column -> shared array name); the last one built is reused."""
+    key = tuple(sorted(columns.items()))
+    if _W["frame_key"] != key:
+        _W["frame"] = _W["base"].assign(**{col: _W["arrays"][name] for col, name in columns.items()})
+        _W["frame_key"] = key
+    return _W["frame"]
+
+def _run_candidate(task) -> List[dict]:
+    from services.api.strategies.engine import StrategyEngine
+
+    cid, params, columns, strategies_cfg = task
+    started = time.perf_counter()
+    cfg, store = _W["cfg"], _W["store"]
+    bt = Backtester(StrategyEngine.from_config(strategies_cfg).strategies, cfg)
+    trades = bt.simulate(store, bt.signals(store, _features_frame(columns)))
+
+    windows = [("full", None, _W["days"])]
+    for s in _W["splits"]:
+        windows.append(("train", s["split"], [d for d in _W["days"] if s["train_start"] <= d <= s["train_end"]]))
+        windows.append(("test", s["split"], [d for d in _W["days"] if s["test_start"] <= d <= s["test_end"]]))
+    seconds = time.perf_counter() - started
+    return [
+        {"candidate": cid, **params, "split": split, "segment": segment,
+         "start": days[0], "end": days[-1], **window_metrics(trades, days, cfg.initial_capital),
+         "seconds": seconds}
+        for segment, split, days in windows
+    ]
+
+# -----------------------
+#     Runner
+# -----------------------
+
+def run_sweep(store: BarStore, candidates: List[dict], splits: Optional[List[dict]] = None,
+              strategies_config: Optional[dict] = None, cfg: Optional[BacktestConfig] = None,
+              workers: Optional[int] = None, out_dir: Optional[str] = SWEEP_DIR,
+              objective: str = "net_pnl") -> SweepResult:
+    """
+    Backtest every candidate on `store` in a process pool. Metrics go to
+    <out_dir>/<run id>/metrics.csv (walk_forward.csv and run.json next to it).
+    """
+    cfg = cfg or BacktestConfig()
+    splits = splits or []
+    workers = workers or os.cpu_count() or 1
+    days = [d for d, _ in store.days()]
+    started = time.perf_counter()
+
+    shared = SharedArrays()
+    try:
+        for col in ["symbol_id", "ts", "o", "h", "l", "c", "v"]:
+            shared.put(f"bar:{col}", getattr(store, col))
+
+        # every distinct feature group variant is computed once and shared
+        bars = store.frame()
+        tasks = []
+        for cid, params in enumerate(candidates):
+            feat_cfg, strat_cfg = split_params(params, cfg.features, strategies_config)
+            missing = [g for g in _GROUP_COLUMNS if f"feat:{feature_key(feat_cfg, g)}:{_GROUP_COLUMNS[g][0]}" not in shared.spec]
+            if missing:
+                out = compute_features_panel(bars, feat_cfg, point_in_time_adtv=True, include=missing)
+                for g in missing:
+                    for col in _GROUP_COLUMNS[g]:
+                        shared.put(f"feat:{feature_key(feat_cfg, g)}:{col}", out[col].to_numpy(dtype=float))
+            columns = {col: f"feat:{feature_key(feat_cfg, g)}:{col}" for g in _GROUP_COLUMNS for col in _GROUP_COLUMNS[g]}
+            tasks.append((cid, params, columns, strat_cfg))
+        features_seconds = time.perf_counter() - started
+        del bars
+
+        # candidates sharing features run back to back on the same worker (frame reuse)
+        tasks.sort(key=lambda t: tuple(sorted(t[2].items())))
+        chunksize = max(1, math.ceil(len(tasks) / (workers * 4)))
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(shared.spec, cfg, days, splits)) as pool:
+            rows = [row for result in pool.map(_run_candidate, tasks, chunksize=chunksize) for row in result]
+    finally:
+        shared.close()
+
+    metrics = pd.DataFrame(rows).sort_values(["candidate", "split", "segment"], na_position="first").reset_index(drop=True)
+    walk_forward = select_walk_forward(metrics, objective)
+    seconds = time.perf_counter() - started
+    print(f"Sweep: {len(candidates)} candidates x {len(splits)} splits on {len(store)} bars, "
+          f"{workers} workers, features {features_seconds:.1f}s, total {seconds:.1f}s")
+
+    run_dir = None
+    if out_dir:
+        run_dir = Path(out_dir) / datetime.now(IST).strftime("%Y%m%d-%H%M%S")
+        run_dir.mkdir(parents=True, exist_ok=True)
+        metrics.to_csv(run_dir / "metrics.csv", index=False)
+        walk_forward.to_csv(run_dir / "walk_forward.csv", index=False)
+        backtest = {f.name: getattr(cfg, f.name) for f in fields(cfg) if f.name != "features"}
+        (run_dir / "run.json").write_text(json.dumps({
+            "candidates": candidates, "splits": splits, "strategies": strategies_config or {},
+            "backtest": backtest, "objective": objective, "bars": len(store), "seconds": seconds,
+        }, default=str, indent=2))
+    return SweepResult(metrics, walk_forward, run_dir)
+
+def select_walk_forward(metrics: pd.DataFrame, objective: str = "net_pnl") -> pd.DataFrame:
+    """Per split: the candidate with the best in-sample objective and its out-of-sample metrics."""
+    train = metrics[metrics["segment"] == "train"]
+    test = metrics[metrics["segment"] == "test"]
+    rows = []
+    for split, grp in train.groupby("split"):
+        best = grp.sort_values(objective, ascending=False, na_position="last").iloc[0]
+        oos = test[(test["split"] == split) & (test["candidate"] == best["candidate"])].iloc[0]
+        rows.append({
+            "split": int(split), "candidate": int(best["candidate"]),
+            **{f"train_{m}": best[m] for m in METRIC_COLUMNS},
+            **{f"test_{m}": oos[m] for m in METRIC_COLUMNS},
+            "test_start": oos["start"], "test_end": oos["end"],
+        })
+    return pd.DataFrame(rows)
@@ -0,0 +1,214 @@
+import pytest
+
+
+class FakeRedis:
+    """
+    In-memory stand-in for the redis-py surface the services use: strings, hashes, sets,
+    lists, pub/sub publishes and one stream with consumer groups. round_trips counts
+    direct commands and pipeline executes (one per pipeline, however many commands).
+    """
+
+    def __init__(self):
+        self.strings = {}
+        self.hashes = {}
+        self.sets = {}
+        self.lists = {}
+        self.expiry = {}       # key -> last EXPIRE seconds
+        self.published = []    # (channel, message)
+        self.entries = []      # stream (id, fields)
+        self.delivered = {}    # group -> last-delivered position
+        self.groups = {}       # group -> {id: consumer} pending
+        self.round_trips = 0
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return FakePipeline(self)
+
+    def execute_command(self, *args, **options):
+        self.round_trips += 1
+        return "OK"
+
+    # --- strings ---
+
+    def set(self, key, value, nx=False, ex=None):
+        self.round_trips += 1
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = value
+        if ex is not None:
+            self.expiry[key] = ex
+        return True
+
+    def get(self, key):
+        self.round_trips += 1
+        return self.strings.get(key)
+
+    def expire(self, key, seconds):
+        self.round_trips += 1
+        self.expiry[key] = seconds
+        return True
+
+    # --- hashes ---
+
+    def hset(self, key, field=None, value=None, mapping=None):
+        self.round_trips += 1
+        items = dict(mapping or {})
+        if field is not None:
+            items[field] = value
+        h = self.hashes.setdefault(key, {})
+        added = len(set(items) - set(h))
+        h.update(items)
+        return added
+
+    def hgetall(self, key):
+        self.round_trips += 1
+        return dict(self.hashes.get(key, {}))
+
+    def hmget(self, key, fields):
+        self.round_trips += 1
+        h = self.hashes.get(key, {})
+        return [h.get(f) for f in fields]
+
+    def hincrby(self, key, field, amount=1):
+        self.round_trips += 1
+        h = self.hashes.setdefault(key, {})
+        h[field] = str(int(h.get(field, 0)) + amount)
+        return int(h[field])
+
+    # --- sets ---
+
+    def sadd(self, key, *members):
+        self.round_trips += 1
+        s = self.sets.setdefault(key, set())
+        new = {str(m) for m in members} - s
+        s.update(new)
+        return len(new)
+
+    def smismember(self, key, members):
+        self.round_trips += 1
+        s = self.sets.get(key, set())
+        return [int(str(m) in s) for m in members]
+
+    # --- lists ---
+
+    def lpush(self, key, *values):
+        self.round_trips += 1
+        lst = self.lists.setdefault(key, [])
+        for v in values:
+            lst.insert(0, v)
+        return len(lst)
+
+    def ltrim(self, key, start, end):
+        self.round_trips += 1
+        lst = self.lists.get(key, [])
+        self.lists[key] = lst[start:] if end == -1 else lst[start:end + 1]
+        return True
+
+    def lrange(self, key, start, end):
+        self.round_trips += 1
+        lst = self.lists.get(key, [])
+        return lst[start:] if end == -1 else lst[start:end + 1]
+
+    def publish(self, channel, message):
+        self.round_trips += 1
+        self.published.append((channel, message))
+        return 0
+
+    # --- stream + consumer groups ---
+
+    @property
+    def pending(self):
+        return {mid: c for pending in self.groups.values() for mid, c in pending.items()}
+
+    def xadd(self, key, fields, maxlen=None, approximate=True):
+        self.round_trips += 1
+        mid = f"{len(self.entries) + 1}-0"
+        self.entries.append((mid, dict(fields)))
+        return mid
+
+    def xgroup_create(self, stream, group, id="$", mkstream=False):
+        self.round_trips += 1
+        if group in self.groups:
+            raise RuntimeError("BUSYGROUP Consumer Group name already exists")
+        self.groups[group] = {}
+        self.delivered[group] = len(self.entries) if id == "$" else 0
+
+    def xreadgroup(self, group, consumer, streams, count=None, block=None):
+        self.round_trips += 1
+        start = self.delivered[group]
+        new = self.entries[start:start + count] if count else self.entries[start:]
+        self.delivered[group] += len(new)
+        for mid, _ in new:
+            self.groups[group][mid] = consumer
+        return [[next(iter(streams)), new]] if new else []
+
+    def xautoclaim(self, stream, group, consumer, min_idle_time, start_id="0-0", count=100):
+        # everything pending counts as idle here
+        self.round_trips += 1
+        pending = self.groups[group]
+        stale = [(mid, f) for mid, f in self.entries if mid in pending and pending[mid] != consumer][:count]
+        for mid, _ in stale:
+            pending[mid] = consumer
+        return ["0-0", stale, []]
+
+    def xack(self, stream, group, *ids):
+        self.round_trips += 1
+        pending = self.groups[group]
+        return sum(pending.pop(mid, None) is not None for mid in ids)
+
+
+class FakePipeline:
+    """Queues any FakeRedis command; execute runs them as one round trip."""
+
+    def __init__(self, r):
+        self.r = r
+        self.ops = []
+
+    def __getattr__(self, name):
+        command = getattr(self.r, name)
+
+        def queue(*args, **kwargs):
+            self.ops.append(lambda: command(*args, **kwargs))
+            return self
+        return queue
+
+    def execute(self, raise_on_error=True):
+        before = self.r.round_trips
+        out = [op() for op in self.ops]
+        self.ops = []
+        self.r.round_trips = before + 1
+        return out
+
+
+class FakeAsyncPipeline(FakePipeline):
+    async def execute(self, raise_on_error=True):
+        return FakePipeline.execute(self, raise_on_error)
+
+
+class FakeAsyncRedis:
+    """The redis.asyncio flavour, over its own data or a sync FakeRedis's."""
+
+    def __init__(self, r=None):
+        self.r = FakeRedis() if r is None else r
+
+    def pipeline(self, transaction=True, shard_hint=None):
+        return FakeAsyncPipeline(self.r)
+
+    async def execute_command(self, *args, **options):
+        return self.r.execute_command(*args, **options)
+
+    async def hgetall(self, key):
+        return self.r.hgetall(key)
+
+    async def hmget(self, key, fields):
+        return self.r.hmget(key, fields)
+
+
+@pytest.fixture
+def redis():
+    return FakeRedis()
+
+
+@pytest.fixture
+def aredis(redis):
+    """An asyncio client over the same data as the redis fixture."""
+    return FakeAsyncRedis(redis)
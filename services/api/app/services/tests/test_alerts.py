@@ -0,0 +1,123 @@
+import json
+import time
+from decimal import Decimal
+
+import pandas as pd
+from services.api.app.services.alerts import (
+    AlertConfig, AlertEngine, LevelIndex, MemoryNotifier, RedisNotifier, cooldown_key, state_key,
+)
+from services.api.app.services.live_feed import ALERTS_CHANNEL
+
+TS = pd.Timestamp("2025-06-02 06:00", tz="UTC")
+DAY = TS.date()
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def signals(*rows):
+    return pd.DataFrame([{
+        "source": "strategy", "id": i, "symbol_id": sid, "instrument_token": 1000 + sid, "strategy_name": "ORB_v1",
+        "ts": TS, "side": side, "entry_price": Decimal(str(entry)), "sl_price": sl, "tp_price": tp,
+    } for i, (sid, side, entry, sl, tp) in enumerate(rows, start=1)])
+
+
+def engine(r, *rows, **cfg):
+    clock, out = Clock(), MemoryNotifier()
+    eng = AlertEngine(r, [out], AlertConfig(dispatch_interval=1e9, **cfg), clock=clock)
+    eng.set_signals(signals(*rows), DAY)
+    return eng, clock, out
+
+
+def test_index_bisects_levels_and_entry_band():
+    idx = LevelIndex.from_frame(signals((1, "long", 100, 98, 104), (1, "short", 110, 112, 105), (2, "long", 50, 49, 52)))
+    assert idx.levels[1001][0] == [98, 100, 104, 105, 110, 112]
+    assert idx.crossed(1001, 99, 104.5) == [(0, "entry"), (0, "tp")]
+    assert idx.crossed(1001, 120, 130) == [] and idx.crossed(9999, 0, 1e9) == []
+    assert idx.near_entry(1001, 100.25, 0.3) == [0]       # within 0.3 %
+    assert idx.near_entry(1001, 100.5, 0.3) == []
+    assert idx.near_entry(1002, 49.9, 0.3) == [2]
+
+
+def test_approach_entry_then_tp_closes_the_signal(redis):
+    eng, clock, out = engine(redis, (1, "long", 100, 98, 104))
+    eng.on_price(1001, 101.0)
+    eng.on_price(1001, 100.2)          # approaching
+    eng.on_price(1001, 100.25)         # still approaching: deduplicated in the batch
+    eng.on_price(1001, 99.5)           # crosses the entry
+    eng.on_price(1001, 100.1)          # near the entry again, but entered
+    eng.on_price(1001, 104.5)          # crosses the TP (and the entry again, in cooldown)
+    eng.on_price(1001, 97.0)           # closed: nothing more
+    sent = eng.flush()
+    assert [a["event"] for a in sent] == ["approaching", "entry", "tp"]
+    assert sent[0]["entry_price"] == 100.0 and sent[0]["key"] == "strategy:1"
+    assert out.batches == [sent]
+    assert redis.hashes[state_key(DAY)] == {"strategy:1": "closed"}
+    json.dumps(sent)
+
+
+def test_cooldown_is_shared_through_redis_and_expires_locally(redis):
+    eng, clock, out = engine(redis, (1, "long", 100, 98, 104), cooldown_seconds=60)
+    eng.on_price(1001, 100.1)
+    assert len(eng.flush()) == 1
+    eng.on_price(1001, 100.2)
+    assert eng.flush() == [] and eng.queue == []   # known cooling down: not even queued
+
+    # another process (fresh engine, same Redis) does not repeat it
+    other = AlertEngine(redis, [MemoryNotifier()], AlertConfig(cooldown_seconds=60), clock=clock)
+    other.set_signals(signals((1, "long", 100, 98, 104)), DAY)
+    other.on_price(1001, 100.1)
+    assert other.flush() == [] and other.suppressed == 1
+
+    clock.now = 61
+    del redis.strings[cooldown_key("strategy:1", "approaching")]   # Redis expired it too
+    eng.on_price(1001, 100.15)
+    assert [a["event"] for a in eng.flush()] == ["approaching"]
+
+
+def test_reload_keeps_entered_and_closed_state(redis):
+    eng, clock, out = engine(redis, (1, "long", 100, 98, 104), (2, "short", 50, 51, 48))
+    eng.on_price(1001, 99.0)
+    eng.on_price(1001, 100.5)          # entry
+    eng.on_price(1002, 52.0)
+    eng.on_price(1002, 50.8)           # SL
+    eng.flush()
+    eng.set_signals(signals((1, "long", 100, 98, 104), (2, "short", 50, 51, 48)), DAY)
+    assert eng.entered == {"strategy:1"} and eng.closed == {"strategy:2"}
+
+
+def test_batches_flush_by_size_and_reach_the_live_feed(redis):
+    clock = Clock()
+    eng = AlertEngine(redis, [RedisNotifier(redis)], AlertConfig(batch_size=2, dispatch_interval=1e9), clock=clock)
+    eng.set_signals(signals((1, "long", 100, 98, 104), (2, "long", 50, 49, 52)), DAY)
+    eng.on_price(1001, 100.1)
+    eng.on_price(1002, 50.1)           # second alert fills the batch
+    assert redis.published == []       # the tick thread only queues
+
+    thread = eng.start_dispatcher()    # a full batch goes out without waiting for the interval
+    deadline = time.monotonic() + 5
+    while not redis.published and time.monotonic() < deadline:
+        time.sleep(0.01)
+    eng.stop_dispatcher()
+    thread.join(timeout=5)
+    assert not thread.is_alive()
+    channel, message = redis.published[0]
+    assert channel == ALERTS_CHANNEL
+    assert [a["symbol_id"] for a in json.loads(message)["alerts"]] == [1, 2]
+    assert len(redis.lists["alerts:outbox"]) == 2
+
+
+def test_tick_rate_over_the_focus_set(redis):
+    rows = [(sid, "long", 100 + sid, 99 + sid, 103 + sid) for sid in range(40) for _ in range(5)]
+    eng, clock, out = engine(redis, *rows)
+    ticks = [{"instrument_token": 1000 + (i % 40), "last_price": 99.5 + (i % 40) + (i % 17) * 0.1} for i in range(100_000)]
+    started = time.perf_counter()
+    eng.on_ticks(ticks)
+    eng.flush()
+    assert time.perf_counter() - started < 2.0
+    assert eng.sent > 0 and redis.round_trips < 10
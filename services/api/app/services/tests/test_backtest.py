@@ -0,0 +1,91 @@
+import numpy as np
+import pandas as pd
+import pytest
+from services.api.app.services.backtest import BacktestConfig, Backtester, BarStore
+from services.api.strategies.base import Strategy
+
+
+def _bars(days=("2025-06-02", "2025-06-03"), n=10):
+    rows = []
+    for d in days:
+        ts = pd.date_range(f"{d} 09:15", periods=n, freq="5min", tz="Asia/Kolkata").tz_convert("UTC")
+        for sid in (2, 1):
+            for i, t in enumerate(ts):
+                c = 100.0 + i
+                rows.append({"symbol_id": sid, "ts": t, "o": c, "h": c + 0.5, "l": c - 0.5, "c": c, "v": 1000})
+    return pd.DataFrame(rows)
+
+
+class AtBar(Strategy):
+    """Goes long symbol 1 on the given bar number of every day."""
+    name = "test_at_bar"
+    defaults = {"bar": 2, "sl": 1.0, "tp": 3.0, "ttl_bars": 0}
+
+    def evaluate(self, ctx):
+        m = ctx.matrix
+        first = m.groupby("symbol_id")["ts"].transform("min")
+        hit = m[(m["symbol_id"] == 1) & (m["ts"] == first + pd.Timedelta(minutes=5 * self.params["bar"]))]
+        return pd.DataFrame({
+            "symbol_id": hit["symbol_id"], "instrument_token": hit["instrument_token"], "ts": hit["ts"],
+            "side": "long", "signal_strength": 1.0, "entry_price": hit["c"],
+            "sl_price": hit["c"] - self.params["sl"], "tp_price": hit["c"] + self.params["tp"],
+            "ttl_bars": self.params["ttl_bars"],
+        })
+
+
+def test_bar_store_sorts_and_marks_day_blocks():
+    store = BarStore.from_frame(_bars())
+    assert (np.diff(store.symbol_id) >= 0).all()
+    assert store.symbol_end[0] == 19 and store.day_end[0] == 9 and store.day_end[10] == 19
+    assert [len(rows) for _, rows in store.days()] == [20, 20]
+
+
+def test_entry_delay_slippage_fees_and_target():
+    cfg = BacktestConfig(slippage_bps=10, fee_bps=5, entry_delay_bars=1, capital_per_trade=10000)
+    res = Backtester([AtBar()], cfg).run(BarStore.from_frame(_bars()))
+    trades = res.trades
+    assert len(trades) == 2 and set(trades["exit_reason"]) == {"target"}
+
+    t = trades.iloc[0]
+    # signal on bar 2 (close 102), fill at bar 3's open 103 plus 10bps
+    assert t["entry_price"] == pytest.approx(103 * 1.001)
+    assert t["entry_ts"] - t["signal_ts"] == pd.Timedelta(minutes=5)
+    # target 105 is touched by bar 4's high 105.5, filled at the target minus slippage
+    assert t["exit_price"] == pytest.approx(105 * 0.999)
+    qty = int(10000 // t["entry_price"])
+    assert t["qty"] == qty
+    assert t["fees"] == pytest.approx(0.0005 * (t["entry_price"] + t["exit_price"]) * qty)
+    assert t["net_pnl"] == pytest.approx((t["exit_price"] - t["entry_price"]) * qty - t["fees"])
+    assert res.equity.iloc[-1] == pytest.approx(cfg.initial_capital + trades["net_pnl"].sum())
+
+
+def _entry_bar(o, l):
+    """The bars with symbol 1's entry bar (bar 3 of each day) opening at o and dipping to l."""
+    df = _bars()
+    first = df.groupby(["symbol_id", df["ts"].dt.date])["ts"].transform("min")
+    at = (df["symbol_id"] == 1) & (df["ts"] == first + pd.Timedelta(minutes=15))
+    df.loc[at, "o"] = o
+    df.loc[at, "l"] = l
+    return BarStore.from_frame(df)
+
+
+def test_stop_wins_and_positions_are_flattened_at_session_end():
+    cfg = BacktestConfig(slippage_bps=0, fee_bps=0)
+    # signal close 102, stop 101: the entry bar opens at 103 and trades down to 100.5
+    tight = Backtester([AtBar({"sl": 1.0, "tp": 50.0})], cfg).run(_entry_bar(103.0, 100.5))
+    assert set(tight.trades["exit_reason"]) == {"stop"}
+    assert (tight.trades["bars_held"] == 1).all()
+    assert (tight.trades["exit_price"] == 101.0).all()
+
+    # the entry bar gaps below the stop: the position is out at the open, not at the stop
+    gap = Backtester([AtBar({"sl": 1.0, "tp": 50.0})], cfg).run(_entry_bar(100.0, 99.5))
+    assert set(gap.trades["exit_reason"]) == {"stop"}
+    assert (gap.trades["exit_price"] == 100.0).all() and (gap.trades["entry_price"] == 100.0).all()
+
+    store = BarStore.from_frame(_bars())
+    # out-of-reach stop and target: exit at the close of the session's last bar, never overnight
+    wide = Backtester([AtBar({"sl": 50.0, "tp": 50.0})], BacktestConfig(slippage_bps=0, fee_bps=0)).run(store)
+    assert set(wide.trades["exit_reason"]) == {"time"}
+    assert (wide.trades["exit_price"] == 109.0).all()
+    assert (wide.trades["exit_ts"].dt.tz_convert("Asia/Kolkata").dt.date
+            == wide.trades["entry_ts"].dt.tz_convert("Asia/Kolkata").dt.date).all()
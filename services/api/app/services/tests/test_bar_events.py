@@ -0,0 +1,87 @@
+import pandas as pd
+from services.api.app.services.bar_events import (
+    LATENCY_KEY, BarEvent, BarEventConsumer, coalesce, ensure_group, events_from_bars,
+    latency_stats, publish,
+)
+
+
+TS = pd.Timestamp("2025-06-02 04:00", tz="UTC")  # 09:30 IST
+
+
+def test_events_group_symbols_by_bar_and_round_trip():
+    events = events_from_bars({1: TS, 2: TS, 3: TS - pd.Timedelta(minutes=5)}, "5m")
+    assert [(e.ts, e.symbol_ids) for e in events] == [(TS - pd.Timedelta(minutes=5), [3]), (TS, [1, 2])]
+
+    back = BarEvent.from_fields("1-0", events[1].fields())
+    assert back.ts == TS and back.symbol_ids == [1, 2] and back.closed_at == TS + pd.Timedelta(minutes=5)
+
+
+def test_coalesce_unions_symbols_per_timeframe():
+    events = [
+        BarEvent("5m", TS, [1, 2], 10.0, "1-0"),
+        BarEvent("5m", TS + pd.Timedelta(minutes=5), [2, 3], 11.0, "2-0"),
+        BarEvent("1m", TS, [1], 10.0, "3-0"),
+    ]
+    batches = coalesce(events)
+    assert [b.timeframe for b in batches] == ["1m", "5m"]
+    five = batches[1]
+    assert five.symbol_ids == [1, 2, 3] and five.ts == TS + pd.Timedelta(minutes=5)
+    assert five.first_close == TS + pd.Timedelta(minutes=5) and five.first_published == 10.0
+
+
+def test_burst_runs_once_and_duplicates_are_dropped(redis):
+    calls = []
+    consumer = BarEventConsumer(redis, lambda b: calls.append(list(b.symbol_ids)) or {"features": 0.1},
+                                "c1", timeframes=["5m"], count=2)
+    ensure_group(redis, group=consumer.group)
+
+    assert publish(redis, events_from_bars({1: TS, 2: TS}, "5m")) == ["1-0"]
+    assert redis.published[0][0] == "events:bar_close"
+    publish(redis, events_from_bars({3: TS}, "5m"))
+    publish(redis, events_from_bars({1: TS}, "1m"))   # not this consumer's timeframe
+    summaries = consumer.process(consumer.read())
+    assert calls == [[1, 2, 3]]                    # three events, one run
+    assert summaries[0]["events"] == 2 and summaries[0]["symbols"] == 3
+    assert redis.pending == {}                         # all acked, the 1m one too (in the 5m group)
+
+    # the same bar again (Kite poll after the ticker) is acked without a run
+    publish(redis, events_from_bars({2: TS, 4: TS}, "5m"))
+    consumer.process(consumer.read())
+    assert calls == [[1, 2, 3], [4]]
+    assert redis.pending == {}
+
+    assert latency_stats(redis)["batches"] == 2
+    assert len(redis.lists[LATENCY_KEY]) == 2
+
+
+def test_failed_batch_stays_pending_and_is_reclaimed(redis):
+    ensure_group(redis)
+
+    def broken(batch):
+        raise RuntimeError("db down")
+
+    publish(redis, events_from_bars({1: TS}, "5m"))
+    dead = BarEventConsumer(redis, broken, "c1")
+    assert dead.process(dead.read()) == []
+    assert list(redis.pending.values()) == ["c1"]
+
+    calls = []
+    other = BarEventConsumer(redis, lambda b: calls.append(b.symbol_ids) or {}, "c2")
+    other.process(other.read())
+    assert calls == [[1]] and redis.pending == {}
+
+
+def test_each_timeframe_has_its_own_group(redis):
+    calls = []
+    five = BarEventConsumer(redis, lambda b: calls.append((b.timeframe, b.symbol_ids)) or {}, "c1", timeframes=["5m"])
+    one = BarEventConsumer(redis, lambda b: calls.append((b.timeframe, b.symbol_ids)) or {}, "c2", timeframes=["1m"])
+    assert (five.group, one.group) == ("pipeline:5m", "pipeline:1m")
+    ensure_group(redis, group=five.group)
+    ensure_group(redis, group=one.group)
+    ensure_group(redis, group=one.group)  # BUSYGROUP is fine
+
+    publish(redis, events_from_bars({1: TS}, "5m") + events_from_bars({2: TS}, "1m"))
+    five.process(five.read())
+    # the 5m consumer acked the 1m event in its own group only: the 1m pipeline still gets it
+    one.process(one.read())
+    assert calls == [("5m", [1]), ("1m", [2])] and redis.pending == {}
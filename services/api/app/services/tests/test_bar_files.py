@@ -0,0 +1,86 @@
+import multiprocessing as mp
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from services.api.app.services.bar_files import BAR_DTYPE, BarFile, BarFileStore, records_frame
+
+
+def _frame(day, n=4, sid=7, start="09:15"):
+    ts = pd.date_range(f"{day} {start}", periods=n, freq="5min", tz="Asia/Kolkata").tz_convert("UTC")
+    c = np.arange(n, dtype=float) + 100
+    return pd.DataFrame({"symbol_id": sid, "ts": ts, "o": c, "h": c + 1, "l": c - 1, "c": c, "v": 10})
+
+
+def test_append_only_closed_new_bars_and_index_days(tmp_path):
+    store = BarFileStore(tmp_path)
+    assert store.open(7, "5m") is None
+
+    df = _frame("2025-06-02")
+    # the last bar is still open and is left out
+    assert store.append(df, "5m", closed_before=df["ts"].iloc[-1]) == 3
+    # already-stored bars are skipped, only the newly closed one goes in
+    assert store.append(pd.concat([df, _frame("2025-06-03")]), "5m") == 5
+
+    f = store.open(7, "5m")
+    assert len(f) == 8 and f.view().dtype == BAR_DTYPE
+    assert f.day_index() == {date(2025, 6, 2): (0, 4), date(2025, 6, 3): (4, 8)}
+    day = f.read(date(2025, 6, 3), date(2025, 6, 3))
+    assert len(day) == 4 and not day.flags.writeable
+    assert np.shares_memory(day, f.view())  # a view of the mapping, not a copy
+
+    since = records_frame(f.since(df["ts"].iloc[2]))
+    assert since["ts"].iloc[0] == df["ts"].iloc[2] and len(since) == 6
+
+    bars = store.bar_store([7], "5m", start=date(2025, 6, 2), end=date(2025, 6, 2))
+    assert len(bars) == 4 and bars.symbol_end[0] == 3
+
+
+def test_backfilled_bars_are_merged_into_the_file(tmp_path):
+    store = BarFileStore(tmp_path)
+    store.append(pd.concat([_frame("2025-06-02"), _frame("2025-06-04")]), "5m")
+    reader = BarFile(tmp_path / "5m" / "7.bars")
+    old = reader.read()
+    assert len(old) == 8
+
+    # a backfilled day and a missing bar inside a stored day, plus bars already stored
+    late = pd.concat([_frame("2025-06-03"), _frame("2025-06-04", n=1, start="10:00"), _frame("2025-06-02")])
+    assert store.append(late, "5m") == 5
+    assert store.append(late, "5m") == 0
+
+    view = reader.view()  # picks up the rebuilt file
+    assert len(view) == 13 and (np.diff(view["ts"]) > 0).all()
+    assert reader.day_index() == {date(2025, 6, 2): (0, 4), date(2025, 6, 3): (4, 8), date(2025, 6, 4): (8, 13)}
+    assert len(old) == 8 and (np.diff(old["ts"]) > 0).all()  # views of the old file stay intact
+
+    # appends after a rebuild land in the new file
+    assert store.append(_frame("2025-06-05"), "5m") == 4
+    assert len(reader.view()) == 17 and len(BarFile(tmp_path / "5m" / "7.bars")) == 17
+
+
+def _append_days(root, days):
+    store = BarFileStore(root)
+    for d in days:
+        store.append(_frame(d, n=75), "5m")
+
+
+def test_readers_see_whole_records_while_another_process_appends(tmp_path):
+    BarFileStore(tmp_path).append(_frame("2025-06-02"), "5m")
+    reader = BarFile(tmp_path / "5m" / "7.bars")
+    days = [str(d.date()) for d in pd.bdate_range("2025-06-03", periods=20)]
+    writer = mp.get_context("fork").Process(target=_append_days, args=(str(tmp_path), days))
+    writer.start()
+    while writer.is_alive():
+        view = reader.view()
+        assert (np.diff(view["ts"]) > 0).all()
+        assert (view["h"] - view["c"] == 1).all()  # no torn or zero-filled records
+    writer.join()
+    assert writer.exitcode == 0 and len(reader.view()) == 4 + 75 * 20
+
+
+def test_rejects_foreign_files(tmp_path):
+    path = tmp_path / "x.bars"
+    path.write_bytes(b"\0" * 64)
+    with pytest.raises(ValueError):
+        BarFile(path)
@@ -0,0 +1,111 @@
+import io
+
+import numpy as np
+import pandas as pd
+from services.api.app.services.candle_writer import COPY_SQL, MERGE_SQL, write_candles
+
+
+class FakeCopy:
+    def __init__(self, cur):
+        self.cur = cur
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def write(self, data):
+        self.cur.conn.payload += data
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def copy(self, sql):                      # psycopg 3
+        self.conn.sql = sql
+        return FakeCopy(self)
+
+    def close(self):
+        pass
+
+
+class FakeCursor2:
+    def __init__(self, conn):
+        self.conn = conn
+
+    def copy_expert(self, sql, f):            # psycopg2
+        self.conn.sql = sql
+        self.conn.payload += f.read()
+
+    def close(self):
+        pass
+
+
+class FakeRawConn:
+    def __init__(self, cursor_cls):
+        self.cursor_cls = cursor_cls
+        self.sql = None
+        self.payload = ""
+
+    def cursor(self):
+        return self.cursor_cls(self)
+
+
+class FakeResult:
+    rowcount = 2
+
+
+class FakeDB:
+    def __init__(self, cursor_cls=FakeCursor):
+        self.raw = FakeRawConn(cursor_cls)
+        self.statements = []
+
+    def connection(self):
+        db = self
+
+        class Conn:
+            class connection:
+                driver_connection = db.raw
+        return Conn
+
+    def execute(self, stmt, params=None):
+        self.statements.append(str(stmt))
+        return FakeResult()
+
+
+def _frame():
+    ts = pd.to_datetime(["2025-06-02 03:45", "2025-06-02 03:50", "2025-06-02 03:50"], utc=True)
+    return pd.DataFrame({"symbol_id": [7, 7, 7], "ts": ts, "o": [10.0, 11.0, 11.5], "h": [10.5, 11.2, 11.8],
+                         "l": [9.8, 10.9, 11.1], "c": [10.2, 11.1, 11.6], "v": [1200.0, np.nan, 900.0]})
+
+
+def test_write_candles_stages_csv_and_merges():
+    frame = _frame()
+    frame.loc[1, "v"] = 500.0
+    frame = pd.concat([frame, frame.iloc[[0]].assign(symbol_id=9, v=np.nan)], ignore_index=True)
+    db = FakeDB()
+    stats = write_candles(db, frame, "5m")
+
+    assert db.raw.sql == COPY_SQL
+    rows = pd.read_csv(io.StringIO(db.raw.payload), header=None,
+                       names=["symbol_id", "ts", "o", "h", "l", "c", "v", "timeframe"])
+    # duplicate keys keep the last copy; a missing volume is written as 0
+    assert rows["symbol_id"].tolist() == [7, 7, 9]
+    assert rows["v"].tolist() == [1200, 900, 0]
+    assert rows["o"].tolist() == [10.0, 11.5, 10.0]
+    assert set(rows["timeframe"]) == {"5m"}
+    assert "candles_staging" in db.statements[0]
+    assert db.statements[1] == str(MERGE_SQL) and "TRUNCATE" in db.statements[2]
+    assert (stats.rows, stats.merged, stats.symbols) == (3, 2, 2)
+
+
+def test_write_candles_psycopg2_and_empty():
+    db = FakeDB(FakeCursor2)
+    stats = write_candles(db, _frame(), "1m")
+    assert db.raw.payload.count("\n") == 2 and db.raw.payload.strip().endswith("1m")
+    assert stats.rows == 2
+
+    empty = FakeDB()
+    assert write_candles(empty, _frame().iloc[:0], "5m").rows == 0 and empty.statements == []
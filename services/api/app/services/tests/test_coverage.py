@@ -0,0 +1,116 @@
+from datetime import datetime
+
+from services.api.app.services.coverage import (
+    IST, closed_until, fetched_range, merge_intervals, missing_ranges, plan_fetches, save_coverage,
+    settled_until, subtract_intervals,
+)
+
+
+def _ist(*args):
+    return IST.localize(datetime(*args))
+
+
+def test_interval_merge_and_subtract():
+    merged = merge_intervals([(5, 7), (1, 3), (3, 4), (6, 9)])
+    assert merged == [(1, 4), (5, 9)]
+    assert subtract_intervals([(0, 10)], merged) == [(0, 1), (4, 5), (9, 10)]
+
+
+def test_gaps_skip_weekends_and_holidays():
+    # Thu 2025-04-17 .. Tue 2025-04-22; Fri 18th is Good Friday
+    start, end = _ist(2025, 4, 17, 0, 0), _ist(2025, 4, 22, 23, 0)
+    gaps = missing_ranges([], start, end, "5m")
+    # one request: Thu open -> Tue close, nothing in between is trading time
+    assert gaps == [(_ist(2025, 4, 17, 9, 15), _ist(2025, 4, 22, 15, 30))]
+
+    covered = [(_ist(2025, 4, 17, 9, 15), _ist(2025, 4, 21, 12, 0))]
+    assert missing_ranges(covered, start, end, "5m") == [(_ist(2025, 4, 21, 12, 0), _ist(2025, 4, 22, 15, 30))]
+
+
+def test_fully_covered_window_needs_no_requests():
+    start, end = _ist(2025, 6, 2, 0, 0), _ist(2025, 6, 6, 23, 0)
+    # daily bars are stamped 00:00 IST: 1d coverage is in whole days
+    coverage = {1: [(_ist(2025, 6, 2, 0, 0), _ist(2025, 6, 7, 0, 0))], 2: []}
+    reqs = plan_fetches([(1, "101"), (2, "202")], coverage, "1d", start, end)
+    assert [r.key for r in reqs] == [2]
+
+
+def test_open_bar_is_not_marked_covered():
+    now = _ist(2025, 6, 2, 10, 7)
+    assert closed_until(now, "5m") == _ist(2025, 6, 2, 10, 5)
+    assert closed_until(now, "1h") == _ist(2025, 6, 2, 9, 15)
+    # today's daily bar opened at 00:00 and closes with the session
+    assert closed_until(now, "1d") == _ist(2025, 6, 2, 0, 0)
+    # after the close nothing starts until tomorrow
+    assert closed_until(_ist(2025, 6, 2, 16, 0), "1d") == _ist(2025, 6, 3, 0, 0)
+
+    # the last closed bars settle before they are marked covered (Kite may still revise them)
+    req = plan_fetches([(1, "101")], {}, "5m", _ist(2025, 6, 2, 9, 0), now)[0]
+    assert fetched_range(req, now) == (_ist(2025, 6, 2, 9, 15), _ist(2025, 6, 2, 9, 50))
+    assert fetched_range(req, _ist(2025, 6, 2, 9, 20)) is None
+
+
+def test_daily_gaps_are_whole_days():
+    gaps = missing_ranges([], _ist(2025, 6, 5, 0, 0), _ist(2025, 6, 10, 0, 0), "1d")
+    # Thu, Fri, (weekend), Mon: one request over the whole days
+    assert gaps == [(_ist(2025, 6, 5, 0, 0), _ist(2025, 6, 10, 0, 0))]
+    req = plan_fetches([(1, "101")], {}, "1d", _ist(2025, 6, 2, 0, 0), _ist(2025, 6, 4, 12, 0))[0]
+    # Wed is still open; Mon and Tue closed with their sessions and are final
+    assert fetched_range(req, _ist(2025, 6, 4, 12, 0)) == (_ist(2025, 6, 2, 0, 0), _ist(2025, 6, 4, 0, 0))
+
+
+def test_repeat_daily_builds_the_same_day_fetch_nothing():
+    start = _ist(2025, 5, 5, 0, 0)
+    coverage = {1: [(start, _ist(2025, 6, 3, 0, 0))]}        # up to Mon's bar, Tue's not fetched yet
+    for first, second in [((8, 30), (9, 30)), ((9, 30), (12, 30)), ((12, 30), (15, 0)), ((16, 0), (20, 0))]:
+        now, later = _ist(2025, 6, 4, *first), _ist(2025, 6, 4, *second)
+        end = closed_until(now, "1d")                          # the universe's window: closed bars only
+        cov = {1: list(coverage[1])}
+        reqs = plan_fetches([(1, "101")], cov, "1d", start, end)
+        assert [(r.from_date, r.to_date) for r in reqs] == [(_ist(2025, 6, 3, 0, 0), end)]
+        cov[1].append(fetched_range(reqs[0], now))
+        # a second build later the same day plans no fetch at all
+        assert plan_fetches([(1, "101")], cov, "1d", start, closed_until(later, "1d")) == []
+
+
+def test_intraday_coverage_settling_today_leaves_past_days_complete():
+    now = _ist(2025, 6, 4, 12, 30)
+    start = _ist(2025, 5, 5, 0, 0)
+    # the 5m syncs keep coverage up to the settle lag behind the open bar
+    coverage = {1: [(_ist(2025, 5, 5, 9, 15), settled_until(now, "5m"))]}
+    assert plan_fetches([(1, "101")], coverage, "5m", start, closed_until(now, "5m"))
+    # up to the closed daily bars (the universe's check) it is complete
+    assert plan_fetches([(1, "101")], coverage, "5m", start, closed_until(now, "1d")) == []
+
+
+class FakeDB:
+    def __init__(self, stored):
+        self.stored = stored
+        self.calls = []
+
+    def execute(self, stmt, params=None):
+        sql = " ".join(str(stmt).split())
+        self.calls.append((sql, params))
+        if sql.startswith("SELECT symbol_id, start_ts, end_ts"):
+            return FakeRows(self.stored)
+        return FakeRows([])
+
+
+class FakeRows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_save_coverage_locks_and_unions_with_stored_ranges():
+    a, b, c, d = (_ist(2025, 6, 2, h, 0) for h in (10, 11, 12, 13))
+    # another sync recorded 12-13 after this one loaded its coverage
+    db = FakeDB([(2, c, d)])
+    save_coverage(db, {2: [(a, b)], 1: [(a, c)]}, "5m")
+    lock_sql, lock_params = db.calls[0]
+    assert "pg_advisory_xact_lock" in lock_sql and lock_params["sids"] == [1, 2]
+    insert_sql, rows = db.calls[-1]
+    assert "ON CONFLICT" in insert_sql
+    assert sorted((r["symbol_id"], r["start_ts"], r["end_ts"]) for r in rows) == [(1, a, c), (2, a, b), (2, c, d)]
@@ -0,0 +1,103 @@
+import json
+import time
+
+import numpy as np
+import pandas as pd
+from services.api.app.services.ensemble import (
+    EnsembleConfig, EnsembleEngine, RegimeConfig, confidence, regime_multiplier, score_matrix,
+)
+
+TS = pd.Timestamp("2025-06-02 06:00", tz="UTC")   # 11:30 IST: no time-of-day adjustment
+STRATS = ["A", "B", "C"]
+
+
+def sig(sid, strategy, side, strength=1.0, ts=TS, ttl=3, entry=100.0, sl=98.0, tp=104.0, atr_pct=2.0):
+    return {"symbol_id": sid, "instrument_token": 1000 + sid, "strategy_name": strategy, "ts": ts, "side": side,
+            "signal_strength": strength, "entry_price": entry, "sl_price": sl, "tp_price": tp, "ttl_bars": ttl,
+            "atr_pct": atr_pct}
+
+
+def engine(**kw):
+    return EnsembleEngine(EnsembleConfig(**kw), STRATS)
+
+
+def test_score_matrix_agreement_and_consensus():
+    side = np.array([[1, 1, -1], [0, -1, -1], [1, -1, 0]])
+    conf = np.full((3, 3), 0.5)
+    out = score_matrix(side, conf, np.array([1.0, 1.0, 2.0]))
+    np.testing.assert_allclose(out["score"], [0.0, -0.375, 0.0])
+    assert out["side"].tolist() == [0, -1, 0]
+    assert out["agree"].tolist() == [0, 2, 0]
+
+
+def test_k_of_n_and_threshold():
+    df = pd.DataFrame([
+        sig(1, "A", "long", 3.0), sig(1, "B", "long", 3.0),                 # 2 agree, strong
+        sig(2, "A", "long", 3.0),                                          # only 1
+        sig(3, "A", "short", 0.2), sig(3, "B", "short", 0.2),              # 2 agree, weak
+        sig(4, "A", "long", 3.0), sig(4, "B", "long", 3.0), sig(4, "C", "short", 3.0),
+    ])
+    out = engine(k=2, threshold=0.3).score(df).set_index("symbol_id")
+    assert out.loc[1, "qualified"] and out.loc[1, "side"] == "long" and out.loc[1, "agree"] == 2
+    np.testing.assert_allclose(out.loc[1, "score"], 2 * 0.75 / 3)
+    assert not out.loc[2, "qualified"]
+    assert out.loc[3, "side"] == "short" and not out.loc[3, "qualified"]
+    assert out.loc[4, "agree"] == 2 and not out.loc[4, "qualified"]   # C's dissent halves the score
+    assert [c["strategy"] for c in json.loads(out.loc[4, "constituents"])] == ["A", "B", "C"]
+
+
+def test_levels_average_the_agreeing_strategies_only():
+    df = pd.DataFrame([
+        sig(1, "A", "long", 1.0, entry=100, sl=98, tp=104),
+        sig(1, "B", "long", 3.0, entry=102, sl=99, tp=106),
+        sig(1, "C", "short", 1.0, entry=50, sl=60, tp=40),
+    ])
+    row = engine().score(df).iloc[0]
+    # weights 1, confidences 0.5 and 0.75
+    assert np.isclose(row["entry_price"], (100 * 0.5 + 102 * 0.75) / 1.25)
+    assert np.isclose(row["sl_price"], (98 * 0.5 + 99 * 0.75) / 1.25)
+
+
+def test_expired_and_unknown_strategies_are_ignored():
+    df = pd.DataFrame([
+        sig(1, "A", "long", ts=TS - pd.Timedelta(minutes=30), ttl=3),   # expired 15 min ago
+        sig(1, "B", "long"),
+        sig(1, "X", "long"),                                           # not an enabled strategy
+    ])
+    row = engine(k=1).score(df, asof=TS).iloc[0]
+    assert row["agree"] == 1 and row["ts"] == TS
+    assert [c["strategy"] for c in json.loads(row["constituents"])] == ["B"]
+
+
+def test_regime_multiplier():
+    cfg = RegimeConfig()
+    ts = pd.Series(pd.to_datetime([
+        "2025-06-02 03:50", "2025-06-02 06:00", "2025-06-02 09:45", "2025-06-02 06:00", "2025-06-02 06:00",
+    ], utc=True))
+    mult = regime_multiplier(ts, np.array([2.0, 2.0, 2.0, 0.5, 6.0]), cfg)
+    np.testing.assert_allclose(mult, [0.8, 1.0, 0.7, 0.9, 0.8])
+
+
+def test_confidence_is_bounded():
+    np.testing.assert_allclose(confidence(np.array([0.0, 1.0, np.nan, -2.0])), [0.0, 0.5, 0.5, 0.0])
+
+
+def test_arrays_for_upsert():
+    out = engine(k=1, threshold=0.1).score(pd.DataFrame([sig(1, "A", "long")]))
+    arrays = EnsembleEngine.ensemble_arrays(out, TS.date())
+    assert arrays["symbol_id"] == [1] and arrays["qualified"] == [True] and arrays["n_strategies"] == [3]
+    assert arrays["ts"][0] == TS.to_pydatetime()
+
+
+def test_forty_symbols_five_strategies_in_milliseconds():
+    names = [f"S{i}" for i in range(5)]
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame([
+        sig(sid, s, rng.choice(["long", "short"]), float(rng.random() * 2))
+        for sid in range(40) for s in names if rng.random() < 0.6
+    ])
+    ens = EnsembleEngine(EnsembleConfig(), names)
+    ens.score(df)
+    started = time.perf_counter()
+    out = ens.score(df)
+    assert len(out) == df["symbol_id"].nunique() and time.perf_counter() - started < 0.05
@@ -0,0 +1,26 @@
+import numpy as np
+import pandas as pd
+from services.api.app.services.feature_cache import publish_snapshots, read_snapshots, snapshot_key
+
+
+def test_latest_row_per_symbol_round_trips(redis):
+    ts = pd.date_range("2025-06-02 09:15", periods=3, freq="5min", tz="Asia/Kolkata")
+    df = pd.DataFrame({
+        "symbol_id": [1, 1, 1, 2, 2, 2],
+        "ts": list(ts) * 2,
+        "rsi14": [40.0, 41.0, 42.0, 60.0, 61.0, np.nan],
+        "vwap": [100.0, 100.5, 101.0, 50.0, 50.1, 50.2],
+    })
+    assert publish_snapshots(redis, df, {1: "111", 2: "222"}) == 2
+
+    snaps = read_snapshots(redis, ["111", "222", "333"])
+    assert redis.round_trips == 2  # one write, one read
+    assert snaps["333"] is None
+    assert snaps["111"]["rsi14"] == 42.0 and snaps["111"]["ts"] == ts[-1]
+    assert snaps["222"]["rsi14"] is None and snaps["222"]["vwap"] == 50.2
+    assert snaps["111"]["macd"] is None  # column not in the frame
+
+
+def test_other_schema_version_is_a_miss(redis):
+    redis.hashes[snapshot_key("111")] = {"v": "0", "symbol_id": "1", "ts": "0"}
+    assert read_snapshots(redis, ["111"]) == {"111": None}
@@ -0,0 +1,100 @@
+import numpy as np
+import pandas as pd
+import pytest
+from services.api.app.services.feature_store import (
+    rows_to_write, finalized_marks, feature_payload, latest_payload, write_features,
+)
+from services.api.app.services.incremental import IncrementalFeatureEngine
+
+
+def _frame():
+    ts = pd.date_range("2025-06-02 09:15", periods=4, freq="5min", tz="Asia/Kolkata")
+    return pd.DataFrame({
+        "symbol_id": [1] * 4 + [2] * 4,
+        "ts": list(ts) * 2,
+        "rsi14": [50.0] * 8,
+    })
+
+
+def test_rows_after_watermark_only():
+    df = _frame()
+    marks = {1: df["ts"].iloc[2]}
+    out = rows_to_write(df, marks)
+    # symbol 1 keeps only its last bar, symbol 2 has no watermark yet
+    assert out[out["symbol_id"] == 1]["ts"].tolist() == [df["ts"].iloc[3]]
+    assert len(out[out["symbol_id"] == 2]) == 4
+
+
+def test_open_bar_is_not_finalized():
+    df = _frame()
+    now = df["ts"].iloc[3] + pd.Timedelta(minutes=2)  # last bar still open
+    marks = finalized_marks(df, "5m", now)
+    assert marks == {1: df["ts"].iloc[2], 2: df["ts"].iloc[2]}
+
+
+def test_payload_fills_missing_feature_columns():
+    payload = feature_payload(_frame().head(1))
+    assert payload[0]["rsi14"] == 50.0
+    assert payload[0]["adtv"] is None
+
+
+def test_latest_payload_is_newest_row_per_symbol():
+    df = _frame().sample(frac=1, random_state=0)  # order must not matter
+    payload = latest_payload(df)
+    assert sorted(p["symbol_id"] for p in payload) == [1, 2]
+    assert all(p["ts"] == _frame()["ts"].iloc[3] for p in payload)
+
+
+def test_other_timeframes_are_rejected_before_touching_the_db():
+    # 09:15/09:30 15m buckets share their ts with 5m bars in the timeframe-less features key
+    with pytest.raises(ValueError):
+        write_features(None, _frame(), "15m")
+
+
+class FakeDB:
+    """Serves one stored watermark per symbol and keeps the feature upserts."""
+
+    def __init__(self, marks):
+        self.marks = marks
+        self.rows = []
+
+    def execute(self, stmt, params=None):
+        sql = " ".join(str(stmt).split())
+        if sql.startswith("SELECT symbol_id, last_final_ts"):
+            return FakeRows(list(self.marks.items()))
+        if sql.startswith("INSERT INTO features "):
+            self.rows += params
+        return FakeRows([])
+
+
+class FakeRows:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+
+def test_backfill_reseed_rewrites_rows_below_the_watermark():
+    ts = pd.date_range("2025-06-02 03:45", periods=150, freq="5min", tz="UTC")
+    c = 100 + np.sin(np.arange(150) / 7)
+    bars = pd.DataFrame({"ts": ts, "o": c, "h": c + 1, "l": c - 1, "c": c, "v": 1000.0})
+    gap = bars.index[60:70]
+
+    # first pass without the gap's bars: the watermark moves past it
+    first = IncrementalFeatureEngine().update(bars.drop(gap)).assign(symbol_id=1)
+    mark = first["ts"].iloc[-1]
+
+    # the gap is backfilled and the engine reseeded over the whole window
+    redo = IncrementalFeatureEngine().update(bars).assign(symbol_id=1)
+    db = FakeDB({1: mark})
+    assert write_features(db, redo, "5m", now=ts[-1] + pd.Timedelta(hours=1)) == 0   # all below the mark
+    written = write_features(db, redo, "5m", now=ts[-1] + pd.Timedelta(hours=1),
+                             rewrite_from={1: redo["ts"].iloc[0]})
+    assert written == len(bars)
+    stored = {r["ts"] for r in db.rows}
+    assert set(ts[gap]) <= stored                     # the missing rows land
+    # and the rows after the gap carry the recomputed values
+    after = {r["ts"]: r["vwap"] for r in db.rows}[ts[80]]
+    assert np.isclose(after, redo.set_index("ts").loc[ts[80], "vwap"])
+    assert not np.isclose(after, first.set_index("ts").loc[ts[80], "vwap"])
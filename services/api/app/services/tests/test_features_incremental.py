@@ -0,0 +1,76 @@
+import numpy as np
+import pandas as pd
+from services.api.app.services.features import compute_features
+from services.api.app.services.incremental import IncrementalFeatureEngine, FEATURE_COLUMNS
+
+
+def _candles(days=25, bars_per_day=75, seed=7):
+    rng = np.random.default_rng(seed)
+    sessions = pd.bdate_range("2025-01-01", periods=days)
+    ts = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(d + pd.Timedelta(hours=3, minutes=45), periods=bars_per_day, freq="5min").values
+        for d in sessions
+    ])).tz_localize("UTC")
+    n = len(ts)
+    c = 100 + np.cumsum(rng.normal(0, 0.5, n))
+    o = c + rng.normal(0, 0.2, n)
+    h = np.maximum(o, c) + rng.random(n)
+    l = np.minimum(o, c) - rng.random(n)
+    v = rng.integers(1_000, 100_000, n).astype(float)
+    return pd.DataFrame({"ts": ts, "o": o, "h": h, "l": l, "c": c, "v": v})
+
+
+def test_incremental_matches_batch():
+    df = _candles()
+    batch = compute_features(df.copy())
+
+    engine = IncrementalFeatureEngine()
+    parts = [engine.update(df.iloc[:500])]
+    for i in range(500, len(df), 13):
+        parts.append(engine.update(df.iloc[i:i + 13]))
+    inc = pd.concat(parts, ignore_index=True)
+
+    assert len(inc) == len(df)
+    for col in FEATURE_COLUMNS:
+        if col == "adtv":
+            continue
+        np.testing.assert_allclose(inc[col], batch[col], rtol=1e-9, atol=1e-9, equal_nan=True)
+
+    # ADTV is point-in-time, so it agrees with the batch value at each day's last bar
+    day_close = batch.groupby(batch["ts"].dt.date).tail(1).index
+    np.testing.assert_allclose(inc["adtv"][day_close], batch["adtv"][day_close], rtol=1e-9, equal_nan=True)
+
+
+def test_revised_last_bar_replaces_state():
+    df = _candles(days=5)
+    engine = IncrementalFeatureEngine()
+    engine.update(df.iloc[:-1])
+
+    stale = df.iloc[[-1]].copy()
+    stale["c"] = stale["c"] * 1.05
+    engine.update(stale)
+    out = engine.update(df.iloc[[-1]])
+
+    expected = compute_features(df.copy()).iloc[-1]
+    assert len(out) == 1
+    for col in ["rsi14", "macd", "atr14", "vwap"]:
+        assert np.isclose(out[col].iloc[0], expected[col], equal_nan=True)
+
+
+def test_bar_count_tracks_distinct_bars_and_registry_reset():
+    from services.api.app.services.incremental import get_engine, reset_engines, warm_engines
+
+    df = _candles(days=3)
+    engine = IncrementalFeatureEngine()
+    engine.update(df.iloc[:100])
+    engine.update(df.iloc[99:120])          # revised copy of bar 99 counts once
+    assert engine.n_bars == 120
+    assert engine.first_ts == df["ts"].iloc[0] and engine.last_ts == df["ts"].iloc[119]
+
+    reset_engines()
+    get_engine(1, "5m").update(df.iloc[:50])
+    get_engine(2, "5m")                     # never seeded
+    assert list(warm_engines([1, 2, 3], "5m")) == [1]
+    reset_engines([(1, "5m")])
+    assert warm_engines([1, 2], "5m") == {}
+    reset_engines()
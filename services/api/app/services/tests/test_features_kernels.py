@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+from services.api.app.services import kernels
+from services.api.app.services.features import (
+    FeatureConfig, compute_features, ewm_alpha, _true_range, _rolling_zscore,
+)
+
+
+def _candles(n=900, seed=11):
+    rng = np.random.default_rng(seed)
+    ts = pd.date_range("2025-05-05 03:45", periods=n, freq="5min", tz="UTC")
+    c = 500 + np.cumsum(rng.normal(0, 2.0, n))
+    o = c + rng.normal(0, 0.5, n)
+    h = np.maximum(o, c) + rng.random(n)
+    l = np.minimum(o, c) - rng.random(n)
+    v = rng.integers(100, 20_000, n).astype(float)
+    return pd.DataFrame({"ts": ts, "o": o, "h": h, "l": l, "c": c, "v": v})
+
+
+def test_kernel_backend_matches_pandas():
+    df = _candles()
+    ref = compute_features(df.copy())
+    out = compute_features(df.copy(), FeatureConfig(backend="kernel"))
+
+    # recursive indicators follow the pandas update exactly
+    for col in ["rsi14", "macd", "macd_sig", "atr14", "atr_pct"]:
+        np.testing.assert_array_equal(out[col].to_numpy(), ref[col].to_numpy())
+    np.testing.assert_allclose(out["vol_z"], ref["vol_z"], rtol=1e-9, atol=1e-9, equal_nan=True)
+
+
+def test_numpy_fallbacks_match_pandas():
+    df = _candles(n=300)
+    h, l, c, v = (kernels.as_f64(df[k]) for k in ("h", "l", "c", "v"))
+
+    tr_ref = _true_range(df["h"], df["l"], df["c"].shift(1)).to_numpy()
+    np.testing.assert_array_equal(kernels._true_range_numpy(h, l, c), tr_ref)
+    np.testing.assert_array_equal(kernels.true_range(h, l, c), tr_ref)
+
+    z_ref = _rolling_zscore(df["v"], 20).to_numpy()
+    np.testing.assert_allclose(kernels._rolling_zscore_numpy(v, 20, 6), z_ref, rtol=1e-9, equal_nan=True)
+
+    ref = compute_features(df.copy())
+    np.testing.assert_allclose(kernels._rsi_numpy(c, ewm_alpha(alpha=1 / 14), 14), ref["rsi14"], rtol=1e-12,
+                               equal_nan=True)
+    line, sig = kernels._macd_numpy(c, ewm_alpha(span=12), 12, ewm_alpha(span=26), 26, ewm_alpha(span=9), 9)
+    np.testing.assert_allclose(line, ref["macd"], rtol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(sig, ref["macd_sig"], rtol=1e-12, equal_nan=True)
+    np.testing.assert_allclose(kernels._ewm_numpy(kernels._true_range_numpy(h, l, c), ewm_alpha(alpha=1 / 14), 14),
+                               ref["atr14"], rtol=1e-12, equal_nan=True)
+
+
+def test_rolling_zscore_skips_missing_volume():
+    df = _candles(n=200)
+    df.loc[[3, 50, 51, 120], "v"] = np.nan
+    v = kernels.as_f64(df["v"])
+    z_ref = _rolling_zscore(df["v"], 20).to_numpy()
+    for impl in (kernels._rolling_zscore_loop, kernels._rolling_zscore_numpy):
+        z = impl(v, 20, 6)
+        np.testing.assert_allclose(z, z_ref, rtol=1e-9, atol=1e-9, equal_nan=True)
+        assert np.isfinite(z[-50:]).all()
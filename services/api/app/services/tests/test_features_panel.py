@@ -0,0 +1,38 @@
+import numpy as np
+import pandas as pd
+from services.api.app.services.features import compute_features
+from services.api.app.services.panel import compute_features_panel
+
+COLUMNS = ["rsi14", "macd", "macd_sig", "atr14", "atr_pct", "vwap", "vwap_dev", "vol_z", "ma50", "ma200", "adtv"]
+
+
+def _symbol(symbol_id, days, rng):
+    sessions = pd.bdate_range("2025-03-03", periods=days)
+    ts = pd.DatetimeIndex(np.concatenate([
+        pd.date_range(d + pd.Timedelta(hours=3, minutes=45), periods=75, freq="5min").values
+        for d in sessions
+    ])).tz_localize("UTC")
+    n = len(ts)
+    c = 250 + np.cumsum(rng.normal(0, 1.0, n))
+    o = c + rng.normal(0, 0.3, n)
+    return pd.DataFrame({
+        "symbol_id": symbol_id, "ts": ts, "o": o,
+        "h": np.maximum(o, c) + rng.random(n), "l": np.minimum(o, c) - rng.random(n),
+        "c": c, "v": rng.integers(500, 50_000, n).astype(float),
+    })
+
+
+def test_panel_matches_per_symbol_compute():
+    rng = np.random.default_rng(3)
+    frames = [_symbol(sid, days, rng) for sid, days in [(11, 8), (4, 12), (27, 3)]]
+    panel = pd.concat(frames, ignore_index=True).sample(frac=1.0, random_state=0)
+
+    out = compute_features_panel(panel)
+
+    assert list(out["symbol_id"].unique()) == [4, 11, 27]
+    for frame in frames:
+        sid = frame["symbol_id"].iloc[0]
+        expected = compute_features(frame.drop(columns="symbol_id"))
+        got = out[out["symbol_id"] == sid].reset_index(drop=True)
+        for col in COLUMNS:
+            np.testing.assert_allclose(got[col], expected[col], rtol=1e-9, atol=1e-9, equal_nan=True)
@@ -0,0 +1,43 @@
+import datetime as dt
+
+import pandas as pd
+from services.api.app.services.focus import FEATURE_COLUMNS, focus_set
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+
+class FakeDB:
+    def __init__(self, rows):
+        self.rows = rows
+        self.params = []
+
+    def execute(self, sql, params):
+        self.params.append(params)
+        return FakeResult(self.rows)
+
+
+def _row(sid, ts, score):
+    feats = [None] * len(FEATURE_COLUMNS)
+    feats[FEATURE_COLUMNS.index("vol_z")] = 1.5
+    return (dt.date(2025, 6, 2), "0930", sid, str(1000 + sid), score, sid, ts, *feats)
+
+
+def test_focus_set_keeps_symbols_with_todays_features():
+    today = pd.Timestamp("2025-06-02 10:00", tz="Asia/Kolkata").to_pydatetime()
+    yesterday = pd.Timestamp("2025-05-30 15:25", tz="Asia/Kolkata").to_pydatetime()
+    db = FakeDB([_row(1, today, "9.5"), _row(2, yesterday, "8.0"), _row(3, None, "7.0")])
+
+    out = focus_set(db, topk=3, trade_date=dt.date(2025, 6, 2))
+    assert db.params == [{"d": dt.date(2025, 6, 2), "k": 3}]
+    assert out["symbol_id"].tolist() == [1]
+    assert out["universe_score"].iloc[0] == 9.5 and out["vol_z"].iloc[0] == 1.5
+
+    everything = focus_set(db, topk=3, trade_date=dt.date(2025, 6, 2), today_only=False)
+    assert everything["symbol_id"].tolist() == [1, 2, 3]
+    assert everything["ts"].isna().tolist() == [False, False, True]
@@ -0,0 +1,41 @@
+import pandas as pd
+import pytest
+from services.api.app.services.keyset import CursorError, Keyset, decode_cursor, encode_cursor
+
+KEYSET = Keyset((("ts", "ss.ts", "timestamptz"), ("symbol_id", "ss.symbol_id", "integer")))
+TS = pd.Timestamp("2025-06-02 04:00:00.123456", tz="UTC")
+
+
+def test_cursor_round_trip_keeps_microseconds():
+    cursor = encode_cursor([TS, 17])
+    assert "=" not in cursor
+    ts, sid = decode_cursor(cursor, 2)
+    assert pd.Timestamp(ts) == TS and sid == 17
+
+
+def test_where_and_order_by():
+    assert KEYSET.where(None) == ("TRUE", {})
+    where, params = KEYSET.where(encode_cursor([TS, 17]))
+    assert where == "(ss.ts, ss.symbol_id) < (CAST(:k0 AS timestamptz), CAST(:k1 AS integer))"
+    assert params == {"k0": TS.isoformat(), "k1": 17}
+    assert KEYSET.order_by == "ss.ts DESC, ss.symbol_id DESC"
+
+    ascending = Keyset((("id", "id", "integer"),), descending=False)
+    assert ascending.where(encode_cursor([5]))[0] == "(id) > (CAST(:k0 AS integer))"
+    assert ascending.order_by == "id ASC"
+
+
+def test_page_cuts_at_limit_and_points_at_last_row():
+    rows = [{"ts": TS - pd.Timedelta(minutes=5 * i), "symbol_id": i} for i in range(4)]
+    items, cursor = KEYSET.page(rows, 3)
+    assert items == rows[:3]
+    ts, sid = decode_cursor(cursor, 2)
+    assert pd.Timestamp(ts) == rows[2]["ts"] and sid == 2
+
+    assert KEYSET.page(rows, 4) == (rows, None)
+
+
+@pytest.mark.parametrize("bad", ["!!!", encode_cursor([1]), encode_cursor({"a": 1})])
+def test_bad_cursor(bad):
+    with pytest.raises(CursorError):
+        KEYSET.where(bad)
@@ -0,0 +1,64 @@
+import threading
+from datetime import datetime
+
+from services.api.app.services.kite_fetcher import FetchRequest, HistoricalFetcher, TokenBucket
+
+
+class TooManyRequests(Exception):
+    code = 429
+
+
+class FakeKite:
+    """historical_data stub: the first `fail_first` calls per token answer 429."""
+
+    def __init__(self, fail_first=0):
+        self.fail_first = fail_first
+        self.calls = {}
+        self.intervals = set()
+        self._lock = threading.Lock()
+
+    def historical_data(self, instrument_token, from_date, to_date, interval):
+        with self._lock:
+            n = self.calls[instrument_token] = self.calls.get(instrument_token, 0) + 1
+            self.intervals.add(interval)
+        if n <= self.fail_first:
+            raise TooManyRequests("Too many requests")
+        return [{"date": from_date, "open": 1, "high": 2, "low": 0.5, "close": 1.5, "volume": instrument_token}]
+
+
+def _requests(n):
+    day = datetime(2025, 6, 2)
+    return [FetchRequest(token, day, day, "5m", key=f"SYM{token}") for token in range(n)]
+
+
+def test_bucket_spaces_requests_at_the_rate():
+    now = [0.0]
+    waits = []
+    def sleep(s):
+        waits.append(s)
+        now[0] += s
+    bucket = TokenBucket(rate=3, capacity=3, clock=lambda: now[0], sleep=sleep)
+    for _ in range(9):
+        bucket.acquire()
+    # burst of 3, then one token every 1/3 s
+    assert now[0] == 2.0
+    assert len(waits) == 6
+
+
+def test_streams_every_result_and_retries_429():
+    client = FakeKite(fail_first=2)
+    fetcher = HistoricalFetcher(client, TokenBucket(rate=1e6), max_workers=4, sleep=lambda s: None)
+    results = list(fetcher.fetch_many(_requests(20)))
+
+    assert len(results) == 20
+    assert all(r.ok and r.attempts == 3 for r in results)
+    assert {r.request.key for r in results} == {f"SYM{i}" for i in range(20)}
+    assert client.intervals == {"5minute"}
+
+
+def test_gives_up_after_max_retries():
+    fetcher = HistoricalFetcher(FakeKite(fail_first=10), TokenBucket(rate=1e6), max_retries=2, sleep=lambda s: None)
+    result = fetcher.fetch(_requests(1)[0])
+    assert not result.ok
+    assert result.attempts == 3
+    assert isinstance(result.error, TooManyRequests)
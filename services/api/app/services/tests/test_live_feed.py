@@ -0,0 +1,112 @@
+import asyncio
+import json
+
+import pandas as pd
+from services.api.app.services.live_feed import (
+    BAR_CLOSE_CHANNEL, FOCUS_CHANNEL, SIGNALS_CHANNEL, Client, Hub, bar_close_message, focus_message,
+    signals_message,
+)
+
+TS = pd.Timestamp("2025-06-02 04:00", tz="UTC")
+
+
+def signals(*rows):
+    return pd.DataFrame([{"symbol_id": sid, "ts": TS, "strategy_name": name, "signal_strength": s}
+                         for sid, name, s in rows])
+
+
+def test_outbox_coalesces_by_key_and_drops_oldest_when_full():
+    async def go():
+        async def send(payload):
+            pass
+        c = Client(send, max_queue=2)
+        c.offer(("signals", 1, "ORB"), "a")
+        c.offer(("signals", 2, "ORB"), "b")
+        c.offer(("signals", 1, "ORB"), "a2")     # replaces "a" in place
+        assert list(c.outbox.values()) == ["a2", "b"] and c.coalesced == 1
+        c.offer(("signals", 3, "ORB"), "c")      # full: the oldest goes
+        assert list(c.outbox.values()) == ["b", "c"] and c.dropped == 1
+    asyncio.run(go())
+
+
+def test_dispatch_routes_by_topic_and_symbol():
+    async def go():
+        hub = Hub()
+        got = {"all": [], "one": [], "focus": []}
+
+        def sink(name):
+            async def send(payload):
+                got[name].append(json.loads(payload))
+            return send
+
+        hub.connect(sink("all"))
+        one = hub.connect(sink("one"), topics=["signals", "bars"], symbol_ids=[1])
+        hub.connect(sink("focus"), topics=["focus"])
+
+        msg = signals_message(signals((1, "ORB", 0.5), (2, "ORB", 0.7)), published_at=10.0)
+        assert hub.dispatch(SIGNALS_CHANNEL, msg) == 3
+        hub.dispatch(FOCUS_CHANNEL, focus_message(["111", "222"], published_at=11.0))
+        hub.dispatch(BAR_CLOSE_CHANNEL, bar_close_message("5m", TS, [2, 3], published_at=12.0))
+        await asyncio.sleep(0.01)
+
+        assert [(m["topic"], m.get("symbol_id")) for m in got["all"]] == \
+            [("signals", 1), ("signals", 2), ("focus", None), ("bars", None)]
+        assert [(m["topic"], m["symbol_id"]) for m in got["one"]] == [("signals", 1)]
+        assert got["one"][0]["published_at"] == 10.0 and got["one"][0]["ts"] == TS.isoformat()
+        assert [m["tokens"] for m in got["focus"]] == [["111", "222"]]
+
+        # the client widens its filter; the bar close for symbol 2 now reaches it
+        hub.update(one, symbol_ids=[1, 2])
+        hub.dispatch(BAR_CLOSE_CHANNEL, bar_close_message("5m", TS, [2], published_at=13.0))
+        await asyncio.sleep(0.01)
+        assert got["one"][-1]["topic"] == "bars"
+
+        await hub.stop()
+        assert hub.stats()["clients"] == 0 and not hub.by_symbol and not hub.everything
+    asyncio.run(go())
+
+
+def test_slow_client_does_not_hold_up_fast_one():
+    async def go():
+        hub = Hub(max_queue=4)
+        fast, slow = [], []
+        release = asyncio.Event()
+
+        async def fast_send(payload):
+            fast.append(json.loads(payload)["signal_strength"])
+
+        async def slow_send(payload):
+            await release.wait()
+            slow.append(json.loads(payload)["signal_strength"])
+
+        hub.connect(fast_send)
+        stuck = hub.connect(slow_send)
+        for i in range(20):
+            hub.dispatch(SIGNALS_CHANNEL, signals_message(signals((i % 8, "ORB", i))))
+            await asyncio.sleep(0)
+
+        assert fast == list(range(20))
+        assert len(stuck.outbox) <= 4 and stuck.dropped > 0
+
+        release.set()
+        await asyncio.sleep(0.01)
+        # the slow one gets the newest values, not a stale backlog
+        assert slow[-1] == 19 and len(slow) <= 5
+        await hub.stop()
+    asyncio.run(go())
+
+
+def test_failed_send_closes_the_client():
+    async def go():
+        hub = Hub()
+
+        async def broken(payload):
+            raise ConnectionError("gone")
+
+        c = hub.connect(broken)
+        hub.dispatch(FOCUS_CHANNEL, focus_message(["1"]))
+        await asyncio.sleep(0.01)
+        assert c.closed
+        await hub.disconnect(c)
+        assert hub.stats()["clients"] == 0
+    asyncio.run(go())
@@ -0,0 +1,291 @@
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+import pytest
+from services.api.app.services.news import (
+    Article, BloomFilter, Deduper, Feed, NewsAnalyzer, NewsConfig, NewsPipeline, TickerLinker,
+    canonical_url, content_hash, fetch_feeds, parse_feed, seen_key, sentiment_scores, write_news,
+)
+
+FIXTURES = Path(__file__).parent / "fixtures"
+NOW = datetime(2025, 6, 2, 12, 0, tzinfo=timezone.utc)
+RSS = Feed("markets", "https://news.example.com/rss", kind="rss", reliability=0.8)
+WIRE = Feed("wire", "https://wire.example.org/feed.json", kind="json", reliability=0.6)
+
+SYMBOLS = [
+    (1, "INFY", "Infosys Ltd."),
+    (2, "TCS", "Tata Consultancy Services Ltd"),
+    (3, "RELIANCE", "Reliance Industries Ltd"),
+    (4, "RPOWER", "Reliance Power Ltd"),
+    (5, "HDFCBANK", "HDFC Bank Ltd"),
+    (6, "HDFCLIFE", "HDFC Life Insurance Company Ltd"),
+    (7, "IPO", None),
+]
+
+
+def fixture_articles():
+    return (parse_feed(RSS, (FIXTURES / "news_rss.xml").read_bytes(), NOW)
+            + parse_feed(WIRE, (FIXTURES / "news_feed.json").read_bytes(), NOW))
+
+
+class Ent:
+    def __init__(self, text, label="ORG"):
+        self.text, self.label_ = text, label
+
+
+class FakeDoc:
+    def __init__(self, ents):
+        self.ents = ents
+
+
+class FakeNLP:
+    """Stands in for spaCy: ORG entities are the known company names found in the text."""
+    NAMES = ["Infosys Ltd.", "Infosys", "HDFC Bank", "Reliance Power"]
+
+    def __init__(self):
+        self.calls = []
+
+    def pipe(self, texts, batch_size=1):
+        self.calls.append((len(texts), batch_size))
+        for t in texts:
+            yield FakeDoc([Ent(n) for n in self.NAMES if n in t] + [Ent("Mumbai", "GPE")])
+
+
+class FakeClassifier:
+    def __init__(self):
+        self.calls = []
+
+    def __call__(self, texts, batch_size=1, truncation=False, max_length=None):
+        self.calls.append((len(texts), batch_size, truncation, max_length))
+        out = []
+        for t in texts:
+            pos = 0.8 if ("raises" in t or "gains" in t.lower()) else 0.1
+            neg = 0.7 if "slip" in t else 0.1
+            out.append([{"label": "positive", "score": pos}, {"label": "negative", "score": neg},
+                        {"label": "neutral", "score": max(0.0, 1 - pos - neg)}])
+        return out
+
+
+class FakeResult:
+    def __init__(self, rowcount):
+        self.rowcount = rowcount
+
+
+class FakeDB:
+    def __init__(self, fail_commit=False):
+        self.calls = []
+        self.fail_commit = fail_commit
+        self.commits = 0
+
+    def execute(self, stmt, params):
+        rows = json.loads(params["rows"])
+        self.calls.append(rows)
+        return FakeResult(len(rows))
+
+    def commit(self):
+        if self.fail_commit:
+            raise RuntimeError("connection lost")
+        self.commits += 1
+
+
+def test_parse_rss_and_json_feeds():
+    arts = fixture_articles()
+    assert [a.source for a in arts] == ["markets"] * 3 + ["wire"] * 2
+    infy = arts[0]
+    assert infy.url == "https://news.example.com/markets/infosys-guidance?id=42"
+    assert infy.summary == "Shares of Infosys rose 3% in early trade."
+    assert infy.ts == datetime(2025, 6, 2, 4, 15, tzinfo=timezone.utc)
+    assert infy.reliability == 0.8
+    # guid as the link, no date -> fetch time
+    assert arts[2].url == "https://news.example.com/economy/rbi-policy" and arts[2].ts == NOW
+    # ISO offsets are normalized to UTC
+    assert arts[4].ts == datetime(2025, 6, 2, 4, 15, tzinfo=timezone.utc)
+
+
+def test_parse_atom_and_bad_content():
+    atom = b"""<feed xmlns="http://www.w3.org/2005/Atom"><entry>
+        <title>Atom story</title><link rel="alternate" href="https://a.example/s1"/>
+        <updated>2025-06-02T08:00:00Z</updated><summary>Body</summary></entry></feed>"""
+    (a,) = parse_feed(RSS, atom, NOW)
+    assert (a.title, a.url, a.summary) == ("Atom story", "https://a.example/s1", "Body")
+    assert parse_feed(RSS, b"<rss><channel>", NOW) == []
+    assert parse_feed(WIRE, b"not json", NOW) == []
+
+
+def test_content_hash_ignores_case_markup_and_urls():
+    arts = fixture_articles()
+    # the same story from two sources under different URLs
+    assert arts[0].body_hash == arts[3].body_hash
+    assert content_hash("Infosys  raises guidance!", "") == content_hash("infosys raises guidance", "")
+    assert content_hash("Infosys raises guidance") != content_hash("Infosys cuts guidance")
+    assert canonical_url("HTTPS://X.com/a?fbclid=1&b=2#frag") == "https://x.com/a?b=2"
+
+
+def test_bloom_filter_has_no_false_negatives_and_few_false_positives():
+    bloom = BloomFilter(capacity=10_000, error_rate=1e-3)
+    keys = [f"k{i}" for i in range(10_000)]
+    bloom.add(keys)
+    assert bloom.contains(keys).all()
+    others = bloom.contains([f"other{i}" for i in range(10_000)])
+    assert others.mean() < 5e-3
+    assert "k1" in bloom and "nope" not in bloom
+
+
+def test_bloom_filter_resets_past_capacity():
+    bloom = BloomFilter(capacity=10, error_rate=1e-3)
+    bloom.add([f"a{i}" for i in range(10)])
+    bloom.add(["b"])
+    assert "b" in bloom and bloom.count == 1
+
+
+def test_deduper_batch_bloom_and_redis(redis):
+    dedupe = Deduper(redis, BloomFilter(1000), clock=lambda: NOW)
+    fresh = dedupe.fresh(fixture_articles())
+    assert len(fresh) == 4                       # the syndicated copy is dropped in-batch
+    assert redis.round_trips == 1 and redis.sets == {}
+    # checking marks nothing: until they are stored they stay fresh
+    assert len(dedupe.fresh(fixture_articles())) == 4 and redis.round_trips == 2
+
+    dedupe.mark_seen(fresh)
+    assert redis.round_trips == 3 and len(redis.sets[seen_key(NOW.date())]) == 4
+    # everything is in the Bloom filter now: no round trip at all
+    assert dedupe.fresh(fixture_articles()) == [] and redis.round_trips == 3
+
+    # another worker (own Bloom filter) sees them in Redis
+    other = Deduper(redis, BloomFilter(1000), clock=lambda: NOW)
+    assert other.fresh(fixture_articles()) == [] and redis.round_trips == 4
+
+
+def test_deduper_checks_the_previous_day(redis):
+    arts = fixture_articles()
+    redis.sets[seen_key(datetime(2025, 6, 1).date())] = {arts[0].body_hash}
+    fresh = Deduper(redis, clock=lambda: NOW).fresh(arts)
+    assert arts[0].body_hash not in {a.body_hash for a in fresh} and len(fresh) == 3
+
+
+def test_ticker_linker():
+    linker = TickerLinker(SYMBOLS)
+    assert linker.link("", ["Infosys Ltd."]) == ([1], ["INFY"])
+    assert linker.link("", ["INFOSYS LIMITED"]) == ([1], ["INFY"])
+    assert linker.link("", ["Tata"]) == ([2], ["TCS"])                    # unique first word
+    # "HDFC" starts several names: no alias; a ticker is a name of its own
+    assert linker.link("", ["HDFC"]) == ([], [])
+    assert linker.link("", ["Reliance"]) == ([3], ["RELIANCE"])
+    assert linker.link("", ["IPO"]) == ([], [])
+    assert linker.link("", ["HDFC Bank"]) == ([5], ["HDFCBANK"])
+    # upper-case ticker tokens; market acronyms never link even when listed
+    assert linker.link("TCS and RELIANCE lead; IPO market busy") == ([2, 3], ["TCS", "RELIANCE"])
+    assert linker.link("tcs and reliance") == ([], [])
+
+
+def test_sentiment_scores():
+    outs = [[{"label": "Positive", "score": 0.7}, {"label": "Negative", "score": 0.2},
+             {"label": "Neutral", "score": 0.1}],
+            {"label": "neutral", "score": 0.9}]
+    assert sentiment_scores(outs) == [(0.5, "positive"), (0.0, "neutral")]
+
+
+def test_analyzer_batches_and_links():
+    nlp, clf = FakeNLP(), FakeClassifier()
+    analyzer = NewsAnalyzer(nlp, clf, TickerLinker(SYMBOLS), NewsConfig(nlp_batch_size=64, sentiment_batch_size=16))
+    arts = Deduper().fresh(fixture_articles())
+    analyzer.analyze(arts)
+    by_title = {a.title: a for a in arts}
+
+    assert nlp.calls == [(4, 64)]
+    # only the 3 linked articles are classified, in one call
+    assert clf.calls == [(3, 16, True, 128)]
+    infy = by_title["Infosys Ltd. raises FY26 revenue guidance after strong quarter"]
+    assert infy.tickers == ["INFY"] and infy.sentiment == 0.7 and infy.sentiment_label == "positive"
+    assert by_title["TCS and RELIANCE lead Nifty gains; IPO market stays busy"].symbol_ids == [2, 3]
+    hdfc = by_title["HDFC Bank shares slip as deposit growth slows"]
+    assert hdfc.symbol_ids == [5] and hdfc.sentiment < 0
+    rbi = by_title["RBI keeps repo rate unchanged"]
+    assert rbi.symbol_ids == [] and rbi.sentiment is None
+
+    analyzer.config.score_unlinked = True
+    analyzer.analyze(arts)
+    assert clf.calls[-1][0] == 4 and rbi.sentiment is not None
+
+
+def test_write_news_one_statement_per_batch():
+    db = FakeDB()
+    arts = Deduper().fresh(fixture_articles())
+    NewsAnalyzer(FakeNLP(), FakeClassifier(), TickerLinker(SYMBOLS)).analyze(arts)
+    assert write_news(db, arts, batch_size=3) == 4
+    assert [len(rows) for rows in db.calls] == [3, 1]
+    row = db.calls[0][0]
+    assert row["tickers"] == ["INFY"] and row["symbol_ids"] == [1]
+    assert row["ts"].startswith("2025-06-02T04:15:00") and len(row["body_hash"]) == 32
+
+
+def test_pipeline_process_throughput(redis):
+    n = 5000
+    arts = [Article("s", f"https://x.example/{i}", f"Story {i} about TCS results", "Summary", NOW)
+            for i in range(n)]
+    for a in arts:
+        a.body_hash = content_hash(a.title, a.summary)
+    arts += arts[:500]                                   # re-polled items
+    pipeline = NewsPipeline(NewsConfig(), NewsAnalyzer(FakeNLP(), FakeClassifier(), TickerLinker(SYMBOLS)),
+                            Deduper(redis, BloomFilter(100_000), clock=lambda: NOW))
+    db = FakeDB()
+    start = time.perf_counter()
+    stats = pipeline.process(db, arts)
+    elapsed = time.perf_counter() - start
+    assert stats == {"fetched": n + 500, "new": n, "written": n, "linked": n}
+    assert len(db.calls) == 5 and db.commits == 1
+    # everything but the models costs well under a second per few thousand articles
+    assert elapsed < 2.0, elapsed
+
+
+def test_pipeline_marks_seen_only_after_commit(redis):
+    pipeline = NewsPipeline(NewsConfig(), NewsAnalyzer(FakeNLP(), FakeClassifier(), TickerLinker(SYMBOLS)),
+                            Deduper(redis, BloomFilter(1000), clock=lambda: NOW))
+    validators = {"https://h.example/rss": ('"v1"', None)}
+    with pytest.raises(RuntimeError):
+        pipeline.process(FakeDB(fail_commit=True), fixture_articles(), validators)
+    # not seen, and the feed isn't fetched conditionally (a 304 would skip the articles)
+    assert redis.sets == {} and pipeline.validators == {}
+
+    # the next poll writes them after all
+    db = FakeDB()
+    assert pipeline.process(db, fixture_articles(), validators)["written"] == 4
+    assert len(redis.sets[seen_key(NOW.date())]) == 4 and pipeline.validators == validators
+    assert pipeline.process(db, fixture_articles())["new"] == 0
+
+
+def test_fetch_feeds_concurrent_conditional():
+    httpx = pytest.importorskip("httpx")
+    bodies = {"/rss": (FIXTURES / "news_rss.xml").read_bytes(), "/feed.json": (FIXTURES / "news_feed.json").read_bytes()}
+    state = {"in_flight": 0, "max": 0}
+
+    async def handler(request):
+        state["in_flight"] += 1
+        state["max"] = max(state["max"], state["in_flight"])
+        await asyncio.sleep(0.01)
+        state["in_flight"] -= 1
+        if request.url.path == "/down":
+            return httpx.Response(503)
+        if request.headers.get("if-none-match") == '"v1"':
+            return httpx.Response(304)
+        return httpx.Response(200, content=bodies[request.url.path], headers={"ETag": '"v1"'})
+
+    feeds = [Feed("rss", "https://h.example/rss"), Feed("json", "https://h.example/feed.json", kind="json"),
+             Feed("down", "https://h.example/down")] + [Feed(f"rss{i}", "https://h.example/rss") for i in range(3)]
+    validators = {}
+
+    async def go():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+            first = await fetch_feeds(client, feeds[:3], concurrency=2, validators=validators)
+            second = await fetch_feeds(client, feeds, concurrency=2, validators=validators)
+        return first, second
+
+    first, second = asyncio.run(go())
+    assert [c is not None for _, c in first] == [True, True, False]
+    assert validators["https://h.example/rss"] == ('"v1"', None)
+    assert all(c is None for _, c in second)             # 304s and the failing feed
+    assert state["max"] <= 2
+    assert len(parse_feed(feeds[1], first[1][1], NOW)) == 2
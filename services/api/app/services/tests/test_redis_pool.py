@@ -0,0 +1,42 @@
+import asyncio
+
+from services.api.app.services.redis_pool import (
+    METRICS, CommandStats, _TimedAsync, _TimedSync, apipelined, hgetall_many, hset_many, pipelined,
+)
+
+
+def test_batches_are_chunked_in_order(redis, aredis):
+    assert hset_many(redis, {f"k{i}": {"i": i} for i in range(5)}, ttl=60, chunk=4) == 5
+    assert redis.round_trips == 3  # 10 commands in pipelines of 4
+    redis.round_trips = 0
+    assert [d.get("i") for d in hgetall_many(redis, ["k3", "nope", "k0"], chunk=2)] == [3, None, 0]
+    assert redis.round_trips == 2
+    assert pipelined(redis, []) == []
+
+    out = asyncio.run(apipelined(aredis, [("hgetall", ("a",))] * 3, chunk=2))
+    assert out == [{}, {}, {}]
+
+
+def test_commands_and_pipelines_are_timed(redis, aredis):
+    METRICS.reset()
+    client = type("Timed", (_TimedSync, type(redis)), {})()
+    client.execute_command("get", "x")
+    client.execute_command("GET", "y")
+    pipe = client.pipeline(transaction=False)
+    pipe.hgetall("x")
+    pipe.execute()
+
+    aclient = type("TimedAsync", (_TimedAsync, type(aredis)), {})()
+    asyncio.run(aclient.execute_command("SET", "k", "v"))
+
+    snap = METRICS.snapshot()
+    assert snap["GET"]["count"] == 2 and snap["PIPELINE"]["count"] == 1 and snap["SET"]["count"] == 1
+
+
+def test_quantiles_from_histogram():
+    stats = CommandStats(buckets_ms=(1, 10, 100, float("inf")))
+    for ms in [0.5] * 90 + [50] * 9 + [500]:
+        stats.record("HGETALL", ms / 1000)
+    s = stats.snapshot()["HGETALL"]
+    assert s["count"] == 100 and s["p50_ms"] == 1 and s["p95_ms"] == 100
+    assert abs(s["max_ms"] - 500) < 1e-9
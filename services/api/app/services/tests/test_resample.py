@@ -0,0 +1,69 @@
+import numpy as np
+import pandas as pd
+from services.api.app.services.backtest import BarStore
+from services.api.app.services.bar_files import to_records
+from services.api.app.services.resample import (
+    bars_sql, bucket_floor, resample_frame, resample_records, resample_store, source_timeframe,
+)
+
+
+def five_minute_bars(symbol_id, days=("2025-06-02", "2025-06-03"), seed=0):
+    rng = np.random.default_rng(seed)
+    ts = pd.DatetimeIndex([
+        t for d in days for t in pd.date_range(f"{d} 09:15", f"{d} 15:25", freq="5min", tz="Asia/Kolkata")
+    ])
+    c = 100 + rng.normal(0, 1, len(ts)).cumsum()
+    o = np.r_[100.0, c[:-1]]
+    return pd.DataFrame({
+        "symbol_id": symbol_id, "ts": ts.tz_convert("UTC"), "o": o,
+        "h": np.maximum(o, c) + 0.5, "l": np.minimum(o, c) - 0.5, "c": c,
+        "v": rng.integers(100, 1000, len(ts)),
+    })
+
+
+def pandas_resample(df, rule, origin):
+    g = df.set_index(df["ts"].dt.tz_convert("Asia/Kolkata")).resample(rule, origin=origin)
+    out = g.agg({"o": "first", "h": "max", "l": "min", "c": "last", "v": "sum"}).dropna()
+    out.index = out.index.tz_convert("UTC")
+    return out
+
+
+def test_intraday_buckets_start_at_the_open():
+    df = five_minute_bars(1)
+    out = resample_frame(df, "1h")
+    ist = out["ts"].dt.tz_convert("Asia/Kolkata")
+    assert (ist.dt.strftime("%H:%M").iloc[:7] == ["09:15", "10:15", "11:15", "12:15", "13:15", "14:15", "15:15"]).all()
+
+    expected = pandas_resample(df, "1h", pd.Timestamp("2025-06-02 09:15", tz="Asia/Kolkata"))
+    assert np.allclose(out[["o", "h", "l", "c", "v"]].to_numpy(float), expected.to_numpy(float))
+    assert len(resample_frame(df, "15m")) == 2 * 25
+
+
+def test_daily_bucket_is_ist_midnight_and_matches_pandas():
+    df = pd.concat([five_minute_bars(2, seed=1), five_minute_bars(1)], ignore_index=True)
+    out = resample_frame(df, "1d")
+    assert list(out["symbol_id"]) == [1, 1, 2, 2]
+    assert (out["ts"].dt.tz_convert("Asia/Kolkata").dt.strftime("%H:%M") == "00:00").all()
+    expected = pandas_resample(df[df["symbol_id"] == 1], "1D", "start_day")
+    assert np.allclose(out[out["symbol_id"] == 1][["o", "h", "l", "c", "v"]].to_numpy(float), expected.to_numpy(float))
+
+
+def test_records_store_and_frame_agree():
+    df = pd.concat([five_minute_bars(1), five_minute_bars(2, seed=3)], ignore_index=True)
+    frame = resample_frame(df, "15m")
+
+    recs = resample_records(to_records(df[df["symbol_id"] == 2]), "15m")
+    assert np.allclose(recs["c"], frame[frame["symbol_id"] == 2]["c"])
+
+    store = resample_store(BarStore.from_frame(df), "15m")
+    assert len(store) == len(frame)
+    assert np.allclose(store.v, frame["v"]) and (store.day_end[-1] == len(store) - 1)
+
+
+def test_bucket_floor_and_sources():
+    ts = pd.Timestamp("2025-06-02 10:40", tz="Asia/Kolkata")
+    assert bucket_floor(ts, "1h") == pd.Timestamp("2025-06-02 10:15", tz="Asia/Kolkata")
+    assert bucket_floor(ts, "1d") == pd.Timestamp("2025-06-02 00:00", tz="Asia/Kolkata")
+    assert source_timeframe("1h") == "5m" and source_timeframe("1m") == "1m"
+    assert "candles_15m" in str(bars_sql("15m")) and ":tf" not in str(bars_sql("15m"))
+    assert "timeframe = :tf" in str(bars_sql("5m"))
@@ -0,0 +1,85 @@
+from datetime import date, datetime
+from decimal import Decimal
+
+import pandas as pd
+import pytest
+from services.api.app.services.coverage import IST
+from services.api.app.services.research_store import (
+    ResearchStore, complete_through, export_candles, exported_dates,
+)
+
+
+class FakeResult:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def fetchall(self):
+        return self.rows
+
+    def scalar(self):
+        return self.rows[0][0] if self.rows else None
+
+
+class FakeCandlesDB:
+    """Answers the exporter's two queries from an in-memory candles list."""
+
+    def __init__(self, rows):
+        self.rows = sorted(rows, key=lambda r: (r[0], r[1]))
+        self.queries = 0
+
+    def execute(self, stmt, params):
+        self.queries += 1
+        if "min(ts)" in str(stmt):
+            return FakeResult([(min(r[1] for r in self.rows),)])
+        if "count(*)" in str(stmt):
+            days = pd.Series([r[1].astimezone(IST).date() for r in self.rows
+                              if params["lo"] <= r[1] < params["hi"]], dtype=object)
+            return FakeResult(list(days.value_counts().items()))
+        return FakeResult([r for r in self.rows if params["lo"] <= r[1] < params["hi"]])
+
+
+def _candles(days):
+    rows = []
+    for d in days:
+        for ts in pd.date_range(f"{d} 09:15", periods=3, freq="5min", tz=IST).to_pydatetime():
+            for sid in (1, 2):
+                rows.append((sid, ts, Decimal("100.5"), Decimal("101"), Decimal("100"), Decimal("100.75"), 1000))
+    return rows
+
+
+def test_complete_through_waits_for_the_close():
+    assert complete_through(IST.localize(datetime(2025, 6, 3, 12, 0))) == date(2025, 6, 2)
+    assert complete_through(IST.localize(datetime(2025, 6, 3, 15, 45))) == date(2025, 6, 3)
+
+
+def test_export_is_incremental_and_reads_push_down(tmp_path):
+    pytest.importorskip("pyarrow")
+    db = FakeCandlesDB(_candles(["2025-06-02", "2025-06-03"]))
+    now = IST.localize(datetime(2025, 6, 4, 10, 0))
+    assert export_candles(db, "5m", root=tmp_path, now=now) == {"days": 2, "rows": 12}
+    assert exported_dates(tmp_path, "candles", "5m") == {date(2025, 6, 2), date(2025, 6, 3)}
+
+    # only the last finished day is refreshed (late revisions); the rest is skipped
+    assert export_candles(db, "5m", root=tmp_path, now=now) == {"days": 1, "rows": 6}
+    assert export_candles(db, "5m", root=tmp_path, now=now, refresh_days=0) == {"days": 0, "rows": 0}
+
+    # the next day's candles arrive; only that partition is written
+    db.rows += _candles(["2025-06-04"])
+    assert export_candles(db, "5m", root=tmp_path, now=now, refresh_days=0) == {"days": 0, "rows": 0}
+    later = IST.localize(datetime(2025, 6, 5, 10, 0))
+    assert export_candles(db, "5m", root=tmp_path, now=later) == {"days": 1, "rows": 6}
+
+    # a backfilled bar on an old day changes its row count: that day is written again
+    db.rows += [(1, IST.localize(datetime(2025, 6, 2, 9, 30)), Decimal("100"), Decimal("101"),
+                 Decimal("99"), Decimal("100"), 500)]
+    db.rows.sort(key=lambda r: (r[0], r[1]))
+    assert export_candles(db, "5m", root=tmp_path, now=later, refresh_days=0) == {"days": 1, "rows": 7}
+
+    store = ResearchStore(tmp_path)
+    table = store.scan("candles", "5m", start=date(2025, 6, 3), symbol_ids=[2], columns=["ts", "c"])
+    assert table.column_names == ["ts", "c"] and table.num_rows == 6
+    arrays = store.arrays("candles", "5m", end=date(2025, 6, 2))
+    assert set(arrays["symbol_id"]) == {1, 2} and arrays["c"][0] == 100.75
+
+    bars = store.bar_store("5m")
+    assert len(bars) == 19 and bars.symbol_end[0] == 9
@@ -0,0 +1,80 @@
+import asyncio
+from decimal import Decimal
+
+import numpy as np
+import orjson
+import pandas as pd
+from services.api.app.services.response_cache import VERSION_KEY, ResponseCache, bump_versions, cached_body, dumps
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_dumps_handles_row_types():
+    out = orjson.loads(dumps({"items": [{
+        "ts": pd.Timestamp("2025-06-02 04:00", tz="UTC"), "missing": pd.NaT, "price": Decimal("101.2500"),
+        "n": np.int64(3), "x": float("nan"),
+    }]}))
+    assert out["items"][0] == {"ts": "2025-06-02T04:00:00+00:00", "missing": None, "price": 101.25, "n": 3, "x": None}
+
+
+def test_cached_until_ttl_or_version_bump(redis, aredis):
+    async def go():
+        clock = Clock()
+        cache = ResponseCache(ttl=5, clock=clock)
+        loads = []
+
+        async def load():
+            loads.append(1)
+            return {"items": [len(loads)]}
+
+        async def get():
+            return orjson.loads(await cached_body(aredis, "signals", {"limit": 100, "cursor": None}, ["signals"],
+                                                  load, cache=cache))
+
+        assert await get() == {"items": [1]}
+        assert await get() == {"items": [1]}          # within the TTL
+        bump_versions(redis, "signals")
+        assert redis.hashes[VERSION_KEY] == {"signals": "1"}
+        assert await get() == {"items": [2]}          # new signals: miss
+        clock.now = 6
+        assert await get() == {"items": [3]}          # expired
+        assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 3
+    asyncio.run(go())
+
+
+def test_concurrent_misses_share_one_load_and_errors_are_not_cached():
+    async def go():
+        cache = ResponseCache(ttl=5)
+        calls = []
+
+        async def slow():
+            calls.append(1)
+            await asyncio.sleep(0.01)
+            return [1, 2]
+
+        bodies = await asyncio.gather(*(cache.get_or_load(("k",), slow) for _ in range(5)))
+        assert calls == [1] and set(bodies) == {b"[1,2]"}
+
+        async def broken():
+            raise RuntimeError("db down")
+
+        for _ in range(2):
+            try:
+                await cache.get_or_load(("x",), broken)
+            except RuntimeError:
+                pass
+        assert cache.get(("x",)) is None and cache.misses == 3
+    asyncio.run(go())
+
+
+def test_lru_bound():
+    cache = ResponseCache(ttl=5, max_entries=2)
+    for k in "abc":
+        cache.put((k,), k.encode())
+    assert list(cache.entries) == [("b",), ("c",)]
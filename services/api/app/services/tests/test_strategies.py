@@ -0,0 +1,53 @@
+from datetime import date
+
+import pandas as pd
+from services.api.strategies.base import REGISTRY, StrategyContext
+from services.api.strategies.engine import StrategyEngine
+
+DAY = date(2025, 6, 2)
+
+
+def _bars():
+    ts = pd.date_range("2025-06-02 09:15", periods=6, freq="5min", tz="Asia/Kolkata").tz_convert("UTC")
+    rows = []
+    for sid, closes in [(1, [100, 101, 102, 101, 103, 106]), (2, [50, 50, 50, 50, 50, 50])]:
+        for t, c in zip(ts, closes):
+            rows.append({"symbol_id": sid, "ts": t, "o": c, "h": c + 0.5, "l": c - 0.5, "c": float(c), "v": 1000})
+    return pd.DataFrame(rows)
+
+
+def _snapshots(ts):
+    base = {"ts": ts, "rsi14": 60.0, "macd": 0.1, "macd_sig": 0.05, "ma50": None, "ma200": None, "adtv": 30.0}
+    return {
+        # breaks out above its 99.5..101.5 opening range on strong volume, 1% above vwap
+        "111": {**base, "symbol_id": 1, "vwap": 104.9, "vwap_dev": 0.0105, "atr_pct": 0.5, "atr14": 0.53, "vol_z": 2.0},
+        # flat, 3% below vwap -> vwap bounce long only
+        "222": {**base, "symbol_id": 2, "vwap": 51.5, "vwap_dev": -0.03, "atr_pct": 2.0, "atr14": 1.0, "vol_z": 0.1},
+    }
+
+
+def test_registry_has_the_builtin_plugins():
+    assert {"VWAP_Bounce_v1", "ORB_v1"} <= set(REGISTRY)
+
+
+def test_engine_runs_every_strategy_on_one_context():
+    bars = _bars()
+    ts = bars["ts"].max()
+    engine = StrategyEngine.from_config({"vwap_bounce": {"atr_mult": 1.2}, "orb": {"open_minutes": 15}})
+    ctx = StrategyEngine.build_context(_snapshots(ts), {"111": 9.0, "222": 8.0}, bars, DAY)
+    assert isinstance(ctx, StrategyContext) and len(ctx.matrix) == 2
+
+    signals = engine.evaluate(ctx).set_index(["strategy_name", "symbol_id"])
+    assert set(signals.index) == {("VWAP_Bounce_v1", 1), ("VWAP_Bounce_v1", 2), ("ORB_v1", 1)}
+    assert signals.loc[("VWAP_Bounce_v1", 1), "side"] == "short"
+    assert signals.loc[("VWAP_Bounce_v1", 2), "side"] == "long"
+    orb = signals.loc[("ORB_v1", 1)]
+    assert orb["side"] == "long" and orb["sl_price"] == 99.5  # opening-range low
+
+    arrays = engine.signal_arrays(signals.reset_index(), DAY)
+    assert len(set(map(len, arrays.values()))) == 1 and len(arrays["date"]) == 3
+
+
+def test_disabled_strategy_is_skipped():
+    engine = StrategyEngine.from_config({"orb": {"enabled": False}})
+    assert [s.name for s in engine.strategies] == ["VWAP_Bounce_v1"]
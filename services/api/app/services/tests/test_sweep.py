@@ -0,0 +1,61 @@
+from datetime import date
+
+import numpy as np
+import pandas as pd
+import pytest
+from services.api.app.services.backtest import BacktestConfig, Backtester, BarStore
+from services.api.app.services.features import FeatureConfig
+from services.api.app.services.sweep import (
+    param_grid, random_search, run_sweep, split_params, walk_forward_splits,
+)
+from services.api.strategies.engine import StrategyEngine
+
+
+def _store(n_days=6, n_sym=3, seed=1):
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range("2025-06-02", periods=n_days)
+    ts = np.concatenate([
+        pd.date_range(f"{d.date()} 09:15", periods=30, freq="5min", tz="Asia/Kolkata").tz_convert("UTC").tz_localize(None).to_numpy()
+        for d in days
+    ])
+    n = len(ts)
+    sid = np.repeat(np.arange(1, n_sym + 1), n)
+    c = 100 * np.exp(np.cumsum(rng.normal(0, 0.003, n * n_sym)))
+    o = c * (1 + rng.normal(0, 0.001, n * n_sym))
+    return BarStore(sid, np.tile(ts, n_sym), o, np.maximum(o, c) * 1.002, np.minimum(o, c) * 0.998, c,
+                    rng.integers(1000, 9000, n * n_sym).astype(float))
+
+
+def test_candidates_and_splits():
+    grid = param_grid({"vwap_bounce.atr_mult": [1.0, 2.0], "features.atr_period": [10, 14, 20]})
+    assert len(grid) == 6 and grid[0] == {"vwap_bounce.atr_mult": 1.0, "features.atr_period": 10}
+    rnd = random_search({"orb.open_minutes": [15, 30], "vwap_bounce.atr_mult": (0.5, 2.0)}, n=5, seed=3)
+    assert len(rnd) == 5 and all(0.5 <= c["vwap_bounce.atr_mult"] <= 2.0 for c in rnd)
+
+    feat, strategies = split_params({"features.atr_period": 10, "orb.open_minutes": 30}, FeatureConfig(),
+                                    {"orb": {"vol_z_min": 1.0}})
+    assert feat.atr_period == 10 and strategies == {"orb": {"vol_z_min": 1.0, "open_minutes": 30}}
+
+    days = [date(2025, 6, d) for d in range(1, 11)]
+    splits = walk_forward_splits(days, train_days=4, test_days=2)
+    assert len(splits) == 3
+    assert splits[1]["train_start"] == days[2] and splits[1]["test_end"] == days[7]
+
+
+def test_sweep_matches_a_direct_backtest(tmp_path):
+    store = _store()
+    cfg = BacktestConfig(slippage_bps=2, fee_bps=1)
+    candidates = param_grid({"vwap_bounce.atr_mult": [0.5, 1.5], "features.atr_period": [10, 14]})
+    splits = walk_forward_splits([d for d, _ in store.days()], train_days=3, test_days=1)
+    res = run_sweep(store, candidates, splits, {"orb": {"vol_z_min": 0.0}}, cfg, workers=2, out_dir=str(tmp_path))
+
+    assert (res.run_dir / "metrics.csv").exists()
+    assert len(res.metrics) == len(candidates) * (1 + 2 * len(splits))
+    assert len(res.walk_forward) == len(splits)
+
+    feat, strategies = split_params(candidates[3], cfg.features, {"orb": {"vol_z_min": 0.0}})
+    direct = Backtester(StrategyEngine.from_config(strategies).strategies, BacktestConfig(
+        slippage_bps=2, fee_bps=1, features=feat)).run(store)
+    full = res.metrics[(res.metrics["candidate"] == 3) & (res.metrics["segment"] == "full")].iloc[0]
+    assert full["trades"] == len(direct.trades)
+    assert full["net_pnl"] == pytest.approx(direct.trades["net_pnl"].sum())
@@ -0,0 +1,59 @@
+from datetime import datetime
+
+import pandas as pd
+from services.api.app.services.coverage import IST
+from services.api.app.services.ticks import BarAggregator, TickRecorder, replay
+
+
+def _tick(token, hh, mm, ss, price, volume):
+    return {"instrument_token": token, "last_price": price, "volume_traded": volume,
+            "exchange_timestamp": datetime(2025, 6, 2, hh, mm, ss)}
+
+
+def test_bars_close_on_the_next_bar_and_use_volume_deltas():
+    agg = BarAggregator(("1m",), listening_since=IST.localize(datetime(2025, 6, 2, 9, 14)))
+    agg.on_ticks([_tick(1, 9, 15, 1, 100.0, 1000), _tick(1, 9, 15, 20, 101.5, 1300),
+                  _tick(1, 9, 15, 40, 99.5, 1350), _tick(1, 9, 16, 2, 100.2, 1400)])
+    bars = agg.drain()
+    assert len(bars) == 1
+    bar = bars.iloc[0]
+    assert bar["ts"] == pd.Timestamp("2025-06-02 09:15", tz=IST)
+    assert (bar["o"], bar["h"], bar["l"], bar["c"]) == (100.0, 101.5, 99.5, 99.5)
+    # 1000 was already traded before the bar's first tick we saw; 09:16's tick belongs to the next bar
+    assert bar["v"] == 350
+    assert len(agg.recent(1, "1m")) == 1
+
+
+def test_quiet_symbols_close_on_the_clock_and_partial_bars_are_dropped():
+    agg = BarAggregator(("1m", "5m"), listening_since=IST.localize(datetime(2025, 6, 2, 9, 15, 30)))
+    agg.on_ticks([_tick(1, 9, 15, 31, 100.0, 10), _tick(1, 9, 16, 5, 101.0, 20), _tick(1, 9, 16, 50, 102.0, 25)])
+    assert agg.drain().empty  # 09:15 started before we were listening
+    # a late tick does not touch the closed bar's prices; its traded volume lands in the open bar
+    agg.on_ticks([_tick(1, 9, 15, 59, 90.0, 26)])
+
+    assert agg.close_due(IST.localize(datetime(2025, 6, 2, 9, 17, 1))) == 0  # within the grace period
+    assert agg.close_due(IST.localize(datetime(2025, 6, 2, 9, 17, 3))) == 1
+    bars = agg.drain()
+    assert list(bars["timeframe"]) == ["1m"] and bars.iloc[0]["h"] == 102.0 and bars.iloc[0]["v"] == 16
+
+
+def test_replay_of_a_recorded_feed(tmp_path):
+    path = tmp_path / "ticks.jsonl"
+    rec = TickRecorder(path)
+    volume = 0
+    for minute in range(10):
+        batch = []
+        for sec in (0, 30):
+            volume += 100
+            batch += [_tick(1, 9, 15 + minute, sec, 100.0 + minute, volume),
+                      _tick(2, 9, 15 + minute, sec, 50.0 - minute, volume)]
+        rec.write(batch)
+    rec.close()
+
+    bars = replay(path, BarAggregator(("1m", "5m")))
+    one = bars[bars["timeframe"] == "1m"]
+    five = bars[bars["timeframe"] == "5m"]
+    assert len(one) == 20 and len(five) == 4
+    first = five[(five["instrument_token"] == 1)].iloc[0]
+    assert (first["o"], first["c"]) == (100.0, 104.0)
+    assert first["v"] == 900  # the very first tick's own volume predates the feed
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+from services.api.app.services.universe_metrics import latest_adv_atr, quotes_frame, within_circuit
+
+
+def _history(n_symbols=5, days=30, seed=3):
+    rng = np.random.default_rng(seed)
+    frames = []
+    for k in range(n_symbols):
+        n = days - 12 * (k == 0)  # first symbol is too short for ADV20
+        c = 100 * (k + 1) + np.cumsum(rng.normal(0, 2, n))
+        frames.append(pd.DataFrame({
+            "symbol": f"NSE:S{k}",
+            "ts": pd.date_range("2025-05-01", periods=n, freq="D", tz="Asia/Kolkata"),
+            "h": c + rng.uniform(0, 3, n), "l": c - rng.uniform(0, 3, n), "c": c,
+            "v": rng.integers(1e5, 1e6, n),
+        }))
+    return pd.concat(frames, ignore_index=True).sample(frac=1, random_state=seed)
+
+
+def test_matches_per_symbol_rolling():
+    hist = _history()
+    out = latest_adv_atr(hist).set_index("symbol")
+    for sym, g in hist.sort_values("ts").groupby("symbol"):
+        adv = g["v"].rolling(20).mean().iloc[-1]
+        prev = g["c"].shift(1)
+        tr = pd.concat([g["h"] - g["l"], (g["h"] - prev).abs(), (g["l"] - prev).abs()], axis=1).max(axis=1)
+        atr = tr.rolling(14).mean().iloc[-1]
+        assert out.loc[sym, "ts"] == g["ts"].iloc[-1]
+        np.testing.assert_allclose(out.loc[sym, "ATR14"], atr, rtol=1e-12)
+        if np.isnan(adv):
+            assert np.isnan(out.loc[sym, "ADV20"])
+        else:
+            np.testing.assert_allclose(out.loc[sym, "ADV20"], adv, rtol=1e-12)
+
+
+def test_quotes_frame_drops_circuit_locked():
+    quotes = {
+        "NSE:A": {"instrument_token": 1, "ohlc": {"open": 1, "high": 2, "low": 1, "close": 2}, "volume": 10,
+                  "last_price": 2, "lower_circuit_limit": 1, "upper_circuit_limit": 3},
+        "NSE:B": {"instrument_token": 2, "ohlc": {"open": 1, "high": 3, "low": 1, "close": 3}, "volume": 10,
+                  "last_price": 3, "lower_circuit_limit": 1, "upper_circuit_limit": 3},
+        "NSE:C": {"instrument_token": 3, "last_price": 2},
+    }
+    df = within_circuit(quotes_frame(quotes))
+    assert df["symbol"].tolist() == ["NSE:A"]
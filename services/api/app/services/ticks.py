@@ -0,0 +1,248 @@
+'''
+Tick -> bar aggregation for the KiteTicker feed.
+
+Every subscribed token gets a slot; the bar being built for each timeframe lives in flat
+NumPy state arrays indexed by slot, and closed bars go into a fixed-size per-slot ring
+buffer (the recent intraday history, no per-bar objects) and onto a pending list that
+the ingestion service flushes in bulk.
+
+A bar closes when the first tick of a later bar arrives or, for quiet symbols, once
+its end is `grace` behind the wall clock (close_due). Bars are aligned to the epoch,
+which lines 1m/5m bars up with the 09:15 IST open. Kite's volume_traded is cumulative
+for the day, so bar volume is the difference across the bar. Bars that started before
+the aggregator was listening are incomplete and are dropped.
+
+Recorded feeds are JSON lines, one KiteTicker on_ticks batch per line, and can be
+replayed through the same aggregator.
+'''
+
+import json
+from datetime import datetime
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from .bar_files import BAR_DTYPE
+from .coverage import IST
+from .feature_store import timeframe_delta
+
+TICK_TIMEFRAMES = ("1m", "5m")
+RING_CAPACITY = 400  # a full session of 1m bars
+
+CLOSED_BAR_COLUMNS = ["instrument_token", "timeframe", "ts", "o", "h", "l", "c", "v"]
+
+def tick_time(tick: dict, default: Optional[datetime] = None) -> Optional[datetime]:
+    """Exchange time of a tick (KiteTicker sends naive IST datetimes)."""
+    ts = tick.get("exchange_timestamp") or tick.get("last_trade_time") or default
+    if ts is None:
+        return None
+    if isinstance(ts, str):
+        ts = datetime.fromisoformat(ts)
+    return IST.localize(ts) if ts.tzinfo is None else ts
+
+class BarRing:
+    """Last `capacity` closed bars of every slot in one (slots, capacity) record array."""
+
+    def __init__(self, slots: int, capacity: int = RING_CAPACITY):
+        self.capacity = capacity
+        self.bars = np.zeros((slots, capacity), dtype=BAR_DTYPE)
+        self.count = np.zeros(slots, dtype=np.int64)
+
+    def grow(self, slots: int) -> None:
+        if slots > len(self.count):
+            extra = slots - len(self.count)
+            self.bars = np.concatenate([self.bars, np.zeros((extra, self.capacity), dtype=BAR_DTYPE)])
+            self.count = np.concatenate([self.count, np.zeros(extra, dtype=np.int64)])
+
+    def push(self, slot: int, bar: tuple) -> None:
+        self.bars[slot, self.count[slot] % self.capacity] = bar
+        self.count[slot] += 1
+
+    def recent(self, slot: int) -> np.ndarray:
+        """Closed bars of a slot, oldest first."""
+        n = int(self.count[slot])
+        if n <= self.capacity:
+            return self.bars[slot, :n]
+        head = n % self.capacity
+        return np.concatenate([self.bars[slot, head:], self.bars[slot, :head]])
+
+class _TimeframeState:
+    """The open bar of every slot for one timeframe (start < 0 = no open bar)."""
+
+    def __init__(self, timeframe: str, slots: int, capacity: int):
+        self.timeframe = timeframe
+        self.step = int(timeframe_delta(timeframe).value)
+        self.start = np.full(slots, -1, dtype=np.int64)
+        self.o, self.h, self.l, self.c = (np.zeros(slots) for _ in range(4))
+        self.v0 = np.zeros(slots, dtype=np.int64)        # cumulative volume before the bar
+        self.closed_end = np.zeros(slots, dtype=np.int64)  # ticks before this are late
+        self.partial = np.zeros(slots, dtype=bool)       # open bar began before we were listening
+        self.ring = BarRing(slots, capacity)
+
+    def grow(self, slots: int) -> None:
+        extra = slots - len(self.start)
+        if extra <= 0:
+            return
+        self.start = np.append(self.start, np.full(extra, -1, dtype=np.int64))
+        self.o, self.h, self.l, self.c = (np.append(a, np.zeros(extra)) for a in (self.o, self.h, self.l, self.c))
+        self.v0 = np.append(self.v0, np.zeros(extra, dtype=np.int64))
+        self.closed_end = np.append(self.closed_end, np.zeros(extra, dtype=np.int64))
+        self.partial = np.append(self.partial, np.zeros(extra, dtype=bool))
+        self.ring.grow(slots)
+
+class BarAggregator:
+    def __init__(self, timeframes: Sequence[str] = TICK_TIMEFRAMES, capacity: int = RING_CAPACITY,
+                 listening_since: Optional[datetime] = None):
+        # defaults to the first tick seen (replays)
+        self.listening_since = pd.Timestamp(listening_since).value if listening_since is not None else None
+        self.slots: Dict[int, int] = {}
+        self.tokens: List[int] = []
+        self.last_volume = np.zeros(0, dtype=np.int64)
+        self.states = {tf: _TimeframeState(tf, 0, capacity) for tf in timeframes}
+        self.pending: List[tuple] = []  # closed bars not flushed yet (CLOSED_BAR_COLUMNS)
+
+    def slot(self, token: int) -> int:
+        s = self.slots.get(token)
+        if s is None:
+            s = self.slots[token] = len(self.tokens)
+            self.tokens.append(token)
+            self.last_volume = np.append(self.last_volume, -1)
+            for st in self.states.values():
+                st.grow(len(self.tokens))
+        return s
+
+    # -----------------------
+    #     Ticks in
+    # -----------------------
+
+    def on_tick(self, token: int, ts_ns: int, price: float, volume: Optional[int] = None) -> None:
+        if self.listening_since is None:
+            self.listening_since = ts_ns
+        s = self.slot(token)
+        prev_volume = int(self.last_volume[s])
+        for st in self.states.values():
+            if ts_ns < st.closed_end[s]:
+                continue  # late tick for a bar that is already out
+            start = ts_ns - ts_ns % st.step
+            if st.start[s] != start:
+                if st.start[s] >= 0:
+                    self._close(st, s, prev_volume)
+                st.partial[s] = start < self.listening_since
+                st.start[s] = start
+                st.o[s] = st.h[s] = st.l[s] = st.c[s] = price
+                st.v0[s] = prev_volume if prev_volume >= 0 else (volume or 0)
+            else:
+                st.h[s] = max(st.h[s], price)
+                st.l[s] = min(st.l[s], price)
+                st.c[s] = price
+        if volume is not None:
+            self.last_volume[s] = volume
+
+    def on_ticks(self, ticks: Iterable[dict], now: Optional[datetime] = None) -> int:
+        """A KiteTicker on_ticks batch; returns how many ticks were used."""
+        used = 0
+        for tick in ticks:
+            price = tick.get("last_price")
+            ts = tick_time(tick, now)
+            if price is None or ts is None:
+                continue
+            self.on_tick(int(tick["instrument_token"]), pd.Timestamp(ts).value, float(price),
+                         tick.get("volume_traded"))
+            used += 1
+        return used
+
+    # -----------------------
+    #     Bars out
+    # -----------------------
+
+    def _close(self, st: _TimeframeState, s: int, end_volume: int) -> None:
+        v = max(end_volume - int(st.v0[s]), 0) if end_volume >= 0 else 0
+        bar = (int(st.start[s]), st.o[s], st.h[s], st.l[s], st.c[s], v)
+        st.closed_end[s] = st.start[s] + st.step
+        st.start[s] = -1
+        if st.partial[s]:
+            st.partial[s] = False
+            return
+        st.ring.push(s, bar)
+        self.pending.append((self.tokens[s], st.timeframe, *bar))
+
+    def close_due(self, now: datetime, grace_seconds: float = 2.0) -> int:
+        """Close open bars whose end is more than `grace_seconds` in the past."""
+        cutoff = pd.Timestamp(now).value - int(grace_seconds * 1e9)
+        closed = 0
+        for st in self.states.values():
+            for s in np.flatnonzero((st.start >= 0) & (st.start + st.step <= cutoff)):
+                # no tick of a later bar yet, so last_volume is still this bar's
+                self._close(st, int(s), int(self.last_volume[s]))
+                closed += 1
+        return closed
+
+    def drain(self) -> pd.DataFrame:
+        """Pending closed bars as a frame, emptying the list."""
+        rows, self.pending = self.pending, []
+        return closed_bars_frame(rows)
+
+    def recent(self, token: int, timeframe: str) -> np.ndarray:
+        s = self.slots.get(token)
+        if s is None:
+            return np.empty(0, dtype=BAR_DTYPE)
+        return self.states[timeframe].ring.recent(s)
+
+def closed_bars_frame(rows: List[tuple]) -> pd.DataFrame:
+    """CLOSED_BAR_COLUMNS tuples -> frame with ts as UTC timestamps."""
+    df = pd.DataFrame(rows, columns=CLOSED_BAR_COLUMNS)
+    df["ts"] = pd.to_datetime(df["ts"].astype("int64"), utc=True)
+    return df
+
+# -----------------------
+#     Record / replay
+# -----------------------
+
+def _json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return str(value)
+
+class TickRecorder:
+    """Appends every on_ticks batch to a JSON-lines file."""
+
+    def __init__(self, path):
+        self._fh = open(path, "a", encoding="utf-8")
+
+    def write(self, ticks: List[dict]) -> None:
+        self._fh.write(json.dumps(ticks, default=_json_default) + "\n")
+        self._fh.flush()
+
+    def close(self) -> None:
+        self._fh.close()
+
+def read_tick_file(path) -> Iterator[List[dict]]:
+    with open(path, encoding="utf-8") as fh:
+        for line in fh:
+            if line.strip():
+                yield json.loads(line)
+
+def replay(path, aggregator: BarAggregator, on_batch=None) -> pd.DataFrame:
+    """
+    Feed a recorded file through the aggregator as fast as possible; the clock is the
+    tick time, so bars close exactly as they did live. Returns every closed bar.
+    """
+    frames = []
+    last = None
+    for batch in read_tick_file(path):
+        aggregator.on_ticks(batch)
+        times = [t for t in (tick_time(x) for x in batch) if t is not None]
+        if times:
+            last = max(times)
+            aggregator.close_due(last)
+        if on_batch is not None:
+            on_batch(batch)
+        if aggregator.pending:
+            frames.append(aggregator.drain())
+    if last is not None:
+        # end of the recording: everything still open is done
+        aggregator.close_due(pd.Timestamp(last) + pd.Timedelta(days=1), grace_seconds=0)
+        if aggregator.pending:
+            frames.append(aggregator.drain())
+    return pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=CLOSED_BAR_COLUMNS)
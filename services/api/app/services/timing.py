@@ -0,0 +1,26 @@
+import time
+from contextlib import contextmanager
+from typing import Dict
+
+
+class StageTimer:
+    """Wall-clock seconds per named pipeline stage, in the order the stages ran."""
+
+    def __init__(self):
+        self.timings: Dict[str, float] = {}
+
+    @contextmanager
+    def stage(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = self.timings.get(name, 0.0) + time.perf_counter() - started
+
+    @property
+    def total(self) -> float:
+        return sum(self.timings.values())
+
+    def __str__(self) -> str:
+        parts = ", ".join(f"{name}={secs:.2f}s" for name, secs in self.timings.items())
+        return f"{parts} (total {self.total:.2f}s)"
@@ -1,9 +1,16 @@
 import os
 from kiteconnect import KiteConnect
 import pandas as pd
-import numpy as np
-import time
-from datetime import datetime, timedelta
+from datetime import datetime, time, timedelta
+from sqlalchemy import text
+from app.db import SessionLocal
+from app.services.candle_sync import sync_candles
+from app.services.coverage import IST, closed_until, load_coverage, plan_fetches
+from app.services.kite import get_fetcher
+from app.services.kite_fetcher import TokenBucket
+from app.services.resample import BASE_TIMEFRAME, load_bars_frame
+from app.services.timing import StageTimer
+from app.services.universe_metrics import latest_adv_atr, quotes_frame, within_circuit
 
 
 api_key = os.environ.get("KITE_API_KEY")
@@ -11,43 +18,7 @@ access_key = os.environ.get("KITE_ACCESS_TOKEN")
 kite = KiteConnect(api_key=api_key)
 kite.set_access_token(access_token=access_key)
 
-def avg_daily_volume(df, period=20):
-    """
-    Calculates the Average Daily Volume (ADV) for a DataFrame.
-
-    Args:
-        df (pd.DataFrame): DataFrame with a 'v' (volume) column.
-        period (int): The number of periods for the rolling average.
-
-    Returns:
-        pd.DataFrame: The original DataFrame with an added ADV column.
-    """
-    df[f"ADV{period}"] = df['v'].rolling(window=period).mean()
-    return df
-
-def avg_true_range(df, period=14):
-    """
-    Calculates the Average True Range (ATR) for a DataFrame.
-
-    Args:
-        df (pd.DataFrame): DataFrame with 'h', 'l', and 'c' columns.
-        period (int): The number of periods for the ATR calculation.
-
-    Returns:
-        pd.DataFrame: The original DataFrame with an added ATR column.
-    """
-    # Calculate the three True Range components
-    tr1 = df['h'] - df['l']
-    tr2 = abs(df['h'] - df['c'].shift(1)) # .shift(1) gets the previous day's close
-    tr3 = abs(df['l'] - df['c'].shift(1))
-    
-    # Get the maximum of the three components to find the True Range (TR)
-    true_range_df = pd.DataFrame({'tr1': tr1, 'tr2': tr2, 'tr3': tr3})
-    df['TR'] = true_range_df.max(axis=1)
-
-    # Calculate the Simple Moving Average of the True Range to get ATR
-    df[f"ATR{period}"] = df['TR'].rolling(window=period).mean()
-    return df
+QUOTE_RATE_PER_SEC = 1.0
 
 def fetch_stock_quotes():    
     all_quotes = {}
@@ -58,161 +29,135 @@ def fetch_stock_quotes():
         # kite.quote() expectes the equity to be passed in "EXCHANGE:SYMBOL" format
         prefix = "NSE:"
         equity = [prefix + item for item in all_stocks]
+        # quote API allows 1 request/sec; wait only as long as the limit requires
+        bucket = TokenBucket(rate=QUOTE_RATE_PER_SEC, capacity=1)
         for i in range(0,len(equity), batch_size):
             batch = equity[i : i+batch_size]
+            bucket.acquire()
             quotes = kite.quote(batch)
             all_quotes.update(quotes)
-            time.sleep(5)
 
     except Exception as e:
         print(f"Failed to retrieve data: {e}")
         return {}
-    
-    # filter out stocks which have hit Upper Circuit or Lower Circuit
-    # Filter out symbols at circuit limits
-    filtered_quotes = {}
-    for symbol, q in all_quotes.items():
-        ltp = q.get("last_price")
-        lo  = q.get("lower_circuit_limit")
-        hi  = q.get("upper_circuit_limit")
-        if ltp is not None and lo is not None and hi is not None:
-            if lo < ltp < hi:
-                filtered_quotes[symbol] = q
-    return filtered_quotes
+    return all_quotes
 
 def convert_quotes_to_dataframe(quotes_dict):
-    quotes_list = []
-    for symbol,quotes in quotes_dict.items():
-        if 'ohlc' in quotes and 'volume' in quotes:
-            ohlc = quotes.get('ohlc') or {}
-            row = {
-                'symbol': symbol,
-                'instrument_token': quotes.get("instrument_token"),
-                'o' : ohlc.get('open'),
-                'h' : ohlc.get('high'),
-                'l' : ohlc.get('low'),
-                'c' : ohlc.get('close'),
-                'v' : quotes.get('volume')
-            }
-            quotes_list.append(row)
-    
-    df = pd.DataFrame(quotes_list)
-    
-    return df
+    # filter out stocks which have hit Upper Circuit or Lower Circuit
+    return within_circuit(quotes_frame(quotes_dict)).reset_index(drop=True)
 
 def get_historical_data(df):
-
-    all_hist_frames = []
-    to_date = datetime.now().date()
-    from_date = to_date - timedelta(days=30)
-    for _, row in df.iterrows():
-        token = row.get("instrument_token")
-        symbol = row.get("symbol")
-
-        if not token or pd.isna(token):
-            print(f"Skipping {row['symbol']} as instrument token is not available")
-            continue
-        
-        try:
-            hist_data = kite.historical_data(
-                instrument_token=token, 
-                from_date=from_date, 
-                to_date=to_date,
-                interval='day')
-            if isinstance(hist_data,dict) and 'data' in hist_data and 'candles' in hist_data['data']:
-                candles = hist_data['data']['candles']
-            else:
-                candles = hist_data
-            temp_df = pd.DataFrame(candles, columns=["ts","o","h","l","c","v"])
-            temp_df['symbol'] = row['symbol']
-            temp_df["ts"] = pd.to_datetime(temp_df["ts"])
-            for col in ["o","h","l","c"]:
-                temp_df[col] = pd.to_numeric(temp_df[col], errors='coerce')
-            temp_df['v'] = pd.to_numeric(temp_df['v'], errors='coerce').fillna(0).astype(dtype='int64')
-            all_hist_frames.append(temp_df)
-            time.sleep(2)
-        
-        except Exception as e:
-            print(f"Error fetching {row['symbol']}: {e}")
-            continue
-    
-    if not all_hist_frames:
-        return pd.DataFrame(columns=["symbol","ts","o","h","l","c","v"])
-    
-    hist_df = pd.concat(all_hist_frames, ignore_index=True)
+    """
+    30 days of daily candles for every quoted symbol present in the `symbols` table.
+    Symbols whose 5m candles span the window read them from the candles_1d aggregate;
+    for the rest they are served from `candles`, and only the days candle_coverage
+    doesn't have yet go to Kite.
+    Symbols without a symbols row are dropped up front: they can't enter trading_universe.
+    """
+    now = datetime.now(IST)
+    # closed daily bars only: today's open one isn't needed for ADV/ATR and would never be
+    # covered, so every build would fetch it again
+    to_date = closed_until(now, "1d")
+    # whole IST days: daily candles are stamped 00:00, so a time-of-day cutoff drops the first one
+    from_date = IST.localize(datetime.combine((now - timedelta(days=30)).date(), time.min))
+    valid = df[df["instrument_token"].notna() & (df["instrument_token"] != 0)]
+    if len(valid) < len(df):
+        print(f"Skipping {len(df) - len(valid)} symbols as instrument token is not available")
+    names = dict(zip(valid["instrument_token"].astype("int64").astype(str), valid["symbol"]))
+
+    with SessionLocal() as db:
+        ids = dict(db.execute(text("""
+            SELECT instrument_token, id FROM symbols WHERE instrument_token = ANY(:toks)
+        """), {"toks": list(names)}).fetchall())
+        if len(ids) < len(names):
+            print(f"Skipping {len(names) - len(ids)} symbols not present in the symbols table")
+        if not ids:
+            return pd.DataFrame(columns=["symbol","symbol_id","ts","o","h","l","c","v"])
+
+        symbols = [(sid, tok) for tok, sid in ids.items()]
+        # the aggregate only has to match the closed daily bars: during the session that is
+        # up to the last completed day, so the unsettled tail of today's 5m coverage is no gap
+        gaps = plan_fetches(symbols, load_coverage(db, ids.values(), BASE_TIMEFRAME), BASE_TIMEFRAME,
+                            from_date, to_date)
+        missing = {req.key for req in gaps}
+        aggregated = [sid for sid, _ in symbols if sid not in missing]
+        fetched = [(sid, tok) for sid, tok in symbols if sid in missing]
+        print(f"Daily history: {len(aggregated)} symbols from 5m aggregates, {len(fetched)} from Kite")
+
+        frames = [load_bars_frame(db, aggregated, "1d", from_date, to_date)] if aggregated else []
+        if fetched:
+            # concurrent gap fetches under the shared (per API key) historical rate limit
+            sync_candles(db, get_fetcher(), fetched, "1d", from_date, to_date)
+            db.commit()
+            rows = db.execute(text("""
+                SELECT symbol_id, ts, o, h, l, c, v
+                FROM candles
+                WHERE symbol_id = ANY(:sids) AND timeframe = '1d' AND ts >= :from_dt AND ts < :to_dt
+            """), {"sids": [sid for sid, _ in fetched], "from_dt": from_date, "to_dt": to_date}).fetchall()
+            frames.append(pd.DataFrame(rows, columns=["symbol_id","ts","o","h","l","c","v"]))
+
+    hist_df = pd.concat(frames, ignore_index=True) if frames else \
+        pd.DataFrame(columns=["symbol_id","ts","o","h","l","c","v"])
+    hist_df["symbol"] = hist_df["symbol_id"].map({sid: names[tok] for tok, sid in ids.items()})
+    hist_df["ts"] = pd.to_datetime(hist_df["ts"], utc=True)
+    # the aggregate's range is inclusive: drop today's still-open bucket
+    hist_df = hist_df[hist_df["ts"] < pd.Timestamp(to_date)].copy()
+    for col in ["o","h","l","c"]:
+        hist_df[col] = pd.to_numeric(hist_df[col], errors='coerce')
+    hist_df['v'] = pd.to_numeric(hist_df['v'], errors='coerce').fillna(0).astype(dtype='int64')
     hist_df.sort_values(['symbol','ts'], inplace=True)
     hist_df.drop_duplicates(["symbol", "ts"], keep='last', inplace=True)
     
     return hist_df
 
-def create_universe():
+def create_universe(adv_min: float = 100000, atr_min: float = 5, top_n: int = 100):
+    """
+    Build the trading universe. Stage timings are printed and kept in
+    trading_universe.attrs["timings"].
+    """
+    timer = StageTimer()
     try:
-        # fetch all stock quotes
-        get_all_stock_quotes = fetch_stock_quotes()
+        with timer.stage("quotes"):
+            # fetch all stock quotes
+            get_all_stock_quotes = fetch_stock_quotes()
         if not get_all_stock_quotes:
             print("No quotes returned. Empty Universe!")
             return pd.DataFrame()
 
-        # convert quotes into a dataframe
-        quotes_df = convert_quotes_to_dataframe(get_all_stock_quotes)
+        with timer.stage("quotes_frame"):
+            # columnar quotes frame, circuit-locked symbols dropped
+            quotes_df = convert_quotes_to_dataframe(get_all_stock_quotes)
         
-        # get historical data
-        quotes_with_history_data = get_historical_data(quotes_df)
-        if not quotes_with_history_data:
+        with timer.stage("history"):
+            # get historical data
+            quotes_with_history_data = get_historical_data(quotes_df)
+        if quotes_with_history_data.empty:
             print("No historical data.")
             return pd.DataFrame()
 
-        # compute features on historical data
-        hist_df = avg_daily_volume(quotes_with_history_data)
-        hist_df = avg_true_range(hist_df)
+        with timer.stage("metrics"):
+            # ADV/ATR per symbol on its own tail rows, one row (the latest bar) per symbol
+            latest_rows = latest_adv_atr(quotes_with_history_data, adv_period=20, atr_period=14)
 
-        # merged df - to include 'instrument_token' 
-        columns_for_merge = ["symbol","instrument_token"]
-        merged_df = hist_df.merge(quotes_df[columns_for_merge].drop_duplicates(), on='symbol', how='left')
-        
-        # filter the df based on ADV and ATR values
-        filtered_df = merged_df[(merged_df["ADV20"] > 100000) & (merged_df["ATR14"] > 5)]
+            # filter on the latest values before anything else touches the rows
+            latest_rows = latest_rows[(latest_rows["ADV20"] > adv_min) & (latest_rows["ATR14"] > atr_min)]
+
+        with timer.stage("rank"):
+            # instrument_token from the quotes
+            tokens = quotes_df[["symbol","instrument_token"]].drop_duplicates("symbol")
+            latest_rows = latest_rows.merge(tokens, on="symbol", how="left")
 
-        # multiple values of ADV and ATR are calculated since it is a rolling return but only the latest value should be retained. 
-        latest_idx = filtered_df.groupby("symbol")["ts"].idxmax()
-        latest_rows = filtered_df.loc[latest_idx]
+            # create columns - score, rank and atr_pct
+            latest_rows["score"] = latest_rows["ADV20"]
+            latest_rows["rank"] = latest_rows["score"].rank()
+            latest_rows["atr_pct"] = (latest_rows["ATR14"]/latest_rows["c"]) * 100
 
-        # create columns - score, rank and atr_pct
-        latest_rows["score"] = latest_rows["ADV20"]
-        latest_rows["rank"] = latest_rows["score"].rank()
-        latest_rows["atr_pct"] = (latest_rows["ATR14"]/latest_rows["c"]) * 100
+            trading_universe = latest_rows.nlargest(top_n, "ADV20").reset_index(drop=True)
 
-        # create the trading universe using the latest_rows such that a single value of ADV and ATR is retained per stock
-        trading_universe = latest_rows.sort_values("ADV20", ascending=False).head(100)
-        return trading_universe.reset_index(drop=True)
+        trading_universe.attrs["timings"] = dict(timer.timings)
+        print(f"Universe built: {len(trading_universe)} symbols; {timer}")
+        return trading_universe
         
     except Exception as e:
         print(f"Failed to create trading universe: {e}")
         return pd.DataFrame()
-    
-    
-    
-    
-    
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-
-        
-
-
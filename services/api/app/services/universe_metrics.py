@@ -0,0 +1,61 @@
+'''
+Vectorised building blocks for the universe builder: a columnar quotes frame and
+per-symbol ADV/ATR computed on only the tail rows each symbol needs.
+'''
+
+import numpy as np
+import pandas as pd
+
+def quotes_frame(quotes: dict) -> pd.DataFrame:
+    """kite.quote() payload -> one row per symbol, built column by column."""
+    items = [(s, q) for s, q in quotes.items() if "ohlc" in q and "volume" in q]
+    symbols = [s for s, _ in items]
+    qs = [q for _, q in items]
+    ohlc = [q.get("ohlc") or {} for q in qs]
+    return pd.DataFrame({
+        "symbol": symbols,
+        "instrument_token": [q.get("instrument_token") for q in qs],
+        "o": [x.get("open") for x in ohlc],
+        "h": [x.get("high") for x in ohlc],
+        "l": [x.get("low") for x in ohlc],
+        "c": [x.get("close") for x in ohlc],
+        "v": [q.get("volume") for q in qs],
+        "last_price": [q.get("last_price") for q in qs],
+        "lower_circuit_limit": [q.get("lower_circuit_limit") for q in qs],
+        "upper_circuit_limit": [q.get("upper_circuit_limit") for q in qs],
+    })
+
+def within_circuit(df: pd.DataFrame) -> pd.DataFrame:
+    """Drop symbols sitting at (or missing) their upper/lower circuit limits."""
+    ltp = pd.to_numeric(df["last_price"], errors="coerce")
+    lo = pd.to_numeric(df["lower_circuit_limit"], errors="coerce")
+    hi = pd.to_numeric(df["upper_circuit_limit"], errors="coerce")
+    return df[(lo < ltp) & (ltp < hi)]
+
+def latest_adv_atr(hist: pd.DataFrame, adv_period: int = 20, atr_period: int = 14) -> pd.DataFrame:
+    """
+    Latest bar of every symbol with ADV{adv_period} (mean volume) and ATR{atr_period}
+    (simple mean of true range) over that symbol's own history only. A full window is
+    required, as with rolling(window).mean(). Only the last max(adv, atr + 1) rows per
+    symbol are touched.
+    """
+    df = hist.sort_values(["symbol", "ts"], kind="stable")
+    df = df.groupby("symbol", sort=False).tail(max(adv_period, atr_period + 1)).reset_index(drop=True)
+    if df.empty:
+        return df.assign(**{f"ADV{adv_period}": [], f"ATR{atr_period}": []})
+
+    g = df.groupby("symbol", sort=False)
+    h, l = df["h"].to_numpy(dtype=float), df["l"].to_numpy(dtype=float)
+    prev_c = g["c"].shift(1).to_numpy(dtype=float)
+    tr = np.fmax(h - l, np.fmax(np.abs(h - prev_c), np.abs(l - prev_c)))
+    from_end = g.cumcount(ascending=False).to_numpy()
+
+    def _window_mean(values: np.ndarray, period: int) -> pd.Series:
+        inside = pd.Series(np.where(from_end < period, values, np.nan))
+        stats = inside.groupby(df["symbol"], sort=False).agg(["sum", "count"])
+        return (stats["sum"] / stats["count"]).where(stats["count"] >= period)
+
+    latest = g.tail(1).set_index("symbol")
+    latest[f"ADV{adv_period}"] = _window_mean(df["v"].to_numpy(dtype=float), adv_period)
+    latest[f"ATR{atr_period}"] = _window_mean(tr, atr_period)
+    return latest.reset_index()
@@ -0,0 +1,76 @@
+'''
+Event-driven pipeline: python -m app.workers.bar_close_listener
+
+A member of the pipeline timeframe's consumer group on the bar-close stream
+(app.services.bar_events, pipeline:<tf>). For every
+coalesced batch of the pipeline timeframe it computes features for the batch's symbols
+only, then runs the strategies over those of them in the focus set and rescores the
+ensemble of the ones that got signals, in this process (no Celery hop). Run any number
+of them; the group spreads the events. Use it with PIPELINE_TRIGGER=events so beat
+polls Kite instead of running the timer pipeline. PIPELINE_INTERVAL must be the features
+timeframe (5m): features are stored for that one only, and bar-close events are only
+published for the ticker's 1m/5m bars and the 5m Kite ingest, never for 15m/1h.
+'''
+
+import os
+import socket
+from typing import Dict, List, Tuple
+
+from sqlalchemy import text
+
+from app.db import SessionLocal
+from app.services.bar_events import Batch, BarEventConsumer
+from app.services.ensemble import EnsembleEngine
+from app.services.feature_store import check_feature_timeframe
+from app.services.live_feed import publish_signals
+from app.services.redis_utils import redis_client
+from app.services.timing import StageTimer
+from app.settings import config_section
+from app.workers.tasks import compute_and_write_features
+from services.api.strategies.engine import StrategyEngine
+
+class PipelineHandler:
+    def __init__(self, r, timeframe: str = "5m"):
+        self.r = r
+        self.engine = StrategyEngine.from_config(config_section("strategies"))
+        self.ensemble = EnsembleEngine.from_config(config_section("ensemble"),
+                                                   [s.name for s in self.engine.strategies], timeframe)
+        self.topk = config_section("focus").get("topk")
+        self.tokens: Dict[int, str] = {}
+
+    def symbols(self, db, symbol_ids: List[int]) -> List[Tuple[int, str]]:
+        missing = [sid for sid in symbol_ids if sid not in self.tokens]
+        if missing:
+            self.tokens.update((int(sid), str(tok)) for sid, tok in db.execute(text("""
+                SELECT id, instrument_token FROM symbols WHERE id = ANY(:ids)
+            """), {"ids": missing}).fetchall())
+        return [(sid, self.tokens[sid]) for sid in symbol_ids if sid in self.tokens]
+
+    def __call__(self, batch: Batch) -> dict:
+        timer = StageTimer()
+        with SessionLocal() as db:
+            symbols = self.symbols(db, batch.symbol_ids)
+        with timer.stage("features"):
+            written = compute_and_write_features(symbols, batch.timeframe)
+        with timer.stage("strategies"):
+            with SessionLocal() as db:
+                signals = self.engine.run(db, self.r, batch.timeframe, self.topk, tokens=[t for _, t in symbols])
+                ensemble = self.ensemble.run(db, signals)
+                db.commit()
+        try:
+            publish_signals(self.r, signals)
+        except Exception as e:
+            # the signals are committed; only the live feed misses them
+            print(f"Failed to publish signals: {e}")
+        return {"features": written, "signals": len(signals), "ensemble": len(ensemble), **timer.timings}
+
+def main():
+    interval = os.environ.get("PIPELINE_INTERVAL", "5m")
+    check_feature_timeframe(interval)
+    r = redis_client()
+    consumer = BarEventConsumer(r, PipelineHandler(r, interval), consumer=f"{socket.gethostname()}-{os.getpid()}",
+                                timeframes=[interval])
+    consumer.run()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+'''
+News ingestion: python -m app.workers.news_worker [--once]
+
+Long-lived on purpose: the spaCy and sentiment models are loaded once at start and stay
+warm for every poll, where a Celery task would pay the load (seconds, hundreds of MB) per
+run. Every `news.poll_seconds` all `news.feeds` are fetched concurrently and the new
+articles deduped, linked to symbols, scored and written to `news` (app.services.news).
+The analysis runs in a thread so the event loop keeps the HTTP connections alive; the
+symbol aliases are re-read every `news.linker_refresh_seconds`.
+'''
+
+import argparse
+import asyncio
+import time
+
+from app.db import SessionLocal
+from app.services.news import (
+    BloomFilter, Deduper, NewsAnalyzer, NewsConfig, NewsPipeline, TickerLinker, make_client,
+)
+from app.services.redis_utils import redis_client
+from app.settings import config_section
+
+def load_linker() -> TickerLinker:
+    with SessionLocal() as db:
+        return TickerLinker.from_db(db)
+
+def process(pipeline: NewsPipeline, articles, validators) -> dict:
+    with SessionLocal() as db:
+        return pipeline.process(db, articles, validators)
+
+async def run(pipeline: NewsPipeline, config: NewsConfig, once: bool = False):
+    linker_loaded = time.monotonic()
+    async with make_client(config) as client:
+        while True:
+            started = time.monotonic()
+            try:
+                if started - linker_loaded >= config.linker_refresh_seconds:
+                    pipeline.analyzer.linker = await asyncio.to_thread(load_linker)
+                    linker_loaded = started
+                articles, validators = await pipeline.fetch(client)
+                stats = await asyncio.to_thread(process, pipeline, articles, validators)
+                print(f"News poll: {stats} in {time.monotonic() - started:.1f}s")
+            except Exception as e:
+                print(f"News poll failed: {e}")
+            if once:
+                return
+            await asyncio.sleep(max(0.0, config.poll_seconds - (time.monotonic() - started)))
+
+def main():
+    parser = argparse.ArgumentParser(description="News feeds -> NER + sentiment -> news table")
+    parser.add_argument("--once", action="store_true", help="poll the feeds once and exit")
+    args = parser.parse_args()
+
+    config = NewsConfig.from_dict(config_section("news"))
+    if not config.feeds:
+        print("No news.feeds configured")
+    analyzer = NewsAnalyzer.load(config, load_linker())
+    pipeline = NewsPipeline(config, analyzer, Deduper(redis_client(), BloomFilter(config.bloom_capacity)))
+    asyncio.run(run(pipeline, config, once=args.once))
+
+if __name__ == "__main__":
+    main()
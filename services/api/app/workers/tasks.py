@@ -1,73 +1,109 @@
 
 '''The below are Celery tasks which are written in a 'fan-out' pattern
-In the 'fan-out' pattern --> One Parent task which is the function 'update_all_stocks_5m()' is called 
-The parent task now calls upon other 'child' tasks like 'update_price_task()' and 'ingest_candles()'
+In the 'fan-out' pattern --> One Parent task which is the function 'run_trade_pipeline()' is called 
+The parent task splits the universe into shards and runs 'ingest_and_features_shard()' for each of them
+as a chord; 'finalize_cycle()' runs once every shard is done.
 ''' 
 
+import json
+import time
 import pandas as pd
 from datetime import datetime, timedelta, timezone
-from app.services.kite import get_historical_data
+from app.services.kite import get_fetcher
 from sqlalchemy import text
 from app.celery_app import celery_app
 from app.db import SessionLocal
-from app.services.features import (compute_features, FeatureConfig, required_warmup_bars)
-from celery import chain
+from app.services.features import (FeatureConfig, required_warmup_bars)
+from app.services.incremental import get_engine, reset_engines, warm_engines
+from app.services.ensemble import EnsembleEngine
+from app.services.live_feed import publish_signals
+from app.services.panel import compute_features_panel
+from app.services.bar_events import events_from_bars, latency_stats, publish
+from app.services.bar_files import get_bar_files, records_frame
+from app.services.candle_writer import CopyStats
+from app.services.candle_sync import sync_candles
+from app.services.coverage import IST, closed_until
+from app.services.feature_store import check_feature_timeframe, timeframe_delta, write_features
+from app.services.feature_cache import publish_snapshots
+from app.services.redis_utils import redis_client, write_universe_to_redis
+from app.services.research_store import export_candles, export_features
+from app.services.response_cache import bump_versions
+from app.services.resample import AGGREGATE_VIEWS, bar_counts_sql, bars_sql, bucket_floor, resample_records, source_timeframe
+from app.services.timing import StageTimer
+from app.settings import config_section
+from services.api.strategies.engine import StrategyEngine
+from celery import chord, group
 from celery.signals import task_success, task_failure
 from fastapi import APIRouter
 
 """
 Function ingest_candles fetches the historical_data of the past 60 days 
-and writes into the SQL table -> candles
+and writes into the SQL table -> candles.
+Only ranges missing from candle_coverage are requested from Kite.
 """
-def ingest_candles(symbol_id: int, instrument_token: str, interval:str = "5m", days:int = 60) -> pd.DataFrame: 
-    to_date = datetime.now(timezone.utc) 
-    from_date = to_date - timedelta(days=days)
-    candle_data = get_historical_data(instrument_token=instrument_token, from_date=from_date, to_date=to_date, interval=interval) 
-    # <---- Code to store candle_data in DB ----->
-    candle_df = pd.DataFrame(candle_data)
-    if candle_df.empty:
-        return candle_df
-    df = candle_df.rename(columns={"date": "ts", "open": "o", "high": "h", "low": "l", "close": "c", "volume": "v"})
-    df = df[["ts","o","h","c","l","v"]].sort_values("ts").reset_index(drop=True)
-
-    #Upsert to DB
+def ingest_candles(symbol_id: int, instrument_token: str, interval:str = "5m", days:int = 60) -> CopyStats: 
+    stats = ingest_candles_many([(symbol_id, instrument_token)], interval, days)
+    print(f"Candles written for {instrument_token}: {stats}")
+    return stats
+
+def ingest_candles_many(symbols: list, interval: str = "5m", days: int = 60) -> CopyStats:
+    """
+    Fetch the uncovered ranges of every (symbol_id, instrument_token) concurrently under the
+    shared Kite rate limit and write them, with their coverage, in one COPY transaction.
+    Once committed, the new closed bars are announced on the bar-close stream.
+    15m/1h/1d are aggregated from the 5m candles, so asking for them ingests 5m.
+    """
+    interval = source_timeframe(interval)
+    now = datetime.now(IST)
     with SessionLocal() as db:
-        params = [
-            {
-                "symbol_id": symbol_id,
-                "ts": row.ts,
-                "o": float(row.o),
-                "h": float(row.h),
-                "l": float(row.l),
-                "c": float(row.c),
-                "v": float(row.v),
-                "timeframe": interval,
-            }
-            for row in df.itertuples(index=False)
-        ]
-        db.execute(text(""" 
-            INSERT INTO candles (symbol_id, ts, o, h, l, c, v, timeframe)
-            VALUES (:symbol_id, :ts, :o, :h, :l, :c, :v, :timeframe)
-            ON CONFLICT (symbol_id, ts, timeframe) DO UPDATE SET
-              o = EXCLUDED.o, h = EXCLUDED.h, l = EXCLUDED.l,
-              c = EXCLUDED.c, v = EXCLUDED.v
-        """), params)
+        stats = sync_candles(db, get_fetcher(), symbols, interval, now - timedelta(days=days), now, now,
+                             bar_files=get_bar_files())
         db.commit()
-    return df
+    if stats.last_bar:
+        try:
+            publish(redis_client(), events_from_bars(stats.last_bar, interval))
+        except Exception as e:
+            # the candles are in; the timer pipeline or the next bar still picks them up
+            print(f"Failed to publish bar-close events: {e}")
+    return stats
+
+@celery_app.task
+def backfill_candles(interval: str = "5m", days: int = 60, batch_size: int = 50) -> str:
+    with SessionLocal() as db:
+        symbols = db.execute(text("SELECT DISTINCT symbol_id, instrument_token FROM trading_universe")).fetchall()
+
+    total = CopyStats()
+    for i in range(0, len(symbols), batch_size):
+        stats = ingest_candles_many(symbols[i : i + batch_size], interval, days)
+        print(f"Backfill batch {i // batch_size + 1}: {stats}")
+        total.rows += stats.rows
+        total.merged += stats.merged
+        total.symbols += stats.symbols
+        total.seconds += stats.seconds
+    return f"Backfilled {total}"
 
 @celery_app.task(autoretry_for=(Exception,), retry_backoff=True, max_retries=5)
 def update_price_task(symbol_id: int, instrument_token: str, interval: str ="5m") -> int:
     days=1
-    candles = ingest_candles(symbol_id, instrument_token, interval, days)
+    stats = ingest_candles(symbol_id, instrument_token, interval, days)
     print(f"Candle Data ingested for {instrument_token}")
-    return len(candles)
+    return stats.rows
+
+def _universe_symbols(db) -> list:
+    """(symbol_id, instrument_token) of the latest trading-universe date, one per symbol."""
+    rows = db.execute(text("""
+        SELECT DISTINCT symbol_id, instrument_token
+        FROM trading_universe
+        WHERE date = (SELECT MAX(date) FROM trading_universe)
+        ORDER BY symbol_id
+    """)).fetchall()
+    return [(int(sid), str(token)) for sid, token in rows]
 
 # update price of all stocks in the trading universe 
 @celery_app.task 
 def update_all_stocks_5m() -> str: 
-    db = SessionLocal()
-    symbols = db.execute("SELECT symbol_id, instrument_token FROM trading_universe").fetchall()
-    db.close()
+    with SessionLocal() as db:
+        symbols = _universe_symbols(db)
 
     for symbol_id, token in symbols:
         update_price_task.delay(symbol_id,token,"5m")
@@ -75,109 +111,298 @@ def update_all_stocks_5m() -> str:
     return f"Queued price update for {len(symbols)}"
 
 @celery_app.task(autoretry_for=(Exception,),retry_backoff=True, max_retries=3)
-def calc_features(interval: str = "5m") -> str:
+def calc_features(interval: str = "5m", incremental: bool = True, full_rewrite: bool = False) -> str:
+    """
+    With incremental=True each worker process keeps an IncrementalFeatureEngine per symbol,
+    so after the first (seeding) run only bars from the last seen ts onwards are read and emitted.
+    With incremental=False the whole universe is loaded and computed as one panel.
+    Either way only rows after each symbol's feature watermark are written, unless full_rewrite,
+    which also drops the warm engines so the whole window is recomputed and rewritten.
+    """
+    with SessionLocal() as db:
+        symbols = _universe_symbols(db)
+    written = compute_and_write_features(symbols, interval, incremental, full_rewrite)
+    return f"Features upserted rows: {written}"
+
+def compute_and_write_features(symbols: list, interval: str = "5m", incremental: bool = True,
+                               full_rewrite: bool = False) -> int:
+    """Features for the given (symbol_id, instrument_token) pairs; returns rows written."""
+    check_feature_timeframe(interval)
     cfg = FeatureConfig()
     warmup = required_warmup_bars(cfg, interval)
     with SessionLocal() as db:
-        symbols = db.execute(text("SELECT symbol_id, instrument_token FROM trading_universe ")).fetchall()
+        if not incremental:
+            return _calc_features_panel(db, symbols, interval, cfg, warmup, full_rewrite)
 
-        total_written = 0
+        if full_rewrite:
+            # a warm engine only emits bars after its last ts: reseed from the whole window
+            reset_engines([(sid, interval) for sid, _ in symbols])
+            reseeded = set()
+        else:
+            reseeded = _drop_stale_engines(db, [sid for sid, _ in symbols], interval)
+        # reseeded symbols rewrite all their recomputed rows, below the watermark too: the
+        # backfilled bars' rows are missing and the ones after them were computed without them
+        rewrite_from = {}
+        frames = []
         for symbol_id, instrument_token in symbols:
+            engine = get_engine(symbol_id, interval, cfg)
+
             # Load a compute window with warmup; here: last 2 trading days + warmup safety
             to_dt = datetime.now(timezone.utc)
             from_dt = to_dt - timedelta(days=3)
+            if engine.last_ts is not None:
+                # state is warm: only the last seen bar (may have been revised) and newer ones
+                from_dt = engine.last_ts
 
-            # Pull from DB (prefer DB so we don’t double-call provider here)
-            rows = db.execute(text("""
-                SELECT ts, o, h, l, c, v
-                FROM candles
-                WHERE symbol_id = :sid
-                  AND timeframe = :tf
-                  AND ts BETWEEN :from_dt AND :to_dt
-                ORDER BY ts ASC
-            """), {"sid": symbol_id, "tf": interval, "from_dt": from_dt, "to_dt": to_dt}).fetchall()
-
-            # if not rows:
-            #     # Fallback: try fetch from provider (optional)
-            #     ingest_candles(symbol_id, instrument_token, interval, days=3)
-            #     rows = db.execute(text("""
-            #         SELECT ts, o, h, l, c, v
-            #         FROM candles
-            #         WHERE symbol_id = :sid AND timeframe = :tf
-            #         AND ts BETWEEN :from_dt AND :to_dt
-            #         ORDER BY ts ASC
-            #     """), {"sid": symbol_id, "tf": interval, "from_dt": from_dt, "to_dt": to_dt}).fetchall()
-
-            if not rows:
+            # local bar files when they hold the window, else the DB (never the provider here)
+            df = _load_candles(db, symbol_id, interval, from_dt, to_dt)
+
+            if df.empty:
                 print("No rows of data returned from candles table")
                 continue
 
-            df = pd.DataFrame(rows, columns=["ts","o","h","l","c","v"]).sort_values("ts").reset_index(drop=True)
-
-            # Keep enough warmup rows at the head for stable indicators
-            df = df.iloc[-(warmup + 600) :]  # 600 compute bars ~ adjust for your cadence
-
-            # Compute features (mutates df)
-            df = compute_features(df, cfg)
-
-            # Prepare batch upsert rows (drop early NaNs if desired)
-            payload = []
-            for row in df.itertuples(index=False):
-                payload.append({
-                    "symbol_id": symbol_id,
-                    "ts": row.ts,
-                    "rsi14": getattr(row, "rsi14", None),
-                    "macd": getattr(row, "macd", None),
-                    "macd_sig": getattr(row, "macd_sig", None),
-                    "atr14": getattr(row, "atr14", None),
-                    "atr_pct": getattr(row, "atr_pct", None),
-                    "vwap": getattr(row, "vwap", None),
-                    "vwap_dev": getattr(row, "vwap_dev", None),
-                    "vol_z": getattr(row, "vol_z", None),
-                    "ma50": getattr(row, "ma50", None),
-                    "ma200": getattr(row, "ma200", None),
-                    "adtv": getattr(row, "adtv", None),
-                })
-
-            if not payload:
-                continue
+            df = df.sort_values("ts").reset_index(drop=True)
 
-            db.execute(text("""
-                INSERT INTO features (
-                    symbol_id, ts, rsi14, macd, macd_sig, atr14, atr_pct,
-                    vwap, vwap_dev, vol_z, ma50, ma200, adtv
-                )
-                VALUES (
-                    :symbol_id, :ts, :rsi14, :macd, :macd_sig, :atr14, :atr_pct,
-                    :vwap, :vwap_dev, :vol_z, :ma50, :ma200, :adtv
-                )
-                ON CONFLICT (symbol_id, ts) DO UPDATE SET
-                    rsi14 = EXCLUDED.rsi14,
-                    macd = EXCLUDED.macd,
-                    macd_sig = EXCLUDED.macd_sig,
-                    atr14 = EXCLUDED.atr14,
-                    atr_pct = EXCLUDED.atr_pct,
-                    vwap = EXCLUDED.vwap,
-                    vwap_dev = EXCLUDED.vwap_dev,
-                    vol_z = EXCLUDED.vol_z,
-                    ma50 = EXCLUDED.ma50,
-                    ma200 = EXCLUDED.ma200,
-                    adtv = EXCLUDED.adtv
-            """), payload)
-            db.commit()
-            total_written += len(payload)
-    return f"Features upserted rows: {total_written}"
+            if engine.last_ts is None:
+                # Keep enough warmup rows at the head for stable indicators
+                df = df.iloc[-(warmup + 600) :]  # 600 compute bars ~ adjust for your cadence
+                if symbol_id in reseeded:
+                    rewrite_from[symbol_id] = df["ts"].iloc[0]
+
+            # Advance the engine (the first run seeds its state from the warmup window)
+            df = engine.update(df)
+            if not df.empty:
+                frames.append(df.assign(symbol_id=symbol_id))
+
+        if not frames:
+            return 0
+
+        # one upsert for the whole universe, trimmed to rows after each watermark
+        df = pd.concat(frames, ignore_index=True)
+        total_written = write_features(db, df, interval, full_rewrite, rewrite_from=rewrite_from)
+        db.commit()
+    _publish_snapshots(df, symbols)
+    return total_written
+
+def _drop_stale_engines(db, symbol_ids: list, interval: str) -> set:
+    """
+    Warm engines only read bars from their last ts on; one that the store now has more bars
+    for inside [first_ts, last_ts] (a backfilled gap) is dropped and reseeded from the window.
+    Returns the reseeded symbol_ids.
+    """
+    warm = warm_engines(symbol_ids, interval)
+    if not warm:
+        return set()
+    rows = db.execute(bar_counts_sql(interval), {
+        "sids": list(warm), "tf": interval,
+        "froms": [pd.Timestamp(e.first_ts).to_pydatetime() for e in warm.values()],
+        "tos": [pd.Timestamp(e.last_ts).to_pydatetime() for e in warm.values()],
+    }).fetchall()
+    stale = [(int(sid), interval) for sid, n in rows if n > warm[int(sid)].n_bars]
+    if stale:
+        print(f"Reseeding feature engines after backfill: {[sid for sid, _ in stale]}")
+        reset_engines(stale)
+    return {sid for sid, _ in stale}
+
+def _bar_files_for(interval: str):
+    """
+    The local bar files when they are enabled and up to the last closed bar of the stored
+    timeframe (5m for the aggregated ones), else None.
+    """
+    bar_files = get_bar_files()
+    if bar_files is None:
+        return None
+    stored = source_timeframe(interval)
+    return bar_files, closed_until(datetime.now(IST), stored) - timeframe_delta(stored).to_pytimedelta()
+
+def _file_start(interval: str, from_dt: datetime):
+    # aggregated bars are built from the whole bucket holding from_dt
+    return bucket_floor(from_dt, interval) if interval in AGGREGATE_VIEWS else from_dt
+
+def _file_covers(files, symbol_id: int, interval: str, from_dt: datetime) -> bool:
+    bar_files, last_closed = files
+    from_dt = _file_start(interval, from_dt)
+    f = bar_files.open(symbol_id, source_timeframe(interval))
+    return f is not None and len(f) > 0 and f.first_ts() <= from_dt and f.last_ts() >= last_closed
+
+def _read_file(files, symbol_id: int, interval: str, from_dt: datetime) -> pd.DataFrame:
+    bars = files[0].read_since(symbol_id, source_timeframe(interval), _file_start(interval, from_dt))
+    if interval in AGGREGATE_VIEWS:
+        bars = resample_records(bars, interval)
+    return records_frame(bars)
+
+def _load_candles(db, symbol_id: int, interval: str, from_dt: datetime, to_dt: datetime) -> pd.DataFrame:
+    """(ts, o, h, l, c, v) of one symbol in [from_dt, to_dt]."""
+    files = _bar_files_for(interval)
+    if files is not None and _file_covers(files, symbol_id, interval, from_dt):
+        return _read_file(files, symbol_id, interval, from_dt)
+    rows = db.execute(bars_sql(interval), {"sids": [symbol_id], "tf": interval,
+                                           "from_dt": from_dt, "to_dt": to_dt}).fetchall()
+    return pd.DataFrame(rows, columns=["symbol_id","ts","o","h","l","c","v"])[["ts","o","h","l","c","v"]]
+
+def _load_panel(db, sids: list, interval: str, from_dt: datetime, to_dt: datetime) -> pd.DataFrame:
+    """Long (symbol_id, ts, o, h, l, c, v): bar files where they cover, one query for the rest."""
+    frames, missing = [], list(sids)
+    files = _bar_files_for(interval)
+    if files is not None:
+        missing = []
+        for sid in sids:
+            if _file_covers(files, sid, interval, from_dt):
+                frames.append(_read_file(files, sid, interval, from_dt).assign(symbol_id=sid))
+            else:
+                missing.append(sid)
+    if missing:
+        rows = db.execute(bars_sql(interval), {"sids": missing, "tf": interval,
+                                               "from_dt": from_dt, "to_dt": to_dt}).fetchall()
+        frames.append(pd.DataFrame(rows, columns=["symbol_id","ts","o","h","l","c","v"]))
+    frames = [f for f in frames if not f.empty]
+    if not frames:
+        return pd.DataFrame(columns=["symbol_id","ts","o","h","l","c","v"])
+    return pd.concat(frames, ignore_index=True)[["symbol_id","ts","o","h","l","c","v"]]
+
+def _publish_snapshots(df: pd.DataFrame, symbols: list) -> None:
+    # hot cache for strategies/API; Postgres stays the source of truth, so a Redis outage only logs
+    try:
+        r = redis_client()
+        n = publish_snapshots(r, df, dict(symbols))
+        bump_versions(r, "features")
+        print(f"Feature snapshots cached: {n}")
+    except Exception as e:
+        print(f"Failed to cache feature snapshots: {e}")
+
+def _calc_features_panel(db, symbols: list, interval: str, cfg: FeatureConfig, warmup: int,
+                         full_rewrite: bool = False) -> int:
+    # one read for the whole universe, one vectorised compute, one upsert
+    to_dt = datetime.now(timezone.utc)
+    from_dt = to_dt - timedelta(days=3)
+    panel = _load_panel(db, [sid for sid, _ in symbols], interval, from_dt, to_dt)
+    if panel.empty:
+        print("No rows of data returned from candles table")
+        return 0
+
+    panel = panel.sort_values(["symbol_id","ts"]).groupby("symbol_id").tail(warmup + 600)
+    df = compute_features_panel(panel, cfg)
+
+    written = write_features(db, df, interval, full_rewrite)
+    db.commit()
+    _publish_snapshots(df, symbols)
+    return written
     
     
+# -----------------------
+#     Trade pipeline
+# -----------------------
+# chord: every shard ingests its candles and computes its features in parallel,
+# then finalize_cycle runs once all shards are done.
+
+CYCLE_LOG_KEY = "pipeline:cycles"
+CYCLE_LOG_LEN = 300  # a full session of 5m cycles
+
+@celery_app.task(autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def ingest_and_features_shard(symbols: list, interval: str = "5m", days: int = 1, ingest: bool = True) -> dict:
+    """ingest=False when the candles are already in (written by the tick service)."""
+    timer = StageTimer()
+    symbols = [(int(sid), str(token)) for sid, token in symbols]
+    stats = CopyStats()
+    if ingest:
+        with timer.stage("ingest"):
+            stats = ingest_candles_many(symbols, interval, days)
+    with timer.stage("features"):
+        written = compute_and_write_features(symbols, interval)
+    return {"symbols": len(symbols), "candles": stats.rows, "features": written, "timings": timer.timings}
+
+def _refresh_focus() -> None:
+    # latest_features is kept current by write_features; only the Redis focus set is rebuilt
+    write_universe_to_redis()
+
+@celery_app.task
+def finalize_cycle(shard_results: list, started_at: float, interval: str = "5m") -> dict:
+    timer = StageTimer()
+    with timer.stage("focus_refresh"):
+        _refresh_focus()
+    with timer.stage("strategies"):
+        engine = StrategyEngine.from_config(config_section("strategies"))
+        with SessionLocal() as db:
+            signals = engine.run(db, redis_client(), interval, topk=config_section("focus").get("topk"))
+            # only the symbols that just got signals are rescored
+            ensemble = EnsembleEngine.from_config(config_section("ensemble"), [s.name for s in engine.strategies],
+                                                  interval).run(db, signals)
+            db.commit()
+        try:
+            publish_signals(redis_client(), signals)
+        except Exception as e:
+            # the signals are committed; only the live feed misses them
+            print(f"Failed to publish signals: {e}")
+
+    summary = {
+        "interval": interval,
+        "finished_at": datetime.now(IST).isoformat(),
+        "shards": len(shard_results),
+        "symbols": sum(r["symbols"] for r in shard_results),
+        "candles": sum(r["candles"] for r in shard_results),
+        "features": sum(r["features"] for r in shard_results),
+        "signals": len(signals),
+        "ensemble_qualified": int(ensemble["qualified"].sum()) if len(ensemble) else 0,
+        # shards run in parallel: the slowest one bounds the stage
+        "ingest_max": max((r["timings"].get("ingest", 0.0) for r in shard_results), default=0.0),
+        "features_max": max((r["timings"].get("features", 0.0) for r in shard_results), default=0.0),
+        **timer.timings,
+        "cycle": time.time() - started_at,
+    }
+    try:
+        pipe = redis_client().pipeline()
+        pipe.lpush(CYCLE_LOG_KEY, json.dumps(summary))
+        pipe.ltrim(CYCLE_LOG_KEY, 0, CYCLE_LOG_LEN - 1)
+        pipe.execute()
+    except Exception as e:
+        print(f"Failed to log trade cycle: {e}")
+    print(f"Trade cycle done: {summary}")
+    return summary
+
 @celery_app.task(bind=True)
-def run_trade_pipeline(self):
-    pipeline = chain(
-        update_all_stocks_5m.s(),
-        calc_features.s()
-    )
+def run_trade_pipeline(self, interval: str = "5m", shard_size: int = 25, ingest: bool = True):
+    with SessionLocal() as db:
+        symbols = _universe_symbols(db)
+    if not symbols:
+        return "Trading universe is empty"
+
+    shards = [symbols[i : i + shard_size] for i in range(0, len(symbols), shard_size)]
+    header = group(ingest_and_features_shard.s(shard, interval, ingest=ingest) for shard in shards)
+    result = chord(header)(finalize_cycle.s(time.time(), interval))
+    return f"Queued {len(shards)} shards for {len(symbols)} symbols (reducer {result.id})"
+
+# -----------------------
+#     Event-driven pipeline
+# -----------------------
+# PIPELINE_TRIGGER=events: ingestion only publishes bar-close events and the consumer
+# group (app.workers.bar_close_listener) computes features and strategies per batch.
+
+@celery_app.task(autoretry_for=(Exception,), retry_backoff=True, max_retries=3)
+def ingest_shard(symbols: list, interval: str = "5m", days: int = 1) -> int:
+    return ingest_candles_many(symbols, interval, days).rows
 
-    result = pipeline()
-    return result
+@celery_app.task
+def poll_candles(interval: str = "5m", shard_size: int = 25) -> str:
+    """Kite poll of the universe; every shard announces its own bars as soon as it commits."""
+    with SessionLocal() as db:
+        symbols = _universe_symbols(db)
+    shards = [symbols[i : i + shard_size] for i in range(0, len(symbols), shard_size)]
+    group(ingest_shard.s(shard, interval) for shard in shards).apply_async()
+    return f"Queued {len(shards)} ingest shards for {len(symbols)} symbols"
+
+@celery_app.task
+def refresh_focus() -> str:
+    _refresh_focus()
+    return "Focus refreshed"
+
+@celery_app.task
+def export_research_store(timeframe: str = "5m") -> dict:
+    """Append the finished sessions to the Parquet research store."""
+    with SessionLocal() as db:
+        return {
+            "candles": export_candles(db, timeframe),
+            "features": export_features(db, timeframe),
+        }
 
 @task_success.connect
 def on_success(sender, result, **kwargs):
@@ -196,6 +421,11 @@ def trigger_trade_pipeline():
     run_trade_pipeline.delay()
     return {'message': "Trading pipeline queued"}
 
+@router.get("/pipeline/latency")
+def pipeline_latency(n: int = 300, timeframe: str = "5m"):
+    """Bar close -> signals seconds over the last n event-driven batches."""
+    return latency_stats(redis_client(), n, timeframe)
+
 
 
 
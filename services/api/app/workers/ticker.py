@@ -0,0 +1,218 @@
+'''
+Live tick ingestion: python -m app.workers.ticker [--record ticks.jsonl] [--replay ticks.jsonl]
+
+Subscribes the `universe:latest` tokens on KiteTicker (full mode: ticks carry
+the exchange timestamp the bars are stamped with), aggregates ticks into
+1m/5m bars in memory (app.services.ticks) and once a second flushes the closed bars:
+one COPY into `candles` per timeframe and an append to the local bar files. Once every
+bar of a (timeframe, ts) is out (its end plus the grace period has passed) one bar-close
+event with all its symbols goes on the bar-close stream (app.services.bar_events).
+The universe is re-read every `universe_poll` seconds and the subscription diffed.
+Every live tick batch also goes through the alert engine (app.services.alerts), whose
+level index is reloaded every `alerts.refresh_seconds`; the socket thread only queues the
+alerts, the engine's dispatcher thread sends them. A replay raises no alerts.
+'''
+
+import argparse
+import threading
+import time
+from datetime import datetime
+from typing import Dict, Optional, Set, Tuple
+
+import pandas as pd
+from sqlalchemy import text
+
+from app.db import SessionLocal
+from app.services.alerts import AlertConfig, AlertEngine, RedisNotifier
+from app.services.bar_events import BarEvent, publish
+from app.services.bar_files import get_bar_files
+from app.services.candle_writer import write_candles
+from app.services.coverage import IST
+from app.services.feature_store import timeframe_delta
+from app.services.redis_utils import redis_client
+from app.services.ticks import (TICK_TIMEFRAMES, BarAggregator, TickRecorder, closed_bars_frame,
+                                read_tick_file, tick_time)
+from app.settings import config_section
+
+UNIVERSE_KEY = "universe:latest"
+
+class TickService:
+    def __init__(self, r, timeframes=TICK_TIMEFRAMES, flush_interval: float = 1.0,
+                 universe_poll: float = 30.0, grace_seconds: float = 2.0,
+                 recorder: Optional[TickRecorder] = None, alerts: Optional[AlertEngine] = None):
+        self.r = r
+        self.agg = BarAggregator(timeframes, listening_since=datetime.now(IST))
+        self.flush_interval = flush_interval
+        self.grace = pd.Timedelta(seconds=grace_seconds)
+        self.universe_poll = universe_poll
+        self.recorder = recorder
+        self.alerts = alerts
+        self.bar_files = get_bar_files()
+        self.ws = None
+        self.subscribed: Set[int] = set()
+        self.symbol_ids: Dict[int, int] = {}
+        self.unannounced: Dict[Tuple[str, pd.Timestamp], Set[int]] = {}
+        self._lock = threading.Lock()
+
+    # -----------------------
+    #     Universe
+    # -----------------------
+
+    def universe_tokens(self) -> Set[int]:
+        return {int(t) for t in self.r.zrange(UNIVERSE_KEY, 0, -1)}
+
+    def refresh_universe(self) -> None:
+        tokens = self.universe_tokens()
+        added, removed = tokens - self.subscribed, self.subscribed - tokens
+        if added:
+            with SessionLocal() as db:
+                self.symbol_ids.update(db.execute(text("""
+                    SELECT instrument_token, id FROM symbols WHERE instrument_token = ANY(:toks)
+                """), {"toks": sorted(added)}).fetchall())
+        if self.ws is not None:
+            if removed:
+                self.ws.unsubscribe(sorted(removed))
+            if added:
+                self.ws.subscribe(sorted(added))
+                self.ws.set_mode(self.ws.MODE_FULL, sorted(added))
+        if added or removed:
+            print(f"Ticker universe: +{len(added)} -{len(removed)} -> {len(tokens)} tokens")
+        self.subscribed = tokens
+
+    # -----------------------
+    #     Ticks / bars
+    # -----------------------
+
+    def on_ticks(self, ws, ticks) -> None:
+        with self._lock:
+            self.agg.on_ticks(ticks, datetime.now(IST))
+        if self.recorder is not None:
+            self.recorder.write(ticks)
+        if self.alerts is not None:
+            try:
+                self.alerts.on_ticks(ticks)
+            except Exception as e:
+                print(f"Alert evaluation failed: {e}")
+
+    def on_connect(self, ws, response) -> None:
+        # (re)connects start from a clean subscription of the current universe
+        self.subscribed = set()
+        self.refresh_universe()
+
+    def flush(self, now: datetime) -> int:
+        """Write and announce every bar closed by `now`; returns the bars written."""
+        with self._lock:
+            self.agg.close_due(now, self.grace.total_seconds())
+            rows, self.agg.pending = self.agg.pending, []
+        written = 0
+        if rows:
+            try:
+                written = self.write(closed_bars_frame(rows))
+            except Exception:
+                with self._lock:
+                    self.agg.pending[:0] = rows  # retried on the next flush
+                raise
+        self.announce(now)
+        if self.alerts is not None:
+            # dispatch runs on the alert engine's own thread; only the level index reload is here
+            if self.alerts.refresh_due():
+                with SessionLocal() as db:
+                    self.alerts.load(db, now)
+        return written
+
+    def write(self, bars: pd.DataFrame) -> int:
+        bars["symbol_id"] = bars["instrument_token"].map(self.symbol_ids)
+        bars = bars.dropna(subset=["symbol_id"]).astype({"symbol_id": "int64"})
+
+        with SessionLocal() as db:
+            for tf, grp in bars.groupby("timeframe"):
+                write_candles(db, grp, tf)
+            db.commit()
+        if self.bar_files is not None:
+            for tf, grp in bars.groupby("timeframe"):
+                try:
+                    self.bar_files.append(grp, tf)
+                except OSError as e:
+                    print(f"Failed to append bar files: {e}")
+        for (tf, ts), grp in bars.groupby(["timeframe", "ts"]):
+            self.unannounced.setdefault((tf, ts), set()).update(int(s) for s in grp["symbol_id"])
+        return len(bars)
+
+    def announce(self, now: datetime) -> int:
+        """One bar-close event per (timeframe, ts) whose bars are all closed by now."""
+        cutoff = pd.Timestamp(now) - self.grace
+        due = sorted(k for k in self.unannounced if k[1] + timeframe_delta(k[0]) <= cutoff)
+        if not due:
+            return 0
+        publish(self.r, [BarEvent(tf, ts, sorted(self.unannounced[(tf, ts)])) for tf, ts in due])
+        for key in due:
+            del self.unannounced[key]  # only once the events are out
+        return len(due)
+
+    # -----------------------
+    #     Run
+    # -----------------------
+
+    def run(self, api_key: str, access_token: str) -> None:
+        from kiteconnect import KiteTicker
+
+        self.ws = KiteTicker(api_key, access_token)
+        self.ws.on_ticks = self.on_ticks
+        self.ws.on_connect = self.on_connect
+        self.ws.on_close = lambda ws, code, reason: print(f"Ticker closed: {code} {reason}")
+        self.ws.connect(threaded=True)
+        if self.alerts is not None:
+            # the socket thread only queues alerts: Redis and the notifiers never stall tick intake
+            self.alerts.start_dispatcher()
+
+        next_poll = time.monotonic() + self.universe_poll
+        while True:
+            time.sleep(self.flush_interval)
+            try:
+                self.flush(datetime.now(IST))
+                if time.monotonic() >= next_poll:
+                    next_poll = time.monotonic() + self.universe_poll
+                    self.refresh_universe()
+            except Exception as e:
+                # keep the socket alive; unwritten bars stay pending
+                print(f"Ticker flush failed: {e}")
+
+    def replay(self, path) -> int:
+        """Push a recorded tick file through the same flush path, using tick time as the clock."""
+        self.refresh_universe()
+        self.agg = BarAggregator(self.agg.states.keys())
+        written = 0
+        last = None
+        for batch in read_tick_file(path):
+            self.on_ticks(None, batch)
+            times = [t for t in (tick_time(x) for x in batch) if t is not None]
+            if times:
+                last = max(times)
+                written += self.flush(last)
+        if last is not None:
+            # end of the recording closes whatever is still open
+            written += self.flush(last + pd.Timedelta(days=1))
+        print(f"Replayed {path}: {written} bars")
+        return written
+
+def main():
+    parser = argparse.ArgumentParser(description="KiteTicker -> bars -> candles")
+    parser.add_argument("--record", help="append every tick batch to this JSON-lines file")
+    parser.add_argument("--replay", help="replay a recorded file instead of connecting")
+    args = parser.parse_args()
+
+    r = redis_client()
+    # a replay must not alert: the engine would push to the live outbox and feed, and its
+    # cooldown and entered/closed state in Redis would carry over into the live session
+    alerts = None
+    if not args.replay:
+        alerts = AlertEngine(r, [RedisNotifier(r)], AlertConfig.from_dict(config_section("alerts")))
+    service = TickService(r, recorder=TickRecorder(args.record) if args.record else None, alerts=alerts)
+    if args.replay:
+        service.replay(args.replay)
+        return
+    from app.services.kite import access_token, api_key
+    service.run(api_key, access_token)
+
+if __name__ == "__main__":
+    main()
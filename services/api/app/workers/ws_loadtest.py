@@ -0,0 +1,129 @@
+'''
+Live feed load test: python -m app.workers.ws_loadtest [--clients 2000] [--rate 20] [--seconds 30]
+
+Simulated clients, a publisher producing signal batches at `rate` per second, and
+delivery latency (publish -> client receive) percentiles at the end.
+
+    default     in-process: the Hub is driven directly and every client's send sleeps
+                like a socket would (a `--slow` fraction of them very slowly), which
+                measures the fan-out itself
+    --url       real sockets: clients connect to ws://host/ws, the publisher goes
+                through Redis pub/sub, so the whole path (Redis, API, network) is measured
+'''
+
+import argparse
+import asyncio
+import json
+import random
+import time
+from typing import List
+
+import numpy as np
+import pandas as pd
+
+from app.services.live_feed import SIGNALS_CHANNEL, Hub, signals_message
+
+def signal_batch(n_symbols: int, size: int) -> pd.DataFrame:
+    sids = random.sample(range(1, n_symbols + 1), min(size, n_symbols))
+    now = pd.Timestamp.now(tz="UTC").floor("5min")
+    return pd.DataFrame({
+        "symbol_id": sids, "instrument_token": [100000 + s for s in sids], "ts": now,
+        "strategy_name": random.choice(["ORB_v1", "VWAP_Bounce_v1"]), "side": "long",
+        "signal_strength": np.round(np.random.rand(len(sids)), 3), "entry_price": 100.0,
+    })
+
+def subscription(n_symbols: int, per_client: int):
+    # a quarter of the clients watch everything, the rest a handful of symbols
+    return None if random.random() < 0.25 else random.sample(range(1, n_symbols + 1), per_client)
+
+def report(latencies: List[float], extra: dict) -> dict:
+    lat = np.array(latencies) * 1000
+    out = {"delivered": int(len(lat)), **extra}
+    if len(lat):
+        out.update({f"p{q}_ms": round(float(np.percentile(lat, q)), 2) for q in (50, 95, 99)})
+        out["max_ms"] = round(float(lat.max()), 2)
+    print(json.dumps(out, indent=2))
+    return out
+
+# -----------------------
+#     In-process
+# -----------------------
+
+async def run_inprocess(args) -> dict:
+    hub = Hub(max_queue=args.queue)
+    latencies: List[float] = []
+
+    def make_send(delay: float):
+        async def send(payload: str):
+            await asyncio.sleep(delay)
+            latencies.append(time.time() - json.loads(payload)["published_at"])
+        return send
+
+    for _ in range(args.clients):
+        delay = args.slow_delay if random.random() < args.slow else 0
+        hub.connect(make_send(delay), symbol_ids=subscription(args.symbols, args.per_client))
+
+    interval = 1.0 / args.rate
+    end = time.monotonic() + args.seconds
+    while time.monotonic() < end:
+        hub.dispatch(SIGNALS_CHANNEL, signals_message(signal_batch(args.symbols, args.batch)))
+        await asyncio.sleep(interval)
+    await asyncio.sleep(1.0)  # let the outboxes drain
+    stats = hub.stats()
+    await hub.stop()
+    return report(latencies, stats)
+
+# -----------------------
+#     Real sockets
+# -----------------------
+
+async def run_sockets(args) -> dict:
+    import websockets
+    from app.services.redis_pool import get_async_redis
+
+    latencies: List[float] = []
+    stop = asyncio.Event()
+
+    async def client(i: int):
+        sids = subscription(args.symbols, args.per_client)
+        url = args.url + (f"?symbols={','.join(map(str, sids))}" if sids else "")
+        async with websockets.connect(url, max_queue=None) as ws:
+            while not stop.is_set():
+                try:
+                    payload = await asyncio.wait_for(ws.recv(), timeout=0.5)
+                except asyncio.TimeoutError:
+                    continue
+                latencies.append(time.time() - json.loads(payload)["published_at"])
+                if random.random() < args.slow:
+                    await asyncio.sleep(args.slow_delay)
+
+    tasks = [asyncio.create_task(client(i)) for i in range(args.clients)]
+    await asyncio.sleep(2.0)  # connections up
+    r = get_async_redis()
+    interval = 1.0 / args.rate
+    end = time.monotonic() + args.seconds
+    while time.monotonic() < end:
+        await r.publish(SIGNALS_CHANNEL, signals_message(signal_batch(args.symbols, args.batch)))
+        await asyncio.sleep(interval)
+    await asyncio.sleep(1.0)
+    stop.set()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    return report(latencies, {"clients": args.clients})
+
+def main():
+    parser = argparse.ArgumentParser(description="WebSocket live feed load test")
+    parser.add_argument("--url", help="ws://host:8000/ws; in-process when omitted")
+    parser.add_argument("--clients", type=int, default=2000)
+    parser.add_argument("--symbols", type=int, default=100, help="focus-set size")
+    parser.add_argument("--per-client", type=int, default=5, help="symbols per filtered client")
+    parser.add_argument("--rate", type=float, default=20, help="signal batches per second")
+    parser.add_argument("--batch", type=int, default=10, help="signals per batch")
+    parser.add_argument("--seconds", type=float, default=30)
+    parser.add_argument("--slow", type=float, default=0.05, help="fraction of slow clients")
+    parser.add_argument("--slow-delay", type=float, default=0.2, help="seconds a slow client takes per message")
+    parser.add_argument("--queue", type=int, default=256, help="outbox size (in-process)")
+    args = parser.parse_args()
+    asyncio.run(run_sockets(args) if args.url else run_inprocess(args))
+
+if __name__ == "__main__":
+    main()
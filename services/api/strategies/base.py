@@ -0,0 +1,64 @@
+# services/api/strategies/base.py
+
+'''
+Strategy plugin contract.
+
+A strategy is a vectorised function over the focus-set context loaded once per cycle
+by the engine (strategies/engine.py): it gets every focus symbol at once and returns
+one row per signal. Strategies never touch the database or Redis themselves.
+Subclasses register with @register and read their parameters from
+config.yaml -> strategies.<config_key>.
+'''
+
+from dataclasses import dataclass
+from datetime import date
+from typing import Dict, Type
+
+import pandas as pd
+
+SIGNAL_COLUMNS = [
+    "symbol_id", "instrument_token", "ts", "side", "signal_strength",
+    "entry_price", "sl_price", "tp_price", "ttl_bars",
+]
+
+@dataclass
+class StrategyContext:
+    """
+    matrix: one row per focus symbol -> symbol_id, instrument_token, universe_score, ts,
+            the feature columns and the last bar's o/h/l/c/v.
+    bars:   today's candles of the focus symbols (symbol_id, ts, o, h, l, c, v), sorted.
+    """
+    matrix: pd.DataFrame
+    bars: pd.DataFrame
+    trade_date: date
+    timeframe: str = "5m"
+
+
+class Strategy:
+    name: str = ""         # strategy_name stored with every signal
+    config_key: str = ""   # section under strategies: in config.yaml
+    defaults: dict = {}
+
+    def __init__(self, params: dict = None):
+        self.params = {**self.defaults, **(params or {})}
+
+    def evaluate(self, ctx: StrategyContext) -> pd.DataFrame:
+        """Return a frame with (a subset of) SIGNAL_COLUMNS, one row per signal."""
+        raise NotImplementedError
+
+    def __repr__(self) -> str:
+        return f"<Strategy {self.name} {self.params}>"
+
+
+REGISTRY: Dict[str, Type[Strategy]] = {}
+
+def register(cls: Type[Strategy]) -> Type[Strategy]:
+    if not cls.name:
+        raise ValueError(f"{cls.__name__} has no name")
+    if cls.name in REGISTRY and REGISTRY[cls.name] is not cls:
+        raise ValueError(f"Strategy {cls.name} registered twice")
+    REGISTRY[cls.name] = cls
+    return cls
+
+def empty_signals() -> pd.DataFrame:
+    return pd.DataFrame(columns=SIGNAL_COLUMNS)
@@ -0,0 +1,159 @@
+# services/api/strategies/engine.py
+
+'''
+Runs every registered strategy over one shared focus-set context per cycle:
+one pipelined Redis read for the feature snapshots, one candles query for today's
+bars, one INSERT ... SELECT unnest(...) for all signals of all strategies. Adding a
+strategy adds no round trips.
+'''
+
+from datetime import datetime
+from typing import Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import text
+
+from services.api.app.services.coverage import IST
+from services.api.app.services.feature_cache import get_snapshots
+from .base import REGISTRY, SIGNAL_COLUMNS, Strategy, StrategyContext, empty_signals
+# plugins register themselves on import
+from . import orb, vwap_bounce  # noqa: F401
+
+FOCUS_KEY = "universe:latest"
+
+BARS_SQL = text("""
+    SELECT symbol_id, ts, o, h, l, c, v
+    FROM candles
+    WHERE symbol_id = ANY(:sids)
+      AND timeframe = :tf
+      AND ts >= :from_ts
+    ORDER BY symbol_id, ts
+""")
+
+UPSERT_SIGNALS_SQL = text("""
+    INSERT INTO strategy_signals (
+        date, ts, symbol_id, instrument_token, strategy_name, side,
+        signal_strength, entry_price, sl_price, tp_price, ttl_bars
+    )
+    SELECT * FROM unnest(
+        CAST(:date AS date[]), CAST(:ts AS timestamptz[]), CAST(:symbol_id AS integer[]),
+        CAST(:instrument_token AS bigint[]), CAST(:strategy_name AS varchar[]), CAST(:side AS varchar[]),
+        CAST(:signal_strength AS numeric[]), CAST(:entry_price AS numeric[]), CAST(:sl_price AS numeric[]),
+        CAST(:tp_price AS numeric[]), CAST(:ttl_bars AS integer[])
+    )
+    ON CONFLICT (symbol_id, ts, strategy_name) DO UPDATE SET
+        side = EXCLUDED.side,
+        signal_strength = EXCLUDED.signal_strength,
+        entry_price = EXCLUDED.entry_price,
+        sl_price = EXCLUDED.sl_price,
+        tp_price = EXCLUDED.tp_price,
+        ttl_bars = EXCLUDED.ttl_bars
+""")
+
+
+class StrategyEngine:
+    def __init__(self, strategies: List[Strategy]):
+        self.strategies = strategies
+
+    @classmethod
+    def from_config(cls, config: dict) -> "StrategyEngine":
+        """Every registered strategy, parameterised from strategies.<config_key> (enabled: false skips it)."""
+        strategies = []
+        for strategy_cls in REGISTRY.values():
+            params = dict((config or {}).get(strategy_cls.config_key) or {})
+            if not params.pop("enabled", True):
+                continue
+            strategies.append(strategy_cls(params))
+        return cls(strategies)
+
+    # -----------------------
+    #     Context
+    # -----------------------
+
+    @staticmethod
+    def build_context(snapshots: dict, scores: dict, bars: pd.DataFrame, trade_date,
+                      timeframe: str = "5m") -> StrategyContext:
+        """Matrix = today's snapshot per token joined with the bar it was computed on."""
+        rows = [
+            {**snap, "instrument_token": token, "universe_score": scores.get(token)}
+            for token, snap in snapshots.items()
+            if snap["ts"].tz_convert(IST).date() == trade_date
+        ]
+        matrix = pd.DataFrame(rows)
+        bars = bars.assign(ts=pd.to_datetime(bars["ts"], utc=True))
+        if matrix.empty or bars.empty:
+            return StrategyContext(matrix.iloc[0:0], bars, trade_date, timeframe)
+        matrix = matrix.merge(bars, on=["symbol_id", "ts"], how="inner")
+        return StrategyContext(matrix, bars, trade_date, timeframe)
+
+    def load_context(self, db, r, timeframe: str = "5m", topk: Optional[int] = None,
+                     now: Optional[datetime] = None, tokens: Optional[Iterable] = None) -> StrategyContext:
+        """tokens limits the focus set to those symbols (the ones that just got a bar)."""
+        trade_date = (now or datetime.now(IST)).astimezone(IST).date()
+        focus = r.zrevrange(FOCUS_KEY, 0, (topk or 0) - 1, withscores=True)
+        scores = {str(token): score for token, score in focus}
+        if tokens is not None:
+            wanted = {str(t) for t in tokens}
+            scores = {t: s for t, s in scores.items() if t in wanted}
+        snapshots = get_snapshots(r, list(scores), db)
+
+        sids = sorted({snap["symbol_id"] for snap in snapshots.values()})
+        day_start = IST.localize(datetime.combine(trade_date, datetime.min.time()))
+        rows = db.execute(BARS_SQL, {"sids": sids, "tf": timeframe, "from_ts": day_start}).fetchall() if sids else []
+        bars = pd.DataFrame(rows, columns=["symbol_id", "ts", "o", "h", "l", "c", "v"])
+        for col in ["o", "h", "l", "c"]:
+            bars[col] = bars[col].astype(float)
+        return self.build_context(snapshots, scores, bars, trade_date, timeframe)
+
+    # -----------------------
+    #     Evaluate / persist
+    # -----------------------
+
+    def evaluate(self, ctx: StrategyContext) -> pd.DataFrame:
+        if ctx.matrix.empty:
+            return empty_signals().assign(strategy_name=[])
+        frames = []
+        for strategy in self.strategies:
+            try:
+                out = strategy.evaluate(ctx)
+            except Exception as e:
+                # one broken plugin must not cost the other strategies their cycle
+                print(f"Strategy {strategy.name} failed: {e}")
+                continue
+            if out is not None and not out.empty:
+                frames.append(out.reindex(columns=SIGNAL_COLUMNS).assign(strategy_name=strategy.name))
+        if not frames:
+            return empty_signals().assign(strategy_name=[])
+        return pd.concat(frames, ignore_index=True)
+
+    @staticmethod
+    def signal_arrays(signals: pd.DataFrame, trade_date) -> dict:
+        """Column arrays for UPSERT_SIGNALS_SQL (NaN -> NULL, one row per conflict key)."""
+        df = signals.drop_duplicates(["symbol_id", "ts", "strategy_name"], keep="last")
+        df = df.astype(object).where(df.notna(), None)
+        arrays = {c: df[c].tolist() for c in SIGNAL_COLUMNS + ["strategy_name"]}
+        arrays["symbol_id"] = [int(x) for x in arrays["symbol_id"]]
+        arrays["instrument_token"] = [int(x) for x in arrays["instrument_token"]]
+        arrays["ttl_bars"] = [int(x) if x is not None else 0 for x in arrays["ttl_bars"]]
+        for c in ["signal_strength", "entry_price", "sl_price", "tp_price"]:
+            arrays[c] = [float(x) if x is not None else None for x in arrays[c]]
+        arrays["ts"] = [pd.Timestamp(x).to_pydatetime() for x in arrays["ts"]]
+        arrays["date"] = [trade_date] * len(df)
+        return arrays
+
+    def write_signals(self, db, signals: pd.DataFrame, trade_date) -> int:
+        if signals.empty:
+            return 0
+        arrays = self.signal_arrays(signals, trade_date)
+        db.execute(UPSERT_SIGNALS_SQL, arrays)
+        return len(arrays["date"])
+
+    def run(self, db, r, timeframe: str = "5m", topk: Optional[int] = None,
+            tokens: Optional[Iterable] = None) -> pd.DataFrame:
+        """Load, evaluate and upsert in the caller's transaction; returns the signals."""
+        ctx = self.load_context(db, r, timeframe, topk, tokens=tokens)
+        signals = self.evaluate(ctx)
+        written = self.write_signals(db, signals, ctx.trade_date)
+        print(f"Strategies: {len(self.strategies)} over {len(ctx.matrix)} symbols -> {written} signals")
+        return signals
@@ -0,0 +1,63 @@
+# services/api/strategies/orb.py
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .base import Strategy, StrategyContext, register
+from services.api.app.services.coverage import IST, SESSION_OPEN
+
+@register
+class OpeningRangeBreakout(Strategy):
+    """
+    Breakout of the first `open_minutes` of the session: the last close above the
+    opening-range high -> long, below its low -> short, with volume confirmation.
+    Stop at the other side of the range, target `min_rr` times the risk.
+    """
+    name = "ORB_v1"
+    config_key = "orb"
+    defaults = {"open_minutes": 15, "vol_z_min": 1.0, "min_rr": 1.5, "ttl_bars": 6}
+
+    def range_window(self, trade_date):
+        start = pd.Timestamp(IST.localize(datetime.combine(trade_date, SESSION_OPEN)))
+        return start, start + pd.Timedelta(minutes=self.params["open_minutes"])
+
+    def opening_range(self, bars: pd.DataFrame, trade_date) -> pd.DataFrame:
+        """or_high / or_low per symbol_id from bars that start inside the opening window."""
+        start, end = self.range_window(trade_date)
+        ts = pd.to_datetime(bars["ts"], utc=True)
+        window = bars[(ts >= start) & (ts < end)]
+        return window.groupby("symbol_id").agg(or_high=("h", "max"), or_low=("l", "min"))
+
+    def evaluate(self, ctx: StrategyContext) -> pd.DataFrame:
+        rng = self.opening_range(ctx.bars, ctx.trade_date)
+        m = ctx.matrix.merge(rng, left_on="symbol_id", right_index=True, how="inner")
+
+        # only once the range is complete
+        _, or_end = self.range_window(ctx.trade_date)
+        m = m[pd.to_datetime(m["ts"], utc=True) >= or_end]
+
+        c = m["c"].astype(float)
+        hi, lo = m["or_high"].astype(float), m["or_low"].astype(float)
+        long_ = c > hi
+        short = c < lo
+        mask = (long_ | short) & (m["vol_z"].astype(float) >= self.params["vol_z_min"])
+        m, c, hi, lo, long_ = m[mask], c[mask], hi[mask], lo[mask], long_[mask]
+
+        sl = np.where(long_, lo, hi)
+        risk = np.abs(c - sl)
+        # breakout distance in ATRs
+        atr_price = (m["atr_pct"].astype(float) / 100.0) * c
+        strength = np.where(long_, c - hi, lo - c) / atr_price.where(atr_price > 0)
+        return pd.DataFrame({
+            "symbol_id": m["symbol_id"],
+            "instrument_token": m["instrument_token"],
+            "ts": m["ts"],
+            "side": np.where(long_, "long", "short"),
+            "signal_strength": strength,
+            "entry_price": c,
+            "sl_price": sl,
+            "tp_price": np.where(long_, c + self.params["min_rr"] * risk, c - self.params["min_rr"] * risk),
+            "ttl_bars": self.params["ttl_bars"],
+        })